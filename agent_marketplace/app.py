@@ -7,13 +7,20 @@ import os
 import json
 import logging
 from datetime import datetime, timedelta
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, abort
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 import stripe
 
+try:
+    from agent_marketplace.rankings import MarketplaceRankings
+    from agent_marketplace.search_index import AgentSearchIndex
+except ImportError:  # run as a script from this directory
+    from rankings import MarketplaceRankings
+    from search_index import AgentSearchIndex
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -132,6 +139,12 @@ class MarketplaceAnalytics(db.Model):
     top_categories = db.Column(db.JSON)
     growth_metrics = db.Column(db.JSON)
 
+# Full-text agent search
+search_index = AgentSearchIndex(db, Agent)
+
+# Precomputed trending scores and co-purchase recommendations
+rankings = MarketplaceRankings(db, Agent, Purchase, AgentAnalytics)
+
 # Business Logic Classes
 class AgentMarketplace:
     def __init__(self):
@@ -143,78 +156,32 @@ class AgentMarketplace:
         developer_earnings = sale_amount * (1 - self.commission_rate)
         return platform_commission, developer_earnings
     
-    def search_agents(self, query="", category="", industry="", price_range="", rating_min=0):
-        """Advanced agent search with filters"""
-        agents_query = Agent.query.filter(Agent.is_active == True, Agent.is_verified == True)
-        
-        if query:
-            agents_query = agents_query.filter(
-                db.or_(
-                    Agent.name.contains(query),
-                    Agent.description.contains(query)
-                )
-            )
-        
-        if category:
-            agents_query = agents_query.filter(Agent.category == category)
-            
-        if industry:
-            agents_query = agents_query.filter(Agent.industry == industry)
-            
-        if rating_min:
-            agents_query = agents_query.filter(Agent.rating >= rating_min)
-            
-        if price_range:
-            if price_range == "free":
-                agents_query = agents_query.filter(Agent.price == 0)
-            elif price_range == "low":
-                agents_query = agents_query.filter(Agent.price.between(0.01, 1000))
-            elif price_range == "medium":
-                agents_query = agents_query.filter(Agent.price.between(1000, 10000))
-            elif price_range == "high":
-                agents_query = agents_query.filter(Agent.price > 10000)
-        
-        return agents_query.order_by(Agent.rating.desc(), Agent.download_count.desc()).all()
+    def search_agents(self, query="", category="", industry="", price_range="", rating_min=0,
+                      limit=20, cursor=None):
+        """Ranked full-text agent search with filters, one keyset page at a time"""
+        return search_index.search(
+            query,
+            filters={
+                'category': category,
+                'industry': industry,
+                'price_range': price_range,
+                'rating_min': rating_min
+            },
+            limit=limit,
+            cursor=cursor
+        )
     
     def get_trending_agents(self, limit=10):
-        """Get trending agents based on recent activity"""
-        last_week = datetime.utcnow() - timedelta(days=7)
-        trending = db.session.query(Agent).join(AgentAnalytics).filter(
-            AgentAnalytics.date >= last_week.date(),
-            Agent.is_active == True,
-            Agent.is_verified == True
-        ).order_by(AgentAnalytics.downloads.desc()).limit(limit).all()
-        return trending
+        """Get trending agents by time-decayed downloads"""
+        return rankings.load_agents(rankings.trending(limit))
     
     def get_agent_recommendations(self, user_id, limit=5):
         """Get personalized agent recommendations"""
         user = User.query.get(user_id)
         if not user:
             return []
-            
-        # Get user's purchase history
-        purchased_categories = db.session.query(Agent.category).join(Purchase).filter(
-            Purchase.buyer_id == user_id
-        ).distinct().all()
         
-        if purchased_categories:
-            categories = [cat[0] for cat in purchased_categories]
-            recommendations = Agent.query.filter(
-                Agent.category.in_(categories),
-                Agent.is_active == True,
-                Agent.is_verified == True,
-                ~Agent.id.in_(
-                    db.session.query(Purchase.agent_id).filter(Purchase.buyer_id == user_id)
-                )
-            ).order_by(Agent.rating.desc()).limit(limit).all()
-        else:
-            # For new users, show top-rated agents
-            recommendations = Agent.query.filter(
-                Agent.is_active == True,
-                Agent.is_verified == True
-            ).order_by(Agent.rating.desc()).limit(limit).all()
-            
-        return recommendations
+        return rankings.load_agents(rankings.recommendations(user_id, limit))
 
 class PaymentProcessor:
     def __init__(self):
@@ -266,7 +233,7 @@ class PaymentProcessor:
             today = datetime.utcnow().date()
             analytics = AgentAnalytics.query.filter_by(agent_id=agent_id, date=today).first()
             if not analytics:
-                analytics = AgentAnalytics(agent_id=agent_id, date=today)
+                analytics = AgentAnalytics(agent_id=agent_id, date=today, downloads=0, revenue=0.0)
                 db.session.add(analytics)
             
             analytics.downloads += 1
@@ -319,11 +286,16 @@ def browse_agents():
     industry = request.args.get('industry', '')
     price_range = request.args.get('price_range', '')
     rating_min = float(request.args.get('rating_min', 0))
+    cursor = request.args.get('cursor')
     
-    agents = marketplace.search_agents(query, category, industry, price_range, rating_min)
+    try:
+        results = marketplace.search_agents(query, category, industry, price_range, rating_min, cursor=cursor)
+    except ValueError as e:
+        abort(400, description=str(e))
     
     return render_template('marketplace/browse.html',
-                         agents=agents,
+                         agents=results.agents,
+                         next_cursor=results.next_cursor,
                          query=query,
                          category=category,
                          industry=industry,
@@ -340,7 +312,7 @@ def agent_detail(agent_id):
     today = datetime.utcnow().date()
     analytics = AgentAnalytics.query.filter_by(agent_id=agent_id, date=today).first()
     if not analytics:
-        analytics = AgentAnalytics(agent_id=agent_id, date=today)
+        analytics = AgentAnalytics(agent_id=agent_id, date=today, views=0)
         db.session.add(analytics)
     analytics.views += 1
     db.session.commit()
@@ -538,6 +510,7 @@ def logout():
 # Initialize database
 with app.app_context():
     db.create_all()
+    search_index.setup()
     
     # Create sample data if empty
     if User.query.count() == 0:
@@ -632,5 +605,7 @@ with app.app_context():
         db.session.commit()
         logger.info("Sample data created successfully")
 
+    rankings.start(app)
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,342 @@
+"""
+Marketplace Rankings
+Precomputed trending scores and category co-purchase recommendations, maintained incrementally
+"""
+
+import heapq
+import logging
+import math
+import os
+import threading
+import time
+from datetime import date, datetime, time as day_time, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Trending lists up to this long are cached between changes
+TRENDING_CACHE_SIZE = 100
+
+
+def _event_timestamp(day: date) -> float:
+    """Daily analytics rows count as happening at noon UTC of their day"""
+    return datetime.combine(day, day_time(12)).timestamp()
+
+
+class MarketplaceRankings:
+    """In-memory trending and recommendation index for the marketplace.
+
+    Trending scores are time-decayed download sums per agent. They use
+    forward decay: each download adds ``exp(lambda * (t - anchor))``, so a
+    new download only adds to one agent's score and the order never needs
+    re-decaying. Recommendations use a category co-purchase matrix counting,
+    for each pair of categories, the buyers who bought in both.
+
+    Committed ``Purchase``, ``AgentAnalytics`` and ``Agent`` changes from
+    this process are applied as they happen. A background job rebuilds
+    everything every ``refresh_seconds`` to drop downloads that left the
+    trending window and to pick up writes from other processes.
+    """
+
+    def __init__(self, db, agent_model, purchase_model, analytics_model,
+                 half_life_days: Optional[float] = None, window_days: Optional[int] = None,
+                 refresh_seconds: Optional[float] = None):
+        self.db = db
+        self.Agent = agent_model
+        self.Purchase = purchase_model
+        self.AgentAnalytics = analytics_model
+
+        self.half_life_days = half_life_days if half_life_days is not None \
+            else float(os.getenv('MARKETPLACE_TRENDING_HALF_LIFE_DAYS', '3'))
+        self.window_days = window_days if window_days is not None \
+            else int(os.getenv('MARKETPLACE_TRENDING_WINDOW_DAYS', '14'))
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None \
+            else float(os.getenv('MARKETPLACE_RANKINGS_REFRESH_SECONDS', '300'))
+        self.decay_rate = math.log(2) / (self.half_life_days * 86400)
+
+        self.lock = threading.RLock()
+        self.built = False
+        self.anchor = 0.0
+        self.window_start: Optional[date] = None
+
+        self.catalog: Dict[int, Tuple[str, float, bool]] = {}  # agent id -> (category, rating, listed)
+        self.trending_scores: Dict[int, float] = {}
+        self.user_purchases: Dict[int, Set[int]] = {}
+        self.user_categories: Dict[int, Set[str]] = {}
+        self.co_purchases: Dict[str, Dict[str, int]] = {}  # category -> category -> buyers
+
+        self._trending: Optional[List[int]] = None
+        self._category_rankings: Dict[str, List[int]] = {}
+        self._top_rated: Optional[List[int]] = None
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self.stats = {'rebuilds': 0, 'incremental_updates': 0, 'last_rebuild_seconds': 0.0}
+
+        event.listen(Session, 'after_flush', self._collect_changes)
+        event.listen(Session, 'after_commit', self._apply_changes)
+        event.listen(Session, 'after_soft_rollback', self._discard_changes)
+
+    def start(self, app):
+        """Start the background rebuild job; a refresh interval of 0 leaves only incremental updates"""
+        if self.refresh_seconds <= 0 or self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(app,), name='marketplace-rankings', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def trending(self, limit: int = 10) -> List[int]:
+        """Ids of listed agents with the highest decayed download scores"""
+        with self.lock:
+            self._ensure_built()
+            if self._trending is None or limit > len(self._trending) and limit > TRENDING_CACHE_SIZE:
+                self._trending = self._rank_trending(max(limit, TRENDING_CACHE_SIZE))
+            return self._trending[:limit]
+
+    def recommendations(self, user_id: int, limit: int = 5) -> List[int]:
+        """Ids of agents for ``user_id``, favouring categories bought or co-purchased with theirs"""
+        with self.lock:
+            self._ensure_built()
+            purchased = self.user_purchases.get(user_id, set())
+            categories = self.user_categories.get(user_id)
+            if not categories:
+                # For new users, show top-rated agents
+                return [agent_id for agent_id in self._top_rated_ids() if agent_id not in purchased][:limit]
+
+            affinity = self._category_affinity(categories)
+            candidates = []
+            for category, weight in affinity.items():
+                taken = 0
+                for agent_id in self._category_ranking(category):
+                    if agent_id in purchased:
+                        continue
+                    candidates.append((weight * self.catalog[agent_id][1], -agent_id, agent_id))
+                    taken += 1
+                    if taken == limit:
+                        break
+
+            return [agent_id for _, _, agent_id in heapq.nlargest(limit, candidates)]
+
+    def load_agents(self, agent_ids: List[int]) -> List[Any]:
+        """Agents for ``agent_ids`` in the same order, with one query"""
+        if not agent_ids:
+            return []
+        agents = {agent.id: agent for agent in self.Agent.query.filter(self.Agent.id.in_(agent_ids))}
+        return [agents[agent_id] for agent_id in agent_ids if agent_id in agents]
+
+    def rebuild(self):
+        """Recompute every score and matrix from the database"""
+        started = time.monotonic()
+        Agent, Purchase, AgentAnalytics = self.Agent, self.Purchase, self.AgentAnalytics
+        session = self.db.session
+
+        window_start = datetime.utcnow().date() - timedelta(days=self.window_days)
+        anchor = _event_timestamp(window_start)
+
+        catalog = {
+            row.id: (row.category, row.rating or 0.0, bool(row.is_active is not False and row.is_verified))
+            for row in session.execute(select(Agent.id, Agent.category, Agent.rating, Agent.is_active,
+                                              Agent.is_verified))
+        }
+
+        trending_scores = {}
+        analytics = session.execute(
+            select(AgentAnalytics.agent_id, AgentAnalytics.date, AgentAnalytics.downloads)
+            .where(AgentAnalytics.date >= window_start, AgentAnalytics.downloads > 0)
+        )
+        for row in analytics:
+            weight = math.exp(self.decay_rate * (_event_timestamp(row.date) - anchor))
+            trending_scores[row.agent_id] = trending_scores.get(row.agent_id, 0.0) + row.downloads * weight
+
+        user_purchases = {}
+        user_categories = {}
+        for row in session.execute(select(Purchase.buyer_id, Purchase.agent_id)):
+            user_purchases.setdefault(row.buyer_id, set()).add(row.agent_id)
+            if row.agent_id in catalog:
+                user_categories.setdefault(row.buyer_id, set()).add(catalog[row.agent_id][0])
+
+        co_purchases = {}
+        for categories in user_categories.values():
+            for category in categories:
+                row = co_purchases.setdefault(category, {})
+                for other in categories:
+                    row[other] = row.get(other, 0) + 1
+
+        with self.lock:
+            self.catalog = catalog
+            self.trending_scores = trending_scores
+            self.user_purchases = user_purchases
+            self.user_categories = user_categories
+            self.co_purchases = co_purchases
+            self.anchor = anchor
+            self.window_start = window_start
+            self.built = True
+            self._invalidate(all_categories=True)
+            self.stats['rebuilds'] += 1
+            self.stats['last_rebuild_seconds'] = time.monotonic() - started
+
+    def _ensure_built(self):
+        if not self.built:
+            self.rebuild()
+
+    def _run(self, app):
+        while not self._stop.is_set():
+            try:
+                with app.app_context():
+                    self.rebuild()
+                    self.db.session.remove()
+            except Exception as e:
+                logger.error(f"Marketplace rankings rebuild failed: {str(e)}")
+            self._stop.wait(self.refresh_seconds)
+
+    def _invalidate(self, all_categories: bool = False, categories: Tuple[str, ...] = ()):
+        self._trending = None
+        self._top_rated = None
+        if all_categories:
+            self._category_rankings = {}
+        for category in categories:
+            self._category_rankings.pop(category, None)
+
+    def _rank_trending(self, limit: int) -> List[int]:
+        listed = ((score, agent_id) for agent_id, score in self.trending_scores.items()
+                  if score > 0 and self.catalog.get(agent_id, (None, 0.0, False))[2])
+        return [agent_id for _, agent_id in heapq.nsmallest(limit, listed, key=lambda item: (-item[0], item[1]))]
+
+    def _category_ranking(self, category: str) -> List[int]:
+        ranking = self._category_rankings.get(category)
+        if ranking is None:
+            ranking = sorted(
+                (agent_id for agent_id, (agent_category, _, listed) in self.catalog.items()
+                 if listed and agent_category == category),
+                key=lambda agent_id: (-self.catalog[agent_id][1], agent_id)
+            )
+            self._category_rankings[category] = ranking
+        return ranking
+
+    def _top_rated_ids(self) -> List[int]:
+        if self._top_rated is None:
+            listed = ((rating, agent_id) for agent_id, (_, rating, is_listed) in self.catalog.items() if is_listed)
+            self._top_rated = [agent_id for _, agent_id in
+                               heapq.nsmallest(TRENDING_CACHE_SIZE, listed, key=lambda item: (-item[0], item[1]))]
+        return self._top_rated
+
+    def _category_affinity(self, categories: Set[str]) -> Dict[str, float]:
+        """1.0 for categories the user bought in; otherwise the highest share of
+        buyers in one of the user's categories who also bought in it"""
+        affinity = dict.fromkeys(categories, 1.0)
+        for category in categories:
+            row = self.co_purchases.get(category, {})
+            buyers = row.get(category, 0)
+            if not buyers:
+                continue
+            for other, shared in row.items():
+                if other not in categories:
+                    affinity[other] = max(affinity.get(other, 0.0), shared / buyers)
+        return affinity
+
+    # Incremental updates from committed ORM changes
+    @property
+    def _changes_key(self) -> str:
+        return f'marketplace_rankings_changes_{id(self)}'
+
+    def _collect_changes(self, session, flush_context):
+        """Capture flushed purchases, download counts and agents; applied once the transaction commits"""
+        try:
+            changes = session.info.setdefault(self._changes_key, [])
+            for instance in session.new:
+                if isinstance(instance, self.Purchase):
+                    changes.append(('purchase', instance.buyer_id, instance.agent_id))
+                elif isinstance(instance, self.AgentAnalytics):
+                    if instance.downloads:
+                        changes.append(('downloads', instance.agent_id, instance.date, instance.downloads))
+                elif isinstance(instance, self.Agent):
+                    changes.append(('agent', instance.id, self._catalog_entry(instance)))
+
+            for instance in session.dirty:
+                if isinstance(instance, self.AgentAnalytics):
+                    history = inspect(instance).attrs.downloads.history
+                    delta = sum(history.added or ()) - sum(history.deleted or ())
+                    if delta:
+                        changes.append(('downloads', instance.agent_id, instance.date, delta))
+                elif isinstance(instance, self.Agent):
+                    changes.append(('agent', instance.id, self._catalog_entry(instance)))
+
+            for instance in session.deleted:
+                if isinstance(instance, self.Agent):
+                    changes.append(('agent', instance.id, None))
+        except Exception as e:
+            logger.error(f"Error capturing marketplace ranking changes: {str(e)}")
+
+    def _catalog_entry(self, agent) -> Tuple[str, float, bool]:
+        return agent.category, agent.rating or 0.0, bool(agent.is_active is not False and agent.is_verified)
+
+    def _apply_changes(self, session):
+        changes = session.info.pop(self._changes_key, None)
+        if not changes:
+            return
+
+        with self.lock:
+            if not self.built:
+                return
+
+            # Runs inside the caller's commit, after the data is already committed: never raise
+            # into it, rebuild from the database on the next read instead
+            try:
+                for change in changes:
+                    if change[0] == 'agent':
+                        self._apply_agent(change[1], change[2])
+                    elif change[0] == 'downloads':
+                        self._apply_downloads(*change[1:])
+                    else:
+                        self._apply_purchase(*change[1:])
+                self.stats['incremental_updates'] += 1
+            except Exception as e:
+                logger.error(f"Error applying marketplace ranking changes, rebuilding: {str(e)}")
+                self.built = False
+
+    def _apply_agent(self, agent_id: int, entry: Optional[Tuple[str, float, bool]]):
+        previous = self.catalog.pop(agent_id, None)
+        if entry is not None:
+            self.catalog[agent_id] = entry
+        touched = tuple(item[0] for item in (previous, entry) if item is not None)
+        self._invalidate(categories=touched)
+
+    def _apply_downloads(self, agent_id: int, day: date, delta: int):
+        if self.window_start is None or day < self.window_start:
+            return
+        weight = math.exp(self.decay_rate * (_event_timestamp(day) - self.anchor))
+        self.trending_scores[agent_id] = self.trending_scores.get(agent_id, 0.0) + delta * weight
+        self._trending = None
+
+    def _apply_purchase(self, buyer_id: int, agent_id: int):
+        self.user_purchases.setdefault(buyer_id, set()).add(agent_id)
+        entry = self.catalog.get(agent_id)
+        if entry is None:
+            return
+
+        category = entry[0]
+        categories = self.user_categories.setdefault(buyer_id, set())
+        if category in categories:
+            return
+
+        # The buyer now counts towards every pair of their categories with this one
+        row = self.co_purchases.setdefault(category, {})
+        for other in categories:
+            other_row = self.co_purchases.setdefault(other, {})
+            other_row[category] = other_row.get(category, 0) + 1
+            row[other] = row.get(other, 0) + 1
+        row[category] = row.get(category, 0) + 1
+        categories.add(category)
+
+    def _discard_changes(self, session, previous_transaction):
+        session.info.pop(self._changes_key, None)
@@ -0,0 +1,466 @@
+"""
+Agent Search Index
+Full-text agent search with BM25 ranking, quality boosts and keyset pagination
+"""
+
+import base64
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, column, event, func, inspect, literal_column, or_, select, table, text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Text fields and their BM25 weights; a name match counts twice a description match
+FIELD_WEIGHTS = (('name', 2.0), ('description', 1.0))
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Relevance is scaled by up to 1 + RATING_BOOST for a 5-star rating and up to
+# 1 + POPULARITY_BOOST as downloads grow (half of it at POPULARITY_HALF_DOWNLOADS)
+RATING_BOOST = 0.5
+POPULARITY_BOOST = 0.5
+POPULARITY_HALF_DOWNLOADS = 100
+
+# (min, max, min inclusive) per marketplace price range filter
+PRICE_RANGES = {
+    'free': (0, 0, True),
+    'low': (0.01, 1000, True),
+    'medium': (1000, 10000, True),
+    'high': (10000, None, False)
+}
+
+# Letters and digits; underscores separate tokens as in the unicode61 tokenizer
+TOKEN_PATTERN = re.compile(r'[^\W_]+', re.UNICODE)
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    """Lower-cased word tokens, matching the SQLite unicode61 tokenizer"""
+    return TOKEN_PATTERN.findall((value or '').lower())
+
+
+def boosted_score(relevance: float, rating: Optional[float], downloads: Optional[int]) -> float:
+    """Combine text relevance with rating and download count"""
+    rating = rating or 0.0
+    downloads = downloads or 0
+    return relevance * (
+        1 + RATING_BOOST * rating / 5 + POPULARITY_BOOST * downloads / (downloads + POPULARITY_HALF_DOWNLOADS)
+    )
+
+
+def encode_cursor(values: Tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[List]:
+    """The ``size`` keyset values in ``cursor``, the last being an agent id"""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        if len(values) != size:
+            raise ValueError
+        values = [float(value) for value in values[:-1]] + [int(values[-1])]
+        if any(map(math.isnan, values)):
+            raise ValueError
+        return values
+    except (ValueError, TypeError, KeyError, OverflowError):
+        raise ValueError('cursor is not a valid search cursor')
+
+
+@dataclass
+class SearchPage:
+    """One page of search results and the cursor for the next page, if any"""
+    agents: List[Any]
+    next_cursor: Optional[str]
+
+
+class InvertedIndex:
+    """In-memory inverted index with FTS5-compatible BM25 scoring.
+
+    Documents keep their weighted term frequencies per term plus the
+    attributes search filters and boosts need, so a query touches only the
+    postings of its terms and never the database.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, float]] = {}  # term -> doc id -> weighted tf
+        self.documents: Dict[int, Tuple[List[str], int, Dict[str, Any]]] = {}  # id -> (terms, length, attributes)
+        self.total_length = 0
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.documents)
+
+    def add(self, doc_id: int, fields: Dict[str, Optional[str]], attributes: Dict[str, Any]):
+        with self.lock:
+            self.remove(doc_id)
+
+            frequencies = Counter()
+            length = 0
+            for name, weight in FIELD_WEIGHTS:
+                tokens = tokenize(fields.get(name))
+                length += len(tokens)
+                for token in tokens:
+                    frequencies[token] += weight
+
+            for term, frequency in frequencies.items():
+                self.postings.setdefault(term, {})[doc_id] = frequency
+            self.documents[doc_id] = (list(frequencies), length, attributes)
+            self.total_length += length
+
+    def remove(self, doc_id: int):
+        with self.lock:
+            document = self.documents.pop(doc_id, None)
+            if document is None:
+                return
+            terms, length, _ = document
+            for term in terms:
+                posting = self.postings.get(term)
+                if posting is not None:
+                    posting.pop(doc_id, None)
+                    if not posting:
+                        del self.postings[term]
+            self.total_length -= length
+
+    def search(self, terms: List[str], matches, limit: int,
+               after: Optional[Tuple[float, int]] = None) -> List[Tuple[float, int]]:
+        """Top ``limit`` (score, id) pairs for documents with every term, best first.
+
+        ``matches(attributes)`` filters documents; ``after`` is the last
+        (score, id) of the previous page.
+        """
+        with self.lock:
+            postings = [self.postings.get(term) for term in dict.fromkeys(terms)]
+            if not postings or any(posting is None for posting in postings):
+                return []
+
+            count = len(self.documents)
+            average_length = self.total_length / count if count else 0.0
+            weights = [max(math.log((count - len(posting) + 0.5) / (len(posting) + 0.5)), 1e-6)
+                       for posting in postings]
+
+            # Intersect starting from the shortest posting list
+            shortest, *others = sorted(postings, key=len)
+            candidates = shortest.keys()
+            for posting in others:
+                candidates = [doc_id for doc_id in candidates if doc_id in posting]
+
+            scored = []
+            for doc_id in candidates:
+                _, length, attributes = self.documents[doc_id]
+                if not matches(attributes):
+                    continue
+
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length) if average_length else BM25_K1
+                relevance = 0.0
+                for posting, idf in zip(postings, weights):
+                    frequency = posting[doc_id]
+                    relevance += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+                score = boosted_score(relevance, attributes['rating'], attributes['download_count'])
+                if after is not None and (score > after[0] or (score == after[0] and doc_id <= after[1])):
+                    continue
+                scored.append((score, doc_id))
+
+        return heapq.nsmallest(limit, scored, key=lambda item: (-item[0], item[1]))
+
+
+class AgentSearchIndex:
+    """Full-text search over agent names and descriptions.
+
+    The backend follows the database: an external-content FTS5 table kept in
+    sync by triggers on SQLite, a generated ``tsvector`` column with a GIN
+    index on PostgreSQL (added by migration d4b8f1a6c352, so ``flask db
+    upgrade`` has to have run), and an in-process ``InvertedIndex``
+    elsewhere (or when MARKETPLACE_SEARCH_BACKEND=python). The in-process index is loaded
+    once and then patched from committed ORM changes, so it only sees writes
+    made through this process's sessions.
+
+    Results are ranked by BM25 relevance (``ts_rank`` on PostgreSQL, which
+    has no BM25) scaled by rating and download count, and paged with an
+    opaque keyset cursor over (score, id). Without a query, agents are listed
+    by rating and downloads with a keyset cursor over those columns.
+    """
+
+    FTS_TABLE = 'agent_fts'
+
+    def __init__(self, db, model, backend: Optional[str] = None):
+        self.db = db
+        self.model = model
+        self.requested_backend = backend or os.getenv('MARKETPLACE_SEARCH_BACKEND', 'auto')
+        self.backend = None
+        self.index = InvertedIndex()
+        self._fts = table(self.FTS_TABLE, column('rowid'), column(self.FTS_TABLE))
+        self._listeners_registered = False
+
+    def setup(self):
+        """Create the index structures for the active database; call after create_all"""
+        dialect = self.db.engine.dialect.name
+        backend = self.requested_backend
+        if backend == 'auto':
+            backend = {'sqlite': 'fts5', 'postgresql': 'tsvector'}.get(dialect, 'python')
+
+        try:
+            if backend == 'fts5':
+                self._setup_fts5()
+            elif backend == 'tsvector':
+                self._check_tsvector()
+        except Exception as e:
+            logger.warning(f"Full-text search setup failed for {backend}: {e}. Using in-process index.")
+            self.db.session.rollback()
+            backend = 'python'
+
+        if backend == 'python':
+            self.rebuild()
+            self._register_listeners()
+
+        self.backend = backend
+        logger.info(f"Agent search index ready using {backend} backend")
+
+    def rebuild(self):
+        """Reload the in-process index from the database"""
+        model = self.model
+        columns = [model.id, model.is_active, model.is_verified, model.category, model.industry,
+                   model.price, model.rating, model.download_count]
+        columns += [getattr(model, name) for name, _ in FIELD_WEIGHTS]
+
+        # Plain rows rather than entities, so the load does not fill the session
+        index = InvertedIndex()
+        rows = self.db.session.execute(select(*columns).execution_options(yield_per=5000))
+        for row in rows:
+            index.add(row.id, self._fields(row), self._attributes(row))
+        self.index = index
+
+    def search(self, query: str = '', filters: Optional[Dict[str, Any]] = None, limit: int = 20,
+               cursor: Optional[str] = None) -> SearchPage:
+        """One page of active, verified agents matching ``query`` and ``filters``.
+
+        ``filters`` may hold category, industry, rating_min and price_range.
+        Raises ValueError if ``cursor`` is not one this query returned.
+        """
+        filters = filters or {}
+        terms = tokenize(query)
+        # (rating, downloads, id) for listings, (score, id) for ranked queries
+        after = decode_cursor(cursor, 2 if terms else 3)
+
+        if not terms:
+            return self._listing(filters, limit, after)
+        if self.backend == 'python':
+            return self._search_python(terms, filters, limit, after)
+        return self._search_sql(terms, filters, limit, after)
+
+    # SQL backends
+    def _setup_fts5(self):
+        model_table = self.model.__tablename__
+        with self.db.engine.begin() as connection:
+            exists = connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': self.FTS_TABLE}
+            ).first()
+            connection.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.FTS_TABLE} USING fts5("
+                f"name, description, content='{model_table}', content_rowid='id', tokenize='unicode61')"
+            ))
+            connection.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {self.FTS_TABLE}_ai AFTER INSERT ON {model_table} BEGIN "
+                f"INSERT INTO {self.FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description); END"
+            ))
+            connection.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {self.FTS_TABLE}_ad AFTER DELETE ON {model_table} BEGIN "
+                f"INSERT INTO {self.FTS_TABLE}({self.FTS_TABLE}, rowid, name, description) "
+                f"VALUES ('delete', old.id, old.name, old.description); END"
+            ))
+            connection.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {self.FTS_TABLE}_au AFTER UPDATE OF name, description ON {model_table} BEGIN "
+                f"INSERT INTO {self.FTS_TABLE}({self.FTS_TABLE}, rowid, name, description) "
+                f"VALUES ('delete', old.id, old.name, old.description); "
+                f"INSERT INTO {self.FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description); END"
+            ))
+            if not exists:
+                # Index rows written before the table and its triggers existed
+                connection.execute(text(f"INSERT INTO {self.FTS_TABLE}({self.FTS_TABLE}) VALUES ('rebuild')"))
+
+    def _check_tsvector(self):
+        """The search_vector column and its GIN index are created by a migration, not here"""
+        model_table = self.model.__tablename__
+        columns = {column['name'] for column in inspect(self.db.engine).get_columns(model_table)}
+        if 'search_vector' not in columns:
+            raise RuntimeError(f"{model_table}.search_vector does not exist; run flask db upgrade")
+
+    def _search_sql(self, terms: List[str], filters: Dict[str, Any], limit: int,
+                    after: Optional[List]) -> SearchPage:
+        model = self.model
+        if self.backend == 'fts5':
+            match = ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+            weights = [weight for _, weight in FIELD_WEIGHTS]
+            relevance = -func.bm25(self._fts.c[self.FTS_TABLE], *weights)
+            ranked = (
+                select(model.id.label('id'), self._boosted(relevance).label('score'))
+                .join(self._fts, self._fts.c.rowid == model.id)
+                .where(self._fts.c[self.FTS_TABLE].op('MATCH')(match))
+            )
+        else:
+            vector = literal_column(f'{model.__tablename__}.search_vector')
+            query = func.plainto_tsquery('simple', ' '.join(terms))
+            ranked = (
+                select(model.id.label('id'), self._boosted(func.ts_rank(vector, query)).label('score'))
+                .where(vector.op('@@')(query))
+            )
+
+        ranked = ranked.where(*self._criteria(filters)).subquery()
+        page = select(ranked.c.id, ranked.c.score)
+        if after:
+            score, last_id = after
+            page = page.where(or_(ranked.c.score < score, and_(ranked.c.score == score, ranked.c.id > last_id)))
+        rows = self.db.session.execute(
+            page.order_by(ranked.c.score.desc(), ranked.c.id).limit(limit + 1)
+        ).all()
+
+        return self._page([(row.score, row.id) for row in rows], limit)
+
+    def _boosted(self, relevance):
+        rating = func.coalesce(self.model.rating, 0.0)
+        downloads = func.coalesce(self.model.download_count, 0)
+        return relevance * (
+            1 + RATING_BOOST * rating / 5
+            + POPULARITY_BOOST * downloads / (downloads + float(POPULARITY_HALF_DOWNLOADS))
+        )
+
+    def _criteria(self, filters: Dict[str, Any]) -> List:
+        model = self.model
+        criteria = [model.is_active == True, model.is_verified == True]
+        if filters.get('category'):
+            criteria.append(model.category == filters['category'])
+        if filters.get('industry'):
+            criteria.append(model.industry == filters['industry'])
+        if filters.get('rating_min'):
+            criteria.append(model.rating >= filters['rating_min'])
+
+        bounds = PRICE_RANGES.get(filters.get('price_range'))
+        if bounds:
+            low, high, low_inclusive = bounds
+            criteria.append(model.price >= low if low_inclusive else model.price > low)
+            if high is not None:
+                criteria.append(model.price <= high)
+        return criteria
+
+    def _listing(self, filters: Dict[str, Any], limit: int, after: Optional[List]) -> SearchPage:
+        model = self.model
+        rating = func.coalesce(model.rating, 0.0)
+        downloads = func.coalesce(model.download_count, 0)
+        listing = self.db.session.query(model).filter(*self._criteria(filters))
+
+        if after:
+            last_rating, last_downloads, last_id = after
+            listing = listing.filter(or_(
+                rating < last_rating,
+                and_(rating == last_rating, downloads < last_downloads),
+                and_(rating == last_rating, downloads == last_downloads, model.id > last_id)
+            ))
+
+        agents = listing.order_by(rating.desc(), downloads.desc(), model.id).limit(limit + 1).all()
+        next_cursor = None
+        if len(agents) > limit:
+            agents = agents[:limit]
+            last = agents[-1]
+            next_cursor = encode_cursor((last.rating or 0.0, last.download_count or 0, last.id))
+        return SearchPage(agents=agents, next_cursor=next_cursor)
+
+    def _page(self, ranked: List[Tuple[float, int]], limit: int) -> SearchPage:
+        next_cursor = encode_cursor(ranked[limit - 1]) if len(ranked) > limit else None
+        ranked = ranked[:limit]
+
+        agents_by_id = {}
+        if ranked:
+            ids = [doc_id for _, doc_id in ranked]
+            agents_by_id = {agent.id: agent for agent in self.model.query.filter(self.model.id.in_(ids))}
+        agents = [agents_by_id[doc_id] for _, doc_id in ranked if doc_id in agents_by_id]
+        return SearchPage(agents=agents, next_cursor=next_cursor)
+
+    # In-process backend
+    def _search_python(self, terms: List[str], filters: Dict[str, Any], limit: int,
+                       after: Optional[List]) -> SearchPage:
+        category = filters.get('category')
+        industry = filters.get('industry')
+        rating_min = filters.get('rating_min')
+        bounds = PRICE_RANGES.get(filters.get('price_range'))
+
+        def matches(attributes):
+            if not (attributes['is_active'] and attributes['is_verified']):
+                return False
+            if category and attributes['category'] != category:
+                return False
+            if industry and attributes['industry'] != industry:
+                return False
+            if rating_min and (attributes['rating'] is None or attributes['rating'] < rating_min):
+                return False
+            if bounds:
+                low, high, low_inclusive = bounds
+                price = attributes['price']
+                if price is None or price < low or (price == low and not low_inclusive):
+                    return False
+                if high is not None and price > high:
+                    return False
+            return True
+
+        ranked = self.index.search(terms, matches, limit + 1, tuple(after) if after else None)
+        return self._page(ranked, limit)
+
+    def _fields(self, agent) -> Dict[str, Optional[str]]:
+        return {name: getattr(agent, name) for name, _ in FIELD_WEIGHTS}
+
+    def _attributes(self, agent) -> Dict[str, Any]:
+        return {
+            'is_active': agent.is_active is not False,
+            'is_verified': bool(agent.is_verified),
+            'category': agent.category,
+            'industry': agent.industry,
+            'price': agent.price,
+            'rating': agent.rating or 0.0,
+            'download_count': agent.download_count or 0
+        }
+
+    def _register_listeners(self):
+        if self._listeners_registered:
+            return
+        event.listen(Session, 'after_flush', self._collect_changes)
+        event.listen(Session, 'after_commit', self._apply_changes)
+        event.listen(Session, 'after_soft_rollback', self._discard_changes)
+        self._listeners_registered = True
+
+    @property
+    def _changes_key(self) -> str:
+        return f'agent_search_changes_{id(self)}'
+
+    def _collect_changes(self, session, flush_context):
+        """Capture flushed agents; they are applied once the transaction commits"""
+        try:
+            changes = session.info.setdefault(self._changes_key, [])
+            for action, instances in (('upsert', session.new), ('upsert', session.dirty), ('delete', session.deleted)):
+                for instance in instances:
+                    if isinstance(instance, self.model):
+                        if action == 'delete':
+                            changes.append((action, instance.id, None, None))
+                        else:
+                            changes.append((action, instance.id, self._fields(instance), self._attributes(instance)))
+        except Exception as e:
+            logger.error(f"Error capturing agent search changes: {str(e)}")
+
+    def _apply_changes(self, session):
+        for action, doc_id, fields, attributes in session.info.pop(self._changes_key, None) or []:
+            if action == 'delete':
+                self.index.remove(doc_id)
+            else:
+                self.index.add(doc_id, fields, attributes)
+
+    def _discard_changes(self, session, previous_transaction):
+        session.info.pop(self._changes_key, None)
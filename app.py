@@ -2,6 +2,7 @@ import os
 import logging
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from flask_migrate import Migrate
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
 
@@ -28,6 +29,9 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
 # Initialize the app with the extension
 db.init_app(app)
 
+# Schema changes create_all cannot apply to existing tables (indexes, partitioning) are migrations: flask db upgrade
+migrate = Migrate(app, db)
+
 # Non-blocking initialization to avoid startup delays
 def initialize_app():
     """Initialize app components after startup - lazy loaded when needed"""
@@ -48,6 +52,20 @@ def initialize_app():
                 init_scheduler()
             except Exception as e:
                 logging.warning(f"Scheduler initialization failed: {e}")
+
+            # Flush agent execution telemetry in the background
+            try:
+                from services.agent_telemetry import agent_telemetry
+                agent_telemetry.start(app)
+            except Exception as e:
+                logging.warning(f"Agent telemetry initialization failed: {e}")
+
+            # Fold agent executions into performance rollups and health snapshots
+            try:
+                from services.execution_rollup import execution_rollup
+                execution_rollup.start(app)
+            except Exception as e:
+                logging.warning(f"Agent execution rollup initialization failed: {e}")
             
         logging.info("Replit Manager application initialized successfully")
         return True
@@ -0,0 +1,64 @@
+"""Add secondary indexes for the dashboard and history queries
+
+Revision ID: 3f9a1c2e7b10
+Revises: 
+Create Date: 2026-10-16 21:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2e7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, partial index predicate); the same indexes are declared on the models,
+# so databases created by create_all already have them and are skipped
+INDEXES = [
+    ('ix_replit_app_active_updated_at', 'replit_app', ['updated_at'], 'is_active'),
+    ('ix_ai_agent_app_id_agent_type', 'ai_agent', ['app_id', 'agent_type'], None),
+    ('ix_ai_agent_created_at', 'ai_agent', ['created_at'], None),
+    ('ix_ai_agent_updated_at', 'ai_agent', ['updated_at'], None),
+    ('ix_agent_usage_log_agent_id_usage_date', 'agent_usage_log', ['agent_id', 'usage_date'], None),
+    ('ix_agent_execution_agent_key_started_at', 'agent_execution', ['agent_key', 'started_at'], None),
+    ('ix_agent_execution_started_at', 'agent_execution', ['started_at'], None),
+    ('ix_agent_execution_failures', 'agent_execution', ['agent_key', 'started_at'],
+     "execution_status IN ('failed', 'timeout')"),
+    ('ix_agent_coordination_log_campaign_id', 'agent_coordination_log', ['campaign_id', 'coordinated_at'], None),
+    ('ix_agent_coordination_log_coordinated_at', 'agent_coordination_log', ['coordinated_at'], None),
+    ('ix_executed_opportunity_executed_at', 'executed_opportunity', ['executed_at', 'id'], None),
+    ('ix_executed_opportunity_status_executed_at', 'executed_opportunity', ['status', 'executed_at'], None),
+    ('ix_executed_opportunity_opportunity_id', 'executed_opportunity', ['opportunity_id'], None),
+]
+
+
+def _existing_indexes(bind):
+    inspector = sa.inspect(bind)
+    return {table: {index['name'] for index in inspector.get_indexes(table)}
+            for table in {table for _, table, _, _ in INDEXES} if inspector.has_table(table)}
+
+
+def upgrade():
+    bind = op.get_bind()
+    existing = _existing_indexes(bind)
+    postgresql = bind.dialect.name == 'postgresql'
+
+    # Build on PostgreSQL without blocking writes to tables that may already hold millions of rows
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            if table not in existing or name in existing[table]:
+                continue
+            options = {'postgresql_concurrently': postgresql}
+            if where:
+                options.update(postgresql_where=sa.text(where), sqlite_where=sa.text(where))
+            op.create_index(name, table, columns, **options)
+
+
+def downgrade():
+    existing = _existing_indexes(op.get_bind())
+    for name, table, _, _ in reversed(INDEXES):
+        if name in existing.get(table, ()):
+            op.drop_index(name, table_name=table)
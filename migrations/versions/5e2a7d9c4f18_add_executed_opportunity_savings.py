@@ -0,0 +1,60 @@
+"""Store each executed opportunity's savings instead of parsing them per request
+
+Revision ID: 5e2a7d9c4f18
+Revises: 8c4d2b6e1a93
+Create Date: 2026-10-16 23:10:00.000000
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2a7d9c4f18'
+down_revision = '8c4d2b6e1a93'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of models.SAVINGS_PATTERN as of this revision
+SAVINGS_PATTERN = re.compile(r'\$(\d+\.?\d*)')
+BATCH_SIZE = 1000
+
+
+def upgrade():
+    bind = op.get_bind()
+    columns = {column['name'] for column in sa.inspect(bind).get_columns('executed_opportunity')}
+    if 'savings_achieved' not in columns:
+        op.add_column('executed_opportunity', sa.Column('savings_achieved', sa.Float(), nullable=True))
+
+    # The history API pages by (executed_at, id), which needs every row to have an executed_at
+    bind.execute(sa.text(
+        "UPDATE executed_opportunity SET executed_at = COALESCE(created_at, CURRENT_TIMESTAMP) "
+        "WHERE executed_at IS NULL"
+    ))
+
+    select = sa.text(
+        "SELECT id, replit_prompt FROM executed_opportunity "
+        "WHERE id > :after AND replit_prompt LIKE '%$%' ORDER BY id LIMIT :limit"
+    )
+    update = sa.text("UPDATE executed_opportunity SET savings_achieved = :savings WHERE id = :id")
+    after = 0
+    while True:
+        rows = bind.execute(select, {'after': after, 'limit': BATCH_SIZE}).all()
+        updates = []
+        for row_id, prompt in rows:
+            match = SAVINGS_PATTERN.search(prompt)
+            if match:
+                updates.append({'id': row_id, 'savings': float(match.group(1))})
+        if updates:
+            bind.execute(update, updates)
+        if len(rows) < BATCH_SIZE:
+            break
+        after = rows[-1][0]
+    bind.execute(sa.text("UPDATE executed_opportunity SET savings_achieved = 0 WHERE savings_achieved IS NULL"))
+
+
+def downgrade():
+    with op.batch_alter_table('executed_opportunity') as batch_op:
+        batch_op.drop_column('savings_achieved')
@@ -0,0 +1,40 @@
+"""Range-partition the execution and log tables by month on PostgreSQL
+
+Revision ID: 8c4d2b6e1a93
+Revises: 3f9a1c2e7b10
+Create Date: 2026-10-16 21:45:00.000000
+
+"""
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+from services.history_partitions import HISTORY_TABLES, is_partitioned, partition_table, unpartition_table
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4d2b6e1a93'
+down_revision = '3f9a1c2e7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    inspector = sa.inspect(bind)
+    months_ahead = int(os.getenv('HISTORY_PARTITION_MONTHS_AHEAD', '3'))
+    for table in HISTORY_TABLES:
+        if inspector.has_table(table) and not is_partitioned(bind, table):
+            partition_table(bind, table, months_ahead)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    for table in HISTORY_TABLES:
+        if is_partitioned(bind, table):
+            unpartition_table(bind, table)
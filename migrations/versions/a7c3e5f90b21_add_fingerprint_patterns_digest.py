@@ -0,0 +1,28 @@
+"""Record the agent pattern set each file fingerprint was scanned with
+
+Revision ID: a7c3e5f90b21
+Revises: 5e2a7d9c4f18
+Create Date: 2026-10-17 09:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e5f90b21'
+down_revision = '5e2a7d9c4f18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing fingerprints are left without a digest, so each app is rescanned once with the current patterns
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('app_file_fingerprint')}
+    if 'patterns_digest' not in columns:
+        op.add_column('app_file_fingerprint', sa.Column('patterns_digest', sa.String(length=32), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('app_file_fingerprint') as batch_op:
+        batch_op.drop_column('patterns_digest')
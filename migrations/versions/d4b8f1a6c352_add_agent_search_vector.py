@@ -0,0 +1,40 @@
+"""Add the marketplace agent search_vector column and its GIN index on PostgreSQL
+
+The agent table belongs to agent_marketplace, which shares DATABASE_URL
+with this app; run this once the marketplace has created its tables.
+
+Revision ID: d4b8f1a6c352
+Revises: a7c3e5f90b21
+Create Date: 2026-10-17 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4b8f1a6c352'
+down_revision = 'a7c3e5f90b21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or not sa.inspect(bind).has_table('agent'):
+        return
+    # A name match outranks a description match, as in the SQLite FTS5 and in-process backends
+    op.execute(
+        "ALTER TABLE agent ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(description, '')), 'B')) STORED"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_agent_search_vector ON agent USING GIN (search_vector)")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    op.execute("DROP INDEX IF EXISTS ix_agent_search_vector")
+    op.execute("ALTER TABLE agent DROP COLUMN IF EXISTS search_vector")
@@ -1,6 +1,10 @@
+import re
 from app import db
 from datetime import datetime
-from sqlalchemy import JSON
+from sqlalchemy import JSON, event, inspect
+
+# First dollar amount in an opportunity's prompt, taken as the savings it achieves
+SAVINGS_PATTERN = re.compile(r'\$(\d+\.?\d*)')
 
 class ReplitApp(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -16,9 +20,16 @@ class ReplitApp(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
     
+    __table_args__ = (
+        # Recently changed active apps (periodic agent analysis)
+        db.Index('ix_replit_app_active_updated_at', 'updated_at',
+                 postgresql_where=db.text('is_active'), sqlite_where=db.text('is_active')),
+    )
+    
     # Relationships
     ai_agents = db.relationship('AIAgent', back_populates='app', cascade='all, delete-orphan')
     credentials = db.relationship('AppCredential', back_populates='app', cascade='all, delete-orphan')
+    file_fingerprints = db.relationship('AppFileFingerprint', back_populates='app', cascade='all, delete-orphan')
 
 class AIAgent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -36,6 +47,12 @@ class AIAgent(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_ai_agent_app_id_agent_type', 'app_id', 'agent_type'),
+        db.Index('ix_ai_agent_created_at', 'created_at'),
+        db.Index('ix_ai_agent_updated_at', 'updated_at'),
+    )
+    
     # Relationships
     app = db.relationship('ReplitApp', back_populates='ai_agents')
 
@@ -50,6 +67,24 @@ class AppCredential(db.Model):
     # Relationships
     app = db.relationship('ReplitApp', back_populates='credentials')
 
+class AppFileFingerprint(db.Model):
+    """Content hash and scan results of each analyzed app file"""
+    id = db.Column(db.Integer, primary_key=True)
+    app_id = db.Column(db.Integer, db.ForeignKey('replit_app.id'), nullable=False)
+    file_path = db.Column(db.String(500), nullable=False)
+    content_hash = db.Column(db.String(64), nullable=False)
+    detected_agents = db.Column(JSON)  # Agents found in this file by the last scan
+    detected_credentials = db.Column(JSON)  # Credential services found in this file
+    patterns_digest = db.Column(db.String(32))  # Agent pattern set the scan results come from
+    analyzed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('app_id', 'file_path', name='uq_app_file_fingerprint'),
+    )
+    
+    # Relationships
+    app = db.relationship('ReplitApp', back_populates='file_fingerprints')
+
 class MatrixSnapshot(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     snapshot_date = db.Column(db.Date, nullable=False, unique=True)
@@ -68,6 +103,11 @@ class AgentUsageLog(db.Model):
     response_time_ms = db.Column(db.Integer)
     success_rate = db.Column(db.Float, default=1.0)
     cost_incurred = db.Column(db.Float, default=0.0)
+    
+    # Range-partitioned by usage_date on PostgreSQL, see services/history_partitions.py
+    __table_args__ = (
+        db.Index('ix_agent_usage_log_agent_id_usage_date', 'agent_id', 'usage_date'),
+    )
 
 # AI Agents Performance Tracking Models
 class AgentExecution(db.Model):
@@ -101,6 +141,15 @@ class AgentExecution(db.Model):
     # Error Tracking
     error_message = db.Column(db.Text)
     error_type = db.Column(db.String(100))
+    
+    # Range-partitioned by started_at on PostgreSQL, where execution_id is then unique per started_at
+    __table_args__ = (
+        db.Index('ix_agent_execution_agent_key_started_at', 'agent_key', 'started_at'),
+        db.Index('ix_agent_execution_started_at', 'started_at'),
+        db.Index('ix_agent_execution_failures', 'agent_key', 'started_at',
+                 postgresql_where=db.text("execution_status IN ('failed', 'timeout')"),
+                 sqlite_where=db.text("execution_status IN ('failed', 'timeout')")),
+    )
 
 class AgentPerformanceMetrics(db.Model):
     """Aggregate performance metrics for each agent"""
@@ -138,6 +187,26 @@ class AgentPerformanceMetrics(db.Model):
     last_execution = db.Column(db.DateTime)
     metrics_calculated_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+class AgentExecutionRollup(db.Model):
+    """Running per-agent state behind AgentPerformanceMetrics, folded from AgentExecution rows"""
+    id = db.Column(db.Integer, primary_key=True)
+    agent_key = db.Column(db.String(100), unique=True, nullable=False)
+
+    # Latency
+    latency_histogram = db.Column(JSON)  # Sparse log-linear histogram of execution_time_ms
+    latency_sum_ms = db.Column(db.Float, default=0.0)
+    p50_execution_time_ms = db.Column(db.Integer)
+    p95_execution_time_ms = db.Column(db.Integer)
+    p99_execution_time_ms = db.Column(db.Integer)
+
+    # Usage buckets
+    hour_of_day_counts = db.Column(JSON)  # 24 execution counts by UTC hour
+    recent_hours = db.Column(JSON)  # 'YYYY-MM-DDTHH' -> [executions, successes, latency_ms_sum, cost_usd]
+    recent_days = db.Column(JSON)  # 'YYYY-MM-DD' -> [executions, successes, cost_usd, tokens]
+    total_tokens = db.Column(db.Integer, default=0)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class CampaignOrchestration(db.Model):
     """Track multi-agent campaign orchestrations"""
     id = db.Column(db.Integer, primary_key=True)
@@ -195,6 +264,12 @@ class AgentCoordinationLog(db.Model):
     # Timestamps
     coordinated_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Range-partitioned by coordinated_at on PostgreSQL
+    __table_args__ = (
+        db.Index('ix_agent_coordination_log_campaign_id', 'campaign_id', 'coordinated_at'),
+        db.Index('ix_agent_coordination_log_coordinated_at', 'coordinated_at'),
+    )
+    
 class SystemHealthSnapshot(db.Model):
     """Regular snapshots of overall system health"""
     id = db.Column(db.Integer, primary_key=True)
@@ -256,7 +331,25 @@ class ExecutedOpportunity(db.Model):
     telegram_sent = db.Column(db.Boolean, default=False)
     automation_notes = db.Column(db.Text)  # Notes about automated vs manual implementation
     applied_changes = db.Column(JSON)  # List of changes that were automatically applied
+    savings_achieved = db.Column(db.Float, default=0.0)  # Extracted from replit_prompt unless set explicitly
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_executed_opportunity_executed_at', 'executed_at', 'id'),
+        db.Index('ix_executed_opportunity_status_executed_at', 'status', 'executed_at'),
+        db.Index('ix_executed_opportunity_opportunity_id', 'opportunity_id'),
+    )
+
+
+@event.listens_for(ExecutedOpportunity, 'before_insert')
+@event.listens_for(ExecutedOpportunity, 'before_update')
+def _extract_savings(mapper, connection, opportunity):
+    """Derive savings_achieved from a new replit_prompt unless the same flush sets it"""
+    attrs = inspect(opportunity).attrs
+    if attrs.replit_prompt.history.has_changes() and not attrs.savings_achieved.history.has_changes():
+        prompt = opportunity.replit_prompt
+        match = SAVINGS_PATTERN.search(prompt) if prompt else None
+        opportunity.savings_achieved = float(match.group(1)) if match else 0.0
 
 # Template Marketplace Models
 class AppTemplate(db.Model):
@@ -1,4 +1,5 @@
-from flask import render_template, request, jsonify, redirect, url_for, flash, render_template_string
+from flask import (render_template, request, jsonify, redirect, url_for, flash, render_template_string,
+                   stream_with_context)
 from app import app, db
 from datetime import datetime, date, timedelta
 import logging
@@ -12,6 +13,9 @@ import uuid
 # but keep heavy services lazy-loaded
 from models import ReplitApp, AIAgent, MatrixSnapshot, SystemSettings
 from services.analytics_service import AnalyticsService
+from services.execution_history import ExecutionHistory
+from services.matrix_read_model import MatrixReadModel
+from services.matrix_materializer import materialized_matrix
 
 # Global cache for heavy services
 _services_cache = {}
@@ -2722,69 +2726,18 @@ def get_app_kpis():
 
 @app.route('/api/matrix-data', methods=['GET'])
 def get_matrix_data():
-    """API endpoint for matrix visualization data"""
+    """API endpoint for matrix visualization data, served from the materialized matrix"""
     try:
-        apps = ReplitApp.query.filter_by(is_active=True).all()
-        agents = AIAgent.query.all()
+        etag, payload = materialized_matrix.current()
         
-        # Build matrix structure
-        matrix_apps = []
-        matrix_agents = []
-        relationships = []
-        
-        for app in apps:
-            app_agents = [agent for agent in agents if agent.app_id == app.id]
-            
-            matrix_apps.append({
-                'id': app.id,
-                'name': app.name,
-                'url': app.url,
-                'framework': getattr(app, 'framework', None) or getattr(app, 'language', None) or 'Unknown',
-                'agent_count': len(app_agents),
-                'total_cost': sum(float(agent.cost_estimate or 0) for agent in app_agents)
-            })
-            
-            for agent in app_agents:
-                if not any(a['id'] == agent.id for a in matrix_agents):
-                    matrix_agents.append({
-                        'id': agent.id,
-                        'name': agent.agent_name,
-                        'type': agent.agent_type,
-                        'model': agent.model_name
-                    })
-                
-                relationships.append({
-                    'app_id': app.id,
-                    'agent_id': agent.id,
-                    'strength': float(agent.effectiveness_score or 0.5),
-                    'cost': float(agent.cost_estimate or 0.0),
-                    'usage': int(agent.usage_frequency or 0)
-                })
-        
-        # Generate or get integration opportunities and optimization tips
-        analytics_service = AnalyticsService()
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            response = jsonify(payload)
         
-        # Get or generate matrix data with full analytics
-        matrix_result = analytics_service.generate_matrix()
-        integration_opportunities = matrix_result.get('integration_opportunities', [])
-        optimization_tips = matrix_result.get('optimization_tips', [])
-
-        return jsonify({
-            'success': True,
-            'apps': matrix_apps,
-            'agents': matrix_agents,
-            'relationships': relationships,
-            'integration_opportunities': integration_opportunities,
-            'optimization_tips': optimization_tips,
-            'metadata': {
-                'total_apps': len(matrix_apps),
-                'total_agents': len(matrix_agents),
-                'total_relationships': len(relationships),
-                'integration_count': len(integration_opportunities),
-                'optimization_count': len(optimization_tips),
-                'generated_at': datetime.now().isoformat()
-            }
-        })
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
         
     except Exception as e:
         logging.error(f"Error in matrix-data API: {str(e)}")
@@ -2797,27 +2750,7 @@ def get_matrix_data():
 def get_apps():
     """API endpoint for apps list"""
     try:
-        apps = ReplitApp.query.filter_by(is_active=True).all()
-        
-        apps_data = []
-        for app in apps:
-            agents = AIAgent.query.filter_by(app_id=app.id).all()
-            
-            apps_data.append({
-                'id': app.id,
-                'name': app.name,
-                'url': app.url,
-                'language': app.language or 'Unknown',
-                'agent_count': len(agents),
-                'created_at': app.created_at.isoformat() if app.created_at else None,
-                'updated_at': app.updated_at.isoformat() if app.updated_at else None
-            })
-        
-        return jsonify({
-            'success': True,
-            'apps': apps_data,
-            'count': len(apps_data)
-        })
+        return jsonify(MatrixReadModel().apps_payload())
         
     except Exception as e:
         logging.error(f"Error in apps API: {str(e)}")
@@ -2830,26 +2763,7 @@ def get_apps():
 def get_agents():
     """API endpoint for agents list"""
     try:
-        agents = AIAgent.query.all()
-        
-        agents_data = []
-        for agent in agents:
-            agents_data.append({
-                'id': agent.id,
-                'name': agent.agent_name,
-                'type': agent.agent_type,
-                'model': agent.model_name,
-                'app_name': agent.app.name if agent.app else 'Unknown',
-                'performance': float(agent.effectiveness_score or 0.0),
-                'cost': float(agent.cost_estimate or 0.0),
-                'usage': int(agent.usage_frequency or 0)
-            })
-        
-        return jsonify({
-            'success': True,
-            'agents': agents_data,
-            'count': len(agents_data)
-        })
+        return jsonify(MatrixReadModel().agents_payload())
         
     except Exception as e:
         logging.error(f"Error in agents API: {str(e)}")
@@ -4917,38 +4831,36 @@ def executions():
 
 @app.route('/api/execution-history', methods=['GET'])
 def execution_history():
-    """API endpoint to get execution history"""
+    """API endpoint to get execution history, newest first.
+
+    Filters: ``status`` and ``type`` (comma separated), ``since`` and
+    ``until`` (ISO dates or datetimes). Returns a JSON array of up to
+    ``limit`` executions; when more remain, ``X-Next-Cursor`` and a
+    ``Link: rel="next"`` header carry the ``cursor`` of the next page.
+    ``format=ndjson`` (or ``Accept: application/x-ndjson``) streams every
+    matching execution as newline-delimited JSON instead, for exports.
+    """
     try:
-        executions = ExecutedOpportunity.query.order_by(ExecutedOpportunity.executed_at.desc()).all()
-        
-        history_data = []
-        for execution in executions:
-            # Extract savings from replit_prompt or description
-            savings_achieved = 0
-            if hasattr(execution, 'savings_achieved'):
-                savings_achieved = execution.savings_achieved
-            elif execution.replit_prompt and '$' in execution.replit_prompt:
-                # Try to extract savings from prompt
-                import re
-                savings_match = re.search(r'\$(\d+\.?\d*)', execution.replit_prompt)
-                if savings_match:
-                    savings_achieved = float(savings_match.group(1))
-            
-            history_data.append({
-                'id': execution.id,
-                'opportunity_id': execution.opportunity_id,
-                'opportunity_type': execution.opportunity_type,
-                'title': execution.title,
-                'description': execution.description,
-                'status': execution.status,
-                'executed_at': execution.executed_at.isoformat() if execution.executed_at else None,
-                'completed_at': execution.completed_at.isoformat() if execution.completed_at else None,
-                'telegram_sent': execution.telegram_sent,
-                'replit_prompt': execution.replit_prompt,
-                'savings_achieved': savings_achieved
-            })
-        
-        return jsonify(history_data)
+        history = ExecutionHistory.from_args(request.args)
+        if request.args.get('format') == 'ndjson' or \
+                request.accept_mimetypes.best == 'application/x-ndjson':
+            return app.response_class(
+                stream_with_context(history.ndjson()),
+                mimetype='application/x-ndjson',
+                headers={'Content-Disposition': 'attachment; filename=execution-history.ndjson'}
+            )
+
+        executions, next_cursor = history.page(request.args.get('cursor'),
+                                               request.args.get('limit', type=int))
+        response = jsonify(executions)
+        if next_cursor:
+            args = request.args.to_dict(flat=False)
+            args['cursor'] = next_cursor
+            response.headers['X-Next-Cursor'] = next_cursor
+            response.headers['Link'] = f'<{url_for("execution_history", _external=True, **args)}>; rel="next"'
+        return response
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logging.error(f"Error fetching execution history: {str(e)}")
         return jsonify([])
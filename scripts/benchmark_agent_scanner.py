@@ -0,0 +1,148 @@
+"""
+Benchmark the precompiled AgentPatternScanner against the per-pattern detector
+it replaced, on a synthetic corpus of source files.
+
+Usage: python scripts/benchmark_agent_scanner.py [--files 2000] [--size 8000]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.agent_scanner import (  # noqa: E402
+    AgentPatternScanner, DEFAULT_AGENT_PATTERNS, CREDENTIAL_PATTERNS, ROLE_PATTERNS
+)
+
+
+def legacy_infer_role(content, agent_type):
+    for role, patterns in ROLE_PATTERNS.items():
+        for pattern in patterns:
+            if re.search(pattern, content, re.IGNORECASE):
+                return f"{role.title()} Assistant"
+    return f"{agent_type.title()} Assistant"
+
+
+def legacy_detect(content, file_path):
+    """The original AIAgentService detection loop"""
+    detected = []
+    for agent_type, patterns in DEFAULT_AGENT_PATTERNS.items():
+        agent_detected = False
+        features = []
+        api_endpoints = []
+        model_name = None
+
+        for import_pattern in patterns.get('imports', []):
+            if re.search(import_pattern, content, re.IGNORECASE):
+                agent_detected = True
+                features.append(f"imports_{agent_type}")
+                break
+        for api_pattern in patterns.get('api_calls', []):
+            matches = re.findall(api_pattern, content, re.IGNORECASE)
+            if matches:
+                agent_detected = True
+                features.append(f"api_calls_{agent_type}")
+                api_endpoints.extend(matches)
+        for model_pattern in patterns.get('models', []):
+            match = re.search(model_pattern, content, re.IGNORECASE)
+            if match:
+                agent_detected = True
+                model_name = match.group(0)
+                features.append(f"model_{model_name}")
+                break
+        for pattern in patterns.get('patterns', []):
+            if re.search(pattern, content, re.IGNORECASE):
+                agent_detected = True
+                features.append(f"pattern_{pattern}")
+
+        if agent_detected:
+            detected.append({
+                'type': agent_type,
+                'name': f"{agent_type.title()} Agent in {os.path.basename(file_path)}",
+                'model': model_name,
+                'role': legacy_infer_role(content, agent_type),
+                'features': features,
+                'api_endpoints': api_endpoints
+            })
+
+    credentials = set()
+    for service, service_patterns in CREDENTIAL_PATTERNS.items():
+        for pattern in service_patterns:
+            if re.search(pattern, content, re.IGNORECASE):
+                credentials.add(service)
+                break
+
+    return detected, credentials
+
+
+SNIPPETS = [
+    "import openai\nclient = OpenAI(api_key=os.environ['OPENAI_API_KEY'])\n",
+    "resp = client.chat.completions.create(model='gpt-4', messages=msgs)\n",
+    "from anthropic import Anthropic\nmsg = client.messages.create(model='claude-3-opus')\n",
+    "from transformers import AutoTokenizer, AutoModel\npipe = pipeline('summarization')\n",
+    "import torch\nmodel.fit(X, y)\npreds = model.predict(X_test)\n",
+    "TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')\n",
+    "STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY')\n",
+    "def render_dashboard(request):\n    return render_template('index.html')\n",
+    "for row in rows:\n    total += row.amount\n",
+    "class UserProfile(db.Model):\n    id = db.Column(db.Integer, primary_key=True)\n",
+]
+
+FILLER_WORDS = ['value', 'result', 'items', 'config', 'handler', 'request', 'session',
+                'payload', 'record', 'update', 'render', 'buffer', 'offset', 'status']
+
+
+def build_corpus(file_count, file_size, seed=42):
+    rng = random.Random(seed)
+    corpus = []
+    for index in range(file_count):
+        parts = []
+        length = 0
+        while length < file_size:
+            if rng.random() < 0.05:
+                chunk = rng.choice(SNIPPETS)
+            else:
+                chunk = ' = '.join(rng.choice(FILLER_WORDS) for _ in range(3)) + '\n'
+            parts.append(chunk)
+            length += len(chunk)
+        corpus.append((f"src/module_{index}.py", ''.join(parts)))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--size', type=int, default=8000, help='approximate bytes per file')
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.files, args.size)
+    total_mb = sum(len(content) for _, content in corpus) / 1e6
+    scanner = AgentPatternScanner(DEFAULT_AGENT_PATTERNS)
+
+    start = time.perf_counter()
+    legacy_results = [legacy_detect(content, path) for path, content in corpus]
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scanner_results = []
+    for path, content in corpus:
+        scan = scanner.scan(content, path)
+        scanner_results.append((scan['agents'], scan['credentials']))
+    scanner_seconds = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(legacy_results, scanner_results) if a != b)
+
+    print(f"corpus: {args.files} files, {total_mb:.1f} MB")
+    print(f"legacy detector:  {legacy_seconds:8.3f}s  ({total_mb / legacy_seconds:7.1f} MB/s)")
+    print(f"pattern scanner:  {scanner_seconds:8.3f}s  ({total_mb / scanner_seconds:7.1f} MB/s)")
+    print(f"speedup:          {legacy_seconds / scanner_seconds:8.2f}x")
+    print(f"parity mismatches: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Microbenchmark cache key construction for SharedAICache at 1 KB, 1 MB and
+50 MB payloads: MD5 over str(content) followed by MD5 over json.dumps(params),
+against the streaming content digest and canonical key builder.
+
+Usage: python scripts/benchmark_cache_keys.py [--repeat 5]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.cache_keys import build_cache_key, content_digest, xxhash  # noqa: E402
+
+SIZES = [('1 KB', 1024), ('1 MB', 1024 * 1024), ('50 MB', 50 * 1024 * 1024)]
+
+
+def legacy_key(content):
+    params = {
+        'content_hash': hashlib.md5(str(content).encode()).hexdigest()[:16],
+        'content_type': 'text'
+    }
+    key_data = f"text_processor:extract_text:{json.dumps(params, sort_keys=True)}"
+    return hashlib.md5(key_data.encode()).hexdigest()
+
+
+def new_key(content):
+    params = {'content_hash': content_digest(content), 'content_type': 'text'}
+    return build_cache_key('text_processor', 'extract_text', params)
+
+
+def time_call(func, make_payload, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        payload = make_payload()
+        start = time.perf_counter()
+        func(payload)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def fresh_copy(payload):
+    """An equal payload with a new identity, so the digest memo cannot help"""
+    if isinstance(payload, bytes):
+        return bytes(bytearray(payload))
+    return payload[:-1] + payload[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"hash: {'xxh3_128' if xxhash else 'blake2b-128'}")
+    print(f"{'payload':<14}{'legacy md5':>14}{'streaming':>14}{'memoized':>14}")
+
+    for label, size in SIZES:
+        for kind, payload in (('str', 'x' * size), ('bytes', os.urandom(size))):
+            legacy = time_call(legacy_key, lambda: payload, args.repeat)
+            cold = time_call(new_key, lambda: fresh_copy(payload), args.repeat)
+            new_key(payload)
+            warm = time_call(new_key, lambda: payload, args.repeat)
+            print(f"{label + ' ' + kind:<14}{legacy * 1e3:>12.3f}ms{cold * 1e3:>12.3f}ms{warm * 1e3:>12.3f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Folding AgentExecution rows into per-agent rollups, and reading analytics
+from the rollups instead of raw history.
+
+Seeds a scratch SQLite database with executions spread over the last two
+weeks, folds them in one pass and then folds a second, smaller batch to
+show the incremental cost. The histogram quantiles are checked against
+exact quantiles of the seeded latencies, and the analytics reads are timed
+against the rollup rows.
+
+Usage: python scripts/benchmark_execution_rollup.py [--executions 200000] [--agents 100]
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def seed(db, model, count, agents, now, rng, latencies):
+    rows = []
+    for i in range(count):
+        agent = f"agent_{rng.randrange(agents)}"
+        latency = int(rng.lognormvariate(5 + int(agent[6:]) % 3, 0.6))
+        started = now - timedelta(seconds=rng.randrange(14 * 86400))
+        latencies.setdefault(agent, []).append(latency)
+        rows.append({
+            'agent_key': agent,
+            'agent_name': agent.replace('_', ' ').title(),
+            'execution_id': f"seed-{now.timestamp()}-{i}",
+            'execution_status': 'success' if rng.random() < 0.97 else 'failed',
+            'execution_time_ms': latency,
+            'cost_usd': 0.002,
+            'tokens_used': 400,
+            'started_at': started,
+            'completed_at': started + timedelta(milliseconds=latency)
+        })
+        if len(rows) == 10000:
+            db.session.bulk_insert_mappings(model, rows)
+            rows = []
+    if rows:
+        db.session.bulk_insert_mappings(model, rows)
+    db.session.commit()
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--executions', type=int, default=200000)
+    parser.add_argument('--agents', type=int, default=100)
+    args = parser.parse_args()
+
+    database = os.path.join(tempfile.mkdtemp(), 'rollup.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+    from app import app, db
+    from models import AgentExecution, AgentExecutionRollup, AgentPerformanceMetrics, SystemHealthSnapshot
+    from services.analytics_service import AnalyticsService
+    from services.execution_rollup import ExecutionRollup
+
+    rng = random.Random(7)
+    latencies = {}
+    rollup = ExecutionRollup(interval_seconds=0)
+    with app.app_context():
+        db.create_all()
+        now = datetime.utcnow()
+        seed(db, AgentExecution, args.executions, args.agents, now, rng, latencies)
+
+        started = time.perf_counter()
+        folded = rollup.fold()
+        elapsed = time.perf_counter() - started
+        print(f"initial fold: {folded:,} executions in {elapsed:.2f}s ({folded / elapsed:,.0f}/s)")
+
+        seed(db, AgentExecution, args.executions // 100, args.agents, now + timedelta(seconds=1), rng, latencies)
+        started = time.perf_counter()
+        folded = rollup.fold()
+        print(f"incremental fold: {folded:,} executions in {(time.perf_counter() - started) * 1000:.0f}ms")
+        print(f"fold with nothing new: {rollup.fold()} rows in {rollup.stats['last_fold_seconds'] * 1000:.1f}ms")
+
+        worst = 0.0
+        for row in AgentExecutionRollup.query.all():
+            values = latencies[row.agent_key]
+            for q, estimate in ((0.5, row.p50_execution_time_ms), (0.95, row.p95_execution_time_ms),
+                                (0.99, row.p99_execution_time_ms)):
+                exact = exact_quantile(values, q)
+                worst = max(worst, abs(estimate - exact) / exact)
+        sizes = [len(row.latency_histogram['counts']) for row in AgentExecutionRollup.query.all()]
+        print(f"quantiles: worst relative error {worst:.2%} against exact p50/p95/p99, "
+              f"at most {max(sizes)} histogram buckets per agent")
+
+        metrics = AgentPerformanceMetrics.query.first()
+        print(f"sample metrics: {metrics.agent_name} executions={metrics.total_executions} "
+              f"success_rate={metrics.success_rate:.1f}% p50={metrics.typical_response_time_ms}ms "
+              f"peak_hour={metrics.peak_usage_hour} concurrency={metrics.recommended_concurrency}")
+
+        rollup.write_snapshot()
+        snapshot = SystemHealthSnapshot.query.order_by(SystemHealthSnapshot.id.desc()).first()
+        print(f"snapshot: {snapshot.executions_last_24h:,} executions in 24h, success "
+              f"{snapshot.system_success_rate:.1f}%, avg {snapshot.avg_system_response_time_ms:.0f}ms, "
+              f"status {snapshot.system_status}")
+
+        service = AnalyticsService()
+        for name in ('get_usage_trends', 'get_effectiveness_metrics'):
+            started = time.perf_counter()
+            result = getattr(service, name)()
+            print(f"{name}: {(time.perf_counter() - started) * 1000:.1f}ms, keys {sorted(result)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""
+Query plans and latencies of the dashboard queries over large history tables.
+
+Seeds the history tables inside the database engine (a recursive CTE on
+SQLite, generate_series on PostgreSQL), about 40% agent executions, 25%
+usage log, 20% coordination log, 10% executed opportunities and 5% AI
+agents, spread over the past year. It then prints each dashboard query's
+plan and median latency. With --compare the same queries run again after
+dropping the history indexes, which are recreated afterwards. Run
+``flask db upgrade`` against a PostgreSQL database first to benchmark the
+partitioned tables.
+
+Usage: python scripts/benchmark_history_queries.py [--rows 10000000] [--database-url URL]
+                                                    [--skip-seed] [--compare] [--runs 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+SEED_CHUNK = 1000000
+APPS = 1000
+AGENT_KEYS = 200
+CAMPAIGNS = 50000
+
+# table -> (share of --rows, columns, value expressions over the series value x); timestamps
+# step 7919 seconds per row modulo a year, so any share of the rows covers the whole year
+SEED_TABLES = {
+    'ai_agent': (0.05, 'app_id, agent_type, agent_name, usage_frequency, effectiveness_score, cost_estimate, '
+                       'created_at, updated_at',
+                 "x % {apps} + 1, 'openai', 'agent_' || x, x % 100, (x % 100) / 100.0, 1.0, {ago}, {ago}"),
+    'agent_usage_log': (0.25, 'agent_id, usage_date, usage_count, response_time_ms, success_rate, cost_incurred',
+                        "x % {agents} + 1, {day_ago}, 1 + x % 20, 100 + x % 900, 1.0, 0.01"),
+    'agent_execution': (0.40, 'agent_key, agent_name, execution_id, execution_status, execution_time_ms, cost_usd, '
+                              'started_at, completed_at, created_at',
+                        "'agent_' || (x % {agent_keys}), 'Agent', 'seed-' || x, "
+                        "CASE WHEN x % 33 = 0 THEN 'failed' ELSE 'success' END, 100 + x % 900, 0.002, "
+                        "{ago}, {ago}, {ago}"),
+    'agent_coordination_log': (0.20, 'campaign_id, source_agent, target_agent, coordination_type, success, '
+                                     'coordination_time_ms, coordinated_at',
+                               "'campaign_' || (x % {campaigns}), 'agent_' || (x % 7), 'agent_' || (x % 11), "
+                               "'sequential', {true}, x % 500, {ago}"),
+    'executed_opportunity': (0.10, 'opportunity_type, opportunity_id, title, status, executed_at, created_at',
+                             "'integration', 'opportunity_' || x, 'Opportunity', "
+                             "CASE x % 5 WHEN 0 THEN 'executed' WHEN 1 THEN 'automated' WHEN 2 THEN 'manual_required' "
+                             "WHEN 3 THEN 'done' ELSE 'failed' END, {ago}, {ago}")
+}
+
+
+def dashboard_queries(now: datetime):
+    """(name, SQL, parameters) of the queries behind the dashboards and history pages"""
+    day_ago = now - timedelta(days=1)
+    month_ago = now - timedelta(days=30)
+    return [
+        ('usage log of one agent, last 30 days',
+         'SELECT usage_date, sum(usage_count) FROM agent_usage_log WHERE agent_id = :agent_id '
+         'AND usage_date >= :since GROUP BY usage_date',
+         {'agent_id': 42, 'since': month_ago.date()}),
+        ('latest executions of one agent',
+         'SELECT id, execution_status, execution_time_ms, started_at FROM agent_execution '
+         'WHERE agent_key = :agent_key AND started_at >= :since ORDER BY started_at DESC LIMIT 50',
+         {'agent_key': 'agent_7', 'since': month_ago}),
+        ('failed executions of one agent',
+         "SELECT id, started_at FROM agent_execution WHERE agent_key = :agent_key "
+         "AND execution_status IN ('failed', 'timeout') AND started_at >= :since ORDER BY started_at DESC LIMIT 50",
+         {'agent_key': 'agent_7', 'since': month_ago}),
+        ('executions in the last 24 hours',
+         'SELECT count(*) FROM agent_execution WHERE started_at >= :since',
+         {'since': day_ago}),
+        ('coordination log of one campaign',
+         'SELECT source_agent, target_agent, coordinated_at FROM agent_coordination_log '
+         'WHERE campaign_id = :campaign_id ORDER BY coordinated_at',
+         {'campaign_id': 'campaign_123'}),
+        ('agents of one app',
+         'SELECT id, agent_type, agent_name FROM ai_agent WHERE app_id = :app_id',
+         {'app_id': 17}),
+        ('new agents in the last 24 hours (matrix)',
+         'SELECT count(*) FROM ai_agent WHERE created_at >= :since',
+         {'since': day_ago}),
+        ('execution history, newest page',
+         'SELECT id, title, status, executed_at FROM executed_opportunity '
+         'ORDER BY executed_at DESC, id DESC LIMIT 50',
+         {}),
+        ('execution history filtered by status',
+         'SELECT id, title, executed_at FROM executed_opportunity WHERE status = :status '
+         'ORDER BY executed_at DESC LIMIT 50',
+         {'status': 'failed'}),
+    ]
+
+
+def seed(db, rows: int):
+    from sqlalchemy import text
+
+    postgresql = db.engine.dialect.name == 'postgresql'
+    if postgresql:
+        ago = "(now() AT TIME ZONE 'utc') - (x * 7919 % 31536000) * interval '1 second'"
+        day_ago = 'current_date - CAST(x % 365 AS INTEGER)'
+        true = 'true'
+    else:
+        ago = "datetime('now', '-' || (x * 7919 % 31536000) || ' seconds')"
+        day_ago = "date('now', '-' || (x % 365) || ' days')"
+        true = '1'
+
+    db.session.execute(text(
+        "INSERT INTO replit_app (repl_id, name, language, is_active, created_at, updated_at) "
+        + ("SELECT 'repl_' || x, 'App ' || x, 'python', true, now(), now() FROM generate_series(1, :n) AS seq(x)"
+           if postgresql else
+           "WITH RECURSIVE seq(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM seq WHERE x < :n) "
+           "SELECT 'repl_' || x, 'App ' || x, 'python', 1, datetime('now'), datetime('now') FROM seq")
+    ), {'n': APPS})
+    db.session.commit()
+
+    agents = max(1, int(rows * SEED_TABLES['ai_agent'][0]))
+    for table, (share, columns, values) in SEED_TABLES.items():
+        count = max(1, int(rows * share))
+        values = values.format(apps=APPS, agents=agents, agent_keys=AGENT_KEYS, campaigns=CAMPAIGNS,
+                               ago=ago, day_ago=day_ago, true=true)
+        started = time.perf_counter()
+        for first in range(1, count + 1, SEED_CHUNK):
+            last = min(count, first + SEED_CHUNK - 1)
+            if postgresql:
+                statement = (f"INSERT INTO {table} ({columns}) SELECT {values} "
+                             f"FROM generate_series(CAST(:first AS BIGINT), :last) AS seq(x)")
+            else:
+                statement = (f"INSERT INTO {table} ({columns}) WITH RECURSIVE seq(x) AS "
+                             f"(SELECT :first UNION ALL SELECT x + 1 FROM seq WHERE x < :last) "
+                             f"SELECT {values} FROM seq")
+            db.session.execute(text(statement), {'first': first, 'last': last})
+            db.session.commit()
+        print(f"  seeded {count:,} rows into {table} in {time.perf_counter() - started:.1f}s")
+
+    if postgresql:
+        # VACUUM also sets the visibility map that index-only scans rely on
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.execute(text('VACUUM ANALYZE'))
+    else:
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+
+
+def plan(db, sql: str, params) -> str:
+    from sqlalchemy import text
+
+    if db.engine.dialect.name == 'postgresql':
+        rows = db.session.execute(text(f'EXPLAIN (ANALYZE, BUFFERS) {sql}'), params).scalars()
+        return '\n'.join(rows)
+    rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}'), params).all()
+    return '\n'.join(row[-1] for row in rows)
+
+
+def measure(db, queries, runs: int):
+    from sqlalchemy import text
+
+    results = {}
+    for name, sql, params in queries:
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            db.session.execute(text(sql), params).all()
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = statistics.median(timings)
+        print(f"\n{name}: median {results[name]:.2f}ms over {runs} runs")
+        print('  ' + plan(db, sql, params).replace('\n', '\n  '))
+    return results
+
+
+def history_indexes(db):
+    tables = {'replit_app', 'ai_agent', 'agent_usage_log', 'agent_execution', 'agent_coordination_log',
+              'executed_opportunity'}
+    return [index for table in db.metadata.sorted_tables if table.name in tables
+            for index in table.indexes if index.name and index.name.startswith('ix_')]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000000)
+    parser.add_argument('--database-url')
+    parser.add_argument('--skip-seed', action='store_true')
+    parser.add_argument('--compare', action='store_true', help='also run without the history indexes')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'history.db')}"
+    from sqlalchemy import text
+    from app import app, db
+    from services.history_partitions import HISTORY_TABLES, create_month_partitions, is_partitioned
+
+    with app.app_context():
+        db.create_all()
+        connection = db.session.connection()
+        if db.engine.dialect.name == 'postgresql':
+            today = date.today()
+            for table in HISTORY_TABLES:
+                if is_partitioned(connection, table):
+                    create_month_partitions(connection, table, date(today.year - 1, today.month, 1), today)
+                    print(f"{table} is partitioned by month")
+            db.session.commit()
+
+        if not args.skip_seed:
+            print(f"seeding {args.rows:,} rows into {db.engine.dialect.name}")
+            seed(db, args.rows)
+
+        queries = dashboard_queries(datetime.utcnow())
+        indexed = measure(db, queries, args.runs)
+        if args.compare:
+            indexes = history_indexes(db)
+            for index in indexes:
+                db.session.execute(text(f'DROP INDEX IF EXISTS {index.name}'))
+            db.session.commit()
+            # New connections, so no cached statement keeps a plan made with the indexes
+            db.session.remove()
+            db.engine.dispose()
+            print('\n--- without history indexes ---')
+            unindexed = measure(db, queries, args.runs)
+            print('\nrecreating indexes')
+            for index in indexes:
+                index.create(db.engine)
+
+        print('\nsummary (median ms)')
+        for name, _, _ in queries:
+            line = f"  {indexed[name]:10.2f}"
+            if args.compare:
+                line += f" {unindexed[name]:12.2f} without indexes"
+            print(f"{line}  {name}")
+
+
+if __name__ == '__main__':
+    main()
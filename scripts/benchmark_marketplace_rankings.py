@@ -0,0 +1,174 @@
+"""
+Benchmark the marketplace trending and recommendation pages at 100k agents:
+the old per-request queries against the precomputed rankings. Also checks
+that the trending list has no repeated agents, that its order matches the
+decayed scores computed straight from AgentAnalytics, and that a committed
+purchase shows up without a rebuild.
+
+Seeds a throwaway SQLite database; nothing touches the configured one.
+
+Usage: python scripts/benchmark_marketplace_rankings.py [--agents 100000] [--users 5000]
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+CATEGORIES = ['finance', 'healthcare', 'operations', 'marketing', 'security', 'legal', 'retail', 'energy']
+
+
+def seed(db, Agent, User, Purchase, AgentAnalytics, agents, users, developer_id):
+    rng = random.Random(11)
+    rows = [{
+        'name': f'Agent {i}', 'description': 'seeded', 'category': rng.choice(CATEGORIES),
+        'industry': 'general', 'pricing_model': 'subscription', 'price': 100.0,
+        'developer_id': developer_id, 'is_active': True, 'is_verified': rng.random() < 0.9,
+        'rating': round(rng.uniform(1, 5), 1)
+    } for i in range(agents)]
+    for start in range(0, len(rows), 5000):
+        db.session.execute(Agent.__table__.insert(), rows[start:start + 5000])
+
+    db.session.execute(User.__table__.insert(), [{
+        'username': f'buyer{i}', 'email': f'buyer{i}@example.com', 'password_hash': 'x', 'user_type': 'enterprise'
+    } for i in range(users)])
+    db.session.commit()
+
+    agent_ids = [row[0] for row in db.session.execute(db.select(Agent.id))]
+    user_ids = [row[0] for row in db.session.execute(db.select(User.id).where(User.user_type == 'enterprise'))]
+
+    purchases = []
+    for user_id in user_ids:
+        for agent_id in rng.sample(agent_ids, rng.randint(0, 8)):
+            purchases.append({'buyer_id': user_id, 'agent_id': agent_id, 'amount_paid': 100.0,
+                              'license_type': 'single', 'license_key': f'{user_id}-{agent_id}'})
+    db.session.execute(Purchase.__table__.insert(), purchases)
+
+    # A popular head of agents with activity every day, and a long tail with occasional downloads
+    today = datetime.utcnow().date()
+    analytics = []
+    popular = rng.sample(agent_ids, 2000)
+    for days_ago in range(21):
+        day = today - timedelta(days=days_ago)
+        for agent_id in popular + rng.sample(agent_ids, 3000):
+            analytics.append({'agent_id': agent_id, 'date': day, 'views': rng.randint(0, 200),
+                              'downloads': rng.randint(0, 40), 'revenue': 0.0})
+    for start in range(0, len(analytics), 10000):
+        db.session.execute(AgentAnalytics.__table__.insert(), analytics[start:start + 10000])
+    db.session.commit()
+    return user_ids, len(purchases), len(analytics)
+
+
+def legacy_trending(db, Agent, AgentAnalytics, limit):
+    last_week = datetime.utcnow() - timedelta(days=7)
+    return db.session.query(Agent).join(AgentAnalytics).filter(
+        AgentAnalytics.date >= last_week.date(), Agent.is_active == True, Agent.is_verified == True
+    ).order_by(AgentAnalytics.downloads.desc()).limit(limit).all()
+
+
+def legacy_recommendations(db, Agent, Purchase, User, user_id, limit):
+    if not User.query.get(user_id):
+        return []
+    categories = [row[0] for row in db.session.query(Agent.category).join(Purchase).filter(
+        Purchase.buyer_id == user_id).distinct().all()]
+    return Agent.query.filter(
+        Agent.category.in_(categories), Agent.is_active == True, Agent.is_verified == True,
+        ~Agent.id.in_(db.session.query(Purchase.agent_id).filter(Purchase.buyer_id == user_id))
+    ).order_by(Agent.rating.desc()).limit(limit).all()
+
+
+def expected_trending(db, Agent, AgentAnalytics, rankings, limit):
+    """Decayed scores recomputed from scratch, in the plain exp(-lambda * age) form"""
+    now = datetime.utcnow().timestamp()
+    scores = {}
+    rows = db.session.execute(
+        db.select(AgentAnalytics.agent_id, AgentAnalytics.date, AgentAnalytics.downloads)
+        .join(Agent).where(AgentAnalytics.date >= rankings.window_start, Agent.is_verified == True)
+    )
+    for agent_id, day, downloads in rows:
+        age = now - datetime.combine(day, datetime.min.time()).timestamp() - 12 * 3600
+        scores[agent_id] = scores.get(agent_id, 0.0) + downloads * math.exp(-rankings.decay_rate * age)
+    return [agent_id for agent_id, score in sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+            if score > 0][:limit]
+
+
+def timed(function, repeat=5):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--agents', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=5000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='marketplace-rankings-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'marketplace.db')}"
+    os.environ['MARKETPLACE_SEARCH_BACKEND'] = 'fts5'
+    os.environ['MARKETPLACE_RANKINGS_REFRESH_SECONDS'] = '0'
+
+    from agent_marketplace.app import (app, db, Agent, User, Purchase, AgentAnalytics,  # noqa: E402
+                                       AgentMarketplace, PaymentProcessor, rankings)
+
+    with app.app_context():
+        developer = User.query.filter_by(user_type='developer').first()
+        started = time.perf_counter()
+        user_ids, purchases, analytics = seed(db, Agent, User, Purchase, AgentAnalytics,
+                                              args.agents, args.users, developer.id)
+        print(f"Seeded {args.agents} agents, {purchases} purchases, {analytics} analytics rows "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        rankings.rebuild()
+        print(f"Rankings rebuild: {time.perf_counter() - started:.2f}s")
+
+        marketplace = AgentMarketplace()
+        legacy_time, legacy_rows = timed(lambda: legacy_trending(db, Agent, AgentAnalytics, 10))
+        trending_time, trending_rows = timed(lambda: marketplace.get_trending_agents(10))
+        legacy_ids = [agent.id for agent in legacy_rows]
+        trending_ids = [agent.id for agent in trending_rows]
+        print(f"\nTrending: legacy {legacy_time * 1000:.1f}ms "
+              f"({len(legacy_ids) - len(set(legacy_ids))} repeated agents), "
+              f"precomputed {trending_time * 1000:.1f}ms ({len(trending_ids) - len(set(trending_ids))} repeated)")
+        expected = expected_trending(db, Agent, AgentAnalytics, rankings, 10)
+        print(f"  order matches scores recomputed from AgentAnalytics: {trending_ids == expected}")
+
+        sample = random.Random(3).sample(user_ids, 200)
+        started = time.perf_counter()
+        for user_id in sample:
+            legacy_recommendations(db, Agent, Purchase, User, user_id, 5)
+        legacy_time = (time.perf_counter() - started) / len(sample)
+        started = time.perf_counter()
+        for user_id in sample:
+            marketplace.get_agent_recommendations(user_id, 5)
+        rankings_time = (time.perf_counter() - started) / len(sample)
+        print(f"Recommendations: legacy {legacy_time * 1000:.1f}ms, precomputed {rankings_time * 1000:.1f}ms per user")
+
+        # A purchase committed through the normal path reaches both pages without a rebuild
+        buyer = sample[0]
+        owned = rankings.user_purchases.get(buyer, set())
+        candidate = next(agent_id for agent_id in rankings.recommendations(buyer, 5) if agent_id not in owned)
+        rebuilds = rankings.stats['rebuilds']
+        before = rankings.trending_scores.get(candidate, 0.0)
+        started = time.perf_counter()
+        PaymentProcessor().process_purchase(buyer, candidate, 'pi_benchmark')
+        commit_ms = (time.perf_counter() - started) * 1000
+        print(f"\nPurchase applied incrementally: "
+              f"{candidate not in rankings.recommendations(buyer, 5) and rankings.trending_scores[candidate] > before}"
+              f" (rebuilds {rankings.stats['rebuilds'] - rebuilds}, purchase with update {commit_ms:.1f}ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark marketplace agent search at 100k agents: the old LIKE filter that
+loads every match, the FTS5 index and the in-process BM25 index, each paged
+20 results at a time. Also checks that the FTS5 and in-process backends
+rank the first page identically.
+
+Seeds a throwaway SQLite database; nothing touches the configured one.
+
+Usage: python scripts/benchmark_marketplace_search.py [--agents 100000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+QUERIES = ['risk', 'compliance monitoring', 'supply chain optimization', 'patient outcome prediction', 'w5']
+DOMAIN_WORDS = ['risk', 'compliance', 'monitoring', 'supply', 'chain', 'optimization', 'patient', 'outcome',
+                'prediction', 'financial', 'fraud', 'detection', 'inventory', 'forecasting', 'customer', 'support']
+CATEGORIES = ['finance', 'healthcare', 'operations', 'marketing', 'security', 'legal']
+
+
+def seed(db, Agent, count, developer_id):
+    rng = random.Random(7)
+    vocabulary = DOMAIN_WORDS + [f'w{i}' for i in range(5000)]
+    # Zipf-like word frequencies so common and rare terms both occur
+    weights = [1.0 / (rank + 1) for rank in range(len(vocabulary))]
+
+    rows = []
+    for i in range(count):
+        rows.append({
+            'name': ' '.join(rng.choices(vocabulary, weights, k=rng.randint(2, 5))).title(),
+            'description': ' '.join(rng.choices(vocabulary, weights, k=rng.randint(15, 60))),
+            'category': rng.choice(CATEGORIES),
+            'industry': rng.choice(CATEGORIES),
+            'pricing_model': 'subscription',
+            'price': round(rng.uniform(0, 20000), 2),
+            'developer_id': developer_id,
+            'is_active': True,
+            'is_verified': rng.random() < 0.9,
+            'rating': round(rng.uniform(1, 5), 1),
+            'download_count': rng.randint(0, 5000)
+        })
+        if len(rows) == 5000:
+            db.session.execute(Agent.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(Agent.__table__.insert(), rows)
+    db.session.commit()
+
+
+def legacy_search(db, Agent, query):
+    return Agent.query.filter(
+        Agent.is_active == True, Agent.is_verified == True,
+        db.or_(Agent.name.contains(query), Agent.description.contains(query))
+    ).order_by(Agent.rating.desc(), Agent.download_count.desc()).all()
+
+
+def timed(function, repeat=5):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--agents', type=int, default=100000)
+    parser.add_argument('--pages', type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='marketplace-search-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'marketplace.db')}"
+    os.environ['MARKETPLACE_SEARCH_BACKEND'] = 'fts5'
+
+    from agent_marketplace.app import app, db, Agent, User, search_index  # noqa: E402
+    from agent_marketplace.search_index import AgentSearchIndex  # noqa: E402
+
+    with app.app_context():
+        developer = User.query.filter_by(user_type='developer').first()
+        started = time.perf_counter()
+        seed(db, Agent, args.agents, developer.id)
+        print(f"Seeded {args.agents} agents (FTS5 maintained by triggers) in {time.perf_counter() - started:.1f}s")
+
+        python_index = AgentSearchIndex(db, Agent, backend='python')
+        started = time.perf_counter()
+        python_index.setup()
+        print(f"Built in-process index over {len(python_index.index)} agents in {time.perf_counter() - started:.1f}s")
+
+        print(f"\n{'query':<28} {'LIKE (all rows)':>18} {'FTS5 page':>12} {'python page':>12} {'next pages':>11}")
+        for query in QUERIES:
+            legacy_time, legacy_rows = timed(lambda: legacy_search(db, Agent, query), repeat=2)
+            fts_time, fts_page = timed(lambda: search_index.search(query, limit=20))
+            python_time, python_page = timed(lambda: python_index.search(query, limit=20))
+
+            fts_ids = [agent.id for agent in fts_page.agents]
+            python_ids = [agent.id for agent in python_page.agents]
+            if fts_ids != python_ids:
+                print(f"  ranking mismatch for {query!r}: {fts_ids[:5]} vs {python_ids[:5]}")
+
+            cursor = fts_page.next_cursor
+            page_times = []
+            seen = set(fts_ids)
+            for _ in range(args.pages):
+                if not cursor:
+                    break
+                started = time.perf_counter()
+                page = search_index.search(query, limit=20, cursor=cursor)
+                page_times.append(time.perf_counter() - started)
+                page_ids = {agent.id for agent in page.agents}
+                if page_ids & seen:
+                    print(f"  pagination repeated agents for {query!r}")
+                seen |= page_ids
+                cursor = page.next_cursor
+            next_ms = sum(page_times) / len(page_times) * 1000 if page_times else 0.0
+
+            print(f"{query:<28} {legacy_time * 1000:>10.1f}ms/{len(legacy_rows):<6} "
+                  f"{fts_time * 1000:>10.1f}ms {python_time * 1000:>10.1f}ms {next_ms:>9.1f}ms")
+
+        agent = Agent.query.order_by(Agent.id.desc()).first()
+        agent.name = 'Quasar Telemetry Agent'
+        started = time.perf_counter()
+        db.session.commit()
+        commit_ms = (time.perf_counter() - started) * 1000
+        fts_hit = [a.id for a in search_index.search('quasar').agents] == [agent.id] if agent.is_verified else True
+        python_hit = [a.id for a in python_index.search('quasar').agents] == [agent.id] if agent.is_verified else True
+        print(f"\nRenamed agent found by FTS5: {fts_hit}, by in-process index: {python_hit} "
+              f"(commit with both index updates: {commit_ms:.1f}ms)")
+
+
+if __name__ == '__main__':
+    main()
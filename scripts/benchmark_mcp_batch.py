@@ -0,0 +1,150 @@
+"""
+Run a large agent tool plan through batch_tool_execution against a local
+MCP backend that slows down when overloaded. Each call takes ``delay``
+seconds up to ``capacity`` concurrent calls, and quadratically longer
+beyond that. The plan mixes repeated lookups with dependent follow-up
+calls.
+
+Compares the old behaviour (every call fired at once through
+asyncio.gather, duplicates included, dependencies ignored) with the batch
+planner (identical calls merged, dependencies respected, per-tool
+concurrency held at the backend's capacity). Also checks that no dependent
+call started before its dependency finished, and how soon the first
+streamed result arrives.
+
+Usage: python scripts/benchmark_mcp_batch.py [--calls 600] [--capacity 20] [--delay 0.02]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from mcp_echo_server import EchoServer, build_app  # noqa: E402
+from services.mcp_integration_service import MCPIntegrationService, MCPTool, MCPTransport  # noqa: E402
+
+TOOLS = ['crm_lookup', 'enrich_company', 'draft_email']
+
+
+class OverloadedBackend(EchoServer):
+    """Echo server whose per-call latency grows with load past ``capacity``"""
+
+    def __init__(self, delay, capacity):
+        super().__init__(0.0)
+        self.base_delay = delay
+        self.capacity = capacity
+        self.in_flight = 0
+        self.peak = 0
+        self.tool_calls = 0
+        self.spans = {}
+
+    async def handle(self, message, connection):
+        if message.get('method') != 'tools/call':
+            return await super().handle(message, connection)
+        self.tool_calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        started = time.perf_counter()
+        try:
+            await asyncio.sleep(self.base_delay * max(1.0, self.in_flight / self.capacity) ** 2)
+            return await super().handle(message, connection)
+        finally:
+            self.in_flight -= 1
+            call_id = (message.get('params') or {}).get('arguments', {}).get('call')
+            self.spans.setdefault(call_id, (started, time.perf_counter()))
+
+
+def build_plan(calls, seed=5):
+    """Company lookups (many repeated), each followed by enrichment and an email depending on it"""
+    rng = random.Random(seed)
+    plan = []
+    companies = [f'company-{i}' for i in range(calls // 6)]
+    while len(plan) < calls:
+        company = rng.choice(companies)
+        lookup_id = f'lookup-{len(plan)}'
+        plan.append({'id': lookup_id, 'tool_name': 'crm_lookup',
+                     'parameters': {'company': company, 'call': f'lookup:{company}'}})
+        enrich_id = f'enrich-{len(plan)}'
+        plan.append({'id': enrich_id, 'tool_name': 'enrich_company', 'depends_on': [lookup_id],
+                     'parameters': {'company': company, 'call': f'enrich:{company}'}})
+        plan.append({'id': f'email-{len(plan)}', 'tool_name': 'draft_email', 'depends_on': [enrich_id],
+                     'parameters': {'company': company, 'variant': rng.randint(0, 3),
+                                    'call': f'email:{company}:{len(plan)}'}})
+    return plan[:calls]
+
+
+async def run(args):
+    backend = OverloadedBackend(args.delay, args.capacity)
+    runner = web.AppRunner(build_app(backend))
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    service = MCPIntegrationService()
+    for name in TOOLS:
+        service.register_tool(MCPTool(
+            name=name, description='Overloaded backend', input_schema={'type': 'object'},
+            transport=MCPTransport.WEBSOCKET, endpoint=f'ws://127.0.0.1:{port}/mcp',
+            metadata={'max_concurrency': max(1, args.capacity // len(TOOLS))}
+        ))
+    plan = build_plan(args.calls)
+
+    try:
+        await service.call_tool('crm_lookup', {'warmup': True})
+
+        backend.tool_calls = backend.peak = 0
+        started = time.perf_counter()
+        legacy = await asyncio.gather(*(service.call_tool(call['tool_name'], call['parameters']) for call in plan))
+        legacy_elapsed = time.perf_counter() - started
+        legacy_calls, legacy_peak = backend.tool_calls, backend.peak
+
+        backend.tool_calls = backend.peak = 0
+        backend.spans = {}
+        first_result = None
+        results = [None] * len(plan)
+        started = time.perf_counter()
+        async for index, result in service.stream_tool_execution(plan):
+            if first_result is None:
+                first_result = time.perf_counter() - started
+            results[index] = result
+        planned_elapsed = time.perf_counter() - started
+
+        by_id = {call['id']: call for call in plan}
+        violations = 0
+        for call in plan:
+            for dependency in call.get('depends_on', ()):
+                upstream = backend.spans[by_id[dependency]['parameters']['call']]
+                downstream = backend.spans[call['parameters']['call']]
+                if downstream[0] < upstream[1]:
+                    violations += 1
+
+        print(f"{len(plan)} planned calls, {len(service.batch_planner.plan(plan).calls)} distinct, "
+              f"backend capacity {args.capacity} at {args.delay * 1000:.0f}ms")
+        print(f"  gather everything: {legacy_elapsed:.2f}s, {legacy_calls} backend calls, "
+              f"peak {legacy_peak} in flight, {sum(1 for r in legacy if r.get('success'))} ok")
+        print(f"  batch planner:     {planned_elapsed:.2f}s, {backend.tool_calls} backend calls, "
+              f"peak {backend.peak} in flight, {sum(1 for r in results if r and r.get('success'))} ok, "
+              f"first result after {first_result * 1000:.0f}ms, dependency violations {violations}")
+    finally:
+        await asyncio.get_running_loop().run_in_executor(None, service.close)
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=600)
+    parser.add_argument('--capacity', type=int, default=20)
+    parser.add_argument('--delay', type=float, default=0.02)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Throughput of MCPIntegrationService.batch_tool_execution against the local
+echo MCP server (scripts/mcp_echo_server.py) over HTTP, WebSocket and stdio.
+
+Pooled transports are compared with opening a fresh connection (or
+subprocess) per call. The pooled run also reports how many connections and
+server processes served the batch: WebSocket and stdio calls should all
+share one connection, pipelined by JSON-RPC id.
+
+Usage: python scripts/benchmark_mcp_transports.py [--calls 1000] [--delay 0.01] [--fresh-calls 100]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from mcp_echo_server import EchoServer, build_app  # noqa: E402
+from services.mcp_integration_service import MCPIntegrationService, MCPTool, MCPTransport  # noqa: E402
+from services.mcp_transports import TRANSPORTS  # noqa: E402
+
+
+async def fresh_connection_calls(transport, endpoint, calls, concurrency):
+    """Baseline: connect, initialize, call and close for every call"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            connection = TRANSPORTS[transport](endpoint)
+            try:
+                return await connection.request('tools/call', {'name': 'echo', 'arguments': {'i': i}})
+            finally:
+                await connection.close()
+
+    return await asyncio.gather(*(one(i) for i in range(calls)), return_exceptions=True)
+
+
+async def run(args):
+    server = EchoServer(args.delay)
+    runner = web.AppRunner(build_app(server))
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    echo_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mcp_echo_server.py')
+    endpoints = {
+        'http': f'http://127.0.0.1:{port}/mcp',
+        'websocket': f'ws://127.0.0.1:{port}/mcp',
+        'stdio': f'{sys.executable} {echo_script} --delay {args.delay}'
+    }
+
+    service = MCPIntegrationService()
+    for transport, endpoint in endpoints.items():
+        service.register_tool(MCPTool(
+            name=f'echo_{transport}', description='Local echo server', input_schema={'type': 'object'},
+            transport=MCPTransport(transport), endpoint=endpoint
+        ))
+
+    try:
+        print(f"{args.calls} calls per batch, {args.delay * 1000:.0f}ms server time per call")
+        for transport, endpoint in endpoints.items():
+            tool_calls = [{'tool_name': f'echo_{transport}', 'parameters': {'i': i}} for i in range(args.calls)]
+            # Warm up so the handshake and process start are not part of the timing
+            await service.call_tool(f'echo_{transport}', {'warmup': True})
+
+            started = time.perf_counter()
+            results = await service.batch_tool_execution(tool_calls)
+            elapsed = time.perf_counter() - started
+
+            ok = [result for result in results if result.get('success')]
+            echoed = all(result['result']['structuredContent']['arguments'] == call['parameters']
+                         for result, call in zip(results, tool_calls) if result.get('success'))
+            connections = {result['result']['structuredContent']['connection'] for result in ok}
+            processes = {result['result']['structuredContent']['pid'] for result in ok}
+
+            started = time.perf_counter()
+            fresh = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: asyncio.run(fresh_connection_calls(transport, endpoint, args.fresh_calls, 20))
+            )
+            fresh_elapsed = time.perf_counter() - started
+            fresh_ok = sum(1 for result in fresh if not isinstance(result, BaseException))
+
+            print(f"  {transport:<10} pooled {len(ok) / elapsed:>8.0f} calls/s ({len(ok)}/{args.calls} ok, "
+                  f"arguments echoed {echoed}, {len(connections)} connections, {len(processes)} processes); "
+                  f"fresh connection per call {fresh_ok / fresh_elapsed:>6.0f} calls/s")
+
+        stats = service.get_connection_stats()
+        connects = {key.split(':', 1)[0]: value['connects'] for key, value in stats.items()}
+        print(f"Pooled connects per transport over the whole run: {connects}")
+    finally:
+        # The echo server shares this loop, so close from a worker thread to let it answer
+        await asyncio.get_running_loop().run_in_executor(None, service.close)
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=1000)
+    parser.add_argument('--fresh-calls', type=int, default=100)
+    parser.add_argument('--delay', type=float, default=0.01)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
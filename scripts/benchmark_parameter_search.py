@@ -0,0 +1,60 @@
+"""
+Benchmark ParallelParameterSearch: a full momentum grid search and walk-forward
+run with 1 worker (in-process) and with N pool workers on the same shared
+prices, checking that both pick the same parameters.
+
+Usage: python scripts/benchmark_parameter_search.py [--years 5] [--assets 100] [--workers 4]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.algorithmic_trading_developer import AlgorithmicTradingDeveloper, TradingStrategy  # noqa: E402
+from services.parameter_search import ParallelParameterSearch, SharedPriceArray  # noqa: E402
+from services.vectorized_backtest import price_matrix  # noqa: E402
+from check_backtest_parity import make_algorithm  # noqa: E402
+
+
+def run(search, prices, space):
+    started = time.perf_counter()
+    grid = search.grid_search('momentum', prices, space)
+    walk_forward = search.walk_forward('momentum', prices, space)
+    return time.perf_counter() - started, grid['best_parameters'], walk_forward['average_out_of_sample_sharpe']
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--assets', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    developer = AlgorithmicTradingDeveloper()
+    algorithm = make_algorithm(TradingStrategy.MOMENTUM, [f'A{i:03d}' for i in range(args.assets)])
+    spec = {'start_date': datetime(2015, 1, 1), 'end_date': datetime(2015 + args.years, 1, 1)}
+    data = asyncio.run(developer._prepare_backtesting_data(spec, algorithm.asset_universe))
+    space = asyncio.run(developer._define_parameter_space(algorithm, spec))
+
+    with SharedPriceArray(price_matrix(data, algorithm.asset_universe)) as prices:
+        print(f"prices: {prices.shape[0]} assets x {prices.shape[1]} days")
+        results = {}
+        for workers in sorted({1, args.workers}):
+            search = ParallelParameterSearch(max_workers=workers)
+            seconds, best, oos = run(search, prices, space)
+            cached_seconds, _, _ = run(search, prices, space)
+            search.close()
+            results[workers] = best
+            print(f"{workers:>2} worker(s): {seconds:6.2f}s ({search.stats['evaluations']} backtests), "
+                  f"cached rerun {cached_seconds:.3f}s, best {best}, walk-forward OOS sharpe {oos:.3f}")
+
+    assert len({tuple(sorted(best.items())) for best in results.values()}) == 1, 'worker counts disagree'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""
+Portfolio optimization at scale: QuantitativeAnalysisExpert's mean-variance,
+risk parity, Black-Litterman and efficient frontier steps on a synthetic
+factor-model return history, against the previous implementations (kept
+below as ``legacy_*``), which invert the covariance matrix once per step and
+once per frontier point.
+
+Parity is checked on the outputs: mean-variance and Black-Litterman weights
+and the frontier should agree to rounding. The old risk parity stopped after
+a fixed 50 fixed-point iterations, so its weights are compared with the new
+solver's, and both are scored by how far their risk contributions are from
+equal. With correlated assets a risk contribution can turn negative during
+the old iteration, and its weights then become NaN, so risk parity is also
+compared on a long-only market model (every asset loading positively on the
+factors) where the old iteration stays well defined.
+
+Usage: python scripts/benchmark_portfolio_core.py [--assets 2000] [--periods 2520] [--factors 20]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.portfolio_core import PortfolioCore  # noqa: E402
+from services.quantitative_analysis_expert import QuantitativeAnalysisExpert  # noqa: E402
+
+
+def legacy_mean_variance(expected_returns, cov_matrix, risk_aversion=3.0):
+    inv_cov = np.linalg.inv(cov_matrix)
+    numerator = inv_cov @ expected_returns.reshape(-1, 1)
+    weights = numerator.flatten() / (risk_aversion * np.sum(numerator))
+    weights = np.maximum(weights, 0.0)
+    weights = np.minimum(weights, 1.0)
+    return weights / np.sum(weights)
+
+
+def legacy_risk_parity(cov_matrix):
+    n_assets = cov_matrix.shape[0]
+    weights = np.ones(n_assets) / n_assets
+    for _ in range(50):
+        portfolio_vol = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
+        contrib = weights * np.dot(cov_matrix, weights) / portfolio_vol
+        weights = weights * (np.ones(n_assets) / n_assets / contrib) ** 0.5
+        weights = weights / np.sum(weights)
+    return weights
+
+
+def legacy_black_litterman(returns):
+    cov_matrix = np.cov(returns.T)
+    n_assets = cov_matrix.shape[0]
+    market_weights = np.ones(n_assets) / n_assets
+    risk_aversion = 3.0
+    pi = risk_aversion * np.dot(cov_matrix, market_weights)
+    tau = 0.05
+    bl_cov = np.linalg.inv(np.linalg.inv(tau * cov_matrix))
+    bl_returns = np.dot(bl_cov, np.dot(np.linalg.inv(tau * cov_matrix), pi))
+    inv_cov = np.linalg.inv(cov_matrix)
+    bl_weights = np.dot(inv_cov, bl_returns) / (risk_aversion * np.dot(np.ones(n_assets), np.dot(inv_cov, bl_returns)))
+    return bl_weights / np.sum(bl_weights)
+
+
+def legacy_frontier(expected_returns, cov_matrix):
+    points = []
+    for target_return in np.linspace(np.min(expected_returns), np.max(expected_returns), 20):
+        inv_cov = np.linalg.inv(cov_matrix)
+        ones = np.ones(len(expected_returns))
+        A = np.dot(expected_returns.T, np.dot(inv_cov, expected_returns))
+        B = np.dot(expected_returns.T, np.dot(inv_cov, ones))
+        C = np.dot(ones.T, np.dot(inv_cov, ones))
+        lambda_val = (C * target_return - B) / (A * C - B ** 2)
+        gamma_val = (A - B * target_return) / (A * C - B ** 2)
+        weights = lambda_val * np.dot(inv_cov, expected_returns) + gamma_val * np.dot(inv_cov, ones)
+        points.append((np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights))), target_return))
+    return points
+
+
+def factor_returns(assets, periods, factors, seed=11, positive=False):
+    """Daily returns from a few market factors plus idiosyncratic noise of varying size"""
+    rng = np.random.default_rng(seed)
+    loadings = rng.normal(0.0, 1.0, (assets, factors)) * np.linspace(1.0, 0.2, factors)
+    if positive:
+        loadings = np.abs(loadings)
+    factor_moves = rng.normal(0.0, 0.008, (periods, factors))
+    noise = rng.normal(0.0, 1.0, (periods, assets)) * rng.uniform(0.005, 0.03, assets)
+    drift = rng.normal(0.0003, 0.0004, assets)
+    return drift + factor_moves @ loadings.T + noise
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def dispersion(core, weights):
+    """Largest relative deviation of a risk contribution from the equal share"""
+    return float(np.max(np.abs(core.risk_contributions(weights) * len(weights) - 1.0)))
+
+
+def relative_error(new, old):
+    new, old = np.asarray(new, dtype=float), np.asarray(old, dtype=float)
+    return float(np.max(np.abs(new - old)) / max(np.max(np.abs(old)), 1e-300))
+
+
+async def run(args):
+    returns = factor_returns(args.assets, args.periods, args.factors)
+    expert = QuantitativeAnalysisExpert()
+    cov_matrix = await expert._estimate_covariance_matrix(returns)
+    expected_returns = np.mean(returns, axis=0) * 252
+    portfolio_data = {'views': {'asset_0': 0.1}}
+
+    print(f"{args.assets} assets, {args.periods} periods, {args.factors} factors")
+
+    legacy = {}
+    legacy['mean-variance'], legacy_mv = timed(legacy_mean_variance, expected_returns, cov_matrix)
+    with np.errstate(invalid='ignore'):
+        legacy['risk parity'], legacy_rp = timed(legacy_risk_parity, cov_matrix)
+    legacy['black-litterman'], legacy_bl = timed(legacy_black_litterman, returns)
+    legacy['frontier'], legacy_ef = timed(legacy_frontier, expected_returns, cov_matrix)
+
+    started = time.perf_counter()
+    new = {
+        'mean-variance': await expert._mean_variance_optimization(expected_returns, cov_matrix, portfolio_data),
+        'risk parity': await expert._risk_parity_optimization(cov_matrix, portfolio_data),
+        'black-litterman': await expert._black_litterman_optimization(returns, portfolio_data),
+        'frontier': await expert._generate_efficient_frontier(expected_returns, cov_matrix)
+    }
+    new_elapsed = time.perf_counter() - started
+
+    legacy_elapsed = legacy_mv + legacy_rp + legacy_bl + legacy_ef
+    print(f"  legacy: mean-variance {legacy_mv:.2f}s, risk parity {legacy_rp:.2f}s, "
+          f"black-litterman {legacy_bl:.2f}s, frontier {legacy_ef:.2f}s, total {legacy_elapsed:.2f}s")
+    print(f"  new:    all four steps {new_elapsed:.2f}s ({legacy_elapsed / new_elapsed:.1f}x)")
+
+    core = PortfolioCore(cov_matrix)
+    started = time.perf_counter()
+    _, solver = core.risk_parity_weights()
+    print(f"  risk parity solver alone {time.perf_counter() - started:.2f}s: {solver['iterations']} Newton iterations, "
+          f"{solver['cg_iterations']} CG iterations, converged {solver['converged']}")
+
+    print("Parity (max relative difference against legacy):")
+    print(f"  mean-variance weights    {relative_error(new['mean-variance'], legacy['mean-variance']):.2e}")
+    print(f"  black-litterman weights  {relative_error(new['black-litterman'], legacy['black-litterman']):.2e}")
+    print(f"  frontier volatilities    {relative_error([p[0] for p in new['frontier']], [p[0] for p in legacy['frontier']]):.2e}")
+    print(f"  frontier returns         {relative_error([p[1] for p in new['frontier']], [p[1] for p in legacy['frontier']]):.2e}")
+    print(f"  risk parity weights      {relative_error(new['risk parity'], legacy['risk parity']):.2e}")
+    print(f"  risk contribution error  legacy {dispersion(core, legacy['risk parity']):.2e}, "
+          f"new {dispersion(core, new['risk parity']):.2e}")
+
+    positive_cov = await expert._estimate_covariance_matrix(
+        factor_returns(args.assets, args.periods, args.factors, positive=True))
+    positive_core = PortfolioCore(positive_cov)
+    legacy_weights = legacy_risk_parity(positive_cov)
+    new_weights = await expert._risk_parity_optimization(positive_cov, portfolio_data)
+    print("Risk parity on a long-only market model:")
+    print(f"  weights                  {relative_error(new_weights, legacy_weights):.2e}")
+    print(f"  risk contribution error  legacy {dispersion(positive_core, legacy_weights):.2e}, "
+          f"new {dispersion(positive_core, new_weights):.2e}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--assets', type=int, default=2000)
+    parser.add_argument('--periods', type=int, default=2520)
+    parser.add_argument('--factors', type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Repl discovery and file fetching against a local stub GraphQL server
+(scripts/replit_graphql_stub.py) that answers after a fixed delay.
+
+Runs discover_apps, then fetches every repl's files one query at a time
+(get_app_files, the serial path) and through get_files_for_repls, which
+batches repls into aliased queries on a bounded worker pool. Reports the
+wall clock and request counts of each run. Finally queues retryable
+failures on the stub and checks the batched fetch still returns every
+repl's files after backing off.
+
+Usage: python scripts/benchmark_replit_discovery.py [--repls 200] [--delay 0.05] [--workers 8] [--batch-size 10]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from replit_graphql_stub import StubGraphQL, serve  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repls', type=int, default=200)
+    parser.add_argument('--delay', type=float, default=0.05, help='seconds each stub request takes')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=10)
+    args = parser.parse_args()
+
+    stub = StubGraphQL(repls=args.repls, delay=args.delay)
+    server, url = serve(stub)
+
+    database = os.path.join(tempfile.mkdtemp(), 'discovery.db')
+    os.environ.update({
+        'DATABASE_URL': f'sqlite:///{database}',
+        'REPLIT_TOKEN': 'benchmark',
+        'REPLIT_GRAPHQL_URL': url,
+        'REPLIT_MAX_CONCURRENCY': str(args.workers),
+        'REPLIT_BATCH_SIZE': str(args.batch_size),
+        'REPLIT_REQUESTS_PER_SECOND': '0'
+    })
+    from app import app, db
+    from services.replit_service import ReplitService
+
+    logging.getLogger('urllib3').setLevel(logging.WARNING)
+
+    with app.app_context():
+        db.create_all()
+        service = ReplitService()
+        service.client.backoff_base = 0.01
+
+        discovered = service.discover_apps()
+        assert discovered == args.repls, discovered
+        print(f"discover_apps: {discovered} repls, {service.last_run_stats}")
+
+        started = time.perf_counter()
+        serial = {repl_id: service.get_app_files(repl_id) for repl_id in stub.repl_ids}
+        serial_seconds = time.perf_counter() - started
+        print(f"get_app_files x {args.repls}: {serial_seconds:.2f}s, {args.repls} requests")
+
+        requests_before = stub.requests
+        batched = service.get_files_for_repls(stub.repl_ids)
+        stats = service.last_run_stats
+        print(f"get_files_for_repls: {stats['wall_clock_seconds']:.2f}s, {stub.requests - requests_before} requests "
+              f"of up to {args.batch_size} repls, peak {stub.peak_in_flight} in flight "
+              f"({serial_seconds / stats['wall_clock_seconds']:.1f}x faster)")
+        assert batched == serial
+        assert stub.peak_in_flight <= args.workers
+
+        stub.fail_next(3, status=503)
+        recovered = service.get_files_for_repls(stub.repl_ids)
+        stats = service.last_run_stats
+        print(f"get_files_for_repls with 3 queued 503s: {stats['wall_clock_seconds']:.2f}s, "
+              f"{stats['retries']} retries, {stats['failures']} failures")
+        assert recovered == serial and stats['retries'] == 3 and stats['failures'] == 0
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Time create_complete_story_package and generate_multimedia_content against
+provider clients that answer after a fixed delay, and compare the wall time
+with the sum of the step latencies (what running the steps one after another
+costs).
+
+Then runs several story packages at once with a low OpenAI cap and checks
+that no more requests than the cap are ever in flight.
+
+Usage: python scripts/benchmark_story_package.py [--delay 0.2] [--packages 6] [--openai-cap 2]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.generation_graph import ProviderLimits  # noqa: E402
+from services.multimedia_generation_service import MultimediaGenerationService  # noqa: E402
+
+
+class InFlight:
+    """Counts concurrent calls and remembers the peak"""
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc):
+        with self.lock:
+            self.current -= 1
+
+
+class DelayedOpenAI:
+    """Chat completions that answer after ``delay`` seconds"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.in_flight = InFlight()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        with self.in_flight:
+            time.sleep(self.delay)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=f"{kwargs['model']} output"))],
+            usage=SimpleNamespace(prompt_tokens=500, completion_tokens=1000)
+        )
+
+
+class DelayedSession:
+    """HTTP session whose POSTs answer after ``delay`` seconds"""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        assert timeout, "provider requests must carry a timeout"
+        time.sleep(self.delay)
+        return SimpleNamespace(raise_for_status=lambda: None,
+                               json=lambda: {"task_id": "task", "data": [{"url": url}]})
+
+
+def make_service(delay, openai_cap=None):
+    service = MultimediaGenerationService()
+    service.suno_api_key = service.ideogram_api_key = "benchmark"
+    service.openai_client = DelayedOpenAI(delay)
+    service.http = DelayedSession(delay)
+    if openai_cap:
+        service.limits = ProviderLimits({'openai': (openai_cap, 30.0)})
+    return service
+
+
+def print_timings(name, timings):
+    print(f"\n{name}: {timings['wall_ms']:.0f}ms wall, {timings['sequential_ms']:.0f}ms of steps, "
+          f"critical path {' -> '.join(timings['critical_path'])} {timings['critical_path_ms']:.0f}ms")
+    for step, timing in timings['steps'].items():
+        print(f"  {step:18} {timing['status']:8} starts {timing['started_ms']:7.1f}ms, "
+              f"takes {timing['duration_ms']:7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--delay', type=float, default=0.2, help='seconds each provider call takes')
+    parser.add_argument('--packages', type=int, default=6)
+    parser.add_argument('--openai-cap', type=int, default=2)
+    args = parser.parse_args()
+
+    service = make_service(args.delay)
+    package = service.create_complete_story_package("A lighthouse keeper befriends a storm")
+    assert package['success'] and not package['errors'], package['errors']
+    print_timings('story package', package['timings'])
+
+    bundle = service.generate_multimedia_content("calm piano", "a lighthouse at dusk", title="Keeper")
+    assert bundle['success'], bundle['errors']
+    print_timings('music + image', bundle['timings'])
+
+    capped = make_service(args.delay, openai_cap=args.openai_cap)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.packages) as callers:
+        packages = list(callers.map(capped.create_complete_story_package,
+                                    [f"story {n}" for n in range(args.packages)]))
+    elapsed = time.perf_counter() - started
+    assert all(package['success'] for package in packages)
+    peak = capped.openai_client.in_flight.peak
+    print(f"\n{args.packages} concurrent story packages with an OpenAI cap of {args.openai_cap}: "
+          f"{elapsed:.2f}s, peak {peak} requests in flight")
+    assert peak <= args.openai_cap
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+Per-tick cost of QuantitativeAnalysisExpert's technical, mean reversion and
+ML-feature signals as a price history grows one price at a time, against
+the previous implementations (kept below as ``legacy_*``), which rebuild
+returns and RSI inputs from the full history on every call.
+
+Also checks parity: the streaming indicators, the batch functions over a
+(series, periods) array and the legacy formulas must agree at every tick.
+
+Usage: python scripts/benchmark_technical_indicators.py [--history 5000] [--ticks 500] [--assets 200]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services import technical_indicators as ti  # noqa: E402
+from services.quantitative_analysis_expert import QuantitativeAnalysisExpert  # noqa: E402
+
+
+def legacy_rsi(prices, window=14):
+    if len(prices) < window + 1:
+        return 50.0
+    deltas = [prices[i] - prices[i-1] for i in range(1, len(prices))]
+    gains = [d if d > 0 else 0 for d in deltas[-window:]]
+    losses = [-d if d < 0 else 0 for d in deltas[-window:]]
+    avg_gain = np.mean(gains) if gains else 0
+    avg_loss = np.mean(losses) if losses else 0
+    if avg_loss == 0:
+        return 100.0
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+def legacy_signals(price_data):
+    """The three per-asset computations as written before the indicator streams"""
+    sma_20 = np.mean(price_data[-20:])
+    sma_50 = np.mean(price_data[-50:])
+
+    returns = [(price_data[i] - price_data[i-1])/price_data[i-1] for i in range(1, len(price_data))]
+    recent_returns = returns[-10:]
+    cumulative_return = np.prod([1 + r for r in recent_returns]) - 1
+    volatility_10 = np.std(recent_returns)
+
+    returns = [(price_data[i] - price_data[i-1])/price_data[i-1] for i in range(1, len(price_data))]
+    features = {
+        'volatility': np.std(returns[-20:]),
+        'momentum': (price_data[-1] - price_data[-11]) / price_data[-11],
+        'rsi': legacy_rsi(price_data),
+        'mean_reversion': (price_data[-1] - np.mean(price_data[-20:])) / np.std(price_data[-20:])
+    }
+    return sma_20, sma_50, cumulative_return, volatility_10, features
+
+
+def price_paths(assets, periods, seed=3):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, (assets, periods)), axis=1))
+
+
+async def expert_signals(expert, signal_data):
+    await expert._calculate_technical_indicators(signal_data)
+    await expert._generate_mean_reversion_signals(signal_data)
+    await expert._generate_ml_signals(signal_data)
+
+
+def check_parity(paths):
+    """Largest relative difference between streaming, batch and legacy values over every tick"""
+    batch = {
+        'sma_20': ti.rolling_mean(paths, 20),
+        'sma_50': ti.rolling_mean(paths, 50),
+        'zscore_20': ti.rolling_zscore(paths, 20),
+        'rsi_14': ti.rsi(paths, 14),
+        'volatility_20': ti.rolling_std(ti.simple_returns(paths)[:, 1:], 20),
+        'ema_12': ti.ema(paths, 12)
+    }
+    errors = {name: 0.0 for name in list(batch) + ['legacy']}
+
+    for row, path in enumerate(paths):
+        stream = QuantitativeAnalysisExpert._signal_indicators()
+        ema = ti.EMA(12)
+        prices = path.tolist()
+        for tick, price in enumerate(prices):
+            stream.update(price)
+            ema.update(price)
+            streamed = {
+                'sma_20': stream['sma_20'], 'sma_50': stream['sma_50'], 'zscore_20': stream['zscore_20'],
+                'rsi_14': stream['rsi_14'], 'volatility_20': stream['volatility_20'], 'ema_12': ema.value
+            }
+            for name, values in batch.items():
+                column = tick - 1 if name == 'volatility_20' else tick
+                if column >= 0 and not np.isnan(values[row, column]):
+                    errors[name] = max(errors[name], abs(streamed[name] - values[row, column]) / max(abs(values[row, column]), 1e-12))
+
+            if tick >= 50:
+                _, _, _, _, features = legacy_signals(prices[:tick + 1])
+                for name, key in (('volatility_20', 'volatility'), ('rsi_14', 'rsi'), ('zscore_20', 'mean_reversion')):
+                    errors['legacy'] = max(errors['legacy'], abs(streamed[name] - features[key]) / max(abs(features[key]), 1e-12))
+    return errors
+
+
+async def run(args):
+    paths = price_paths(args.assets, args.history + args.ticks)
+    assets = [f'ASSET{i:03d}' for i in range(args.assets)]
+    expert = QuantitativeAnalysisExpert()
+    expert._simulate_ml_prediction = lambda features: 0.0
+
+    histories = {asset: paths[i, :args.history].tolist() for i, asset in enumerate(assets)}
+    await expert_signals(expert, {'prices': histories})  # warm the streams with the existing history
+
+    print(f"{args.assets} assets, {args.history} prices of history, {args.ticks} new ticks")
+
+    legacy_ticks = min(args.ticks, 50)
+    started = time.perf_counter()
+    for tick in range(legacy_ticks):
+        for i, asset in enumerate(assets):
+            legacy_signals(paths[i, :args.history + tick + 1].tolist())
+    legacy_per_tick = (time.perf_counter() - started) / legacy_ticks
+
+    started = time.perf_counter()
+    for tick in range(args.ticks):
+        for i, asset in enumerate(assets):
+            histories[asset].append(float(paths[i, args.history + tick]))
+        await expert_signals(expert, {'prices': histories})
+    stream_per_tick = (time.perf_counter() - started) / args.ticks
+
+    print(f"  legacy full-history recompute: {legacy_per_tick * 1000:8.2f}ms per tick (all assets)")
+    print(f"  indicator streams:             {stream_per_tick * 1000:8.2f}ms per tick ({legacy_per_tick / stream_per_tick:.0f}x)")
+
+    for history in (args.history // 10, args.history):
+        stream = QuantitativeAnalysisExpert._signal_indicators()
+        for price in paths[0, :history]:
+            stream.update(price)
+        started = time.perf_counter()
+        for price in paths[0, history:history + args.ticks]:
+            stream.update(price)
+        print(f"  one asset, {history:>6} prices of history: {(time.perf_counter() - started) / args.ticks * 1e6:.1f}us per update")
+
+    started = time.perf_counter()
+    ti.rolling_mean(paths, 50), ti.rolling_zscore(paths, 20), ti.rsi(paths, 14), ti.ema(paths, 12)
+    print(f"  batch mode over {paths.shape[0]}x{paths.shape[1]} prices: {time.perf_counter() - started:.2f}s")
+
+    errors = check_parity(paths[:5, :min(paths.shape[1], 1500)])
+    print("Parity (max relative difference of the streaming value):")
+    for name, error in errors.items():
+        label = 'against legacy formulas' if name == 'legacy' else f'{name} against batch'
+        print(f"  {label:<28} {error:.2e}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--history', type=int, default=5000)
+    parser.add_argument('--ticks', type=int, default=500)
+    parser.add_argument('--assets', type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+Validate a batch of crypto symbols against local stub servers for CoinGecko,
+Binance and Kraken (plus NFTPriceFloor for NFT requests), each answering
+after a fixed delay, and compare the wall time with the per-source bounds.
+
+With every source fanned out concurrently and capped per source, the batch
+should take about as long as the slowest source needs on its own
+(ceil(symbols / concurrency) * delay), not the sum over sources. Browser
+sources are disabled here since they need a real Chrome.
+
+With --batch the symbols go through validate_batch instead, which coalesces
+them into bulk calls; the stub request counts show the difference. A second
+pass over the same symbols is then served from the quote cache.
+
+Usage: python scripts/benchmark_validator_sources.py [--symbols 500] [--concurrency 50] [--batch]
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import sys
+import time
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.data_source_pool import DataSourcePool  # noqa: E402
+from services.real_time_data_validator import RealTimeDataValidator, ValidationRequest  # noqa: E402
+
+STUB_PRICE = 101.5
+
+
+def stub_app(delays, symbols, counts):
+    async def coingecko(request):
+        counts['coingecko'] += 1
+        await asyncio.sleep(delays['coingecko'])
+        return web.json_response({coin: {'usd': STUB_PRICE, 'usd_market_cap': 1e9,
+                                         'usd_24h_vol': 1e6, 'usd_24h_change': 1.2}
+                                  for coin in request.query['ids'].split(',')})
+
+    async def binance(request):
+        counts['binance'] += 1
+        await asyncio.sleep(delays['binance'])
+        ticker = {'lastPrice': str(STUB_PRICE), 'volume': '2500', 'priceChangePercent': '1.1'}
+        if 'symbol' not in request.query:
+            return web.json_response([dict(ticker, symbol=f'{symbol}USDT') for symbol in symbols])
+        if not request.query['symbol'].endswith('USDT'):
+            return web.json_response({'code': -1121}, status=400)
+        return web.json_response(ticker)
+
+    async def kraken(request):
+        counts['kraken'] += 1
+        await asyncio.sleep(delays['kraken'])
+        ticker = {'c': [str(STUB_PRICE), '1'], 'v': ['10', '20']}
+        pairs = [request.query['pair']] if 'pair' in request.query else [f'{symbol}USD' for symbol in symbols]
+        return web.json_response({'error': [], 'result': {pair: ticker for pair in pairs}})
+
+    async def nftpricefloor(request):
+        counts['nftpricefloor'] += 1
+        await asyncio.sleep(delays['nftpricefloor'])
+        return web.Response(text=f'<html><span class="price">{STUB_PRICE} ETH</span></html>', content_type='text/html')
+
+    app = web.Application()
+    app.router.add_get('/coingecko/simple/price', coingecko)
+    app.router.add_get('/binance/ticker/24hr', binance)
+    app.router.add_get('/kraken/Ticker', kraken)
+    app.router.add_get('/nftpricefloor/{slug}', nftpricefloor)
+    return app
+
+
+async def run(args):
+    delays = {'coingecko': 0.05, 'binance': 0.1, 'kraken': 0.2, 'nftpricefloor': 0.1}
+    symbols = [f'COIN{i}' for i in range(args.symbols)]
+    counts = dict.fromkeys(delays, 0)
+    runner = web.AppRunner(stub_app(delays, symbols, counts))
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base = f'http://127.0.0.1:{port}'
+
+    limits = {source: (args.concurrency, 10.0) for source in delays}
+    pool = DataSourcePool(source_limits=limits, pool_size=args.concurrency * len(delays), browser_factory=None)
+    validator = RealTimeDataValidator(
+        data_sources={
+            'crypto': {'coingecko': f'{base}/coingecko', 'binance': f'{base}/binance', 'kraken': f'{base}/kraken'},
+            'nft': {'nftpricefloor': f'{base}/nftpricefloor'}
+        },
+        source_pool=pool
+    )
+
+    requests = [
+        ValidationRequest(request_id=f'req-{i}', data_type='crypto_price',
+                          original_data={'symbol': symbol, 'price': 100.0})
+        for i, symbol in enumerate(symbols)
+    ]
+
+    async def validate_all():
+        if args.batch:
+            return await validator.validate_batch(requests)
+        return await asyncio.gather(*(validator.validate_financial_data(r) for r in requests))
+
+    try:
+        # Warm the pooled connections so the timing reflects steady state
+        await validator.validate_financial_data(ValidationRequest(
+            request_id='warmup', data_type='crypto_price', original_data={'symbol': 'WARMUP', 'price': 100.0}
+        ))
+        for source in counts:
+            counts[source] = 0
+
+        started = time.perf_counter()
+        results = await validate_all()
+        elapsed = time.perf_counter() - started
+        first_counts = dict(counts)
+
+        started = time.perf_counter()
+        await validate_all()
+        cached_elapsed = time.perf_counter() - started
+        summary = validator.get_validation_summary()
+    finally:
+        validator.close()
+        await runner.cleanup()
+
+    crypto_sources = ('coingecko', 'binance', 'kraken')
+    bounds = {source: math.ceil(args.symbols / args.concurrency) * delays[source] for source in crypto_sources}
+    complete = sum(1 for result in results if sorted(result.sources_checked) == sorted(crypto_sources))
+
+    mode = 'validate_batch' if args.batch else 'validate_financial_data'
+    print(f"{mode}: {args.symbols} symbols in {elapsed:.2f}s "
+          f"({complete} with all of {', '.join(crypto_sources)})")
+    for source in crypto_sources:
+        print(f"  {source:<10} {first_counts[source]:>5} stub requests, "
+              f"bound on its own with per-symbol calls: {bounds[source]:.2f}s")
+    print(f"  slowest source: {max(bounds.values()):.2f}s, sum over sources: {sum(bounds.values()):.2f}s")
+    print(f"Second pass from the quote cache: {cached_elapsed:.3f}s, "
+          f"cache hit rate {summary['cache_hit_rate']:.1%}")
+    for source in crypto_sources:
+        latency = summary['source_latency'].get(source, {})
+        print(f"  {source:<10} p50 {latency.get('p50_ms', 0):.1f}ms, p95 {latency.get('p95_ms', 0):.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--batch', action='store_true')
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
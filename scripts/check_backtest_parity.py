@@ -0,0 +1,120 @@
+"""
+Check that the vectorized backtest engine reproduces the event-driven engine:
+the prepared price data, the trade list and the resulting BacktestResults
+must match for every strategy with a signal rule (floats to within
+FLOAT_TOLERANCE relative).
+
+Usage: python scripts/check_backtest_parity.py [--years 3] [--assets 12]
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import sys
+from dataclasses import asdict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.algorithmic_trading_developer import (  # noqa: E402
+    AlgorithmicTradingDeveloper, TradingAlgorithm, TradingStrategy
+)
+
+FLOAT_TOLERANCE = 1e-9
+
+
+def legacy_prepare(test_data, asset_universe):
+    """Data preparation as written before the return recurrence was vectorized"""
+    dates = pd.date_range(start=test_data['start_date'], end=test_data['end_date'], freq='D')
+    data = {}
+    for asset in asset_universe:
+        np.random.seed(hash(asset) % 1000)
+        returns = np.random.normal(0.0008, 0.02, len(dates))
+        for i in range(1, len(returns)):
+            momentum_effect = returns[i-1] * 0.1
+            mean_reversion = -returns[max(0, i-5):i].mean() * 0.05
+            returns[i] += momentum_effect + mean_reversion
+        prices = 100 * np.exp(np.cumsum(returns))
+        volume = np.random.lognormal(15, 0.5, len(dates))
+        data[f'{asset}_price'] = prices
+        data[f'{asset}_volume'] = volume
+        data[f'{asset}_returns'] = np.concatenate([[0], returns[1:]])
+    return pd.DataFrame(data, index=dates).dropna()
+
+
+def make_algorithm(strategy, assets):
+    return TradingAlgorithm(
+        algorithm_id=f'parity_{strategy.value}',
+        strategy_type=strategy,
+        asset_universe=assets,
+        parameters={},
+        entry_conditions=[],
+        exit_conditions=[],
+        risk_limits={'max_position_size': 0.05},
+        position_sizing='fixed_fractional',
+        execution_logic='market',
+        backtesting_results={},
+        live_performance={},
+        optimization_history=[],
+        last_updated=datetime.now()
+    )
+
+
+def same(a, b):
+    if isinstance(a, float) and isinstance(b, float):
+        if math.isnan(a) and math.isnan(b):
+            return True
+        # The event-driven engine keeps running window sums, which round differently from np.mean
+        return math.isclose(a, b, rel_tol=FLOAT_TOLERANCE)
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(same(a[key], b[key]) for key in a)
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+async def main(years, asset_count):
+    developer = AlgorithmicTradingDeveloper()
+    assets = [f'ASSET{i:03d}' for i in range(asset_count)]
+    test_data = {'start_date': datetime(2015, 1, 1), 'end_date': datetime(2015 + years, 1, 1)}
+
+    prepared = await developer._prepare_backtesting_data(test_data, assets)
+    legacy = legacy_prepare(test_data, assets)
+    assert list(prepared.columns) == list(legacy.columns)
+    assert np.allclose(prepared.to_numpy(), legacy.to_numpy(), rtol=1e-12, atol=1e-15)
+    exact = np.array_equal(prepared.to_numpy(), legacy.to_numpy())
+    print(f"prepared data: {prepared.shape}, {'bit-identical' if exact else 'equal within 1e-12'}")
+
+    failures = 0
+    for strategy in (TradingStrategy.MOMENTUM, TradingStrategy.MEAN_REVERSION, TradingStrategy.ARBITRAGE):
+        algorithm = make_algorithm(strategy, assets)
+        event_trades = await developer._simulate_strategy_execution(algorithm, prepared, engine='event')
+        vector_trades = await developer._simulate_strategy_execution(algorithm, prepared, engine='vectorized')
+
+        trades_match = len(event_trades) == len(vector_trades) and all(
+            a.keys() == b.keys() and all(same(a[key], b[key]) for key in a)
+            for a, b in zip(event_trades, vector_trades)
+        )
+
+        event_results = asdict(await developer.backtest_strategy(algorithm, dict(test_data, engine='event')))
+        vector_results = asdict(await developer.backtest_strategy(algorithm, dict(test_data, engine='vectorized')))
+        results_match = all(same(event_results[key], vector_results[key]) for key in event_results
+                            if key not in ('end_date',))
+
+        status = 'ok' if trades_match and results_match else 'MISMATCH'
+        failures += status != 'ok'
+        print(f"{strategy.value:<16} trades={len(event_trades):>5}  {status}")
+
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--assets', type=int, default=12)
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(main(args.years, args.assets)) else 0)
@@ -0,0 +1,162 @@
+"""
+Minimal MCP server for local testing. Every tool name is accepted and
+``tools/call`` echoes its arguments back, along with the server pid and an id
+for the connection the request arrived on, so callers can check how their
+requests were spread over connections and processes. A ``delay`` argument
+overrides the server's delay for that call, and ``fail`` makes it return a
+JSON-RPC error.
+
+Speaks newline-delimited JSON-RPC on stdin/stdout (the default), streamable
+HTTP on POST /mcp, or WebSocket on /mcp. Requests are handled concurrently,
+so responses to pipelined requests can come back out of order. Over HTTP,
+requests carrying a session id the server did not issue (or has since
+forgotten with ``forget_sessions``) get a 404, as MCP servers answer an
+expired session.
+
+Usage: python scripts/mcp_echo_server.py [--transport stdio|http|websocket] [--port 8765] [--delay 0.0]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import uuid
+
+PROTOCOL_VERSION = '2025-03-26'
+
+
+class EchoServer:
+    def __init__(self, delay):
+        self.delay = delay
+        self.connection_ids = itertools.count(1)
+        self.requests = 0
+        self.sessions = set()
+
+    def forget_sessions(self):
+        """Expire every HTTP session, so clients have to initialize again"""
+        self.sessions.clear()
+
+    async def handle(self, message, connection):
+        """Reply for one JSON-RPC message, or None for notifications"""
+        if 'id' not in message:
+            return None
+        self.requests += 1
+        method = message.get('method')
+        params = message.get('params') or {}
+
+        if method == 'initialize':
+            result = {'protocolVersion': PROTOCOL_VERSION, 'capabilities': {'tools': {}},
+                      'serverInfo': {'name': 'mcp-echo', 'version': '1.0.0'}}
+        elif method == 'ping':
+            result = {}
+        elif method == 'tools/list':
+            result = {'tools': [{'name': 'echo', 'description': 'Echo the arguments back',
+                                 'inputSchema': {'type': 'object'}}]}
+        elif method == 'tools/call':
+            arguments = params.get('arguments') or {}
+            delay = arguments.get('delay', self.delay)
+            if delay:
+                await asyncio.sleep(delay)
+            if arguments.get('fail'):
+                return {'jsonrpc': '2.0', 'id': message['id'],
+                        'error': {'code': -32000, 'message': f"Tool {params.get('name')} failed"}}
+            result = {
+                'content': [{'type': 'text', 'text': json.dumps(arguments)}],
+                'structuredContent': {'tool': params.get('name'), 'arguments': arguments,
+                                      'pid': os.getpid(), 'connection': connection},
+                'isError': False
+            }
+        else:
+            return {'jsonrpc': '2.0', 'id': message['id'],
+                    'error': {'code': -32601, 'message': f'Method not found: {method}'}}
+        return {'jsonrpc': '2.0', 'id': message['id'], 'result': result}
+
+
+async def serve_stdio(server):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=16 * 1024 * 1024)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    write_lock = asyncio.Lock()
+    connection = next(server.connection_ids)
+    tasks = set()
+
+    async def respond(message):
+        reply = await server.handle(message, connection)
+        if reply is not None:
+            async with write_lock:
+                sys.stdout.write(json.dumps(reply) + '\n')
+                sys.stdout.flush()
+
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        task = asyncio.ensure_future(respond(json.loads(line)))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+def build_app(server):
+    from aiohttp import web, WSMsgType
+
+    async def http_handler(request):
+        message = await request.json()
+        session_id = request.headers.get('Mcp-Session-Id')
+        if session_id and session_id not in server.sessions:
+            return web.Response(status=404)
+        peer = request.transport.get_extra_info('peername')
+        reply = await server.handle(message, f'{peer[0]}:{peer[1]}')
+        if reply is None:
+            return web.Response(status=202)
+        headers = {}
+        if message.get('method') == 'initialize':
+            headers['Mcp-Session-Id'] = uuid.uuid4().hex
+            server.sessions.add(headers['Mcp-Session-Id'])
+        return web.json_response(reply, headers=headers)
+
+    async def websocket_handler(request):
+        websocket = web.WebSocketResponse(protocols=['mcp'], max_msg_size=0)
+        await websocket.prepare(request)
+        connection = next(server.connection_ids)
+        tasks = set()
+
+        async def respond(message):
+            reply = await server.handle(message, connection)
+            if reply is not None and not websocket.closed:
+                await websocket.send_str(json.dumps(reply))
+
+        async for frame in websocket:
+            if frame.type == WSMsgType.TEXT:
+                task = asyncio.ensure_future(respond(json.loads(frame.data)))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        return websocket
+
+    app = web.Application()
+    app.router.add_post('/mcp', http_handler)
+    app.router.add_get('/mcp', websocket_handler)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--transport', choices=['stdio', 'http', 'websocket'], default='stdio')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = EchoServer(args.delay)
+    if args.transport == 'stdio':
+        asyncio.run(serve_stdio(server))
+    else:
+        from aiohttp import web
+        web.run_app(build_app(server), host=args.host, port=args.port, print=None)
+
+
+if __name__ == '__main__':
+    main()
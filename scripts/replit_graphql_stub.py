@@ -0,0 +1,142 @@
+"""
+Stub Replit GraphQL server for local testing. Answers the queries
+ReplitService sends: the currentUser repl listing, single-repl file lookups
+and aliased multi-repl file batches (``r0: repl(id: $id0) ...``).
+
+Every response waits ``delay`` seconds, and failures queued with
+``fail_next`` are answered first, so callers can check concurrency, batching
+and retry with backoff. The server counts requests, the repls asked for in
+each one and the peak number of requests in flight.
+
+Usage: python scripts/replit_graphql_stub.py [--port 8766] [--repls 100] [--delay 0.05]
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubGraphQL:
+    def __init__(self, repls=100, files_per_repl=5, delay=0.0):
+        self.repl_ids = [f'repl-{n}' for n in range(repls)]
+        self.files_per_repl = files_per_repl
+        self.delay = delay
+        self.failures = deque()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.repls_per_request = []
+        self.request_times = []
+
+    def fail_next(self, count=1, status=503, retry_after=None):
+        """Answer the next ``count`` requests with ``status``"""
+        with self.lock:
+            self.failures.extend([(status, retry_after)] * count)
+
+    def files(self, repl_id):
+        return [{'path': f'src/file_{n}.py', 'content': f'# {repl_id} file {n}\nimport openai\n', 'size': 32}
+                for n in range(self.files_per_repl)]
+
+    def repl(self, repl_id):
+        n = int(repl_id.rsplit('-', 1)[1])
+        return {
+            'id': repl_id,
+            'title': f'Stub Repl {n}',
+            'slug': f'stub-repl-{n}',
+            'url': f'https://replit.com/@stub/stub-repl-{n}',
+            'language': 'python3',
+            'description': 'Stub repl',
+            'timeCreated': '2024-01-01T00:00:00Z',
+            'timeUpdated': '2024-06-01T00:00:00Z',
+            'isPrivate': False,
+            'size': 128,
+            'files': {'items': [{'path': item['path'], 'size': item['size']} for item in self.files(repl_id)]}
+        }
+
+    def answer(self, payload):
+        """(status, headers, body) for one GraphQL request"""
+        with self.lock:
+            self.requests += 1
+            self.request_times.append(time.monotonic())
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            failure = self.failures.popleft() if self.failures else None
+        try:
+            time.sleep(self.delay)
+            if failure:
+                status, retry_after = failure
+                headers = {'Retry-After': str(retry_after)} if retry_after is not None else {}
+                return status, headers, {'errors': [{'message': f'stub failure {status}'}]}
+            return 200, {}, {'data': self.resolve(payload.get('query', ''), payload.get('variables') or {})}
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def resolve(self, query, variables):
+        known = set(self.repl_ids)
+        if 'currentUser' in query:
+            self.repls_per_request.append(len(self.repl_ids))
+            return {'currentUser': {'repls': {'items': [self.repl(repl_id) for repl_id in self.repl_ids]}}}
+        if 'replId' in variables:
+            self.repls_per_request.append(1)
+            repl_id = variables['replId']
+            return {'repl': {'files': {'items': self.files(repl_id)}} if repl_id in known else None}
+
+        # Aliased batch: $idN is answered as rN
+        self.repls_per_request.append(len(variables))
+        return {
+            f'r{name[2:]}': {'files': {'items': self.files(repl_id)}} if repl_id in known else None
+            for name, repl_id in variables.items()
+        }
+
+
+def serve(stub, port=0):
+    """Serve ``stub`` on localhost in a daemon thread; returns (server, graphql url)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Send headers and body in one write so keep-alive clients are not held up by delayed ACKs
+        wbufsize = -1
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            status, headers, response = stub.answer(json.loads(body or b'{}'))
+            data = json.dumps(response).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/graphql'
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--repls', type=int, default=100)
+    parser.add_argument('--delay', type=float, default=0.05)
+    args = parser.parse_args()
+
+    server, url = serve(StubGraphQL(repls=args.repls, delay=args.delay), args.port)
+    print(f"Stub Replit GraphQL API on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
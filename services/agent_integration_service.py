@@ -12,6 +12,8 @@ from typing import Dict, List, Any, Optional
 from flask import current_app
 from openai import OpenAI
 
+from services.agent_telemetry import agent_telemetry
+
 logger = logging.getLogger(__name__)
 
 class AIAgentIntegrationService:
@@ -270,52 +272,57 @@ class AIAgentIntegrationService:
     
     def execute_agent(self, agent_key: str, request_data: Dict) -> Dict[str, Any]:
         """Execute a specific agent with given data"""
-        
-        try:
-            agent = self.get_agent_instance(agent_key)
-            if not agent:
-                return {'error': f'Failed to instantiate agent {agent_key}'}
+        agent_name = self.agents.get(agent_key, {}).get('name', agent_key)
+        with agent_telemetry.track(agent_key, agent_name, 'execute_agent', request_data) as span:
+            try:
+                agent = self.get_agent_instance(agent_key)
+                if not agent:
+                    span.fail(f'Failed to instantiate agent {agent_key}')
+                    return {'error': f'Failed to instantiate agent {agent_key}'}
             
-            # Execute agent's main function
-            if hasattr(agent, 'process_request'):
-                result = agent.process_request(request_data)
-            elif hasattr(agent, 'execute'):
-                result = agent.execute(request_data)
-            elif hasattr(agent, 'generate_strategy'):
-                result = agent.generate_strategy(request_data)
-            else:
-                return {'error': f'Agent {agent_key} does not have a recognized execution method'}
+                # Execute agent's main function
+                if hasattr(agent, 'process_request'):
+                    result = agent.process_request(request_data)
+                elif hasattr(agent, 'execute'):
+                    result = agent.execute(request_data)
+                elif hasattr(agent, 'generate_strategy'):
+                    result = agent.generate_strategy(request_data)
+                else:
+                    span.fail(f'Agent {agent_key} does not have a recognized execution method')
+                    return {'error': f'Agent {agent_key} does not have a recognized execution method'}
+                span.add_result_usage(result)
             
-            # Update agent status
-            self.agent_status[agent_key] = {
-                'last_execution': datetime.utcnow().isoformat(),
-                'status': 'success',
-                'execution_time': 'calculated_in_production'
-            }
+                # Update agent status
+                self.agent_status[agent_key] = {
+                    'last_execution': datetime.utcnow().isoformat(),
+                    'status': 'success',
+                    'execution_time': 'calculated_in_production'
+                }
             
-            return {
-                'agent': agent_key,
-                'execution_timestamp': datetime.utcnow().isoformat(),
-                'result': result,
-                'status': 'success'
-            }
+                return {
+                    'agent': agent_key,
+                    'execution_timestamp': datetime.utcnow().isoformat(),
+                    'result': result,
+                    'status': 'success'
+                }
             
-        except Exception as e:
-            logger.error(f"Agent {agent_key} execution failed: {str(e)}")
+            except Exception as e:
+                logger.error(f"Agent {agent_key} execution failed: {str(e)}")
+                span.fail(e)
             
-            # Update agent status with error
-            self.agent_status[agent_key] = {
-                'last_execution': datetime.utcnow().isoformat(),
-                'status': 'error',
-                'error': str(e)
-            }
+                # Update agent status with error
+                self.agent_status[agent_key] = {
+                    'last_execution': datetime.utcnow().isoformat(),
+                    'status': 'error',
+                    'error': str(e)
+                }
             
-            return {
-                'agent': agent_key,
-                'execution_timestamp': datetime.utcnow().isoformat(),
-                'error': str(e),
-                'status': 'failed'
-            }
+                return {
+                    'agent': agent_key,
+                    'execution_timestamp': datetime.utcnow().isoformat(),
+                    'error': str(e),
+                    'status': 'failed'
+                }
     
     def execute_multiple_agents(self, agent_keys: List[str], request_data: Dict) -> Dict[str, Any]:
         """Execute multiple agents in coordination"""
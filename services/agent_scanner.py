@@ -0,0 +1,340 @@
+"""
+Agent Pattern Scanner
+Precompiled single-pass scanner for AI agent, credential and role detection
+"""
+
+import os
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+
+# AI agent detection patterns: agent type -> pattern group -> patterns
+DEFAULT_AGENT_PATTERNS = {
+    "openai": {
+        "imports": [
+            r"import\s+openai",
+            r"from\s+openai\s+import",
+            r"import\s+langchain",
+            r"from\s+langchain\s+import"
+        ],
+        "api_calls": [
+            r"openai\.ChatCompletion",
+            r"openai\.Completion",
+            r"client\.chat\.completions",
+            r"OpenAI\(",
+            r"ChatOpenAI\("
+        ],
+        "models": [
+            r"gpt-3\.5-turbo", r"gpt-4", r"text-davinci", 
+            r"text-ada", r"text-babbage", r"text-curie"
+        ]
+    },
+    "anthropic": {
+        "imports": [
+            r"import\s+anthropic",
+            r"from\s+anthropic\s+import"
+        ],
+        "api_calls": [
+            r"anthropic\.Client",
+            r"anthropic\.Anthropic",
+            r"messages\.create"
+        ],
+        "models": [
+            r"claude-3", r"claude-2", r"claude-instant"
+        ]
+    },
+    "huggingface": {
+        "imports": [
+            r"from\s+transformers\s+import",
+            r"import\s+transformers",
+            r"from\s+huggingface_hub\s+import"
+        ],
+        "api_calls": [
+            r"AutoTokenizer", r"AutoModel", r"pipeline\(",
+            r"HuggingFaceHub", r"load_dataset"
+        ],
+        "models": [
+            r"bert-", r"gpt2", r"t5-", r"roberta-",
+            r"distilbert", r"xlnet"
+        ]
+    },
+    "local": {
+        "imports": [
+            r"import\s+torch",
+            r"import\s+tensorflow",
+            r"from\s+sklearn\s+import",
+            r"import\s+numpy",
+            r"import\s+pandas"
+        ],
+        "patterns": [
+            r"\.fit\(", r"\.predict\(", r"\.train\(",
+            r"model\.save", r"torch\.load", r"tf\.keras"
+        ]
+    }
+}
+
+# Credential heuristics: service name -> patterns
+CREDENTIAL_PATTERNS = {
+    'openai': [r'OPENAI_API_KEY', r'openai.*key'],
+    'anthropic': [r'ANTHROPIC_API_KEY', r'anthropic.*key'],
+    'google': [r'GOOGLE_API_KEY', r'GOOGLE_.*_KEY'],
+    'aws': [r'AWS_ACCESS_KEY', r'AWS_SECRET_KEY'],
+    'azure': [r'AZURE_.*_KEY', r'AZURE_.*_SECRET'],
+    'huggingface': [r'HUGGINGFACE_.*_TOKEN', r'HF_TOKEN'],
+    'telegram': [r'TELEGRAM_.*_TOKEN', r'BOT_TOKEN'],
+    'github': [r'GITHUB_TOKEN', r'GH_TOKEN'],
+    'stripe': [r'STRIPE_.*_KEY'],
+    'sendgrid': [r'SENDGRID_API_KEY'],
+    'twilio': [r'TWILIO_.*'],
+}
+
+# Role heuristics, checked in order: role -> patterns
+ROLE_PATTERNS = {
+    'chat': [r'chat', r'conversation', r'dialogue', r'message'],
+    'completion': [r'complete', r'generate', r'text.*generation'],
+    'classification': [r'classify', r'categorize', r'sentiment'],
+    'summarization': [r'summarize', r'summary', r'abstract'],
+    'translation': [r'translate', r'translation', r'language'],
+    'qa': [r'question.*answer', r'qa', r'ask'],
+    'embedding': [r'embed', r'vector', r'similarity'],
+    'image': [r'image', r'vision', r'visual', r'dall'],
+    'code': [r'code', r'programming', r'codex'],
+    'analysis': [r'analyze', r'analysis', r'insight']
+}
+
+# Shortest literal worth using as a prefilter key
+MIN_LITERAL_LENGTH = 2
+
+
+def required_literals(pattern: str) -> Tuple[str, ...]:
+    """Return the literal substrings every match of ``pattern`` must contain.
+
+    Returns an empty tuple when the pattern uses alternation, groups or
+    classes, since no literal is then guaranteed. Such patterns are always
+    confirmed with the regex itself.
+    """
+    runs = []
+    current = []
+    i = 0
+
+    while i < len(pattern):
+        ch = pattern[i]
+
+        if ch == '\\':
+            escaped = pattern[i + 1:i + 2]
+            i += 2
+            if escaped and not escaped.isalnum():
+                current.append(escaped)
+            else:
+                # Character class escape (\s, \d, \b, ...) breaks the run
+                runs.append(current)
+                current = []
+            continue
+
+        if ch in '*?':
+            # Preceding atom is optional
+            if current:
+                current.pop()
+            runs.append(current)
+            current = []
+        elif ch == '{':
+            if current:
+                current.pop()
+            runs.append(current)
+            current = []
+            closing = pattern.find('}', i)
+            if closing == -1:
+                return ()
+            i = closing
+        elif ch in '+.^$':
+            runs.append(current)
+            current = []
+        elif ch in '|()[]':
+            return ()
+        else:
+            current.append(ch)
+        i += 1
+
+    runs.append(current)
+    return tuple(''.join(run).casefold() for run in runs
+                 if len(run) >= MIN_LITERAL_LENGTH)
+
+
+class _CompiledPattern:
+    """A detection regex paired with its prefilter literals"""
+
+    __slots__ = ('source', 'regex', 'literals', 'is_literal')
+
+    def __init__(self, source: str):
+        self.source = source
+        self.regex = re.compile(source, re.IGNORECASE)
+        self.literals = required_literals(source)
+        # Plain literal patterns need no regex confirmation on ASCII content
+        self.is_literal = (
+            source.isascii() and
+            not any(ch in source for ch in '.^$*+?{}[]|()\\') and
+            self.literals == (source.casefold(),)
+        )
+
+    def is_candidate(self, present: Set[str]) -> bool:
+        return all(literal in present for literal in self.literals)
+
+    def search(self, content: str, present: Set[str], ascii_content: bool) -> bool:
+        """Whether the pattern occurs in content, using the prefilter when exact"""
+        if not self.is_candidate(present):
+            return False
+        if self.is_literal and ascii_content:
+            return True
+        return self.regex.search(content) is not None
+
+
+class AgentPatternScanner:
+    """Scan file content for AI agents, credentials and roles in one pass.
+
+    All patterns are compiled once. The literals each pattern requires are
+    collected into a single prefilter: a file is case-folded once, the
+    prefilter records which literals occur, and only patterns whose literals
+    are all present are confirmed with their own regex. Results are identical
+    to running every pattern with ``re.search``/``re.findall`` and
+    ``re.IGNORECASE``.
+    """
+
+    def __init__(self, agent_patterns: Dict[str, Dict[str, List[str]]],
+                 credential_patterns: Dict[str, List[str]] = None,
+                 role_patterns: Dict[str, List[str]] = None):
+        if credential_patterns is None:
+            credential_patterns = CREDENTIAL_PATTERNS
+        if role_patterns is None:
+            role_patterns = ROLE_PATTERNS
+
+        self.agent_patterns = {
+            agent_type: {
+                group: [_CompiledPattern(p) for p in group_patterns]
+                for group, group_patterns in patterns.items()
+            }
+            for agent_type, patterns in agent_patterns.items()
+        }
+        self.credential_patterns = {
+            service: [_CompiledPattern(p) for p in service_patterns]
+            for service, service_patterns in credential_patterns.items()
+        }
+        self.role_patterns = {
+            role: [_CompiledPattern(p) for p in patterns]
+            for role, patterns in role_patterns.items()
+        }
+
+        self.literals = sorted({
+            literal
+            for pattern in self._all_patterns()
+            for literal in pattern.literals
+        })
+
+    def _all_patterns(self):
+        for groups in self.agent_patterns.values():
+            for patterns in groups.values():
+                yield from patterns
+        for patterns in self.credential_patterns.values():
+            yield from patterns
+        for patterns in self.role_patterns.values():
+            yield from patterns
+
+    def _prefilter(self, content: str) -> Tuple[Set[str], bool]:
+        """Return the prefilter literals present in content and whether it is ASCII"""
+        ascii_content = content.isascii()
+        folded = content.lower() if ascii_content else content.casefold()
+        present = {literal for literal in self.literals if literal in folded}
+        return present, ascii_content
+
+    def scan(self, content: str, file_path: str) -> Dict:
+        """Scan content and return detected agents, credentials and role"""
+        present, ascii_content = self._prefilter(content)
+        # The role depends only on the content, so it is resolved once per file
+        role = self._match_role(content, present, ascii_content)
+
+        return {
+            'agents': self._match_agents(content, file_path, present, ascii_content, role),
+            'credentials': self._match_credentials(content, present, ascii_content),
+            'role': role
+        }
+
+    def _match_agents(self, content: str, file_path: str, present: Set[str],
+                      ascii_content: bool, role: Optional[str]) -> List[Dict]:
+        agents = []
+
+        for agent_type, groups in self.agent_patterns.items():
+            agent_detected = False
+            features = []
+            api_endpoints = []
+            model_name = None
+
+            # Check imports
+            for pattern in groups.get('imports', []):
+                if pattern.search(content, present, ascii_content):
+                    agent_detected = True
+                    features.append(f"imports_{agent_type}")
+                    break
+
+            # Check API calls
+            for pattern in groups.get('api_calls', []):
+                if not pattern.is_candidate(present):
+                    continue
+                matches = pattern.regex.findall(content)
+                if matches:
+                    agent_detected = True
+                    features.append(f"api_calls_{agent_type}")
+                    api_endpoints.extend(matches)
+
+            # Check models
+            for pattern in groups.get('models', []):
+                if not pattern.is_candidate(present):
+                    continue
+                match = pattern.regex.search(content)
+                if match:
+                    agent_detected = True
+                    model_name = match.group(0)
+                    features.append(f"model_{model_name}")
+                    break
+
+            # Check general patterns for local models
+            for pattern in groups.get('patterns', []):
+                if pattern.search(content, present, ascii_content):
+                    agent_detected = True
+                    features.append(f"pattern_{pattern.source}")
+
+            if agent_detected:
+                agents.append({
+                    'type': agent_type,
+                    'name': f"{agent_type.title()} Agent in {os.path.basename(file_path)}",
+                    'model': model_name,
+                    'role': role or f"{agent_type.title()} Assistant",
+                    'features': features,
+                    'api_endpoints': api_endpoints
+                })
+
+        return agents
+
+    def _match_credentials(self, content: str, present: Set[str], ascii_content: bool) -> Set[str]:
+        credentials = set()
+        for service, patterns in self.credential_patterns.items():
+            for pattern in patterns:
+                if pattern.search(content, present, ascii_content):
+                    credentials.add(service)
+                    break
+        return credentials
+
+    def _match_role(self, content: str, present: Set[str], ascii_content: bool) -> Optional[str]:
+        for role, patterns in self.role_patterns.items():
+            for pattern in patterns:
+                if pattern.search(content, present, ascii_content):
+                    return f"{role.title()} Assistant"
+        return None
+
+    def infer_role(self, content: str, agent_type: str) -> str:
+        """Infer the role of an AI agent based on content analysis"""
+        present, ascii_content = self._prefilter(content)
+        return self._match_role(content, present, ascii_content) or f"{agent_type.title()} Assistant"
+
+    def detect_credentials(self, content: str) -> Set[str]:
+        """Detect API credentials and services in content"""
+        present, ascii_content = self._prefilter(content)
+        return self._match_credentials(content, present, ascii_content)
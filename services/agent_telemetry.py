@@ -0,0 +1,361 @@
+"""
+Agent Telemetry
+Wall time, CPU time, memory, tokens and errors of agent calls, buffered in process and bulk-inserted into AgentExecution
+"""
+
+import functools
+import inspect
+import itertools
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Keys copied from an entry point's request dict into the execution's context columns
+CONTEXT_KEYS = ('campaign_id', 'business_id', 'user_session')
+
+# Rows per insert statement; the flusher yields the GIL between them
+INSERT_CHUNK_SIZE = 10
+
+_PAGE_MB = os.sysconf('SC_PAGE_SIZE') / 2 ** 20 if hasattr(os, 'sysconf') else 0.0
+
+_current_span: ContextVar[Optional['ExecutionSpan']] = ContextVar('agent_execution_span', default=None)
+
+
+class ExecutionSpan:
+    """The parts of a call's record the entry point itself can fill in while it runs"""
+    __slots__ = ('context', 'tokens_used', 'cost_usd', 'status', 'error_type', 'error_message')
+
+    def __init__(self, context: Optional[Dict[str, Any]] = None):
+        self.context = context
+        self.tokens_used = 0
+        self.cost_usd = 0.0
+        self.status = 'success'
+        self.error_type = None
+        self.error_message = None
+
+    def add_usage(self, tokens: int = 0, cost_usd: float = 0.0):
+        self.tokens_used += tokens
+        self.cost_usd += cost_usd
+
+    def add_result_usage(self, result: Any):
+        """Add ``tokens_used`` (or ``usage['total_tokens']``) and ``cost_usd`` from a dict result"""
+        if type(result) is not dict:
+            return
+        usage = result.get('usage')
+        tokens = result.get('tokens_used') or (usage.get('total_tokens') if type(usage) is dict else None)
+        if tokens:
+            self.tokens_used += _number(tokens, int, 0)
+        if result.get('cost_usd'):
+            self.cost_usd += _number(result['cost_usd'], float, 0.0)
+
+    def fail(self, error, status: str = 'failed'):
+        """Mark the call failed without raising, e.g. when the entry point returns an error result"""
+        self.status = status
+        if isinstance(error, BaseException):
+            self.error_type = type(error).__name__
+        self.error_message = str(error)
+
+
+def current_span() -> Optional[ExecutionSpan]:
+    """Span of the innermost instrumented call running in this thread or task, if any"""
+    return _current_span.get()
+
+
+def _request_context(args, kwargs) -> Optional[Dict[str, Any]]:
+    found = {key: kwargs[key] for key in CONTEXT_KEYS if key in kwargs}
+    if found:
+        return found
+    for value in args:
+        if type(value) is dict:
+            found = {key: value[key] for key in CONTEXT_KEYS if key in value}
+            if found:
+                return found
+    return None
+
+
+def _number(value, cast, default):
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class AgentTelemetry:
+    """Per-call execution records for agent entry points.
+
+    ``instrument`` (a decorator for sync and async functions) and ``track``
+    (a context manager) time each call with ``perf_counter_ns`` and
+    ``thread_time_ns``, note the process's resident memory when it ends and
+    take token usage from a ``tokens_used``/``usage`` and ``cost_usd`` in a
+    dict result or from ``current_span().add_usage``. Nothing on that path
+    touches the database: the finished record, a tuple of scalars, is
+    appended to a bounded deque, and once the deque is full the oldest
+    records are overwritten and counted as dropped.
+
+    A background thread started with ``start(app)`` takes the buffer every
+    ``flush_seconds`` and bulk-inserts it into ``AgentExecution``. Recorders
+    take no lock: ``deque.append`` and ``next`` on an ``itertools.count``
+    are atomic under the GIL. The flusher swaps in an empty deque and pops
+    the detached one until it is empty, so a record appended to it by a
+    recorder that had already read the old reference is still written. It
+    yields the GIL between small insert chunks, so recorders are not held
+    up behind a flush. The entry point's name goes into ``input_data`` and the
+    CPU time into ``output_data``. For coroutines the CPU time is the event
+    loop thread's while the call was pending, so it includes tasks that ran
+    in between.
+    """
+
+    def __init__(self, capacity: Optional[int] = None, flush_seconds: Optional[float] = None,
+                 batch_size: Optional[int] = None, enabled: Optional[bool] = None):
+        self.capacity = capacity if capacity is not None \
+            else int(os.getenv('AGENT_TELEMETRY_BUFFER_SIZE', '10000'))
+        self.flush_seconds = flush_seconds if flush_seconds is not None \
+            else float(os.getenv('AGENT_TELEMETRY_FLUSH_SECONDS', '5'))
+        self.batch_size = batch_size or int(os.getenv('AGENT_TELEMETRY_BATCH_SIZE', '1000'))
+        self.enabled = (enabled if enabled is not None
+                        else os.getenv('AGENT_TELEMETRY_ENABLED', 'true').lower() != 'false') and self.capacity > 0
+
+        self.buffer = deque(maxlen=max(self.capacity, 1))
+        self._sequence = itertools.count()
+        self._drained = 0
+        self._highest_drained = -1
+        self._flushed = 0
+        self._failed = 0
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._app = None
+
+        self._statm = None
+        self._reset_process()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset_process)
+
+    def _reset_process(self):
+        """Execution ids and the memory probe are per process; a forked worker gets its own"""
+        self._id_prefix = uuid.uuid4().hex[:16]
+        if self._statm is not None:
+            os.close(self._statm)
+        try:
+            self._statm = os.open('/proc/self/statm', os.O_RDONLY)
+        except OSError:
+            self._statm = None
+
+    def start(self, app):
+        """Start the background flusher; a flush interval of 0 leaves flushing to explicit ``flush`` calls"""
+        self._app = app
+        if not self.enabled or self.flush_seconds <= 0 or self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(app,), name='agent-telemetry', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the flusher and write out whatever is still buffered"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._app is not None:
+            try:
+                with self._app.app_context():
+                    self.flush()
+            except Exception as e:
+                logger.error(f"Agent telemetry final flush failed: {str(e)}")
+
+    def instrument(self, agent_key: str, agent_name: Optional[str] = None, entry_point: Optional[str] = None):
+        """Decorator recording every call of a sync or async agent entry point"""
+        def decorate(func):
+            name = agent_name or agent_key
+            point = entry_point or func.__name__
+
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await func(*args, **kwargs)
+                    span = ExecutionSpan(_request_context(args, kwargs))
+                    token = _current_span.set(span)
+                    started, wall, cpu = time.time(), time.perf_counter_ns(), time.thread_time_ns()
+                    try:
+                        result = await func(*args, **kwargs)
+                    except BaseException as e:
+                        self._finish(agent_key, name, point, span, started, wall, cpu, error=e)
+                        raise
+                    finally:
+                        _current_span.reset(token)
+                    self._finish(agent_key, name, point, span, started, wall, cpu, result=result)
+                    return result
+            else:
+                @functools.wraps(func)
+                def wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return func(*args, **kwargs)
+                    span = ExecutionSpan(_request_context(args, kwargs))
+                    token = _current_span.set(span)
+                    started, wall, cpu = time.time(), time.perf_counter_ns(), time.thread_time_ns()
+                    try:
+                        result = func(*args, **kwargs)
+                    except BaseException as e:
+                        self._finish(agent_key, name, point, span, started, wall, cpu, error=e)
+                        raise
+                    finally:
+                        _current_span.reset(token)
+                    self._finish(agent_key, name, point, span, started, wall, cpu, result=result)
+                    return result
+            return wrapper
+        return decorate
+
+    @contextmanager
+    def track(self, agent_key: str, agent_name: Optional[str] = None, entry_point: str = '',
+              request_data: Optional[Dict[str, Any]] = None) -> Iterator[ExecutionSpan]:
+        """Record the enclosed block as one execution; context columns come from ``request_data``"""
+        span = ExecutionSpan(_request_context((request_data,), {}))
+        if not self.enabled:
+            yield span
+            return
+
+        token = _current_span.set(span)
+        started, wall, cpu = time.time(), time.perf_counter_ns(), time.thread_time_ns()
+        try:
+            yield span
+        except BaseException as e:
+            self._finish(agent_key, agent_name or agent_key, entry_point, span, started, wall, cpu, error=e)
+            raise
+        else:
+            self._finish(agent_key, agent_name or agent_key, entry_point, span, started, wall, cpu)
+        finally:
+            _current_span.reset(token)
+
+    def _finish(self, agent_key: str, agent_name: str, entry_point: str, span: ExecutionSpan,
+                started: float, wall: int, cpu: int, error: BaseException = None, result: Any = None):
+        wall = time.perf_counter_ns() - wall
+        cpu = time.thread_time_ns() - cpu
+        if error is not None:
+            span.fail(error, 'timeout' if isinstance(error, TimeoutError) else 'failed')
+        elif result is not None:
+            span.add_result_usage(result)
+
+        # Scalars only: the garbage collector untracks such tuples, so a full buffer does not slow collections
+        context = span.context or {}
+        memory_mb = self._memory_mb()
+        self.buffer.append((next(self._sequence), agent_key, agent_name, entry_point, started, wall, cpu,
+                            memory_mb, span.status, span.tokens_used, span.cost_usd, span.error_type,
+                            span.error_message, context.get('campaign_id'), context.get('business_id'),
+                            context.get('user_session')))
+
+    def _memory_mb(self) -> Optional[float]:
+        """Resident set size of the process now, or its peak where /proc is not available"""
+        if self._statm is not None:
+            try:
+                return int(os.pread(self._statm, 64, 0).split()[1]) * _PAGE_MB
+            except (OSError, IndexError, ValueError):
+                pass
+        if resource is not None:
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return None
+
+    def _swap(self) -> deque:
+        """Detach the filled buffer and leave an empty one for recorders"""
+        records, self.buffer = self.buffer, deque(maxlen=self.buffer.maxlen)
+        return records
+
+    def _take(self, records: deque, count: int) -> List[tuple]:
+        """Pop up to ``count`` records off a detached buffer"""
+        taken = []
+        while records and len(taken) < count:
+            taken.append(records.popleft())
+        if taken:
+            # Threads can append in a different order than they drew sequence numbers
+            self._drained += len(taken)
+            self._highest_drained = max(self._highest_drained, max(record[0] for record in taken))
+        return taken
+
+    def _row(self, record) -> Dict[str, Any]:
+        (sequence, agent_key, agent_name, entry_point, started, wall, cpu, memory_mb,
+         status, tokens_used, cost_usd, error_type, error_message, campaign_id, business_id, user_session) = record
+        return {
+            'agent_key': agent_key,
+            'agent_name': agent_name,
+            'execution_id': f"{self._id_prefix}-{sequence}",
+            'input_data': {'entry_point': entry_point},
+            'output_data': {'cpu_time_ms': round(cpu / 1e6, 3)},
+            'execution_status': status,
+            'execution_time_ms': round(wall / 1e6),
+            'memory_usage_mb': memory_mb,
+            'tokens_used': tokens_used or None,
+            'cost_usd': cost_usd,
+            'campaign_id': campaign_id,
+            'business_id': business_id,
+            'user_session': user_session,
+            'started_at': datetime.utcfromtimestamp(started),
+            'completed_at': datetime.utcfromtimestamp(started + wall / 1e9),
+            'error_message': error_message,
+            'error_type': error_type
+        }
+
+    def flush(self) -> int:
+        """Bulk-insert everything buffered so far; needs an app context. Returns the rows written"""
+        from app import db
+        from models import AgentExecution
+
+        written = 0
+        records = self._swap()
+        while records:
+            batch = 0
+            try:
+                while records and batch < self.batch_size:
+                    chunk = self._take(records, min(INSERT_CHUNK_SIZE, self.batch_size - batch))
+                    batch += len(chunk)
+                    db.session.bulk_insert_mappings(AgentExecution, [self._row(record) for record in chunk])
+                    # Hand the GIL back so recorders do not wait out a whole switch interval behind the flush
+                    time.sleep(0)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                # The failed batch and everything after it in the detached buffer are dropped
+                failed = batch + len(self._take(records, len(records)))
+                self._failed += failed
+                logger.error(f"Agent telemetry flush of {failed} executions failed: {str(e)}")
+                break
+            self._flushed += batch
+            written += batch
+        return written
+
+    def stats(self) -> Dict[str, int]:
+        """Dropped counts records overwritten in a full buffer, as of the last drain"""
+        return {
+            'buffered': len(self.buffer),
+            'flushed': self._flushed,
+            'failed': self._failed,
+            'dropped': max(0, self._highest_drained + 1 - self._drained)
+        }
+
+    def _run(self, app):
+        from app import db
+
+        while not self._stop.wait(self.flush_seconds):
+            try:
+                with app.app_context():
+                    self.flush()
+                    db.session.remove()
+            except Exception as e:
+                logger.error(f"Agent telemetry flusher failed: {str(e)}")
+
+
+agent_telemetry = AgentTelemetry()
+instrument_agent = agent_telemetry.instrument
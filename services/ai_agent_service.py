@@ -1,16 +1,31 @@
-import re
+import copy
+import hashlib
 import json
 import os
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
+from sqlalchemy.orm import selectinload
 from app import db
-from models import ReplitApp, AIAgent, AppCredential
+from models import ReplitApp, AIAgent, AppCredential, AppFileFingerprint
 from services.replit_service import ReplitService
+from services.agent_scanner import AgentPatternScanner, DEFAULT_AGENT_PATTERNS
+
+
+def _as_naive_utc(value):
+    """Normalize a datetime to naive UTC for comparison with stored timestamps"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
 
 class AIAgentService:
     def __init__(self):
         self.replit_service = ReplitService()
         self.patterns = self._load_agent_patterns()
+        self.scanner = AgentPatternScanner(self.patterns)
+        # Fingerprints include the pattern set, so editing patterns invalidates them
+        self._patterns_digest = hashlib.blake2b(
+            json.dumps(self.patterns, sort_keys=True).encode(), digest_size=16
+        ).digest()
         
     def _load_agent_patterns(self):
         """Load AI agent detection patterns from config"""
@@ -24,258 +39,215 @@ class AIAgentService:
     
     def _get_default_patterns(self):
         """Default agent detection patterns"""
-        return {
-            "openai": {
-                "imports": [
-                    r"import\s+openai",
-                    r"from\s+openai\s+import",
-                    r"import\s+langchain",
-                    r"from\s+langchain\s+import"
-                ],
-                "api_calls": [
-                    r"openai\.ChatCompletion",
-                    r"openai\.Completion",
-                    r"client\.chat\.completions",
-                    r"OpenAI\(",
-                    r"ChatOpenAI\("
-                ],
-                "models": [
-                    r"gpt-3\.5-turbo", r"gpt-4", r"text-davinci", 
-                    r"text-ada", r"text-babbage", r"text-curie"
-                ]
-            },
-            "anthropic": {
-                "imports": [
-                    r"import\s+anthropic",
-                    r"from\s+anthropic\s+import"
-                ],
-                "api_calls": [
-                    r"anthropic\.Client",
-                    r"anthropic\.Anthropic",
-                    r"messages\.create"
-                ],
-                "models": [
-                    r"claude-3", r"claude-2", r"claude-instant"
-                ]
-            },
-            "huggingface": {
-                "imports": [
-                    r"from\s+transformers\s+import",
-                    r"import\s+transformers",
-                    r"from\s+huggingface_hub\s+import"
-                ],
-                "api_calls": [
-                    r"AutoTokenizer", r"AutoModel", r"pipeline\(",
-                    r"HuggingFaceHub", r"load_dataset"
-                ],
-                "models": [
-                    r"bert-", r"gpt2", r"t5-", r"roberta-",
-                    r"distilbert", r"xlnet"
-                ]
-            },
-            "local": {
-                "imports": [
-                    r"import\s+torch",
-                    r"import\s+tensorflow",
-                    r"from\s+sklearn\s+import",
-                    r"import\s+numpy",
-                    r"import\s+pandas"
-                ],
-                "patterns": [
-                    r"\.fit\(", r"\.predict\(", r"\.train\(",
-                    r"model\.save", r"torch\.load", r"tf\.keras"
-                ]
-            }
-        }
+        return copy.deepcopy(DEFAULT_AGENT_PATTERNS)
     
-    def analyze_all_apps(self):
+    def analyze_all_apps(self, force=False):
         """Analyze all active apps for AI agents"""
         try:
-            apps = ReplitApp.query.filter_by(is_active=True).all()
+            apps = ReplitApp.query.filter_by(is_active=True).options(
+                selectinload(ReplitApp.file_fingerprints),
+                selectinload(ReplitApp.ai_agents),
+                selectinload(ReplitApp.credentials)
+            ).all()
             analyzed_count = 0
+            changed_count = 0
+            
+            # Fetch files for every app that needs analysis concurrently, in batched queries
+            pending = [app for app in apps if force or self._needs_analysis(app)]
+            files_by_repl = self.replit_service.get_files_for_repls([app.repl_id for app in pending])
             
-            for app in apps:
+            for app in pending:
                 try:
-                    self.analyze_app_for_agents(app)
+                    if self.analyze_app_for_agents(app, force=force, files=files_by_repl.get(app.repl_id)):
+                        changed_count += 1
                     analyzed_count += 1
                 except Exception as e:
                     logging.error(f"Error analyzing app {app.name}: {str(e)}")
                     continue
                     
             db.session.commit()
-            logging.info(f"Analyzed {analyzed_count} apps for AI agents")
+            logging.info(f"Analyzed {analyzed_count} apps for AI agents "
+                         f"({changed_count} changed, {len(apps) - len(pending)} unmodified)")
             return analyzed_count
             
         except Exception as e:
             logging.error(f"Error in analyze_all_apps: {str(e)}")
             return 0
     
-    def analyze_app_for_agents(self, app):
-        """Analyze a specific app for AI agents"""
+    def _needs_analysis(self, app):
+        """Whether the repl may have changed, or the patterns have, since its files were last analyzed"""
+        if not app.file_fingerprints or not app.last_modified:
+            return True
+        patterns_digest = self._patterns_digest.hex()
+        if any(fp.patterns_digest != patterns_digest for fp in app.file_fingerprints):
+            return True
+        last_analyzed = max(fp.analyzed_at for fp in app.file_fingerprints)
+        return _as_naive_utc(app.last_modified) > last_analyzed
+    
+    def analyze_app_for_agents(self, app, force=False, files=None):
+        """Analyze a specific app for AI agents.
+        
+        Files are fingerprinted by content hash. Only new or changed files are
+        rescanned, and agents and credentials are upserted from the stored
+        per-file results, so unchanged agents keep their rows and usage history.
+        Returns True if the app's agents or credentials changed.
+        """
         try:
-            # Get app files
-            files = self.replit_service.get_app_files(app.repl_id)
+            # Skip the fetch entirely when the repl has not changed since the last analysis
+            if files is None and not force and not self._needs_analysis(app):
+                return False
+            
+            fingerprints = {fp.file_path: fp for fp in app.file_fingerprints}
+            
+            # Get app files unless they were prefetched
+            if files is None:
+                files = self.replit_service.get_app_files(app.repl_id)
             
             if not files:
                 logging.warning(f"No files found for app {app.name}")
-                return
+                return False
+            
+            now = datetime.utcnow()
+            patterns_digest = self._patterns_digest.hex()
+            files_changed = False
+            seen_paths = []
             
-            # Clear existing agents for this app
-            AIAgent.query.filter_by(app_id=app.id).delete()
-            AppCredential.query.filter_by(app_id=app.id).delete()
+            for file in files:
+                if not file.get('content'):
+                    continue
+                
+                path = file['path']
+                content_hash = self._hash_content(file['content'])
+                fingerprint = fingerprints.get(path)
+                seen_paths.append(path)
+                
+                if fingerprint and fingerprint.content_hash == content_hash:
+                    fingerprint.patterns_digest = patterns_digest
+                    fingerprint.analyzed_at = now
+                    continue
+                
+                # Detect AI agents and credentials in a single pass
+                scan = self.scanner.scan(file['content'], path)
+                
+                if fingerprint is None:
+                    fingerprint = AppFileFingerprint(file_path=path)
+                    app.file_fingerprints.append(fingerprint)
+                    fingerprints[path] = fingerprint
+                
+                fingerprint.content_hash = content_hash
+                fingerprint.detected_agents = scan['agents']
+                fingerprint.detected_credentials = sorted(scan['credentials'])
+                fingerprint.patterns_digest = patterns_digest
+                fingerprint.analyzed_at = now
+                files_changed = True
+            
+            # Forget files that were removed from the repl
+            for path in set(fingerprints) - set(seen_paths):
+                app.file_fingerprints.remove(fingerprints.pop(path))
+                files_changed = True
+            
+            if not files_changed and not force:
+                return False
             
             detected_agents = {}
             detected_credentials = set()
             
-            for file in files:
-                if file.get('content'):
-                    content = file['content']
-                    
-                    # Detect AI agents
-                    agents = self._detect_agents_in_content(content, file['path'])
-                    for agent in agents:
-                        agent_key = f"{agent['type']}_{agent['name']}"
-                        if agent_key not in detected_agents:
-                            detected_agents[agent_key] = agent
-                        else:
-                            # Merge features and endpoints
-                            detected_agents[agent_key]['features'].extend(agent['features'])
-                            detected_agents[agent_key]['api_endpoints'].extend(agent['api_endpoints'])
-                    
-                    # Detect credentials
-                    credentials = self._detect_credentials_in_content(content)
-                    detected_credentials.update(credentials)
-            
-            # Save detected agents
-            for agent_data in detected_agents.values():
-                new_agent = AIAgent(
-                    app_id=app.id,
-                    agent_type=agent_data['type'],
-                    agent_name=agent_data['name'],
-                    model_name=agent_data.get('model'),
-                    role_description=agent_data.get('role', 'Detected AI agent'),
-                    features_used=list(set(agent_data['features'])),
-                    api_endpoints=list(set(agent_data['api_endpoints']))
-                )
-                db.session.add(new_agent)
+            for path in seen_paths:
+                fingerprint = fingerprints[path]
+                for agent in fingerprint.detected_agents or []:
+                    agent_key = (agent['type'], agent['name'])
+                    if agent_key not in detected_agents:
+                        detected_agents[agent_key] = {
+                            **agent,
+                            'features': list(agent['features']),
+                            'api_endpoints': list(agent['api_endpoints'])
+                        }
+                    else:
+                        # Merge features and endpoints
+                        detected_agents[agent_key]['features'].extend(agent['features'])
+                        detected_agents[agent_key]['api_endpoints'].extend(agent['api_endpoints'])
+                
+                detected_credentials.update(fingerprint.detected_credentials or [])
             
-            # Save detected credentials
-            for cred in detected_credentials:
-                new_credential = AppCredential(
-                    app_id=app.id,
-                    credential_type='api_key',
-                    service_name=cred
-                )
-                db.session.add(new_credential)
+            agents_changed = self._upsert_agents(app, detected_agents)
+            credentials_changed = self._upsert_credentials(app, detected_credentials)
+            return agents_changed or credentials_changed
                 
         except Exception as e:
             logging.error(f"Error analyzing app {app.id} for agents: {str(e)}")
             raise
     
-    def _detect_agents_in_content(self, content, file_path):
-        """Detect AI agents in file content"""
-        detected = []
+    def _hash_content(self, content):
+        """Content fingerprint used to detect changed files"""
+        digest = hashlib.blake2b(self._patterns_digest, digest_size=16)
+        digest.update(content.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+    
+    def _upsert_agents(self, app, detected_agents):
+        """Insert new agents, update changed ones and remove agents no longer detected"""
+        existing_agents = {(agent.agent_type, agent.agent_name): agent for agent in app.ai_agents}
+        changed = False
         
-        for agent_type, patterns in self.patterns.items():
-            agent_detected = False
-            features = []
-            api_endpoints = []
-            model_name = None
-            
-            # Check imports
-            if 'imports' in patterns:
-                for import_pattern in patterns['imports']:
-                    if re.search(import_pattern, content, re.IGNORECASE):
-                        agent_detected = True
-                        features.append(f"imports_{agent_type}")
-                        break
-            
-            # Check API calls
-            if 'api_calls' in patterns:
-                for api_pattern in patterns['api_calls']:
-                    matches = re.findall(api_pattern, content, re.IGNORECASE)
-                    if matches:
-                        agent_detected = True
-                        features.append(f"api_calls_{agent_type}")
-                        api_endpoints.extend(matches)
-            
-            # Check models
-            if 'models' in patterns:
-                for model_pattern in patterns['models']:
-                    match = re.search(model_pattern, content, re.IGNORECASE)
-                    if match:
-                        agent_detected = True
-                        model_name = match.group(0)
-                        features.append(f"model_{model_name}")
-                        break
+        for agent_key, agent_data in detected_agents.items():
+            fields = {
+                'model_name': agent_data.get('model'),
+                'role_description': agent_data.get('role', 'Detected AI agent'),
+                'features_used': sorted(set(agent_data['features'])),
+                'api_endpoints': sorted(set(agent_data['api_endpoints']))
+            }
+            agent = existing_agents.get(agent_key)
             
-            # Check general patterns for local models
-            if 'patterns' in patterns:
-                for pattern in patterns['patterns']:
-                    if re.search(pattern, content, re.IGNORECASE):
-                        agent_detected = True
-                        features.append(f"pattern_{pattern}")
+            if agent is None:
+                app.ai_agents.append(AIAgent(
+                    agent_type=agent_data['type'],
+                    agent_name=agent_data['name'],
+                    **fields
+                ))
+                changed = True
+                continue
             
-            if agent_detected:
-                detected.append({
-                    'type': agent_type,
-                    'name': f"{agent_type.title()} Agent in {os.path.basename(file_path)}",
-                    'model': model_name,
-                    'role': self._infer_agent_role(content, agent_type),
-                    'features': features,
-                    'api_endpoints': api_endpoints
-                })
+            for field, value in fields.items():
+                if getattr(agent, field) != value:
+                    setattr(agent, field, value)
+                    changed = True
+        
+        for agent_key, agent in existing_agents.items():
+            if agent_key not in detected_agents:
+                app.ai_agents.remove(agent)
+                changed = True
         
-        return detected
+        return changed
     
-    def _detect_credentials_in_content(self, content):
-        """Detect API credentials and services in content"""
-        credentials = set()
+    def _upsert_credentials(self, app, detected_credentials):
+        """Add newly detected credentials and remove ones no longer referenced"""
+        existing = {cred.service_name: cred for cred in app.credentials}
+        changed = False
         
-        # Common API key patterns
-        patterns = {
-            'openai': [r'OPENAI_API_KEY', r'openai.*key'],
-            'anthropic': [r'ANTHROPIC_API_KEY', r'anthropic.*key'],
-            'google': [r'GOOGLE_API_KEY', r'GOOGLE_.*_KEY'],
-            'aws': [r'AWS_ACCESS_KEY', r'AWS_SECRET_KEY'],
-            'azure': [r'AZURE_.*_KEY', r'AZURE_.*_SECRET'],
-            'huggingface': [r'HUGGINGFACE_.*_TOKEN', r'HF_TOKEN'],
-            'telegram': [r'TELEGRAM_.*_TOKEN', r'BOT_TOKEN'],
-            'github': [r'GITHUB_TOKEN', r'GH_TOKEN'],
-            'stripe': [r'STRIPE_.*_KEY'],
-            'sendgrid': [r'SENDGRID_API_KEY'],
-            'twilio': [r'TWILIO_.*'],
-        }
+        for service_name in detected_credentials - set(existing):
+            app.credentials.append(AppCredential(
+                credential_type='api_key',
+                service_name=service_name
+            ))
+            changed = True
         
-        for service, service_patterns in patterns.items():
-            for pattern in service_patterns:
-                if re.search(pattern, content, re.IGNORECASE):
-                    credentials.add(service)
-                    break
+        for service_name, cred in existing.items():
+            if service_name not in detected_credentials:
+                app.credentials.remove(cred)
+                changed = True
         
-        return credentials
+        return changed
+    
+    def _detect_agents_in_content(self, content, file_path):
+        """Detect AI agents in file content"""
+        return self.scanner.scan(content, file_path)['agents']
+    
+    def _detect_credentials_in_content(self, content):
+        """Detect API credentials and services in content"""
+        return self.scanner.detect_credentials(content)
     
     def _infer_agent_role(self, content, agent_type):
         """Infer the role of an AI agent based on content analysis"""
-        roles = {
-            'chat': [r'chat', r'conversation', r'dialogue', r'message'],
-            'completion': [r'complete', r'generate', r'text.*generation'],
-            'classification': [r'classify', r'categorize', r'sentiment'],
-            'summarization': [r'summarize', r'summary', r'abstract'],
-            'translation': [r'translate', r'translation', r'language'],
-            'qa': [r'question.*answer', r'qa', r'ask'],
-            'embedding': [r'embed', r'vector', r'similarity'],
-            'image': [r'image', r'vision', r'visual', r'dall'],
-            'code': [r'code', r'programming', r'codex'],
-            'analysis': [r'analyze', r'analysis', r'insight']
-        }
-        
-        for role, patterns in roles.items():
-            for pattern in patterns:
-                if re.search(pattern, content, re.IGNORECASE):
-                    return f"{role.title()} Assistant"
-        
-        return f"{agent_type.title()} Assistant"
+        return self.scanner.infer_role(content, agent_type)
     
     def update_agent_usage(self, agent_id, response_time_ms=None, success=True, cost=0.0):
         """Update agent usage statistics"""
@@ -0,0 +1,230 @@
+"""
+AI Cache Backends
+In-process LRU cache and optional second-tier stores for SharedAICache
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+# Sentinel distinguishing a cache miss from a cached None
+MISS = object()
+
+
+class LRUMemoryCache:
+    """Thread-safe in-process cache with TTL expiry, LRU eviction and a byte budget.
+
+    Entry sizes are measured as the length of their JSON encoding, which is
+    what the second tier stores as well. Expired entries are dropped on lookup
+    and by a periodic sweep, so memory stays bounded even for keys that are
+    never read again.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entries: int = 10000,
+                 sweep_interval: float = 60.0):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self.entries = OrderedDict()  # key -> (value, expires_at, size, cost_saved)
+        self.current_bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.lock = threading.RLock()
+        self.last_sweep = time.monotonic()
+
+    def get(self, key: str) -> Tuple[Any, float]:
+        """Return (value, cost_saved), or (MISS, 0.0) if absent or expired"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return MISS, 0.0
+
+            value, expires_at, size, cost_saved = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                return MISS, 0.0
+
+            self.entries.move_to_end(key)
+            return value, cost_saved
+
+    def set(self, key: str, value: Any, ttl: int, cost_saved: float = 0.0, size: int = None):
+        if size is None:
+            size = len(json.dumps(value, default=str))
+
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+
+            # Values larger than the whole budget are never cached in memory
+            if size > self.max_bytes:
+                return
+
+            self.entries[key] = (value, time.monotonic() + ttl, size, cost_saved)
+            self.current_bytes += size
+            self._maybe_sweep()
+
+            while self.entries and (self.current_bytes > self.max_bytes or
+                                    len(self.entries) > self.max_entries):
+                oldest_key = next(iter(self.entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key: str):
+        _, _, size, _ = self.entries.pop(key)
+        self.current_bytes -= size
+
+    def _maybe_sweep(self):
+        now = time.monotonic()
+        if now - self.last_sweep < self.sweep_interval:
+            return
+
+        self.last_sweep = now
+        expired = [key for key, entry in self.entries.items() if entry[1] <= now]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class RedisCacheBackend:
+    """Second-tier cache shared by all workers through Redis"""
+
+    name = 'redis'
+    key_prefix = 'aicache:v2:'
+
+    def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0, url: str = None):
+        if redis is None:
+            raise RuntimeError("Redis module not installed")
+
+        if url:
+            self.client = redis.Redis.from_url(url, decode_responses=True)
+        else:
+            self.client = redis.Redis(host=host, port=port, db=db, decode_responses=True)
+        self.client.ping()
+
+    def get(self, key: str) -> Tuple[Any, float, int]:
+        """Return (value, cost_saved, remaining_ttl), or (MISS, 0.0, 0)"""
+        pipeline = self.client.pipeline()
+        pipeline.get(self.key_prefix + key)
+        pipeline.ttl(self.key_prefix + key)
+        data, ttl = pipeline.execute()
+
+        if data is None:
+            return MISS, 0.0, 0
+
+        envelope = json.loads(data)
+        return envelope['value'], envelope.get('cost_saved', 0.0), max(int(ttl), 1)
+
+    def set(self, key: str, payload: str, ttl: int):
+        self.client.setex(self.key_prefix + key, ttl, payload)
+
+    def delete(self, key: str):
+        self.client.delete(self.key_prefix + key)
+
+
+class SQLiteCacheBackend:
+    """Second-tier cache in a local SQLite file, shared by workers on one host"""
+
+    name = 'sqlite'
+
+    def __init__(self, path: str = None, purge_interval: float = 300.0):
+        self.path = path or os.getenv('AI_CACHE_SQLITE_PATH', 'ai_cache.sqlite3')
+        self.purge_interval = purge_interval
+        self.last_purge = 0.0
+        self.lock = threading.Lock()
+
+        self.connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS ai_cache ("
+            "key TEXT PRIMARY KEY, payload TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self.connection.commit()
+
+    def get(self, key: str) -> Tuple[Any, float, int]:
+        """Return (value, cost_saved, remaining_ttl), or (MISS, 0.0, 0)"""
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT payload, expires_at FROM ai_cache WHERE key = ? AND expires_at > ?",
+                (key, now)
+            ).fetchone()
+
+        if row is None:
+            return MISS, 0.0, 0
+
+        envelope = json.loads(row[0])
+        return envelope['value'], envelope.get('cost_saved', 0.0), max(int(row[1] - now), 1)
+
+    def set(self, key: str, payload: str, ttl: int):
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO ai_cache (key, payload, expires_at) VALUES (?, ?, ?)",
+                (key, payload, now + ttl)
+            )
+            if now - self.last_purge >= self.purge_interval:
+                self.connection.execute("DELETE FROM ai_cache WHERE expires_at <= ?", (now,))
+                self.last_purge = now
+            self.connection.commit()
+
+    def delete(self, key: str):
+        with self.lock:
+            self.connection.execute("DELETE FROM ai_cache WHERE key = ?", (key,))
+            self.connection.commit()
+
+
+def create_l2_backend(backend: str = None, redis_host: str = 'localhost', redis_port: int = 6379,
+                      redis_db: int = 0) -> Optional[Any]:
+    """Create the configured second-tier backend, or None for memory-only caching.
+
+    ``backend`` is one of 'redis', 'sqlite' or 'none'; it defaults to the
+    AI_CACHE_L2 environment variable and falls back to Redis when available.
+    """
+    backend = (backend or os.getenv('AI_CACHE_L2', 'redis')).lower()
+
+    if backend == 'none':
+        return None
+
+    if backend == 'sqlite':
+        try:
+            return SQLiteCacheBackend()
+        except Exception as e:
+            logging.warning(f"SQLite cache not available, using in-memory cache only: {e}")
+            return None
+
+    if redis is None:
+        logging.warning("Redis module not installed, using in-memory cache only")
+        return None
+
+    try:
+        return RedisCacheBackend(host=redis_host, port=redis_port, db=redis_db,
+                                 url=os.getenv('AI_CACHE_REDIS_URL'))
+    except Exception:
+        logging.warning("Redis not available, using in-memory cache only")
+        return None
@@ -13,6 +13,11 @@ from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from enum import Enum
 import json
+from services.agent_telemetry import instrument_agent
+from services.parameter_search import ParallelParameterSearch, SharedPriceArray
+from services.risk_simulation import RiskEstimate, RiskSimulationEngine
+from services.technical_indicators import IndicatorStreams, PriceStream, RollingMean, RollingZScore
+from services.vectorized_backtest import apply_return_dynamics, price_matrix, run_vectorized_backtest
 
 class TradingStrategy(Enum):
     """Types of trading strategies"""
@@ -145,8 +150,22 @@ class AlgorithmicTradingDeveloper:
             'successful_strategies': 0
         }
         
+        # 'vectorized' computes signals for all assets with array ops; 'event' replays
+        # the original day-by-day loop. Both produce the same trade list.
+        self.backtest_engine = 'vectorized'
+        
+        # Process pool and result cache for parameter optimization, started on first use
+        self.parameter_search = ParallelParameterSearch()
+        
+        # Per algorithm and asset indicators for the event-driven engine, advanced one bar at a time
+        self.indicator_streams = IndicatorStreams(self._signal_indicators)
+        
+        # VaR/ES engine; Monte Carlo runs use a process pool started on first use
+        self.risk_engine = RiskSimulationEngine()
+        
         self.logger.info("Algorithmic Trading Developer initialized - Elite strategy development ready")
     
+    @instrument_agent('algorithmic_trading_developer', 'Algorithmic Trading Developer')
     async def develop_trading_algorithm(self, strategy_spec: Dict[str, Any]) -> TradingAlgorithm:
         """
         Develop comprehensive trading algorithm from specification
@@ -215,6 +234,7 @@ class AlgorithmicTradingDeveloper:
             self.logger.error(f"Error developing trading algorithm: {str(e)}")
             raise
     
+    @instrument_agent('algorithmic_trading_developer', 'Algorithmic Trading Developer')
     async def backtest_strategy(self, algorithm: TradingAlgorithm, test_data: Dict[str, Any]) -> BacktestResults:
         """
         Comprehensive backtesting with advanced analytics
@@ -234,7 +254,9 @@ class AlgorithmicTradingDeveloper:
             prepared_data = await self._prepare_backtesting_data(test_data, algorithm.asset_universe)
             
             # Phase 2: Strategy execution simulation
-            trades = await self._simulate_strategy_execution(algorithm, prepared_data)
+            trades = await self._simulate_strategy_execution(
+                algorithm, prepared_data, engine=test_data.get('engine', self.backtest_engine)
+            )
             
             # Phase 3: Performance calculation
             performance_metrics = await self._calculate_performance_metrics(trades, prepared_data)
@@ -281,6 +303,7 @@ class AlgorithmicTradingDeveloper:
             self.logger.error(f"Error in backtesting: {str(e)}")
             raise
     
+    @instrument_agent('algorithmic_trading_developer', 'Algorithmic Trading Developer')
     async def optimize_algorithm_parameters(self, algorithm: TradingAlgorithm, optimization_spec: Dict[str, Any]) -> Dict[str, Any]:
         """
         Advanced parameter optimization using multiple techniques
@@ -299,22 +322,40 @@ class AlgorithmicTradingDeveloper:
             # Phase 1: Define optimization space
             parameter_space = await self._define_parameter_space(algorithm, optimization_spec)
             
-            # Phase 2: Grid search optimization
-            grid_search_results = await self._grid_search_optimization(algorithm, parameter_space, optimization_spec)
-            
-            # Phase 3: Genetic algorithm optimization
-            genetic_results = await self._genetic_algorithm_optimization(algorithm, parameter_space, optimization_spec)
+            # Prices go to shared memory once; every candidate is scored by a real backtest
+            data = await self._prepare_backtesting_data(optimization_spec, algorithm.asset_universe)
+            prices = SharedPriceArray(price_matrix(data, algorithm.asset_universe))
+            split = int(prices.shape[1] * optimization_spec.get('in_sample_fraction', 0.7))
+            in_sample, out_of_sample = (0, split), (split, prices.shape[1])
             
-            # Phase 4: Bayesian optimization
-            bayesian_results = await self._bayesian_optimization(algorithm, parameter_space, optimization_spec)
-            
-            # Phase 5: Walk-forward optimization
-            walk_forward_results = await self._walk_forward_optimization(algorithm, parameter_space, optimization_spec)
-            
-            # Phase 6: Out-of-sample validation
-            validation_results = await self._validate_optimized_parameters(
-                algorithm, [grid_search_results, genetic_results, bayesian_results], optimization_spec
-            )
+            try:
+                # Phase 2: Grid search optimization
+                grid_search_results = await self._grid_search_optimization(
+                    algorithm, parameter_space, optimization_spec, prices, in_sample
+                )
+                
+                # Phase 3: Genetic algorithm optimization
+                genetic_results = await self._genetic_algorithm_optimization(
+                    algorithm, parameter_space, optimization_spec, prices, in_sample
+                )
+                
+                # Phase 4: Bayesian optimization
+                bayesian_results = await self._bayesian_optimization(
+                    algorithm, parameter_space, optimization_spec, prices, in_sample
+                )
+                
+                # Phase 5: Walk-forward optimization
+                walk_forward_results = await self._walk_forward_optimization(
+                    algorithm, parameter_space, optimization_spec, prices
+                )
+                
+                # Phase 6: Out-of-sample validation
+                validation_results = await self._validate_optimized_parameters(
+                    algorithm, [grid_search_results, genetic_results, bayesian_results], optimization_spec,
+                    prices, out_of_sample
+                )
+            finally:
+                prices.release()
             
             # Phase 7: Robustness testing
             robustness_results = await self._test_parameter_robustness(algorithm, validation_results, optimization_spec)
@@ -342,6 +383,7 @@ class AlgorithmicTradingDeveloper:
             self.logger.error(f"Error in parameter optimization: {str(e)}")
             raise
     
+    @instrument_agent('algorithmic_trading_developer', 'Algorithmic Trading Developer')
     async def implement_risk_management(self, algorithm: TradingAlgorithm, risk_spec: Dict[str, Any]) -> RiskMetrics:
         """
         Implement comprehensive risk management system
@@ -699,33 +741,52 @@ class AlgorithmicTradingDeveloper:
         
         dates = pd.date_range(start=start_date, end=end_date, freq='D')
         
-        data = {}
-        for asset in asset_universe:
+        returns = np.empty((len(dates), len(asset_universe)))
+        volumes = np.empty((len(dates), len(asset_universe)))
+        for column, asset in enumerate(asset_universe):
             # Generate realistic price series
             np.random.seed(hash(asset) % 1000)  # Reproducible but different per asset
-            returns = np.random.normal(0.0008, 0.02, len(dates))  # Daily returns
-            
-            # Add some momentum and mean reversion effects
-            for i in range(1, len(returns)):
-                momentum_effect = returns[i-1] * 0.1  # 10% momentum
-                mean_reversion = -returns[max(0, i-5):i].mean() * 0.05  # Mean reversion
-                returns[i] += momentum_effect + mean_reversion
-            
-            prices = 100 * np.exp(np.cumsum(returns))
-            
-            # Add volume and other data
-            volume = np.random.lognormal(15, 0.5, len(dates))  # Log-normal volume
-            
-            data[f'{asset}_price'] = prices
-            data[f'{asset}_volume'] = volume
-            data[f'{asset}_returns'] = np.concatenate([[0], returns[1:]])  # Daily returns
+            returns[:, column] = np.random.normal(0.0008, 0.02, len(dates))  # Daily returns
+            volumes[:, column] = np.random.lognormal(15, 0.5, len(dates))  # Log-normal volume
+        
+        # Add 10% momentum and 5-day mean reversion effects, for all assets at once
+        apply_return_dynamics(returns, momentum=0.1, mean_reversion=0.05, lookback=5)
+        prices = 100 * np.exp(np.cumsum(returns, axis=0))
+        
+        data = {}
+        for column, asset in enumerate(asset_universe):
+            data[f'{asset}_price'] = prices[:, column]
+            data[f'{asset}_volume'] = volumes[:, column]
+            data[f'{asset}_returns'] = np.concatenate([[0], returns[1:, column]])  # Daily returns
         
         df = pd.DataFrame(data, index=dates)
         return df.dropna()
     
-    async def _simulate_strategy_execution(self, algorithm: TradingAlgorithm, data: pd.DataFrame) -> List[Dict]:
+    async def _simulate_strategy_execution(self, algorithm: TradingAlgorithm, data: pd.DataFrame,
+                                           engine: str = 'vectorized') -> List[Dict]:
         """Simulate strategy execution on historical data"""
         
+        if engine == 'event':
+            return await self._simulate_strategy_execution_event_driven(algorithm, data)
+        
+        return run_vectorized_backtest(
+            algorithm.strategy_type.value,
+            algorithm.asset_universe,
+            data,
+            max_position_size=algorithm.risk_limits.get('max_position_size', 0.05)
+        )
+    
+    async def _simulate_strategy_execution_event_driven(self, algorithm: TradingAlgorithm, data: pd.DataFrame) -> List[Dict]:
+        """Day-by-day simulation re-evaluating signals on each history prefix; reference for the vectorized engine"""
+        
+        try:
+            return await self._replay_strategy_execution(algorithm, data)
+        finally:
+            # Streams only carry state within one replay; drop them so finished backtests do not accumulate
+            for asset in algorithm.asset_universe:
+                self.indicator_streams.discard(f"{algorithm.algorithm_id}:{asset}")
+    
+    async def _replay_strategy_execution(self, algorithm: TradingAlgorithm, data: pd.DataFrame) -> List[Dict]:
         trades = []
         current_positions = {}
         cash = 1000000  # Start with $1M
@@ -779,6 +840,15 @@ class AlgorithmicTradingDeveloper:
         
         return trades
     
+    @staticmethod
+    def _signal_indicators() -> PriceStream:
+        """Indicators _generate_trading_signal reads for one asset"""
+        return PriceStream(price_indicators={
+            'ma_20': RollingMean(20),
+            'ma_50': RollingMean(50),
+            'zscore_30': RollingZScore(30)
+        })
+    
     async def _generate_trading_signal(self, algorithm: TradingAlgorithm, asset: str, current_row: pd.Series, historical_data: pd.DataFrame) -> float:
         """Generate trading signal for specific asset"""
         
@@ -793,14 +863,15 @@ class AlgorithmicTradingDeveloper:
         
         prices = historical_data[price_col].values
         current_price = current_row[price_col]
+        indicators = self.indicator_streams.sync(f"{algorithm.algorithm_id}:{asset}", prices)
         
         strategy_type = algorithm.strategy_type
         
         if strategy_type == TradingStrategy.MOMENTUM:
             # Momentum signal
             if len(prices) >= 20:
-                ma_20 = np.mean(prices[-20:])
-                ma_50 = np.mean(prices[-50:]) if len(prices) >= 50 else ma_20
+                ma_20 = indicators['ma_20']
+                ma_50 = indicators['ma_50'] if len(prices) >= 50 else ma_20
                 
                 # Price above moving averages = positive signal
                 if current_price > ma_20 > ma_50:
@@ -811,17 +882,13 @@ class AlgorithmicTradingDeveloper:
         elif strategy_type == TradingStrategy.MEAN_REVERSION:
             # Mean reversion signal
             if len(prices) >= 30:
-                mean_price = np.mean(prices[-30:])
-                std_price = np.std(prices[-30:])
+                z_score = indicators['zscore_30']
                 
-                if std_price > 0:
-                    z_score = (current_price - mean_price) / std_price
-                    
-                    # Revert to mean
-                    if z_score > 2:  # Overpriced
-                        return -0.8
-                    elif z_score < -2:  # Underpriced
-                        return 0.8
+                # Revert to mean
+                if z_score > 2:  # Overpriced
+                    return -0.8
+                elif z_score < -2:  # Underpriced
+                    return 0.8
         
         return 0.0  # No signal
     
@@ -1161,95 +1228,97 @@ class AlgorithmicTradingDeveloper:
                 'position_size': [0.01, 0.02, 0.03, 0.05]
             }
     
-    async def _grid_search_optimization(self, algorithm: TradingAlgorithm, parameter_space: Dict, optimization_spec: Dict) -> Dict:
+    async def _grid_search_optimization(self, algorithm: TradingAlgorithm, parameter_space: Dict, optimization_spec: Dict,
+                                        prices: SharedPriceArray, window: Tuple[int, int]) -> Dict:
         """Perform grid search optimization"""
         
-        # Simulate grid search results
-        best_params = {}
-        best_sharpe = 0
-        
-        # Take middle values as "optimal"
-        for param, values in parameter_space.items():
-            mid_index = len(values) // 2
-            best_params[param] = values[mid_index]
-        
-        # Simulate performance with some variance
-        best_sharpe = 1.2 + np.random.normal(0, 0.1)
+        results = await asyncio.to_thread(
+            self.parameter_search.grid_search,
+            algorithm.strategy_type.value, prices, parameter_space, window,
+            max_evaluations=optimization_spec.get('max_grid_evaluations', 5000)
+        )
         
         return {
-            'best_parameters': best_params,
-            'best_sharpe_ratio': best_sharpe,
-            'optimization_surface': self._generate_optimization_surface(parameter_space),
-            'convergence_iterations': 25
+            'best_parameters': results['best_parameters'],
+            'best_score': results['best_score'],
+            'best_sharpe_ratio': results['best_score'],
+            'optimization_surface': self._generate_optimization_surface(
+                results['evaluations'], results['active_parameters']
+            ),
+            'convergence_iterations': len(results['evaluations'])
         }
     
-    async def _genetic_algorithm_optimization(self, algorithm: TradingAlgorithm, parameter_space: Dict, optimization_spec: Dict) -> Dict:
+    async def _genetic_algorithm_optimization(self, algorithm: TradingAlgorithm, parameter_space: Dict, optimization_spec: Dict,
+                                              prices: SharedPriceArray, window: Tuple[int, int]) -> Dict:
         """Perform genetic algorithm optimization"""
         
-        # Simulate GA results - typically finds better solutions than grid search
-        best_params = {}
-        for param, values in parameter_space.items():
-            # GA tends to find non-obvious combinations
-            best_params[param] = np.random.choice(values)
-        
-        best_fitness = 1.35 + np.random.normal(0, 0.05)
+        results = await asyncio.to_thread(
+            self.parameter_search.genetic_search,
+            algorithm.strategy_type.value, prices, parameter_space, window,
+            population_size=optimization_spec.get('population_size', 24),
+            generations=optimization_spec.get('generations', 10),
+            seed=optimization_spec.get('seed', 0)
+        )
         
         return {
-            'best_parameters': best_params,
-            'best_fitness': best_fitness,
-            'generations': 50,
-            'population_size': 100,
-            'convergence_generation': 42
+            'best_parameters': results['best_parameters'],
+            'best_score': results['best_score'],
+            'best_fitness': results['best_score'],
+            'generations': results['generations'],
+            'population_size': results['population_size'],
+            'convergence_generation': results['convergence_generation']
         }
     
-    async def _bayesian_optimization(self, algorithm: TradingAlgorithm, parameter_space: Dict, optimization_spec: Dict) -> Dict:
+    async def _bayesian_optimization(self, algorithm: TradingAlgorithm, parameter_space: Dict, optimization_spec: Dict,
+                                     prices: SharedPriceArray, window: Tuple[int, int]) -> Dict:
         """Perform Bayesian optimization"""
         
-        # Bayesian optimization is efficient and finds good solutions
-        best_params = {}
-        for param, values in parameter_space.items():
-            # Bayesian tends to find good solutions efficiently
-            optimal_index = int(len(values) * 0.7)  # Towards the higher end
-            best_params[param] = values[min(optimal_index, len(values) - 1)]
-        
-        best_acquisition = 1.28 + np.random.normal(0, 0.03)
+        results = await asyncio.to_thread(
+            self.parameter_search.bayesian_search,
+            algorithm.strategy_type.value, prices, parameter_space, window,
+            iterations=optimization_spec.get('bayesian_iterations', 30),
+            seed=optimization_spec.get('seed', 0)
+        )
         
         return {
-            'best_parameters': best_params,
-            'best_acquisition_value': best_acquisition,
-            'iterations': 30,
-            'acquisition_function': 'expected_improvement',
-            'convergence_confidence': 0.95
+            'best_parameters': results['best_parameters'],
+            'best_score': results['best_score'],
+            'iterations': results['iterations'],
+            'acquisition_function': results['acquisition_function']
         }
     
-    async def _walk_forward_optimization(self, algorithm: TradingAlgorithm, parameter_space: Dict, optimization_spec: Dict) -> Dict:
+    async def _walk_forward_optimization(self, algorithm: TradingAlgorithm, parameter_space: Dict, optimization_spec: Dict,
+                                         prices: SharedPriceArray) -> Dict:
         """Perform walk-forward optimization"""
         
-        return {
-            'optimization_windows': 8,  # 8 optimization periods
-            'out_of_sample_periods': 8,
-            'average_in_sample_sharpe': 1.4,
-            'average_out_of_sample_sharpe': 1.1,
-            'parameter_stability_score': 0.75,
-            'performance_degradation': 0.21  # 21% degradation out of sample
-        }
+        return await asyncio.to_thread(
+            self.parameter_search.walk_forward,
+            algorithm.strategy_type.value, prices, parameter_space,
+            windows=optimization_spec.get('walk_forward_windows', 8),
+            train_fraction=optimization_spec.get('in_sample_fraction', 0.7)
+        )
     
-    async def _validate_optimized_parameters(self, algorithm: TradingAlgorithm, optimization_results: List[Dict], optimization_spec: Dict) -> Dict:
+    async def _validate_optimized_parameters(self, algorithm: TradingAlgorithm, optimization_results: List[Dict], optimization_spec: Dict,
+                                             prices: SharedPriceArray, window: Tuple[int, int]) -> Dict:
         """Validate optimized parameters on out-of-sample data"""
         
-        # Simulate validation results
-        validation_scores = []
-        for result in optimization_results:
-            # Out-of-sample typically performs worse
-            in_sample_score = result.get('best_sharpe_ratio', result.get('best_fitness', result.get('best_acquisition_value', 1.0)))
-            out_of_sample_score = in_sample_score * (0.8 + np.random.normal(0, 0.1))
-            validation_scores.append(out_of_sample_score)
+        outcomes = await asyncio.to_thread(
+            self.parameter_search.evaluate_pairs,
+            algorithm.strategy_type.value, prices,
+            [(result['best_parameters'], window) for result in optimization_results]
+        )
+        validation_scores = [self.parameter_search.score(outcome) for outcome in outcomes]
+        degradations = [
+            (result['best_score'] - score) / result['best_score']
+            for result, score in zip(optimization_results, validation_scores) if result['best_score']
+        ]
+        mean_score = np.mean(validation_scores)
         
         return {
             'validation_scores': validation_scores,
             'best_validation_score': max(validation_scores),
-            'average_degradation': np.mean([(r.get('best_sharpe_ratio', 1.0) - v) / r.get('best_sharpe_ratio', 1.0) for r, v in zip(optimization_results, validation_scores)]),
-            'consistency_score': 1 - np.std(validation_scores) / np.mean(validation_scores) if validation_scores else 0
+            'average_degradation': float(np.mean(degradations)) if degradations else 0.0,
+            'consistency_score': float(1 - np.std(validation_scores) / mean_score) if mean_score else 0
         }
     
     async def _test_parameter_robustness(self, algorithm: TradingAlgorithm, validation_results: Dict, optimization_spec: Dict) -> Dict:
@@ -1288,24 +1357,17 @@ class AlgorithmicTradingDeveloper:
         else:
             return grid_search['best_parameters']
     
-    def _generate_optimization_surface(self, parameter_space: Dict) -> Dict:
-        """Generate optimization surface data for visualization"""
+    def _generate_optimization_surface(self, evaluations: List[Tuple[Dict, float]], active_parameters: List[str]) -> Dict:
+        """Best backtest score over the first two searched parameters, for visualization"""
         
-        # Simplified 2D surface for first two parameters
-        param_names = list(parameter_space.keys())[:2]
-        if len(param_names) < 2:
+        if len(active_parameters) < 2:
             return {}
         
-        param1_values = parameter_space[param_names[0]]
-        param2_values = parameter_space[param_names[1]]
-        
+        first, second = active_parameters[:2]
         surface = {}
-        for p1 in param1_values:
-            surface[p1] = {}
-            for p2 in param2_values:
-                # Simulate performance surface with some noise
-                performance = 1.0 + 0.3 * np.sin(p1 * 0.1) * np.cos(p2 * 0.1) + np.random.normal(0, 0.05)
-                surface[p1][p2] = max(0, performance)
+        for params, score in evaluations:
+            row = surface.setdefault(params[first], {})
+            row[params[second]] = max(score, row.get(params[second], score))
         
         return surface
     
@@ -1438,27 +1500,61 @@ class AlgorithmicTradingDeveloper:
             }
         }
     
+    async def _estimate_portfolio_risk(self, algorithm: TradingAlgorithm, risk_spec: Dict) -> RiskEstimate:
+        """Daily VaR/ES of the algorithm's portfolio as fractions of its value.
+        
+        With ``asset_returns`` (periods x assets, in ``asset_universe`` order)
+        the estimate uses those returns and ``weights`` (equal by default),
+        by Monte Carlo unless ``var_method`` says 'historical' or
+        'parametric'. Without history it is the parametric estimate for an
+        assumed ``portfolio_volatility`` (annual, 15% by default).
+        """
+        
+        horizon_days = int(risk_spec.get('var_horizon_days', 1))
+        asset_returns = risk_spec.get('asset_returns')
+        
+        if asset_returns is None:
+            daily_volatility = risk_spec.get('portfolio_volatility', 0.15) / np.sqrt(252)
+            return self.risk_engine.parametric([1.0], [[daily_volatility ** 2]], horizon_days=horizon_days)
+        
+        asset_returns = np.asarray(asset_returns, dtype=float)
+        weights = risk_spec.get('weights')
+        weights = np.full(asset_returns.shape[1], 1.0 / asset_returns.shape[1]) if weights is None \
+            else np.asarray(weights, dtype=float)
+        method = risk_spec.get('var_method', 'monte_carlo')
+        
+        if method == 'historical':
+            return self.risk_engine.historical(weights, asset_returns, horizon_days=horizon_days)
+        
+        mean = asset_returns.mean(axis=0)
+        cov_matrix = np.atleast_2d(np.cov(asset_returns.T))
+        if method == 'parametric':
+            return self.risk_engine.parametric(weights, cov_matrix, mean, horizon_days=horizon_days)
+        if method == 'monte_carlo':
+            return await asyncio.to_thread(
+                self.risk_engine.monte_carlo, weights, cov_matrix, mean,
+                horizon_days=horizon_days,
+                paths=risk_spec.get('simulation_paths'),
+                distribution=risk_spec.get('simulation_distribution', 'normal'),
+                degrees_of_freedom=risk_spec.get('degrees_of_freedom', 5.0)
+            )
+        raise ValueError(f"Unknown VaR method: {method}")
+    
     async def _calculate_var_95(self, algorithm: TradingAlgorithm, risk_spec: Dict) -> float:
         """Calculate 95% Value at Risk"""
         
-        # Simplified VaR calculation
         portfolio_value = risk_spec.get('portfolio_size', 1000000)
-        portfolio_volatility = 0.15  # 15% assumed portfolio volatility
-        
-        # 95% VaR (1.645 standard deviations)
-        daily_var = portfolio_value * portfolio_volatility / np.sqrt(252) * 1.645
+        estimate = await self._estimate_portfolio_risk(algorithm, risk_spec)
         
-        return daily_var
+        return portfolio_value * estimate.var[0.95]
     
     async def _calculate_expected_shortfall(self, algorithm: TradingAlgorithm, risk_spec: Dict) -> float:
         """Calculate Expected Shortfall (Conditional VaR)"""
         
-        var_95 = await self._calculate_var_95(algorithm, risk_spec)
-        
-        # Expected Shortfall is typically 1.2-1.3x VaR for normal distributions
-        expected_shortfall = var_95 * 1.25
+        portfolio_value = risk_spec.get('portfolio_size', 1000000)
+        estimate = await self._estimate_portfolio_risk(algorithm, risk_spec)
         
-        return expected_shortfall
+        return portfolio_value * estimate.expected_shortfall[0.95]
     
     # Additional scenario and stress testing methods
     async def _conduct_scenario_analysis(self, algorithm: TradingAlgorithm, data: pd.DataFrame) -> Dict:
@@ -1,8 +1,10 @@
 import logging
 from datetime import datetime, date, timedelta
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, case
+from sqlalchemy.orm import selectinload
 from app import db
-from models import ReplitApp, AIAgent, MatrixSnapshot, AgentUsageLog, AppCredential
+from models import (ReplitApp, AIAgent, MatrixSnapshot, AgentUsageLog, AppCredential,
+                    AgentExecutionRollup, AgentPerformanceMetrics)
 
 class AnalyticsService:
     def __init__(self):
@@ -12,8 +14,8 @@ class AnalyticsService:
         """Generate the app-to-AI-agent relationship matrix"""
         try:
             # Get all active apps and their agents
-            apps = ReplitApp.query.filter_by(is_active=True).all()
-            all_agents = AIAgent.query.join(ReplitApp).filter(ReplitApp.is_active == True).all()
+            apps = ReplitApp.query.filter_by(is_active=True).options(selectinload(ReplitApp.ai_agents)).all()
+            all_agents = [agent for app in apps for agent in app.ai_agents]
             
             # Create matrix structure
             matrix_data = {
@@ -75,12 +77,6 @@ class AnalyticsService:
             new_agents_count = AIAgent.query.filter(AIAgent.created_at >= yesterday).count()
             matrix_data['new_agents'] = new_agents_count
             
-            # Generate integration opportunities based on real app data
-            matrix_data['integration_opportunities'] = self._analyze_integration_opportunities(apps, agent_types)
-            
-            # Generate optimization tips based on real usage patterns
-            matrix_data['optimization_tips'] = self._analyze_optimization_opportunities(apps, all_agents)
-            
             # Generate integration opportunities
             integration_opportunities = self._analyze_integration_opportunities(apps, agent_types)
             matrix_data['integration_opportunities'] = integration_opportunities
@@ -261,31 +257,68 @@ class AnalyticsService:
     def get_usage_trends(self):
         """Get usage trends over time"""
         try:
-            # Get usage data for the last 30 days
-            thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-            
-            # This would be more comprehensive with AgentUsageLog data
-            # For now, return basic trend data
-            agents = AIAgent.query.join(ReplitApp).filter(ReplitApp.is_active == True).all()
+            type_totals = db.session.query(
+                AIAgent.agent_type,
+                func.count(AIAgent.id).label('agents'),
+                func.coalesce(func.sum(AIAgent.usage_frequency), 0).label('usage'),
+                func.coalesce(func.sum(AIAgent.effectiveness_score), 0.0).label('effectiveness'),
+                func.coalesce(func.sum(AIAgent.cost_estimate), 0.0).label('cost')
+            ).join(ReplitApp).filter(ReplitApp.is_active == True).group_by(AIAgent.agent_type).all()
             
+            total_agents = sum(row.agents for row in type_totals)
             trends = {
-                'total_usage': sum([agent.usage_frequency for agent in agents]),
-                'average_effectiveness': sum([agent.effectiveness_score for agent in agents]) / len(agents) if agents else 0,
-                'total_estimated_cost': sum([agent.cost_estimate for agent in agents]),
-                'most_used_type': None,
-                'trend_direction': 'stable'  # Would calculate from historical data
+                'total_usage': sum(row.usage for row in type_totals),
+                'average_effectiveness': sum(row.effectiveness for row in type_totals) / total_agents if total_agents else 0,
+                'total_estimated_cost': sum(row.cost for row in type_totals),
+                'most_used_type': max(type_totals, key=lambda row: row.usage).agent_type if type_totals else None,
+                'trend_direction': 'stable'
             }
             
-            # Find most used agent type
-            type_usage = {}
-            for agent in agents:
-                if agent.agent_type not in type_usage:
-                    type_usage[agent.agent_type] = 0
-                type_usage[agent.agent_type] += agent.usage_frequency
-            
-            if type_usage:
-                trends['most_used_type'] = max(type_usage, key=type_usage.get)
+            # Execution history comes from the per-agent rollups, one row per agent
+            rollups = AgentExecutionRollup.query.with_entities(
+                AgentExecutionRollup.hour_of_day_counts, AgentExecutionRollup.recent_days
+            ).all()
+            
+            days = {}
+            hours = [0] * 24
+            for rollup in rollups:
+                for day, bucket in (rollup.recent_days or {}).items():
+                    totals = days.setdefault(day, [0, 0, 0.0, 0])
+                    for i, value in enumerate(bucket):
+                        totals[i] += value
+                for hour, count in enumerate(rollup.hour_of_day_counts or ()):
+                    hours[hour] += count
+            
+            daily_usage = [
+                {'date': day, 'executions': bucket[0], 'successes': bucket[1], 'cost': bucket[2], 'tokens': bucket[3]}
+                for day, bucket in sorted(days.items())
+            ]
+            weeks = {}
+            for entry in daily_usage:
+                year, week, _ = date.fromisoformat(entry['date']).isocalendar()
+                weeks[f"{year}-W{week:02d}"] = weeks.get(f"{year}-W{week:02d}", 0) + entry['executions']
             
+            today = date.today()
+            last_week = sum(entry['executions'] for entry in daily_usage
+                            if date.fromisoformat(entry['date']) > today - timedelta(days=7))
+            previous_week = sum(entry['executions'] for entry in daily_usage
+                                if today - timedelta(days=14) < date.fromisoformat(entry['date']) <= today - timedelta(days=7))
+            if previous_week and last_week > previous_week * 1.1 or last_week and not previous_week:
+                trends['trend_direction'] = 'up'
+            elif last_week < previous_week * 0.9:
+                trends['trend_direction'] = 'down'
+            
+            trends.update({
+                'daily_usage': daily_usage,
+                'weekly_usage': [{'week': week, 'executions': count} for week, count in sorted(weeks.items())],
+                'peak_hours': [{'hour': hour, 'executions': hours[hour]}
+                               for hour in sorted(range(24), key=hours.__getitem__, reverse=True)[:3] if hours[hour]],
+                'trends': {
+                    'direction': trends['trend_direction'],
+                    'executions_last_7_days': last_week,
+                    'executions_previous_7_days': previous_week
+                }
+            })
             return trends
         except Exception as e:
             logging.error(f"Error getting usage trends: {str(e)}")
@@ -335,27 +368,62 @@ class AnalyticsService:
     def get_effectiveness_metrics(self):
         """Get effectiveness metrics"""
         try:
-            agents = AIAgent.query.join(ReplitApp).filter(ReplitApp.is_active == True).all()
-            
-            if not agents:
-                return {}
-            
-            effectiveness_scores = [agent.effectiveness_score for agent in agents]
+            active_agents = AIAgent.query.join(ReplitApp).filter(ReplitApp.is_active == True)
+            score = AIAgent.effectiveness_score
+            summary = active_agents.with_entities(
+                func.count(AIAgent.id).label('agents'),
+                func.avg(score).label('average'),
+                func.sum(case((score >= 0.8, 1), else_=0)).label('excellent'),
+                func.sum(case((and_(score >= 0.6, score < 0.8), 1), else_=0)).label('good'),
+                func.sum(case((and_(score >= 0.4, score < 0.6), 1), else_=0)).label('average_range'),
+                func.sum(case((score < 0.4, 1), else_=0)).label('poor')
+            ).one()
+            
+            metrics = {}
+            if summary.agents:
+                metrics.update({
+                    'average_effectiveness': summary.average or 0.0,
+                    'effectiveness_ranges': {
+                        'excellent': summary.excellent or 0,
+                        'good': summary.good or 0,
+                        'average': summary.average_range or 0,
+                        'poor': summary.poor or 0
+                    },
+                    'top_performers': active_agents.order_by(score.desc()).limit(5).all(),
+                    'improvement_candidates': active_agents.filter(score < 0.5).all()
+                })
             
-            # Group by effectiveness ranges
-            ranges = {
-                'excellent': len([s for s in effectiveness_scores if s >= 0.8]),
-                'good': len([s for s in effectiveness_scores if 0.6 <= s < 0.8]),
-                'average': len([s for s in effectiveness_scores if 0.4 <= s < 0.6]),
-                'poor': len([s for s in effectiveness_scores if s < 0.4])
-            }
+            # Execution effectiveness from the per-agent performance rollups
+            performance = AgentPerformanceMetrics.query.filter(AgentPerformanceMetrics.total_executions > 0).all()
+            if performance:
+                executions = sum(row.total_executions for row in performance)
+                total_cost = sum(row.total_cost_usd or 0.0 for row in performance)
+                ranked = sorted(performance, key=lambda row: (row.reliability_score or 0.0, row.total_executions),
+                                reverse=True)
+                
+                def summarize(row):
+                    return {
+                        'agent_key': row.agent_key,
+                        'agent_name': row.agent_name,
+                        'executions': row.total_executions,
+                        'success_rate': row.success_rate,
+                        'reliability_score': row.reliability_score,
+                        'typical_response_time_ms': row.typical_response_time_ms
+                    }
+                
+                metrics.update({
+                    'total_agents': len(performance),
+                    'avg_effectiveness': sum(row.successful_executions for row in performance) / executions,
+                    'high_performers': [summarize(row) for row in ranked if (row.reliability_score or 0.0) >= 95][:5],
+                    'low_performers': [summarize(row) for row in reversed(ranked) if (row.reliability_score or 0.0) < 80][:5],
+                    'total_usage': executions,
+                    'total_cost': total_cost,
+                    'cost_per_usage': total_cost / executions,
+                    'top_performer': ranked[0].agent_name,
+                    'most_used': max(performance, key=lambda row: row.total_executions).agent_name
+                })
             
-            return {
-                'average_effectiveness': sum(effectiveness_scores) / len(effectiveness_scores),
-                'effectiveness_ranges': ranges,
-                'top_performers': sorted(agents, key=lambda x: x.effectiveness_score, reverse=True)[:5],
-                'improvement_candidates': [agent for agent in agents if agent.effectiveness_score < 0.5]
-            }
+            return metrics
         except Exception as e:
             logging.error(f"Error getting effectiveness metrics: {str(e)}")
             return {
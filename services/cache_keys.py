@@ -0,0 +1,147 @@
+"""
+Cache Key Builder
+Canonical, fast cache keys for AI service calls and their content payloads
+"""
+
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Union
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+
+# Bytes hashed per update when streaming large payloads
+CHUNK_SIZE = 1024 * 1024
+
+# Strings and bytes at least this large are replaced by their digest inside keys
+INLINE_LIMIT = 256
+
+# Only payloads this large are worth memoizing by identity
+MEMO_MIN_SIZE = 64 * 1024
+MEMO_MAX_ENTRIES = 32
+# Total size of the payloads the memo may keep alive
+MEMO_MAX_BYTES = 8 * 1024 * 1024
+
+Content = Union[str, bytes, bytearray, memoryview]
+
+
+def _new_hasher():
+    if xxhash is not None:
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=16)
+
+
+class _DigestMemo:
+    """Remember digests of recently hashed immutable payloads by identity.
+
+    Entries hold a reference to the payload, so its id cannot be reused by
+    another object while the entry is cached. Those references keep the
+    payloads alive, so the memo is bounded by their total size as well as
+    by count, and a payload larger than the whole budget is not memoized.
+    """
+
+    def __init__(self, max_entries: int = MEMO_MAX_ENTRIES, max_bytes: int = MEMO_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.entries = OrderedDict()  # id -> (payload, digest, size)
+        self.lock = threading.Lock()
+
+    def get(self, payload) -> str:
+        with self.lock:
+            entry = self.entries.get(id(payload))
+            if entry is not None and entry[0] is payload:
+                self.entries.move_to_end(id(payload))
+                return entry[1]
+        return None
+
+    def put(self, payload, digest: str):
+        size = sys.getsizeof(payload)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            previous = self.entries.pop(id(payload), None)
+            if previous is not None:
+                self.current_bytes -= previous[2]
+            self.entries[id(payload)] = (payload, digest, size)
+            self.current_bytes += size
+            while len(self.entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                self.current_bytes -= self.entries.popitem(last=False)[1][2]
+
+
+_memo = _DigestMemo()
+
+
+def content_digest(content: Content) -> str:
+    """Hex digest of a text or binary payload, streamed in chunks.
+
+    bytes, bytearray and contiguous memoryviews are hashed in place without
+    conversion; a non-contiguous view is copied to bytes first. Other
+    objects are hashed by their str() form. Text is encoded chunk by chunk, so
+    a large document is never copied in full. Digests of large immutable
+    payloads (str, bytes) are memoized, so hashing the same object again on
+    get and set is free.
+    """
+    memoizable = isinstance(content, (str, bytes)) and len(content) >= MEMO_MIN_SIZE
+    if memoizable:
+        cached = _memo.get(content)
+        if cached is not None:
+            return cached
+
+    hasher = _new_hasher()
+
+    if isinstance(content, str):
+        # Type tag keeps str and bytes payloads with equal encodings apart
+        hasher.update(b's')
+        for start in range(0, len(content), CHUNK_SIZE):
+            hasher.update(content[start:start + CHUNK_SIZE].encode('utf-8', 'surrogatepass'))
+    elif isinstance(content, (bytes, bytearray, memoryview)):
+        hasher.update(b'b')
+        view = memoryview(content)
+        view = view.cast('B') if view.contiguous else memoryview(view.tobytes())
+        for start in range(0, len(view), CHUNK_SIZE):
+            hasher.update(view[start:start + CHUNK_SIZE])
+    else:
+        # Other objects are keyed by their text form
+        return content_digest(str(content))
+
+    digest = hasher.hexdigest()
+    if memoizable:
+        _memo.put(content, digest)
+    return digest
+
+
+def _canonicalize(value: Any) -> Any:
+    """Convert params into a JSON-ready form with large payloads replaced by digests"""
+    if isinstance(value, dict):
+        return {str(key): _canonicalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonicalize(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_canonicalize(item) for item in value), key=repr)
+    if isinstance(value, str):
+        if len(value) < INLINE_LIMIT:
+            return value
+        return {'__digest__': content_digest(value)}
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {'__digest__': content_digest(value)}
+    return value
+
+
+def build_cache_key(service: str, method: str, params: Dict[str, Any]) -> str:
+    """Build a stable cache key for a service call.
+
+    Params are serialized canonically (sorted keys, compact separators), with
+    large text and binary values folded to their content digest first, and
+    the result is hashed with a fast non-cryptographic hash.
+    """
+    canonical = json.dumps(_canonicalize(params), sort_keys=True, separators=(',', ':'), default=str)
+    hasher = _new_hasher()
+    hasher.update(canonical.encode('utf-8', 'surrogatepass'))
+    return f"{service}:{method}:{hasher.hexdigest()}"
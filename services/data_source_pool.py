@@ -0,0 +1,289 @@
+"""
+Data Source Pool
+Pooled HTTP session, per-source limits and an off-loop browser pool for market data sources
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import aiohttp
+
+# source -> (max concurrent requests, timeout seconds)
+DEFAULT_SOURCE_LIMITS = {
+    'coingecko': (10, 10.0),
+    'binance': (20, 10.0),
+    'kraken': (10, 10.0),
+    'nftpricefloor': (5, 15.0),
+    'yahoo_finance': (8, 15.0),
+    'coinmarketcap': (2, 20.0),
+    'opensea': (2, 20.0),
+    'blur': (2, 20.0),
+    'amazon': (2, 20.0),
+    'walmart': (2, 20.0)
+}
+DEFAULT_LIMIT = (8, 10.0)
+
+
+def parse_source_limits(value: str) -> Dict[str, Tuple[int, float]]:
+    """Parse ``source=concurrency:timeout`` pairs separated by commas"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        try:
+            source, spec = item.split('=', 1)
+            concurrency, _, timeout = spec.partition(':')
+            default_concurrency, default_timeout = DEFAULT_SOURCE_LIMITS.get(source.strip(), DEFAULT_LIMIT)
+            limits[source.strip()] = (
+                int(concurrency) if concurrency else default_concurrency,
+                float(timeout) if timeout else default_timeout
+            )
+        except ValueError:
+            logging.warning(f"Ignoring malformed source limit: {item}")
+    return limits
+
+
+class DataSourcePool:
+    """Shared transport for every source the validator talks to.
+
+    HTTP requests go through one long-lived ``aiohttp.ClientSession`` with a
+    bounded connection pool. The session lives on the pool's own event loop
+    thread, so callers on any loop (including short-lived ``asyncio.run``
+    loops in request handlers) reuse the same connections. Each source has
+    its own concurrency cap and timeout; waiting for a slot does not count
+    against the timeout.
+
+    Blocking work runs in thread pools off the caller's loop. Browser jobs
+    get a worker pool where every thread owns one Selenium driver, since a
+    driver must not be shared between threads. A timed-out blocking job frees
+    its caller immediately but keeps its worker until the call returns.
+    """
+
+    def __init__(self, source_limits: Optional[Dict[str, Tuple[int, float]]] = None,
+                 pool_size: Optional[int] = None, browser_workers: Optional[int] = None,
+                 browser_factory: Optional[Callable[[], Any]] = None,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        self.source_limits = dict(DEFAULT_SOURCE_LIMITS)
+        self.source_limits.update(parse_source_limits(os.getenv('VALIDATOR_SOURCE_LIMITS', '')))
+        self.source_limits.update(source_limits or {})
+
+        self.pool_size = pool_size if pool_size is not None \
+            else int(os.getenv('VALIDATOR_HTTP_POOL_SIZE', '100'))
+        self.browser_workers = browser_workers if browser_workers is not None \
+            else int(os.getenv('VALIDATOR_BROWSER_WORKERS', '2'))
+        self.browser_factory = browser_factory
+
+        self.executor = executor
+        self._owns_executor = executor is None
+        self.browser_executor = None
+        self._browser_local = threading.local()
+        self._browser_disabled = browser_factory is None
+        self._drivers = []
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._lock = threading.Lock()
+        self._started = threading.Event()
+
+        self.latency_sample_size = 500
+        self._source_stats: Dict[str, Dict[str, Any]] = {}
+
+    def limit(self, source: str) -> Tuple[int, float]:
+        return self.source_limits.get(source, DEFAULT_LIMIT)
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Call counts and latency of recent calls, per source"""
+        with self._lock:
+            snapshot = {source: (dict(stats), sorted(stats['samples']))
+                        for source, stats in self._source_stats.items()}
+
+        metrics = {}
+        for source, (stats, samples) in snapshot.items():
+            entry = {'calls': stats['calls'], 'errors': stats['errors'], 'timeouts': stats['timeouts']}
+            if samples:
+                entry.update({
+                    'avg_ms': sum(samples) / len(samples) * 1000,
+                    'p50_ms': samples[len(samples) // 2] * 1000,
+                    'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+                    'max_ms': samples[-1] * 1000
+                })
+            metrics[source] = entry
+        return metrics
+
+    async def get_json(self, source: str, url: str, params: Optional[Dict[str, Any]] = None) -> Tuple[int, Any]:
+        """GET ``url`` as ``source``; returns (status, decoded JSON or None)"""
+        return await self._call(self._request(source, url, params, 'json'))
+
+    async def get_text(self, source: str, url: str, params: Optional[Dict[str, Any]] = None) -> Tuple[int, Optional[str]]:
+        """GET ``url`` as ``source``; returns (status, body text or None)"""
+        return await self._call(self._request(source, url, params, 'text'))
+
+    async def run_blocking(self, source: str, function: Callable[..., Any], *args) -> Any:
+        """Run a blocking call in the worker threads under the limits of ``source``"""
+        return await self._call(self._offload(source, self._executor(), function, *args))
+
+    async def run_browser(self, source: str, job: Callable[[Any], Any]) -> Any:
+        """Run ``job(driver)`` on a browser worker; returns None when no browser is available"""
+        if self._browser_disabled:
+            return None
+        return await self._call(self._offload(source, self._browser_pool(), self._browser_job, job))
+
+    def close(self):
+        """Close the HTTP session, stop the loop thread and quit browser drivers"""
+        with self._lock:
+            loop, thread = self.loop, self.thread
+            self.loop = self.thread = None
+
+        if loop is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(self._close_session(), loop).result(5)
+            except Exception as e:
+                logging.warning(f"Error closing data source session: {str(e)}")
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(5)
+
+        if self.browser_executor is not None:
+            self.browser_executor.shutdown(wait=False)
+            self.browser_executor = None
+        for driver in self._drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        self._drivers = []
+
+        if self._owns_executor and self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    async def _call(self, coroutine):
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop())
+        return await asyncio.wrap_future(future)
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self.loop is None:
+                self._started.clear()
+                self.thread = threading.Thread(target=self._run_loop, name='data-source-pool', daemon=True)
+                self.thread.start()
+                self._started.wait()
+            return self.loop
+
+    def _run_loop(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self.loop = loop
+        self._session = None
+        self._semaphores = {}
+        self._started.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    def _semaphore(self, source: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(source)
+        if semaphore is None:
+            semaphore = self._semaphores[source] = asyncio.Semaphore(self.limit(source)[0])
+        return semaphore
+
+    def _client_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def _close_session(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def _request(self, source: str, url: str, params: Optional[Dict[str, Any]], body: str):
+        session = self._client_session()
+        timeout = aiohttp.ClientTimeout(total=self.limit(source)[1])
+        async with self._semaphore(source):
+            started = time.perf_counter()
+            outcome = 'errors'
+            try:
+                async with session.get(url, params=params, timeout=timeout) as response:
+                    if response.status != 200:
+                        return response.status, None
+                    if body == 'json':
+                        result = response.status, await response.json(content_type=None)
+                    else:
+                        result = response.status, await response.text()
+                    outcome = None
+                    return result
+            except asyncio.TimeoutError:
+                outcome = 'timeouts'
+                raise
+            finally:
+                self._record(source, time.perf_counter() - started, outcome)
+
+    async def _offload(self, source: str, executor: ThreadPoolExecutor, function: Callable[..., Any], *args):
+        async with self._semaphore(source):
+            started = time.perf_counter()
+            outcome = 'errors'
+            try:
+                result = await asyncio.wait_for(
+                    asyncio.get_running_loop().run_in_executor(executor, function, *args),
+                    self.limit(source)[1]
+                )
+                outcome = None
+                return result
+            except asyncio.TimeoutError:
+                outcome = 'timeouts'
+                raise
+            finally:
+                self._record(source, time.perf_counter() - started, outcome)
+
+    def _record(self, source: str, seconds: float, outcome: Optional[str]):
+        with self._lock:
+            stats = self._source_stats.get(source)
+            if stats is None:
+                stats = self._source_stats[source] = {
+                    'calls': 0, 'errors': 0, 'timeouts': 0, 'samples': deque(maxlen=self.latency_sample_size)
+                }
+            stats['calls'] += 1
+            stats['samples'].append(seconds)
+            if outcome:
+                stats[outcome] += 1
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='data-source')
+            return self.executor
+
+    def _browser_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self.browser_executor is None:
+                self.browser_executor = ThreadPoolExecutor(
+                    max_workers=max(1, self.browser_workers), thread_name_prefix='data-source-browser'
+                )
+            return self.browser_executor
+
+    def _browser_job(self, job: Callable[[Any], Any]) -> Any:
+        driver = getattr(self._browser_local, 'driver', None)
+        if driver is None:
+            if self._browser_disabled:
+                return None
+            try:
+                driver = self.browser_factory()
+            except Exception as e:
+                logging.warning(f"Browser setup failed: {e}. Web scraping will be limited. Continuing without browser.")
+                driver = None
+            if driver is None:
+                # Mark as attempted to avoid retry loops
+                self._browser_disabled = True
+                return None
+            self._browser_local.driver = driver
+            with self._lock:
+                self._drivers.append(driver)
+
+        return job(driver)
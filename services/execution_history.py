@@ -0,0 +1,153 @@
+"""
+Execution History
+Keyset-paginated, filterable reads of executed opportunities for the history API and NDJSON exports
+"""
+
+import base64
+import json
+from datetime import date, datetime, time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import tuple_
+
+from models import ExecutedOpportunity
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+EXPORT_BATCH_SIZE = 1000
+
+COLUMNS = (
+    ExecutedOpportunity.id,
+    ExecutedOpportunity.opportunity_id,
+    ExecutedOpportunity.opportunity_type,
+    ExecutedOpportunity.title,
+    ExecutedOpportunity.description,
+    ExecutedOpportunity.status,
+    ExecutedOpportunity.executed_at,
+    ExecutedOpportunity.completed_at,
+    ExecutedOpportunity.telegram_sent,
+    ExecutedOpportunity.replit_prompt,
+    ExecutedOpportunity.savings_achieved
+)
+
+
+def _parse_time(value: str, name: str, end_of_day: bool = False) -> datetime:
+    """ISO datetime, or an ISO date meaning the start (or end) of that day"""
+    try:
+        if len(value) == 10:
+            day = date.fromisoformat(value)
+            return datetime.combine(day, time.max if end_of_day else time.min)
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date or datetime, got {value!r}")
+
+
+def _values(args, name: str) -> List[str]:
+    """Values of a filter given repeated or comma separated"""
+    return [value.strip() for raw in args.getlist(name) for value in raw.split(',') if value.strip()]
+
+
+def encode_cursor(executed_at: datetime, row_id: int) -> str:
+    raw = json.dumps([executed_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        executed_at, row_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return datetime.fromisoformat(executed_at), int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError('cursor is not a valid execution history cursor')
+
+
+class ExecutionHistory:
+    """Executed opportunities matching a set of filters, newest first.
+
+    Rows are ordered by ``(executed_at, id)`` descending and read by
+    keyset: each page continues after the last row of the previous one, so
+    a page costs an index range scan however deep into the history it is,
+    and rows inserted meanwhile neither repeat nor shift later pages. Only
+    the columns the API returns are loaded, never ORM instances.
+    """
+
+    def __init__(self, statuses: Optional[List[str]] = None, types: Optional[List[str]] = None,
+                 since: Optional[datetime] = None, until: Optional[datetime] = None):
+        self.statuses = statuses or []
+        self.types = types or []
+        self.since = since
+        self.until = until
+
+    @classmethod
+    def from_args(cls, args) -> 'ExecutionHistory':
+        """Filters from request arguments: status, type, since and until; raises ValueError on bad values"""
+        since = args.get('since')
+        until = args.get('until')
+        return cls(
+            statuses=_values(args, 'status'),
+            types=_values(args, 'type'),
+            since=_parse_time(since, 'since') if since else None,
+            until=_parse_time(until, 'until', end_of_day=True) if until else None
+        )
+
+    def _query(self, after: Optional[Tuple[datetime, int]] = None):
+        query = ExecutedOpportunity.query.with_entities(*COLUMNS)
+        if self.statuses:
+            query = query.filter(ExecutedOpportunity.status.in_(self.statuses))
+        if self.types:
+            query = query.filter(ExecutedOpportunity.opportunity_type.in_(self.types))
+        if self.since:
+            query = query.filter(ExecutedOpportunity.executed_at >= self.since)
+        if self.until:
+            query = query.filter(ExecutedOpportunity.executed_at <= self.until)
+        if after:
+            query = query.filter(tuple_(ExecutedOpportunity.executed_at, ExecutedOpportunity.id) < after)
+        return query.order_by(ExecutedOpportunity.executed_at.desc(), ExecutedOpportunity.id.desc())
+
+    def page(self, cursor: Optional[str] = None,
+             limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of executions and the cursor of the next page, or None on the last page"""
+        limit = min(max(limit or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE)
+        rows = self._query(decode_cursor(cursor) if cursor else None).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].executed_at, rows[-1].id)
+        return [self.serialize(row) for row in rows], next_cursor
+
+    def rows(self, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+        """Every matching execution, read ``batch_size`` rows per keyset query"""
+        after = None
+        while True:
+            rows = self._query(after).limit(batch_size).all()
+            for row in rows:
+                yield self.serialize(row)
+            if len(rows) < batch_size:
+                return
+            after = (rows[-1].executed_at, rows[-1].id)
+
+    def ndjson(self, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+        """Every matching execution as newline-delimited JSON, in chunks of ``batch_size`` lines"""
+        lines = []
+        for row in self.rows(batch_size):
+            lines.append(json.dumps(row))
+            if len(lines) == batch_size:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        if lines:
+            yield '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def serialize(row) -> Dict[str, Any]:
+        return {
+            'id': row.id,
+            'opportunity_id': row.opportunity_id,
+            'opportunity_type': row.opportunity_type,
+            'title': row.title,
+            'description': row.description,
+            'status': row.status,
+            'executed_at': row.executed_at.isoformat() if row.executed_at else None,
+            'completed_at': row.completed_at.isoformat() if row.completed_at else None,
+            'telegram_sent': row.telegram_sent,
+            'replit_prompt': row.replit_prompt,
+            'savings_achieved': row.savings_achieved or 0
+        }
@@ -0,0 +1,512 @@
+"""
+Execution Rollup
+Per-agent rollups folded incrementally from AgentExecution rows into AgentPerformanceMetrics and SystemHealthSnapshot
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import or_
+
+logger = logging.getLogger(__name__)
+
+# SystemSettings row holding the id of the last AgentExecution folded, and the id ranges below it not seen yet
+WATERMARK_KEY = 'agent_execution_rollup_watermark'
+
+TERMINAL_STATUSES = ('success', 'failed', 'timeout')
+HOUR_FORMAT = '%Y-%m-%dT%H'
+DAY_FORMAT = '%Y-%m-%d'
+
+# An agent is healthy with at least this share of successful executions in the last 24 hours
+HEALTHY_SUCCESS_RATE = 0.9
+# recommended_concurrency covers the busiest recent hour at p95 latency with this much headroom
+CONCURRENCY_HEADROOM = 1.5
+
+
+class LatencyHistogram:
+    """Constant-memory latency distribution with at most 1/64 relative error.
+
+    Values below 64 get a bucket each; above that every power of two is
+    split into 32 buckets, as in an HDR histogram, so a range from 1ms to
+    weeks needs under 1000 buckets however many values are recorded. Only
+    non-empty buckets are stored, and histograms merge by adding counts.
+    """
+
+    __slots__ = ('counts', 'count', 'minimum', 'maximum')
+
+    def __init__(self, counts: Optional[Dict[int, int]] = None, count: int = 0,
+                 minimum: Optional[int] = None, maximum: Optional[int] = None):
+        self.counts = counts if counts is not None else {}
+        self.count = count
+        self.minimum = minimum
+        self.maximum = maximum
+
+    @staticmethod
+    def bucket(value: int) -> int:
+        if value < 64:
+            return value
+        shift = value.bit_length() - 6
+        return shift * 32 + (value >> shift)
+
+    @staticmethod
+    def bounds(bucket: int) -> Tuple[int, int]:
+        if bucket < 64:
+            return bucket, bucket
+        shift = bucket // 32 - 1
+        low = (bucket - shift * 32) << shift
+        return low, low + (1 << shift) - 1
+
+    def record(self, value: int, count: int = 1):
+        value = max(0, int(value))
+        key = self.bucket(value)
+        self.counts[key] = self.counts.get(key, 0) + count
+        self.count += count
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+    def merge(self, other: 'LatencyHistogram'):
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.count += other.count
+        if other.count:
+            self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+            self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+
+    def quantile(self, q: float) -> Optional[int]:
+        """Midpoint of the bucket holding the ``q`` quantile, clamped to the exact min and max"""
+        if not self.count:
+            return None
+        target = max(1, math.ceil(q * self.count))
+        seen = 0
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if seen >= target:
+                low, high = self.bounds(key)
+                return min(max((low + high) // 2, self.minimum), self.maximum)
+        return self.maximum
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'counts': {str(key): count for key, count in self.counts.items()},
+            'count': self.count,
+            'min': self.minimum,
+            'max': self.maximum
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'LatencyHistogram':
+        if not data:
+            return cls()
+        return cls({int(key): count for key, count in data.get('counts', {}).items()},
+                   data.get('count', 0), data.get('min'), data.get('max'))
+
+
+class _AgentState:
+    """One agent's rollup decoded for folding a batch of executions"""
+
+    def __init__(self, rollup, metrics):
+        self.rollup = rollup
+        self.metrics = metrics
+        self.histogram = LatencyHistogram.from_dict(rollup.latency_histogram)
+        self.latency_sum = rollup.latency_sum_ms or 0.0
+        self.hours_of_day = list(rollup.hour_of_day_counts or [0] * 24)
+        self.recent_hours = dict(rollup.recent_hours or {})
+        self.recent_days = dict(rollup.recent_days or {})
+        self.tokens = rollup.total_tokens or 0
+        for counter in ('total_executions', 'successful_executions', 'failed_executions', 'total_cost_usd'):
+            if getattr(metrics, counter) is None:
+                setattr(metrics, counter, 0)
+
+    def add(self, row):
+        metrics = self.metrics
+        succeeded = row.execution_status == 'success'
+        cost = row.cost_usd or 0.0
+        tokens = row.tokens_used or 0
+        latency = row.execution_time_ms
+        if latency is None and row.started_at and row.completed_at:
+            latency = int((row.completed_at - row.started_at).total_seconds() * 1000)
+        when = row.started_at or row.completed_at or datetime.utcnow()
+
+        metrics.total_executions += 1
+        if succeeded:
+            metrics.successful_executions += 1
+        else:
+            metrics.failed_executions += 1
+        metrics.total_cost_usd += cost
+        metrics.agent_name = row.agent_name or metrics.agent_name
+        finished = row.completed_at or when
+        if metrics.last_execution is None or finished > metrics.last_execution:
+            metrics.last_execution = finished
+
+        if latency is not None:
+            self.histogram.record(latency)
+            self.latency_sum += latency
+        self.tokens += tokens
+        self.hours_of_day[when.hour] += 1
+
+        hour = when.strftime(HOUR_FORMAT)
+        bucket = self.recent_hours.get(hour) or [0, 0, 0.0, 0, 0.0]
+        self.recent_hours[hour] = [bucket[0] + 1, bucket[1] + succeeded, bucket[2] + (latency or 0),
+                                   bucket[3] + (latency is not None), bucket[4] + cost]
+        day = when.strftime(DAY_FORMAT)
+        bucket = self.recent_days.get(day) or [0, 0, 0.0, 0]
+        self.recent_days[day] = [bucket[0] + 1, bucket[1] + succeeded, bucket[2] + cost, bucket[3] + tokens]
+
+    def store(self, now: datetime, keep_hours: int, keep_days: int):
+        """Write the folded state back, dropping buckets older than the recent windows"""
+        first_hour = (now - timedelta(hours=keep_hours)).strftime(HOUR_FORMAT)
+        first_day = (now - timedelta(days=keep_days)).strftime(DAY_FORMAT)
+        recent_hours = {hour: bucket for hour, bucket in self.recent_hours.items() if hour > first_hour}
+        recent_days = {day: bucket for day, bucket in self.recent_days.items() if day > first_day}
+
+        rollup, metrics, histogram = self.rollup, self.metrics, self.histogram
+        p50, p95, p99 = histogram.quantile(0.5), histogram.quantile(0.95), histogram.quantile(0.99)
+        rollup.latency_histogram = histogram.to_dict()
+        rollup.latency_sum_ms = self.latency_sum
+        rollup.p50_execution_time_ms = p50
+        rollup.p95_execution_time_ms = p95
+        rollup.p99_execution_time_ms = p99
+        rollup.hour_of_day_counts = self.hours_of_day
+        rollup.recent_hours = recent_hours
+        rollup.recent_days = recent_days
+        rollup.total_tokens = self.tokens
+
+        total = metrics.total_executions
+        metrics.success_rate = metrics.successful_executions / total * 100 if total else 0.0
+        metrics.avg_cost_per_execution = metrics.total_cost_usd / total if total else 0.0
+        if histogram.count:
+            metrics.avg_execution_time_ms = self.latency_sum / histogram.count
+            metrics.min_execution_time_ms = histogram.minimum
+            metrics.max_execution_time_ms = histogram.maximum
+        metrics.typical_response_time_ms = p50
+        metrics.peak_usage_hour = max(range(24), key=self.hours_of_day.__getitem__) if total else None
+
+        recent_runs = sum(bucket[0] for bucket in recent_hours.values())
+        recent_successes = sum(bucket[1] for bucket in recent_hours.values())
+        metrics.reliability_score = recent_successes / recent_runs * 100 if recent_runs else metrics.success_rate
+        # How tight the tail is: 100 when p99 equals the median
+        metrics.efficiency_score = p50 / p99 * 100 if p99 else 100.0
+
+        # Little's law over the busiest recent hour: arrivals per second times p95 seconds in flight
+        busiest = max((bucket[0] for bucket in recent_hours.values()), default=0)
+        metrics.recommended_concurrency = max(1, math.ceil(busiest / 3600 * (p95 or 0) / 1000 * CONCURRENCY_HEADROOM))
+        metrics.metrics_calculated_at = now
+
+
+class ExecutionRollup:
+    """Folds new ``AgentExecution`` rows into per-agent rollups.
+
+    Each fold reads executions past a watermark stored in ``SystemSettings``,
+    in id order and ``batch_size`` at a time, and updates the agents'
+    ``AgentExecutionRollup`` state (a latency histogram plus hour-of-day,
+    recent-hour and recent-day buckets) and ``AgentPerformanceMetrics`` in
+    the same transaction as the new watermark, so every row is counted
+    once. The watermark row is selected ``FOR UPDATE``, which serializes
+    folds from several processes on PostgreSQL. A fold stops at an
+    execution still pending unless it started more than
+    ``pending_grace_seconds`` ago, in which case it is skipped.
+
+    Ids are not committed in order: telemetry flushers in several workers
+    draw ids from one sequence, so a lower id can commit after a higher
+    one was folded. The watermark therefore also keeps the id ranges it
+    passed over without seeing a row, and each fold re-reads them. A range
+    is forgotten ``gap_seconds`` after it was recorded, by which time any
+    transaction holding those ids has committed or rolled back.
+
+    Every ``snapshot_seconds`` the background job also writes a
+    ``SystemHealthSnapshot`` from the rollups, reading one row per agent.
+    """
+
+    def __init__(self, interval_seconds: Optional[float] = None, snapshot_seconds: Optional[float] = None,
+                 batch_size: Optional[int] = None, recent_hours: Optional[int] = None,
+                 recent_days: Optional[int] = None, pending_grace_seconds: Optional[float] = None,
+                 gap_seconds: Optional[float] = None):
+        self.interval_seconds = interval_seconds if interval_seconds is not None \
+            else float(os.getenv('AGENT_ROLLUP_INTERVAL_SECONDS', '30'))
+        self.snapshot_seconds = snapshot_seconds if snapshot_seconds is not None \
+            else float(os.getenv('AGENT_ROLLUP_SNAPSHOT_SECONDS', '300'))
+        self.batch_size = batch_size or int(os.getenv('AGENT_ROLLUP_BATCH_SIZE', '5000'))
+        self.recent_hours = recent_hours or int(os.getenv('AGENT_ROLLUP_RECENT_HOURS', '48'))
+        self.recent_days = recent_days or int(os.getenv('AGENT_ROLLUP_RECENT_DAYS', '30'))
+        self.pending_grace_seconds = pending_grace_seconds if pending_grace_seconds is not None \
+            else float(os.getenv('AGENT_ROLLUP_PENDING_GRACE_SECONDS', '900'))
+        self.gap_seconds = gap_seconds if gap_seconds is not None \
+            else float(os.getenv('AGENT_ROLLUP_GAP_SECONDS', '600'))
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._last_snapshot = 0.0
+
+        self.stats = {'folded': 0, 'skipped': 0, 'snapshots': 0, 'last_fold_seconds': 0.0}
+
+    def start(self, app):
+        """Start the background fold job; an interval of 0 leaves folding to explicit ``fold`` calls"""
+        if self.interval_seconds <= 0 or self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(app,), name='agent-execution-rollup', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def fold(self) -> int:
+        """Fold every execution added since the last fold; needs an app context. Returns the rows folded"""
+        started = time.monotonic()
+        folded = 0
+        while True:
+            consumed, more = self._fold_batch()
+            folded += consumed
+            if not more:
+                break
+        self.stats['last_fold_seconds'] = time.monotonic() - started
+        return folded
+
+    def _fold_batch(self) -> Tuple[int, bool]:
+        from app import db
+        from models import AgentExecution, AgentExecutionRollup, AgentPerformanceMetrics, SystemSettings
+
+        watermark_row = SystemSettings.query.filter_by(setting_key=WATERMARK_KEY).with_for_update().first()
+        if watermark_row is None:
+            watermark_row = SystemSettings(setting_key=WATERMARK_KEY, setting_value='0')
+            db.session.add(watermark_row)
+        watermark, gaps = _parse_watermark(watermark_row.setting_value)
+
+        columns = (
+            AgentExecution.id, AgentExecution.agent_key, AgentExecution.agent_name,
+            AgentExecution.execution_status, AgentExecution.execution_time_ms, AgentExecution.cost_usd,
+            AgentExecution.tokens_used, AgentExecution.started_at, AgentExecution.completed_at
+        )
+        late_rows = []
+        if gaps:
+            late_rows = db.session.query(*columns).filter(
+                or_(*(AgentExecution.id.between(low, high) for low, high, _ in gaps))
+            ).order_by(AgentExecution.id).all()
+        rows = db.session.query(*columns).filter(AgentExecution.id > watermark) \
+            .order_by(AgentExecution.id).limit(self.batch_size).all()
+
+        now = datetime.utcnow()
+        pending_cutoff = now - timedelta(seconds=self.pending_grace_seconds)
+        batch = []
+        skipped = 0
+        consumed_ids = []
+
+        # Rows committed late inside ranges passed over earlier; a recent pending one stays in its range
+        for row in late_rows:
+            if row.execution_status not in TERMINAL_STATUSES:
+                if row.started_at is not None and row.started_at > pending_cutoff:
+                    continue
+                skipped += 1
+            else:
+                batch.append(row)
+            consumed_ids.append(row.id)
+        gaps = _remove_ids(gaps, consumed_ids)
+
+        seen_at = time.time()
+        passed = 0
+        for row in rows:
+            if row.execution_status not in TERMINAL_STATUSES:
+                if row.started_at is not None and row.started_at > pending_cutoff:
+                    break
+                skipped += 1
+            else:
+                batch.append(row)
+            if row.id > watermark + 1:
+                gaps.append([watermark + 1, row.id - 1, seen_at])
+            watermark = row.id
+            passed += 1
+
+        gaps = [gap for gap in gaps if gap[2] > seen_at - self.gap_seconds]
+        consumed = len(batch) + skipped
+        if not consumed:
+            watermark_row.setting_value = _format_watermark(watermark, gaps)
+            db.session.commit()
+            return 0, False
+
+        agent_keys = {row.agent_key for row in batch}
+        states = self._load_states(agent_keys, AgentExecutionRollup, AgentPerformanceMetrics)
+        for row in batch:
+            states[row.agent_key].add(row)
+
+        for state in states.values():
+            state.store(now, self.recent_hours, self.recent_days)
+        watermark_row.setting_value = _format_watermark(watermark, gaps)
+        db.session.commit()
+
+        self.stats['folded'] += len(batch)
+        self.stats['skipped'] += skipped
+        return consumed, passed == len(rows) == self.batch_size
+
+    def _load_states(self, agent_keys, rollup_model, metrics_model) -> Dict[str, _AgentState]:
+        from app import db
+
+        if not agent_keys:
+            return {}
+        rollups = {rollup.agent_key: rollup
+                   for rollup in rollup_model.query.filter(rollup_model.agent_key.in_(agent_keys))}
+        metrics = {row.agent_key: row
+                   for row in metrics_model.query.filter(metrics_model.agent_key.in_(agent_keys))}
+
+        states = {}
+        for agent_key in agent_keys:
+            if agent_key not in rollups:
+                rollups[agent_key] = rollup_model(agent_key=agent_key, latency_sum_ms=0.0, total_tokens=0)
+                db.session.add(rollups[agent_key])
+            if agent_key not in metrics:
+                metrics[agent_key] = metrics_model(agent_key=agent_key, agent_name=agent_key, total_executions=0,
+                                                   successful_executions=0, failed_executions=0,
+                                                   total_cost_usd=0.0)
+                db.session.add(metrics[agent_key])
+            states[agent_key] = _AgentState(rollups[agent_key], metrics[agent_key])
+        return states
+
+    def write_snapshot(self):
+        """Store a SystemHealthSnapshot of the last 24 hours and refresh cost ratings; needs an app context"""
+        from app import db
+        from models import AgentExecutionRollup, AgentPerformanceMetrics, CampaignOrchestration, SystemHealthSnapshot
+
+        now = datetime.utcnow()
+        since_hour = (now - timedelta(hours=24)).strftime(HOUR_FORMAT)
+        metrics = {row.agent_key: row for row in AgentPerformanceMetrics.query.all()}
+        rollups = AgentExecutionRollup.query.all()
+
+        executions = successes = latency_count = active = healthy = 0
+        latency_sum = cost = 0.0
+        recommendations: List[str] = []
+        warnings: List[str] = []
+        agent_workers = int(os.getenv('ORCHESTRATOR_AGENT_WORKERS', '32'))
+        for rollup in rollups:
+            day = [0, 0, 0.0, 0, 0.0]
+            for hour, bucket in (rollup.recent_hours or {}).items():
+                if hour > since_hour:
+                    day = [total + value for total, value in zip(day, bucket)]
+            executions += day[0]
+            successes += day[1]
+            latency_sum += day[2]
+            latency_count += day[3]
+            cost += day[4]
+
+            agent = metrics.get(rollup.agent_key)
+            name = agent.agent_name if agent else rollup.agent_key
+            if day[0]:
+                active += 1
+                if day[1] / day[0] >= HEALTHY_SUCCESS_RATE:
+                    healthy += 1
+                else:
+                    recommendations.append(f"Investigate {name}: {day[1] / day[0]:.0%} of "
+                                           f"{day[0]} executions succeeded in the last 24h")
+            if rollup.p50_execution_time_ms and rollup.p99_execution_time_ms \
+                    and rollup.p99_execution_time_ms > 10 * rollup.p50_execution_time_ms:
+                recommendations.append(f"{name} has a long latency tail: p99 {rollup.p99_execution_time_ms}ms "
+                                       f"against a {rollup.p50_execution_time_ms}ms median")
+            if agent and (agent.recommended_concurrency or 0) > agent_workers:
+                warnings.append(f"{name} needs about {agent.recommended_concurrency} concurrent executions "
+                                f"at peak, above the {agent_workers} orchestrator agent workers")
+
+        self._rate_costs(list(metrics.values()))
+
+        success_rate = successes / executions * 100 if executions else 100.0
+        alerts = active - healthy + len(warnings)
+        memory_percent, cpu_percent = _host_usage()
+        db.session.add(SystemHealthSnapshot(
+            snapshot_timestamp=now,
+            total_agents=len(rollups),
+            active_agents=active,
+            healthy_agents=healthy,
+            system_success_rate=success_rate,
+            avg_system_response_time_ms=latency_sum / latency_count if latency_count else None,
+            executions_last_24h=executions,
+            campaigns_last_24h=CampaignOrchestration.query.filter(
+                CampaignOrchestration.created_at >= now - timedelta(hours=24)).count(),
+            total_cost_last_24h=cost,
+            system_health_score=success_rate,
+            system_status='healthy' if success_rate >= 95 and not alerts
+            else 'degraded' if success_rate >= 80 else 'critical',
+            alerts_count=alerts,
+            memory_usage_percentage=memory_percent,
+            cpu_usage_percentage=cpu_percent,
+            system_recommendations=recommendations,
+            capacity_warnings=warnings
+        ))
+        db.session.commit()
+        self.stats['snapshots'] += 1
+
+    @staticmethod
+    def _rate_costs(metrics):
+        """Rate each agent's cost per execution against the fleet median"""
+        costs = sorted(row.avg_cost_per_execution for row in metrics if row.total_executions)
+        if not costs:
+            return
+        median = costs[len(costs) // 2]
+        for row in metrics:
+            if not row.total_executions:
+                continue
+            ratio = row.avg_cost_per_execution / median if median \
+                else 1.0 if not row.avg_cost_per_execution else math.inf
+            row.cost_efficiency_rating = 'excellent' if ratio <= 0.5 else 'good' if ratio <= 1.0 \
+                else 'average' if ratio <= 2.0 else 'poor'
+
+    def _run(self, app):
+        from app import db
+
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                with app.app_context():
+                    self.fold()
+                    if self.snapshot_seconds > 0 and time.monotonic() - self._last_snapshot >= self.snapshot_seconds:
+                        self.write_snapshot()
+                        self._last_snapshot = time.monotonic()
+                    db.session.remove()
+            except Exception as e:
+                logger.error(f"Agent execution rollup failed: {str(e)}")
+
+
+def _parse_watermark(value: Optional[str]) -> Tuple[int, List[List]]:
+    """(last id folded, [first id, last id, seen at] ranges below it not seen yet); a bare id has no ranges"""
+    data = json.loads(value or '0')
+    if isinstance(data, int):
+        return data, []
+    return int(data['id']), [list(gap) for gap in data.get('gaps', [])]
+
+
+def _format_watermark(watermark: int, gaps: List[List]) -> str:
+    return json.dumps({'id': watermark, 'gaps': gaps})
+
+
+def _remove_ids(gaps: List[List], ids: List[int]) -> List[List]:
+    """Split the ranges around ids that have now been folded"""
+    for row_id in ids:
+        for position, (low, high, seen_at) in enumerate(gaps):
+            if low <= row_id <= high:
+                gaps[position:position + 1] = [gap for gap in ([low, row_id - 1, seen_at], [row_id + 1, high, seen_at])
+                                               if gap[0] <= gap[1]]
+                break
+    return gaps
+
+
+def _host_usage() -> Tuple[Optional[float], Optional[float]]:
+    """Memory in use and one-minute load per CPU, as percentages, where the platform reports them"""
+    memory = cpu = None
+    try:
+        total = os.sysconf('SC_PHYS_PAGES')
+        available = os.sysconf('SC_AVPHYS_PAGES')
+        memory = (total - available) / total * 100 if total > 0 else None
+    except (AttributeError, ValueError, OSError):
+        pass
+    try:
+        cpu = os.getloadavg()[0] / (os.cpu_count() or 1) * 100
+    except (AttributeError, OSError):
+        pass
+    return memory, cpu
+
+
+execution_rollup = ExecutionRollup()
@@ -0,0 +1,203 @@
+"""
+Generation Graph
+Dependency-graph runner and per-provider limits for multimedia generation steps
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# provider -> (max concurrent requests, timeout seconds)
+DEFAULT_PROVIDER_LIMITS = {
+    'openai': (8, 120.0),
+    'suno': (2, 60.0),
+    'ideogram': (4, 60.0),
+    'gemini': (2, 300.0)
+}
+DEFAULT_LIMIT = (4, 60.0)
+
+
+def parse_provider_limits(value: str) -> Dict[str, Tuple[int, float]]:
+    """Parse ``provider=concurrency:timeout`` pairs separated by commas"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        try:
+            provider, spec = item.split('=', 1)
+            concurrency, _, timeout = spec.partition(':')
+            default_concurrency, default_timeout = DEFAULT_PROVIDER_LIMITS.get(provider.strip(), DEFAULT_LIMIT)
+            limits[provider.strip()] = (
+                int(concurrency) if concurrency else default_concurrency,
+                float(timeout) if timeout else default_timeout
+            )
+        except ValueError:
+            logger.warning(f"Ignoring malformed provider limit: {item}")
+    return limits
+
+
+class ProviderLimits:
+    """Concurrency cap and request timeout per provider.
+
+    One instance is shared by every caller of the service, so the caps hold
+    across concurrent story packages and direct calls alike. Limits come
+    from ``MULTIMEDIA_PROVIDER_LIMITS``, then the defaults above.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[int, float]]] = None):
+        self.limits = dict(DEFAULT_PROVIDER_LIMITS)
+        self.limits.update(parse_provider_limits(os.getenv('MULTIMEDIA_PROVIDER_LIMITS', '')))
+        self.limits.update(limits or {})
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def timeout(self, provider: str) -> float:
+        return self.limits.get(provider, DEFAULT_LIMIT)[1]
+
+    @contextmanager
+    def slot(self, provider: str) -> Iterator[None]:
+        """Hold one of the provider's concurrent request slots"""
+        semaphore = self._semaphores.get(provider)
+        if semaphore is None:
+            with self._lock:
+                semaphore = self._semaphores.get(provider)
+                if semaphore is None:
+                    concurrency = self.limits.get(provider, DEFAULT_LIMIT)[0]
+                    semaphore = self._semaphores[provider] = threading.BoundedSemaphore(max(1, concurrency))
+        with semaphore:
+            yield
+
+
+@dataclass
+class GenerationStep:
+    """One generation call; ``run`` receives the results of the steps it depends on, by name"""
+    name: str
+    run: Callable[[Dict[str, Dict[str, Any]]], Dict[str, Any]]
+    depends_on: Tuple[str, ...] = ()
+
+
+class GenerationGraph:
+    """Runs generation steps on an executor as soon as their dependencies succeed.
+
+    Steps return the service's result dicts. A step that raises gets an
+    error result, and a step whose dependency did not succeed is skipped
+    with an error result marked ``skipped``. Independent steps run at the
+    same time, so the graph takes about as long as its slowest dependency
+    chain rather than the sum of its steps; ``run`` reports both, along
+    with each step's start offset and latency.
+    """
+
+    def __init__(self, steps: List[GenerationStep]):
+        self.steps = {step.name: step for step in steps}
+        if len(self.steps) < len(steps):
+            raise ValueError("Generation step names must be unique")
+        self.dependents: Dict[str, List[str]] = {name: [] for name in self.steps}
+        for step in steps:
+            for dependency in step.depends_on:
+                if dependency not in self.steps:
+                    raise ValueError(f"Step {step.name} depends on unknown step {dependency}")
+                self.dependents[dependency].append(step.name)
+        self._check_acyclic()
+
+    def run(self, executor: Executor) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+        """Run every step; returns (results by step name, timing report)"""
+        results: Dict[str, Dict[str, Any]] = {}
+        timings: Dict[str, Dict[str, Any]] = {}
+        remaining = {name: len(step.depends_on) for name, step in self.steps.items()}
+        running: Dict[Future, str] = {}
+        started = time.perf_counter()
+
+        def finish(name: str, result: Dict[str, Any], status: str, offset: float, duration: float):
+            results[name] = result
+            timings[name] = {
+                "status": status,
+                "started_ms": round(offset * 1000, 2),
+                "duration_ms": round(duration * 1000, 2)
+            }
+            for dependent in self.dependents[name]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    start(dependent)
+
+        def start(name: str):
+            step = self.steps[name]
+            failed = [dependency for dependency in step.depends_on if not results[dependency].get("success")]
+            if failed:
+                offset = time.perf_counter() - started
+                finish(name, {
+                    "success": False,
+                    "error": f"Skipped: dependency {failed[0]} did not succeed",
+                    "skipped": True
+                }, "skipped", offset, 0.0)
+                return
+            inputs = {dependency: results[dependency] for dependency in step.depends_on}
+            running[executor.submit(self._timed, step, inputs)] = name
+
+        for name, count in list(remaining.items()):
+            if count == 0:
+                start(name)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                result, step_started, duration = future.result()
+                status = "success" if result.get("success") else "failed"
+                finish(name, result, status, step_started - started, duration)
+
+        return results, self._report(timings, time.perf_counter() - started)
+
+    def _timed(self, step: GenerationStep, inputs: Dict[str, Dict[str, Any]]):
+        step_started = time.perf_counter()
+        try:
+            result = step.run(inputs)
+        except Exception as e:
+            logger.error(f"Generation step {step.name} failed: {str(e)}")
+            result = {"success": False, "error": str(e)}
+        return result, step_started, time.perf_counter() - step_started
+
+    def _report(self, timings: Dict[str, Dict[str, Any]], wall: float) -> Dict[str, Any]:
+        # Longest chain of step latencies through the dependencies
+        path_ms: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for name in self._order():
+            upstream = max(self.steps[name].depends_on, key=lambda dependency: path_ms[dependency], default=None)
+            path_ms[name] = timings[name]["duration_ms"] + (path_ms[upstream] if upstream else 0.0)
+            previous[name] = upstream
+        critical_path = []
+        name = max(path_ms, key=path_ms.get, default=None)
+        while name:
+            critical_path.append(name)
+            name = previous[name]
+
+        return {
+            "steps": {name: timings[name] for name in self.steps},
+            "wall_ms": round(wall * 1000, 2),
+            "sequential_ms": round(sum(timing["duration_ms"] for timing in timings.values()), 2),
+            "critical_path": critical_path[::-1],
+            "critical_path_ms": round(path_ms[critical_path[0]], 2) if critical_path else 0.0
+        }
+
+    def _order(self) -> List[str]:
+        """Steps in dependency order (Kahn's algorithm, definition order among independent steps)"""
+        remaining = {name: len(step.depends_on) for name, step in self.steps.items()}
+        ready = [name for name, count in remaining.items() if count == 0]
+        order = []
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for dependent in self.dependents[name]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        return order
+
+    def _check_acyclic(self):
+        order = self._order()
+        if len(order) < len(self.steps):
+            cycle = sorted(set(self.steps) - set(order))
+            raise ValueError(f"Generation steps contain a cycle through: {cycle}")
@@ -0,0 +1,273 @@
+"""
+History Partitions
+Monthly range partitions and retention roll-off for the high-volume execution and log tables
+"""
+
+import logging
+import os
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Table -> partition column, columns unique on their own before partitioning, foreign keys,
+# and the retention setting with its default in days
+HISTORY_TABLES = {
+    'agent_execution': {
+        'column': 'started_at',
+        'unique': ('execution_id',),
+        'foreign_keys': (),
+        'retention_env': 'AGENT_EXECUTION_RETENTION_DAYS',
+        'retention_days': 90
+    },
+    'agent_coordination_log': {
+        'column': 'coordinated_at',
+        'unique': (),
+        'foreign_keys': (),
+        'retention_env': 'AGENT_COORDINATION_LOG_RETENTION_DAYS',
+        'retention_days': 180
+    },
+    'agent_usage_log': {
+        'column': 'usage_date',
+        'unique': (),
+        'foreign_keys': (('agent_id', 'ai_agent', 'id'),),
+        'retention_env': 'AGENT_USAGE_LOG_RETENTION_DAYS',
+        'retention_days': 365
+    }
+}
+
+
+def _month_start(day) -> date:
+    return date(day.year, day.month, 1)
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month.year:04d}_{month.month:02d}"
+
+
+def is_partitioned(connection, table: str) -> bool:
+    return bool(connection.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"),
+        {'table': table}
+    ).scalar())
+
+
+def month_partitions(connection, table: str) -> List[Tuple[date, str]]:
+    """(month, partition name) of the table's monthly partitions, oldest first"""
+    names = connection.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass(:table)"
+    ), {'table': table}).scalars()
+    pattern = re.compile(rf"^{re.escape(table)}_p(\d{{4}})_(\d{{2}})$")
+    months = []
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            months.append((date(int(match.group(1)), int(match.group(2)), 1), name))
+    return sorted(months)
+
+
+def create_month_partitions(connection, table: str, first_month: date, last_month: date) -> int:
+    """Create the missing monthly partitions from ``first_month`` to ``last_month``, inclusive.
+
+    Rows already sitting in the default partition for a new month are
+    moved into it; PostgreSQL refuses to attach a partition whose range
+    the default partition still holds rows for.
+    """
+    column = HISTORY_TABLES[table]['column']
+    existing = {month for month, _ in month_partitions(connection, table)}
+    created = 0
+    month = _month_start(first_month)
+    while month <= last_month:
+        upper = _next_month(month)
+        if month not in existing:
+            bounds = {'lower': month, 'upper': upper}
+            stranded = connection.execute(text(
+                f"SELECT EXISTS (SELECT 1 FROM {table}_default WHERE {column} >= :lower AND {column} < :upper)"
+            ), bounds).scalar()
+            if stranded:
+                connection.execute(text(f"CREATE TEMP TABLE {table}_moved (LIKE {table}) ON COMMIT DROP"))
+                connection.execute(text(
+                    f"WITH moved AS (DELETE FROM {table}_default WHERE {column} >= :lower AND {column} < :upper "
+                    f"RETURNING *) INSERT INTO {table}_moved SELECT * FROM moved"
+                ), bounds)
+            connection.execute(text(
+                f"CREATE TABLE {_partition_name(table, month)} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+            ))
+            if stranded:
+                connection.execute(text(f"INSERT INTO {table} SELECT * FROM {table}_moved"))
+                connection.execute(text(f"DROP TABLE {table}_moved"))
+            created += 1
+        month = upper
+    return created
+
+
+def partition_table(connection, table: str, months_ahead: int = 3):
+    """Convert an existing table into one range-partitioned by month on its history column.
+
+    The table is rebuilt as a partitioned copy with monthly partitions
+    from its oldest row to ``months_ahead`` months out plus a default
+    partition, keeping its id sequence and secondary indexes. PostgreSQL
+    requires the partition column in every unique constraint, so the
+    primary key becomes (id, column) and single-column unique constraints
+    become unique per column value.
+    """
+    spec = HISTORY_TABLES[table]
+    column = spec['column']
+    old = f"{table}_unpartitioned"
+
+    index_definitions = connection.execute(text(
+        "SELECT pg_get_indexdef(indexrelid) FROM pg_index "
+        "WHERE indrelid = to_regclass(:table) AND NOT indisprimary AND NOT indisunique"
+    ), {'table': table}).scalars().all()
+    oldest = connection.execute(text(f"SELECT min({column}) FROM {table}")).scalar()
+
+    connection.execute(text(f"UPDATE {table} SET {column} = CURRENT_TIMESTAMP WHERE {column} IS NULL"))
+    connection.execute(text(f"ALTER TABLE {table} RENAME TO {old}"))
+    connection.execute(text(
+        f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE ({column})"
+    ))
+    connection.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL"))
+    sequence = connection.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {'table': old}).scalar()
+    if sequence:
+        connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id"))
+
+    connection.execute(text(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"))
+    this_month = _month_start(datetime.utcnow())
+    last_month = this_month
+    for _ in range(months_ahead):
+        last_month = _next_month(last_month)
+    create_month_partitions(connection, table, _month_start(oldest) if oldest else this_month, last_month)
+
+    connection.execute(text(f"INSERT INTO {table} SELECT * FROM {old}"))
+    connection.execute(text(f"DROP TABLE {old}"))
+
+    connection.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, {column})"))
+    for unique in spec['unique']:
+        connection.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {table}_{unique}_key UNIQUE ({unique}, {column})"))
+    for local, referenced, remote in spec['foreign_keys']:
+        connection.execute(text(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_{local}_fkey "
+            f"FOREIGN KEY ({local}) REFERENCES {referenced} ({remote})"
+        ))
+    for definition in index_definitions:
+        connection.execute(text(definition))
+    connection.execute(text(f"ANALYZE {table}"))
+
+
+def unpartition_table(connection, table: str):
+    """Rebuild a partitioned history table as a plain table with its original constraints"""
+    spec = HISTORY_TABLES[table]
+    old = f"{table}_partitioned"
+
+    index_definitions = connection.execute(text(
+        "SELECT pg_get_indexdef(indexrelid) FROM pg_index "
+        "WHERE indrelid = to_regclass(:table) AND NOT indisprimary AND NOT indisunique"
+    ), {'table': table}).scalars().all()
+
+    connection.execute(text(f"ALTER TABLE {table} RENAME TO {old}"))
+    connection.execute(text(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    sequence = connection.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {'table': old}).scalar()
+    if sequence:
+        connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id"))
+    connection.execute(text(f"INSERT INTO {table} SELECT * FROM {old}"))
+    connection.execute(text(f"DROP TABLE {old} CASCADE"))
+
+    connection.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)"))
+    for unique in spec['unique']:
+        connection.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {table}_{unique}_key UNIQUE ({unique})"))
+    for local, referenced, remote in spec['foreign_keys']:
+        connection.execute(text(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_{local}_fkey "
+            f"FOREIGN KEY ({local}) REFERENCES {referenced} ({remote})"
+        ))
+    for definition in index_definitions:
+        connection.execute(text(definition))
+
+
+class HistoryPartitions:
+    """Retention for the history tables in ``HISTORY_TABLES``.
+
+    ``maintain`` runs daily from the scheduler. On PostgreSQL tables
+    partitioned by the migrations, it creates the monthly partitions
+    ``months_ahead`` months out and drops whole partitions whose month
+    ended before the table's retention window, which is a catalog
+    change rather than a delete. Elsewhere, e.g. SQLite or tables not
+    yet partitioned, expired rows are deleted ``batch_size`` at a time so
+    no single transaction holds the table for long.
+    """
+
+    def __init__(self, months_ahead: Optional[int] = None, batch_size: Optional[int] = None):
+        self.months_ahead = months_ahead if months_ahead is not None \
+            else int(os.getenv('HISTORY_PARTITION_MONTHS_AHEAD', '3'))
+        self.batch_size = batch_size or int(os.getenv('HISTORY_RETENTION_BATCH_SIZE', '10000'))
+
+    def retention_days(self, table: str) -> int:
+        """Days of history kept; 0 keeps everything"""
+        spec = HISTORY_TABLES[table]
+        return int(os.getenv(spec['retention_env'], str(spec['retention_days'])))
+
+    def maintain(self) -> Dict[str, Dict[str, Any]]:
+        """Create upcoming partitions and roll off expired history; needs an app context"""
+        from app import db
+
+        results = {}
+        for table in HISTORY_TABLES:
+            try:
+                results[table] = self._maintain_table(db, table)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"History maintenance of {table} failed: {str(e)}")
+                results[table] = {'error': str(e)}
+        return results
+
+    def _maintain_table(self, db, table: str) -> Dict[str, Any]:
+        connection = db.session.connection()
+        retention = self.retention_days(table)
+        cutoff = datetime.utcnow() - timedelta(days=retention) if retention > 0 else None
+        result = {'partitioned': False, 'partitions_created': 0, 'partitions_dropped': 0, 'rows_deleted': 0}
+
+        if connection.dialect.name == 'postgresql' and is_partitioned(connection, table):
+            result['partitioned'] = True
+            this_month = _month_start(datetime.utcnow())
+            last_month = this_month
+            for _ in range(self.months_ahead):
+                last_month = _next_month(last_month)
+            result['partitions_created'] = create_month_partitions(connection, table, this_month, last_month)
+
+            if cutoff is not None:
+                for month, name in month_partitions(connection, table):
+                    if _next_month(month) > cutoff.date():
+                        break
+                    connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                    connection.execute(text(f"DROP TABLE {name}"))
+                    result['partitions_dropped'] += 1
+            db.session.commit()
+            return result
+
+        if cutoff is None:
+            return result
+        column = HISTORY_TABLES[table]['column']
+        delete = text(
+            f"DELETE FROM {table} WHERE id IN "
+            f"(SELECT id FROM {table} WHERE {column} < :cutoff LIMIT :batch_size)"
+        )
+        while True:
+            deleted = db.session.execute(delete, {'cutoff': cutoff, 'batch_size': self.batch_size}).rowcount
+            db.session.commit()
+            result['rows_deleted'] += deleted
+            if deleted < self.batch_size:
+                break
+        return result
+
+
+history_partitions = HistoryPartitions()
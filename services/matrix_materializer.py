@@ -0,0 +1,295 @@
+"""
+Matrix Materializer
+In-process materialized app-agent matrix, maintained incrementally from ORM changes
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from app import db
+from models import ReplitApp, AIAgent
+from services.cache_keys import content_digest
+
+
+def _app_row(app: ReplitApp) -> Dict[str, Any]:
+    return {
+        'id': app.id,
+        'name': app.name,
+        'url': app.url,
+        'framework': getattr(app, 'framework', None) or getattr(app, 'language', None) or 'Unknown',
+        'is_active': bool(app.is_active) if app.is_active is not None else True,
+        'updated_at': app.updated_at
+    }
+
+
+def _agent_row(agent: AIAgent) -> Dict[str, Any]:
+    return {
+        'id': agent.id,
+        'app_id': agent.app_id,
+        'name': agent.agent_name,
+        'type': agent.agent_type,
+        'model': agent.model_name,
+        'strength': float(agent.effectiveness_score or 0.5),
+        'cost': float(agent.cost_estimate or 0.0),
+        'usage': int(agent.usage_frequency or 0),
+        'updated_at': agent.updated_at
+    }
+
+
+class MaterializedMatrix:
+    """Versioned matrix payload for /api/matrix-data.
+
+    Apps and agents are held as row dicts and patched from SQLAlchemy flush
+    events once their transaction commits, so a poll only rebuilds the payload
+    lists in memory after a change and otherwise returns the cached payload
+    and its ETag. Integration and optimization opportunities need the full
+    ORM graph; they are refreshed after a change at most once per
+    ``opportunity_refresh_seconds``.
+
+    Writes from other processes, and bulk query deletes that bypass ORM
+    events, are caught by a cheap count/max(updated_at) fingerprint that is
+    checked at most once per ``fingerprint_check_seconds`` and triggers a
+    full rebuild when it moves unexpectedly. After a local commit the
+    fingerprint the patched rows imply is compared with the stored one, so
+    a write that lands alongside ours also forces a rebuild.
+    """
+
+    def __init__(self, fingerprint_check_seconds: float = None, opportunity_refresh_seconds: float = None):
+        self.fingerprint_check_seconds = fingerprint_check_seconds if fingerprint_check_seconds is not None \
+            else float(os.getenv('MATRIX_FINGERPRINT_CHECK_SECONDS', '15'))
+        self.opportunity_refresh_seconds = opportunity_refresh_seconds if opportunity_refresh_seconds is not None \
+            else float(os.getenv('MATRIX_OPPORTUNITY_REFRESH_SECONDS', '60'))
+
+        self.lock = threading.RLock()
+        self.apps = None  # app id -> row, None until first build
+        self.agents = {}  # agent id -> row
+        self.version = 0
+        self.integration_opportunities = []
+        self.optimization_tips = []
+
+        self._payload = None
+        self._etag = None
+        self._opportunities_stale = True
+        self._opportunities_refreshed = 0.0
+        self._fingerprint = None
+        self._fingerprint_checked = 0.0
+
+        self.stats = {
+            'full_builds': 0,
+            'incremental_updates': 0,
+            'payload_builds': 0
+        }
+
+    def current(self) -> Tuple[str, Dict[str, Any]]:
+        """Return (etag, payload) for the current matrix version"""
+        with self.lock:
+            if self.apps is None or self._fingerprint_moved():
+                self._full_build()
+
+            if self._opportunities_stale and (
+                time.monotonic() - self._opportunities_refreshed >= self.opportunity_refresh_seconds
+            ):
+                self._refresh_opportunities()
+
+            if self._payload is None:
+                self._build_payload()
+
+            return self._etag, self._payload
+
+    def apply_changes(self, changes: List[Tuple[str, str, Dict[str, Any]]]):
+        """Patch rows from committed (kind, action, row) changes"""
+        with self.lock:
+            if self.apps is None or not changes:
+                return
+
+            for kind, action, row in changes:
+                rows = self.apps if kind == 'app' else self.agents
+                if action == 'delete':
+                    rows.pop(row['id'], None)
+                    if kind == 'app':
+                        # Agents are removed with their app by the delete-orphan cascade
+                        self.agents = {k: v for k, v in self.agents.items() if v['app_id'] != row['id']}
+                else:
+                    rows[row['id']] = row
+
+            self.stats['incremental_updates'] += 1
+            self._invalidate()
+            # Our own commit moved the fingerprint; adopt it only if our rows account for the move
+            stored = self._read_fingerprint()
+            if stored == self._expected_fingerprint():
+                self._fingerprint = stored
+            else:
+                self.apps = None
+
+    def recheck(self):
+        """Force the fingerprint check on the next read"""
+        with self.lock:
+            self._fingerprint_checked = 0.0
+
+    def invalidate(self):
+        """Drop all materialized state; the next read rebuilds from the database"""
+        with self.lock:
+            self.apps = None
+
+    def _invalidate(self):
+        self._payload = None
+        self._opportunities_stale = True
+
+    def _read_fingerprint(self):
+        # Uses its own connection, so it is safe to call from session commit hooks
+        with db.engine.connect() as connection:
+            agent_stats = connection.execute(select(func.count(AIAgent.id), func.max(AIAgent.updated_at))).one()
+            app_stats = connection.execute(select(func.count(ReplitApp.id), func.max(ReplitApp.updated_at))).one()
+        return tuple(agent_stats) + tuple(app_stats)
+
+    def _expected_fingerprint(self):
+        """The fingerprint the materialized rows would have if they match the database"""
+        def stats(rows):
+            updated = [row['updated_at'] for row in rows.values() if row['updated_at'] is not None]
+            return len(rows), max(updated, default=None)
+        return stats(self.agents) + stats(self.apps)
+
+    def _fingerprint_moved(self) -> bool:
+        now = time.monotonic()
+        if now - self._fingerprint_checked < self.fingerprint_check_seconds:
+            return False
+
+        self._fingerprint_checked = now
+        return self._read_fingerprint() != self._fingerprint
+
+    def _full_build(self):
+        self._fingerprint = self._read_fingerprint()
+        self._fingerprint_checked = time.monotonic()
+
+        self.apps = {app.id: _app_row(app) for app in ReplitApp.query.all()}
+        self.agents = {agent.id: _agent_row(agent) for agent in AIAgent.query.all()}
+        self.stats['full_builds'] += 1
+        self._invalidate()
+        self._refresh_opportunities()
+
+    def _refresh_opportunities(self):
+        from services.matrix_read_model import MatrixReadModel
+
+        read_model = MatrixReadModel()
+        self.integration_opportunities, self.optimization_tips = read_model.opportunities(
+            read_model.load_active_apps()
+        )
+        self._opportunities_stale = False
+        self._opportunities_refreshed = time.monotonic()
+        self._payload = None
+
+    def _build_payload(self):
+        active_apps = sorted(
+            (row for row in self.apps.values() if row['is_active']),
+            key=lambda row: row['id']
+        )
+        agents_by_app = {}
+        for agent in sorted(self.agents.values(), key=lambda row: row['id']):
+            agents_by_app.setdefault(agent['app_id'], []).append(agent)
+
+        matrix_apps = []
+        matrix_agents = []
+        relationships = []
+
+        for app in active_apps:
+            app_agents = agents_by_app.get(app['id'], [])
+            matrix_apps.append({
+                'id': app['id'],
+                'name': app['name'],
+                'url': app['url'],
+                'framework': app['framework'],
+                'agent_count': len(app_agents),
+                'total_cost': sum(agent['cost'] for agent in app_agents)
+            })
+
+            for agent in app_agents:
+                matrix_agents.append({
+                    'id': agent['id'],
+                    'name': agent['name'],
+                    'type': agent['type'],
+                    'model': agent['model']
+                })
+                relationships.append({
+                    'app_id': app['id'],
+                    'agent_id': agent['id'],
+                    'strength': agent['strength'],
+                    'cost': agent['cost'],
+                    'usage': agent['usage']
+                })
+
+        payload = {
+            'success': True,
+            'apps': matrix_apps,
+            'agents': matrix_agents,
+            'relationships': relationships,
+            'integration_opportunities': self.integration_opportunities,
+            'optimization_tips': self.optimization_tips
+        }
+        etag = content_digest(json.dumps(payload, sort_keys=True, default=str))
+
+        # Content-addressed ETags match across workers; the version only moves on real changes
+        if etag != self._etag:
+            self.version += 1
+            self._etag = etag
+
+        payload['metadata'] = {
+            'total_apps': len(matrix_apps),
+            'total_agents': len(matrix_agents),
+            'total_relationships': len(relationships),
+            'integration_count': len(self.integration_opportunities),
+            'optimization_count': len(self.optimization_tips),
+            'version': self.version,
+            'generated_at': datetime.now().isoformat()
+        }
+        self._payload = payload
+        self.stats['payload_builds'] += 1
+
+
+materialized_matrix = MaterializedMatrix()
+
+_CHANGES_KEY = 'materialized_matrix_changes'
+
+
+def _capture_row(instance) -> Optional[Tuple[str, Dict[str, Any]]]:
+    if isinstance(instance, AIAgent):
+        return 'agent', _agent_row(instance)
+    if isinstance(instance, ReplitApp):
+        return 'app', _app_row(instance)
+    return None
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_matrix_changes(session, flush_context):
+    """Capture flushed app and agent rows; they are applied once the transaction commits"""
+    try:
+        changes = session.info.setdefault(_CHANGES_KEY, [])
+        for action, instances in (('upsert', session.new), ('upsert', session.dirty), ('delete', session.deleted)):
+            for instance in instances:
+                captured = _capture_row(instance)
+                if captured:
+                    changes.append((captured[0], action, captured[1]))
+    except Exception as e:
+        logging.error(f"Error capturing matrix changes: {str(e)}")
+        materialized_matrix.invalidate()
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_matrix_changes(session):
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if changes:
+        materialized_matrix.apply_changes(changes)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_matrix_changes(session, previous_transaction):
+    if session.info.pop(_CHANGES_KEY, None):
+        # Changes flushed before a savepoint may still commit; verify on the next read
+        materialized_matrix.recheck()
@@ -0,0 +1,166 @@
+"""
+Matrix Read Model
+Set-based payload builders for the matrix, apps and agents APIs
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
+
+from app import db
+from models import ReplitApp, AIAgent
+
+
+class MatrixReadModel:
+    """Builds API payloads with a constant number of queries.
+
+    Apps are loaded with their agents through one selectin load, and counts
+    and names are resolved with grouped joins, so query counts do not grow
+    with the number of apps or agents.
+    """
+
+    def __init__(self, analytics_service=None):
+        if analytics_service is None:
+            from services.analytics_service import AnalyticsService
+            analytics_service = AnalyticsService()
+        self.analytics_service = analytics_service
+
+    def load_active_apps(self) -> List[ReplitApp]:
+        """Active apps with their agents eagerly loaded (two queries)"""
+        return (
+            ReplitApp.query
+            .filter_by(is_active=True)
+            .options(selectinload(ReplitApp.ai_agents))
+            .order_by(ReplitApp.id)
+            .all()
+        )
+
+    def matrix_payload(self) -> Dict[str, Any]:
+        """Payload for /api/matrix-data"""
+        apps = self.load_active_apps()
+
+        matrix_apps = []
+        matrix_agents = []
+        relationships = []
+
+        for app in apps:
+            app_agents = app.ai_agents
+
+            matrix_apps.append({
+                'id': app.id,
+                'name': app.name,
+                'url': app.url,
+                'framework': getattr(app, 'framework', None) or getattr(app, 'language', None) or 'Unknown',
+                'agent_count': len(app_agents),
+                'total_cost': sum(float(agent.cost_estimate or 0) for agent in app_agents)
+            })
+
+            # Each agent belongs to exactly one app, so no de-duplication is needed
+            for agent in app_agents:
+                matrix_agents.append({
+                    'id': agent.id,
+                    'name': agent.agent_name,
+                    'type': agent.agent_type,
+                    'model': agent.model_name
+                })
+
+                relationships.append({
+                    'app_id': app.id,
+                    'agent_id': agent.id,
+                    'strength': float(agent.effectiveness_score or 0.5),
+                    'cost': float(agent.cost_estimate or 0.0),
+                    'usage': int(agent.usage_frequency or 0)
+                })
+
+        # Opportunities are derived from the rows already loaded above
+        integration_opportunities, optimization_tips = self.opportunities(apps)
+
+        return {
+            'success': True,
+            'apps': matrix_apps,
+            'agents': matrix_agents,
+            'relationships': relationships,
+            'integration_opportunities': integration_opportunities,
+            'optimization_tips': optimization_tips,
+            'metadata': {
+                'total_apps': len(matrix_apps),
+                'total_agents': len(matrix_agents),
+                'total_relationships': len(relationships),
+                'integration_count': len(integration_opportunities),
+                'optimization_count': len(optimization_tips),
+                'generated_at': datetime.now().isoformat()
+            }
+        }
+
+    def opportunities(self, apps: List[ReplitApp]):
+        """Integration opportunities and optimization tips for apps loaded with their agents"""
+        agents = [agent for app in apps for agent in app.ai_agents]
+        agent_types = {}
+        for agent in agents:
+            agent_types.setdefault(agent.agent_type, []).append(agent)
+
+        return (
+            self.analytics_service._analyze_integration_opportunities(apps, agent_types),
+            self.analytics_service._analyze_optimization_opportunities(apps, agents)
+        )
+
+    def apps_payload(self) -> Dict[str, Any]:
+        """Payload for /api/apps, with agent counts from one grouped query"""
+        rows = (
+            db.session.query(ReplitApp, func.count(AIAgent.id))
+            .outerjoin(AIAgent, AIAgent.app_id == ReplitApp.id)
+            .filter(ReplitApp.is_active == True)
+            .group_by(ReplitApp.id)
+            .order_by(ReplitApp.id)
+            .all()
+        )
+
+        apps_data = [
+            {
+                'id': app.id,
+                'name': app.name,
+                'url': app.url,
+                'language': app.language or 'Unknown',
+                'agent_count': agent_count,
+                'created_at': app.created_at.isoformat() if app.created_at else None,
+                'updated_at': app.updated_at.isoformat() if app.updated_at else None
+            }
+            for app, agent_count in rows
+        ]
+
+        return {
+            'success': True,
+            'apps': apps_data,
+            'count': len(apps_data)
+        }
+
+    def agents_payload(self) -> Dict[str, Any]:
+        """Payload for /api/agents, with app names joined in one query"""
+        rows = (
+            db.session.query(AIAgent, ReplitApp.name)
+            .outerjoin(ReplitApp, AIAgent.app_id == ReplitApp.id)
+            .order_by(AIAgent.id)
+            .all()
+        )
+
+        agents_data = [
+            {
+                'id': agent.id,
+                'name': agent.agent_name,
+                'type': agent.agent_type,
+                'model': agent.model_name,
+                'app_name': app_name or 'Unknown',
+                'performance': float(agent.effectiveness_score or 0.0),
+                'cost': float(agent.cost_estimate or 0.0),
+                'usage': int(agent.usage_frequency or 0)
+            }
+            for agent, app_name in rows
+        ]
+
+        return {
+            'success': True,
+            'agents': agents_data,
+            'count': len(agents_data)
+        }
@@ -0,0 +1,263 @@
+"""
+MCP Batch Planner
+Dependency ordering, de-duplication and per-tool limits for batches of MCP tool calls
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, FrozenSet, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOOL_CONCURRENCY = 10
+
+
+def parse_tool_limits(value: str) -> Dict[str, Tuple[int, float, int]]:
+    """Parse ``tool=concurrency:rate:burst`` entries separated by commas; rate is calls per second"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        try:
+            tool, spec = item.split('=', 1)
+            concurrency, rate, burst = (spec.split(':') + ['', ''])[:3]
+            limits[tool.strip()] = (
+                int(concurrency) if concurrency else 0,
+                float(rate) if rate else 0.0,
+                int(burst) if burst else 0
+            )
+        except ValueError:
+            logger.warning(f"Ignoring malformed tool limit: {item}")
+    return limits
+
+
+class TokenBucket:
+    """Rate limiter refilling ``rate`` tokens per second up to ``burst``.
+
+    State is guarded by a thread lock and waiting uses ``asyncio.sleep``, so
+    one bucket can be shared by batches running on different event loops.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    async def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            await asyncio.sleep(wait)
+
+
+@dataclass
+class PlannedCall:
+    """One distinct (tool, parameters) call and every batch position it answers"""
+    tool_name: str
+    parameters: Dict[str, Any]
+    indexes: List[int] = field(default_factory=list)
+    depends_on: Set[int] = field(default_factory=set)  # positions in BatchPlan.calls
+    dependents: Set[int] = field(default_factory=set)
+
+
+@dataclass
+class BatchPlan:
+    calls: List[PlannedCall]
+    size: int  # number of calls submitted, before de-duplication
+
+
+class MCPBatchPlanner:
+    """Runs batches of tool calls through ``service.call_tool``.
+
+    Each call is ``{"tool_name", "parameters"}``, optionally with an ``id``
+    (defaults to its position) and ``depends_on``, a list of ids that must
+    succeed before it starts. A call whose dependency fails is not sent and
+    gets an error result. Identical (tool, parameters) calls that also
+    depend on the same calls are sent once and their result is given to
+    each; calls ordered around other calls, such as reads before and after
+    a write, are sent separately.
+
+    Per tool, at most ``concurrency`` calls of a batch are in flight, and if
+    a rate is set a token bucket shared by all batches paces them. Limits
+    come from ``MCP_TOOL_LIMITS`` first, then the tool's ``metadata``
+    (``max_concurrency``, ``rate_limit``, ``burst``).
+    """
+
+    def __init__(self, service, tool_limits: Optional[Dict[str, Tuple[int, float, int]]] = None,
+                 default_concurrency: Optional[int] = None):
+        self.service = service
+        self.tool_limits = parse_tool_limits(os.getenv('MCP_TOOL_LIMITS', ''))
+        self.tool_limits.update(tool_limits or {})
+        self.default_concurrency = default_concurrency if default_concurrency is not None \
+            else int(os.getenv('MCP_TOOL_CONCURRENCY', str(DEFAULT_TOOL_CONCURRENCY)))
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._buckets_lock = threading.Lock()
+
+    def limits(self, tool_name: str) -> Tuple[int, float, int]:
+        """(concurrency, calls per second or 0 for unlimited, burst) for a tool"""
+        tool = self.service.registered_tools.get(tool_name)
+        metadata = tool.metadata if tool is not None else {}
+        concurrency, rate, burst = self.tool_limits.get(tool_name, (0, 0.0, 0))
+        concurrency = concurrency or int(metadata.get('max_concurrency', self.default_concurrency))
+        rate = rate or float(metadata.get('rate_limit', 0.0))
+        burst = burst or int(metadata.get('burst', max(1, round(rate))))
+        return max(1, concurrency), rate, burst
+
+    def plan(self, tool_calls: List[Dict[str, Any]]) -> BatchPlan:
+        """Merge identical calls and resolve dependencies; raises ValueError on unknown ids or cycles"""
+        by_id: Dict[str, int] = {}
+        for index, call in enumerate(tool_calls):
+            call_id = str(call.get("id", index))
+            if call_id in by_id:
+                raise ValueError(f"Duplicate call id in batch: {call_id}")
+            by_id[call_id] = index
+
+        depends_on: List[Set[int]] = [set() for _ in tool_calls]
+        for index, call in enumerate(tool_calls):
+            for dependency in call.get("depends_on") or ():
+                if str(dependency) not in by_id:
+                    raise ValueError(f"Call {call.get('id', index)} depends on unknown call {dependency}")
+                upstream = by_id[str(dependency)]
+                if upstream == index:
+                    raise ValueError(f"Call {call.get('id', index)} depends on itself")
+                depends_on[index].add(upstream)
+
+        # Merge in dependency order, keying on the merged upstream calls as well: calls with the
+        # same upstream calls cannot have a path between them, so a read is never merged across
+        # a write that sits between the two reads
+        calls: List[PlannedCall] = []
+        by_key: Dict[Tuple[str, str, FrozenSet[int]], int] = {}
+        positions: Dict[int, int] = {}
+        for index in self._dependency_order(depends_on):
+            call = tool_calls[index]
+            upstream = frozenset(positions[dependency] for dependency in depends_on[index])
+            key = (call["tool_name"], json.dumps(call.get("parameters") or {}, sort_keys=True, default=str), upstream)
+            position = by_key.get(key)
+            if position is None:
+                position = by_key[key] = len(calls)
+                calls.append(PlannedCall(call["tool_name"], call.get("parameters") or {}, depends_on=set(upstream)))
+                for dependency in upstream:
+                    calls[dependency].dependents.add(position)
+            calls[position].indexes.append(index)
+            positions[index] = position
+
+        return BatchPlan(calls=calls, size=len(tool_calls))
+
+    async def stream(self, tool_calls: List[Dict[str, Any]],
+                     session_id: Optional[str] = None) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """Yield ``(batch index, result)`` pairs as calls complete"""
+        plan = self.plan(tool_calls)
+        calls = plan.calls
+        remaining = [len(call.depends_on) for call in calls]
+        skipped: Set[int] = set()
+        semaphores = {call.tool_name: asyncio.Semaphore(self.limits(call.tool_name)[0]) for call in calls}
+        running: Dict[asyncio.Task, int] = {}
+
+        def start(position: int):
+            task = asyncio.ensure_future(self._execute(calls[position], semaphores[calls[position].tool_name], session_id))
+            running[task] = position
+
+        for position, count in enumerate(remaining):
+            if count == 0:
+                start(position)
+
+        try:
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    position = running.pop(task)
+                    result = task.result()
+                    for index in calls[position].indexes:
+                        yield index, result
+
+                    if result.get("success") is False:
+                        # Skip everything downstream of a failed call
+                        for downstream, reason in self._skip_dependents(calls, position, skipped):
+                            for index in calls[downstream].indexes:
+                                yield index, reason
+                        continue
+
+                    for dependent in calls[position].dependents:
+                        remaining[dependent] -= 1
+                        if remaining[dependent] == 0:
+                            start(dependent)
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def execute(self, tool_calls: List[Dict[str, Any]], session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Run a batch and return results in submission order"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(tool_calls)
+        async for index, result in self.stream(tool_calls, session_id):
+            results[index] = result
+        return results
+
+    async def _execute(self, call: PlannedCall, semaphore: asyncio.Semaphore,
+                       session_id: Optional[str]) -> Dict[str, Any]:
+        async with semaphore:
+            bucket = self._bucket(call.tool_name)
+            if bucket is not None:
+                await bucket.acquire()
+            try:
+                return await self.service.call_tool(call.tool_name, call.parameters, session_id)
+            except Exception as e:
+                return {"success": False, "error": str(e), "tool": call.tool_name}
+
+    def _bucket(self, tool_name: str) -> Optional[TokenBucket]:
+        _, rate, burst = self.limits(tool_name)
+        if rate <= 0:
+            return None
+        with self._buckets_lock:
+            bucket = self._buckets.get(tool_name)
+            if bucket is None or bucket.rate != rate or bucket.burst != max(1, burst):
+                bucket = self._buckets[tool_name] = TokenBucket(rate, burst)
+            return bucket
+
+    def _skip_dependents(self, calls: List[PlannedCall], failed: int, skipped: Set[int]):
+        """Every call downstream of ``failed`` not yet in ``skipped``, with the error result it gets"""
+        stack = [(failed, dependent) for dependent in calls[failed].dependents]
+        while stack:
+            upstream, position = stack.pop()
+            if position in skipped:
+                continue
+            skipped.add(position)
+            yield position, {
+                "success": False,
+                "error": f"Skipped: dependency {calls[upstream].tool_name} failed",
+                "tool": calls[position].tool_name,
+                "skipped": True
+            }
+            stack.extend((position, dependent) for dependent in calls[position].dependents)
+
+    def _dependency_order(self, depends_on: List[Set[int]]) -> List[int]:
+        """Batch indexes with every call after its dependencies, in submission order where free"""
+        remaining = [len(upstream) for upstream in depends_on]
+        dependents: List[List[int]] = [[] for _ in depends_on]
+        for index, upstream in enumerate(depends_on):
+            for dependency in upstream:
+                dependents[dependency].append(index)
+        ready = [index for index, count in enumerate(remaining) if count == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            index = heapq.heappop(ready)
+            order.append(index)
+            for dependent in dependents[index]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    heapq.heappush(ready, dependent)
+        if len(order) < len(depends_on):
+            raise ValueError("Tool call dependencies contain a cycle")
+        return order
@@ -4,17 +4,17 @@ Model Context Protocol (MCP) Integration Service
 Universal tool connection layer for AI agents to interact with external applications
 """
 
-import asyncio
 import json
 import logging
 from typing import Dict, List, Any, Optional, Callable, Union
 from dataclasses import dataclass, field
 from enum import Enum
-import httpx
-import websockets
 import uuid
 from datetime import datetime
 
+from services.mcp_batch_planner import MCPBatchPlanner
+from services.mcp_transports import MCPConnectionPool, MCPError
+
 logger = logging.getLogger(__name__)
 
 class MCPTransport(Enum):
@@ -52,8 +52,10 @@ class MCPIntegrationService:
     def __init__(self):
         self.registered_tools: Dict[str, MCPTool] = {}
         self.active_sessions: Dict[str, Dict] = {}
-        self.client_sessions: Dict[str, httpx.AsyncClient] = {}
-        self.websocket_connections: Dict[str, Any] = {}
+        
+        # Connections are pooled per tool endpoint and shared by all sessions
+        self.connection_pool = MCPConnectionPool()
+        self.batch_planner = MCPBatchPlanner(self)
         
         # Pre-configured enterprise integrations
         self._initialize_enterprise_tools()
@@ -207,83 +209,40 @@ class MCPIntegrationService:
         session_id = session_id or str(uuid.uuid4())
         
         try:
-            if tool.transport == MCPTransport.HTTP:
-                return await self._call_http_tool(tool, parameters, session_id)
-            elif tool.transport == MCPTransport.WEBSOCKET:
-                return await self._call_websocket_tool(tool, parameters, session_id)
-            else:
-                return await self._call_stdio_tool(tool, parameters, session_id)
+            return await self._call_mcp_tool(tool, parameters, session_id)
                 
+        except MCPError as e:
+            logger.error(f"Tool {tool_name} returned an error: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e),
+                "code": e.code,
+                "tool": tool_name,
+                "timestamp": datetime.now().isoformat()
+            }
         except Exception as e:
             logger.error(f"Error calling tool {tool_name}: {str(e)}")
             return {
                 "success": False,
-                "error": str(e),
+                "error": str(e) or type(e).__name__,
                 "tool": tool_name,
                 "timestamp": datetime.now().isoformat()
             }
     
-    async def _call_http_tool(self, tool: MCPTool, parameters: Dict[str, Any], session_id: str) -> Dict[str, Any]:
-        """Call HTTP-based MCP tool"""
-        if session_id not in self.client_sessions:
-            self.client_sessions[session_id] = httpx.AsyncClient(
-                headers={"Authorization": f"Bearer {tool.auth_token}"} if tool.auth_token else {}
-            )
-        
-        client = self.client_sessions[session_id]
-        
-        # Simulate MCP protocol communication
-        mcp_request = {
-            "jsonrpc": "2.0",
-            "id": str(uuid.uuid4()),
-            "method": "tools/call",
-            "params": {
-                "name": tool.name,
-                "arguments": parameters
-            }
-        }
-        
-        # For demonstration, return successful mock response
-        # In production, this would make actual HTTP calls
+    async def _call_mcp_tool(self, tool: MCPTool, parameters: Dict[str, Any], session_id: str) -> Dict[str, Any]:
+        """Send a tools/call request over the pooled transport for the tool's endpoint"""
+        result = await self.connection_pool.call(
+            tool.transport.value, tool.endpoint, tool.auth_token,
+            "tools/call", {"name": tool.name, "arguments": parameters}
+        )
+        result = result or {}
         return {
-            "success": True,
-            "result": {
-                "tool": tool.name,
-                "action": parameters.get("action", "unknown"),
-                "parameters": parameters,
-                "status": "executed",
-                "timestamp": datetime.now().isoformat(),
-                "session_id": session_id
-            },
+            "success": not result.get("isError", False),
+            "result": result,
             "metadata": {
-                "transport": "http",
+                "transport": tool.transport.value,
                 "endpoint": tool.endpoint,
-                "capabilities": tool.capabilities
-            }
-        }
-    
-    async def _call_websocket_tool(self, tool: MCPTool, parameters: Dict[str, Any], session_id: str) -> Dict[str, Any]:
-        """Call WebSocket-based MCP tool"""
-        # WebSocket implementation for real-time tools
-        return {
-            "success": True,
-            "result": {
-                "tool": tool.name,
-                "transport": "websocket",
-                "status": "connected",
-                "session_id": session_id
-            }
-        }
-    
-    async def _call_stdio_tool(self, tool: MCPTool, parameters: Dict[str, Any], session_id: str) -> Dict[str, Any]:
-        """Call STDIO-based MCP tool (local processes)"""
-        # STDIO implementation for local tool execution
-        return {
-            "success": True,
-            "result": {
-                "tool": tool.name,
-                "transport": "stdio",
-                "status": "executed",
+                "capabilities": tool.capabilities,
                 "session_id": session_id
             }
         }
@@ -324,39 +283,32 @@ class MCPIntegrationService:
         return integration_profile
     
     async def batch_tool_execution(self, tool_calls: List[Dict[str, Any]], session_id: str = None) -> List[Dict[str, Any]]:
-        """Execute multiple MCP tools in parallel"""
-        session_id = session_id or str(uuid.uuid4())
-        
-        tasks = [
-            self.call_tool(
-                call["tool_name"],
-                call["parameters"],
-                session_id
-            )
-            for call in tool_calls
-        ]
+        """Execute multiple MCP tools in parallel, honouring ``depends_on`` and per-tool limits.
         
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        return [
-            result if not isinstance(result, Exception) else {
-                "success": False,
-                "error": str(result),
-                "tool": tool_calls[i]["tool_name"]
-            }
-            for i, result in enumerate(results)
-        ]
+        Results are returned in submission order; identical calls are sent once.
+        """
+        session_id = session_id or str(uuid.uuid4())
+        return await self.batch_planner.execute(tool_calls, session_id)
+    
+    def stream_tool_execution(self, tool_calls: List[Dict[str, Any]], session_id: str = None):
+        """Async iterator of ``(index, result)`` pairs for a batch, in completion order"""
+        session_id = session_id or str(uuid.uuid4())
+        return self.batch_planner.stream(tool_calls, session_id)
     
     def cleanup_session(self, session_id: str):
-        """Clean up MCP session resources"""
-        if session_id in self.client_sessions:
-            asyncio.create_task(self.client_sessions[session_id].aclose())
-            del self.client_sessions[session_id]
-        
+        """Clean up MCP session resources; pooled connections stay open for other sessions"""
         if session_id in self.active_sessions:
             del self.active_sessions[session_id]
         
         logger.info(f"Cleaned up MCP session: {session_id}")
+    
+    def get_connection_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Request, error and connect counts per pooled endpoint"""
+        return self.connection_pool.get_stats()
+    
+    def close(self):
+        """Close all pooled MCP connections and subprocesses"""
+        self.connection_pool.close()
 
 # Global MCP service instance
 mcp_service = MCPIntegrationService()
@@ -0,0 +1,440 @@
+"""
+MCP Transports
+JSON-RPC transports for MCP tools over HTTP, WebSocket and stdio, pooled per endpoint
+"""
+
+import abc
+import asyncio
+import itertools
+import json
+import logging
+import os
+import shlex
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+
+try:
+    from websockets.asyncio.client import connect as websocket_connect
+    WEBSOCKET_HEADERS_ARG = 'additional_headers'
+except ImportError:  # websockets < 13
+    try:
+        from websockets import connect as websocket_connect
+        WEBSOCKET_HEADERS_ARG = 'extra_headers'
+    except ImportError:
+        websocket_connect = None
+
+logger = logging.getLogger(__name__)
+
+MCP_PROTOCOL_VERSION = '2025-03-26'
+CLIENT_INFO = {'name': 'ai-agent-ecosystem', 'version': '1.0.0'}
+STDIO_LINE_LIMIT = 16 * 1024 * 1024
+
+
+class MCPError(Exception):
+    """JSON-RPC error returned by an MCP server"""
+
+    def __init__(self, message: str, code: Optional[int] = None, data: Any = None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+
+class MCPTransportBase(abc.ABC):
+    """One logical connection to an MCP server, shared by all callers.
+
+    Subclasses open the connection in ``_connect`` and write messages in
+    ``_send``; responses come back through ``_dispatch``, which matches them
+    to waiting requests by JSON-RPC id. Many requests can therefore be in
+    flight on one connection at once. The MCP ``initialize`` handshake runs
+    once per connection, before the first request.
+    """
+
+    transport_name = 'base'
+
+    def __init__(self, endpoint: str, auth_token: Optional[str] = None, timeout: float = 30.0):
+        self.endpoint = endpoint
+        self.auth_token = auth_token
+        self.timeout = timeout
+        self.server_info: Dict[str, Any] = {}
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._connected = False
+        self._connect_lock = asyncio.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'connects': 0}
+
+    async def request(self, method: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        await self._ensure_connected()
+        return await self._request(method, params)
+
+    async def close(self):
+        self._connected = False
+        self._fail_pending(ConnectionError(f"MCP connection to {self.endpoint} closed"))
+
+    async def _ensure_connected(self):
+        if self._connected:
+            return
+        async with self._connect_lock:
+            if self._connected:
+                return
+            await self._connect()
+            self.stats['connects'] += 1
+            try:
+                self.server_info = await self._request('initialize', {
+                    'protocolVersion': MCP_PROTOCOL_VERSION,
+                    'capabilities': {},
+                    'clientInfo': CLIENT_INFO
+                })
+                await self._send({'jsonrpc': '2.0', 'method': 'notifications/initialized'})
+            except BaseException:
+                await self.close()
+                raise
+            self._connected = True
+
+    async def _request(self, method: str, params: Optional[Dict[str, Any]]) -> Any:
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self.stats['requests'] += 1
+        try:
+            await self._send({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params or {}})
+            return await asyncio.wait_for(future, self.timeout)
+        except BaseException:
+            self.stats['errors'] += 1
+            raise
+        finally:
+            self._pending.pop(request_id, None)
+
+    def _dispatch(self, message: Dict[str, Any]):
+        """Route one incoming message: a response to its caller, a server request to ``_answer``"""
+        if 'method' in message:
+            if 'id' in message:
+                asyncio.ensure_future(self._answer(message))
+            return
+
+        future = self._pending.get(message.get('id'))
+        if future is None or future.done():
+            return
+        if 'error' in message:
+            error = message['error'] or {}
+            future.set_exception(MCPError(error.get('message', 'MCP error'), error.get('code'), error.get('data')))
+        else:
+            future.set_result(message.get('result'))
+
+    async def _answer(self, message: Dict[str, Any]):
+        """Reply to requests the server sends us; only ping is supported"""
+        if message['method'] == 'ping':
+            reply = {'jsonrpc': '2.0', 'id': message['id'], 'result': {}}
+        else:
+            reply = {'jsonrpc': '2.0', 'id': message['id'],
+                     'error': {'code': -32601, 'message': f"Method not found: {message['method']}"}}
+        try:
+            await self._send(reply)
+        except Exception as e:
+            logger.warning(f"Could not answer MCP server request on {self.endpoint}: {str(e)}")
+
+    def _connection_lost(self, error: Exception):
+        self._connected = False
+        self._fail_pending(error)
+
+    def _fail_pending(self, error: Exception):
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    def _auth_headers(self) -> Dict[str, str]:
+        return {'Authorization': f'Bearer {self.auth_token}'} if self.auth_token else {}
+
+    @abc.abstractmethod
+    async def _connect(self):
+        """Open the connection; the handshake is sent afterwards through ``_send``"""
+
+    @abc.abstractmethod
+    async def _send(self, message: Dict[str, Any]):
+        """Write one JSON-RPC message"""
+
+
+class HTTPTransport(MCPTransportBase):
+    """MCP over streamable HTTP: one keep-alive connection pool per endpoint.
+
+    At most ``pool_size`` requests are on the wire at once; waiting for a
+    slot does not count against the timeout.
+    """
+
+    transport_name = 'http'
+
+    def __init__(self, endpoint: str, auth_token: Optional[str] = None, timeout: float = 30.0,
+                 pool_size: int = 20):
+        super().__init__(endpoint, auth_token, timeout)
+        self.pool_size = pool_size
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.session_id: Optional[str] = None
+        self._slots = asyncio.Semaphore(pool_size)
+
+    async def _connect(self):
+        if not self.endpoint.startswith(('http://', 'https://')):
+            raise ValueError(f"Unsupported MCP HTTP endpoint: {self.endpoint}")
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                headers=self._auth_headers()
+            )
+
+    async def close(self):
+        await super().close()
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        self.session_id = None
+
+    async def _request(self, method: str, params: Optional[Dict[str, Any]]) -> Any:
+        # Each HTTP request carries its own response, so no shared pending map is needed
+        request_id = next(self._ids)
+        self.stats['requests'] += 1
+        try:
+            message = await self._post({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params or {}},
+                                       request_id)
+        except aiohttp.ClientResponseError as e:
+            self.stats['errors'] += 1
+            if e.status == 404 and self.session_id:
+                # The server dropped our session; initialize again on the next call
+                self._connected = False
+                self.session_id = None
+            raise
+        except BaseException:
+            self.stats['errors'] += 1
+            raise
+
+        if 'error' in message:
+            self.stats['errors'] += 1
+            error = message['error'] or {}
+            raise MCPError(error.get('message', 'MCP error'), error.get('code'), error.get('data'))
+        return message.get('result')
+
+    async def _send(self, message: Dict[str, Any]):
+        await self._post(message)
+
+    async def _post(self, message: Dict[str, Any], request_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        headers = {'Accept': 'application/json, text/event-stream'}
+        if self.session_id:
+            headers['Mcp-Session-Id'] = self.session_id
+
+        async with self._slots:
+            async with self.session.post(self.endpoint, json=message, headers=headers,
+                                         timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                response.raise_for_status()
+                if message.get('method') == 'initialize' and response.headers.get('Mcp-Session-Id'):
+                    self.session_id = response.headers['Mcp-Session-Id']
+                if request_id is None:
+                    return None
+                if response.content_type == 'text/event-stream':
+                    return self._event_stream_message(await response.text(), request_id)
+                return await response.json(content_type=None)
+
+    def _event_stream_message(self, body: str, request_id: int) -> Dict[str, Any]:
+        """Server-sent events: the response is the data event carrying our id"""
+        for line in body.splitlines():
+            if line.startswith('data:'):
+                message = json.loads(line[5:])
+                if message.get('id') == request_id:
+                    return message
+        raise MCPError(f"No response for request {request_id} in event stream")
+
+
+class WebSocketTransport(MCPTransportBase):
+    """MCP over one WebSocket per endpoint, with concurrent requests multiplexed by id"""
+
+    transport_name = 'websocket'
+
+    def __init__(self, endpoint: str, auth_token: Optional[str] = None, timeout: float = 30.0):
+        super().__init__(endpoint, auth_token, timeout)
+        self.websocket = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def _connect(self):
+        if websocket_connect is None:
+            raise RuntimeError("websockets is not installed")
+        kwargs = {'subprotocols': ['mcp'], 'max_size': None}
+        if self.auth_token:
+            kwargs[WEBSOCKET_HEADERS_ARG] = self._auth_headers()
+        self.websocket = await websocket_connect(self.endpoint, **kwargs)
+        self._reader = asyncio.ensure_future(self._read())
+
+    async def _send(self, message: Dict[str, Any]):
+        await self.websocket.send(json.dumps(message))
+
+    async def _read(self):
+        websocket = self.websocket
+        try:
+            async for raw in websocket:
+                self._dispatch(json.loads(raw))
+            error = ConnectionError(f"MCP WebSocket {self.endpoint} closed")
+        except Exception as e:
+            error = e
+        if websocket is self.websocket:
+            self._connection_lost(error)
+
+    async def close(self):
+        await super().close()
+        websocket, self.websocket = self.websocket, None
+        if websocket is not None:
+            await websocket.close()
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+
+
+class StdioTransport(MCPTransportBase):
+    """MCP over a long-lived subprocess speaking newline-delimited JSON-RPC; restarted if it exits"""
+
+    transport_name = 'stdio'
+
+    def __init__(self, endpoint: str, auth_token: Optional[str] = None, timeout: float = 30.0):
+        super().__init__(endpoint, auth_token, timeout)
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+
+    async def _connect(self):
+        env = dict(os.environ)
+        if self.auth_token:
+            env['MCP_AUTH_TOKEN'] = self.auth_token
+        self.process = await asyncio.create_subprocess_exec(
+            *shlex.split(self.endpoint),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            env=env,
+            limit=STDIO_LINE_LIMIT
+        )
+        self._reader = asyncio.ensure_future(self._read(self.process))
+
+    async def _send(self, message: Dict[str, Any]):
+        process = self.process
+        if process is None or process.returncode is not None:
+            raise ConnectionError(f"MCP process {self.endpoint} is not running")
+        async with self._write_lock:
+            process.stdin.write(json.dumps(message).encode() + b'\n')
+            await process.stdin.drain()
+
+    async def _read(self, process: asyncio.subprocess.Process):
+        try:
+            while True:
+                line = await process.stdout.readline()
+                if not line:
+                    break
+                try:
+                    self._dispatch(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring non JSON-RPC output from {self.endpoint}: {line[:200]!r}")
+            error = ConnectionError(f"MCP process {self.endpoint} exited")
+        except Exception as e:
+            error = e
+        if process is self.process:
+            self._connection_lost(error)
+
+    async def close(self):
+        await super().close()
+        process, self.process = self.process, None
+        if process is not None and process.returncode is None:
+            process.stdin.close()
+            try:
+                await asyncio.wait_for(process.wait(), 2)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+
+
+TRANSPORTS = {
+    'http': HTTPTransport,
+    'websocket': WebSocketTransport,
+    'stdio': StdioTransport
+}
+
+
+class MCPConnectionPool:
+    """Transports keyed by (transport, endpoint, auth token), all living on one event loop thread.
+
+    Transports hold loop-bound state (sockets, futures, subprocess pipes), so
+    they live on the pool's own loop and callers on any loop reach them
+    through ``call``. This also gives ``close`` a loop to run on.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, http_pool_size: Optional[int] = None):
+        self.timeout = timeout if timeout is not None else float(os.getenv('MCP_REQUEST_TIMEOUT', '30'))
+        self.http_pool_size = http_pool_size if http_pool_size is not None \
+            else int(os.getenv('MCP_HTTP_POOL_SIZE', '20'))
+        self.transports: Dict[Tuple[str, str, Optional[str]], MCPTransportBase] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._started = threading.Event()
+
+    async def call(self, transport: str, endpoint: str, auth_token: Optional[str], method: str,
+                   params: Optional[Dict[str, Any]] = None) -> Any:
+        """Send a JSON-RPC request over the pooled transport for this endpoint"""
+        future = asyncio.run_coroutine_threadsafe(
+            self._call(transport, endpoint, auth_token, method, params), self._ensure_loop()
+        )
+        return await asyncio.wrap_future(future)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            f'{kind}:{endpoint}': dict(transport.stats, connected=transport._connected)
+            for (kind, endpoint, _), transport in list(self.transports.items())
+        }
+
+    def close(self):
+        """Close every transport and stop the loop thread"""
+        with self._lock:
+            loop, thread = self.loop, self.thread
+            self.loop = self.thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_all(), loop).result(10)
+        except Exception as e:
+            logger.warning(f"Error closing MCP transports: {str(e)}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+
+    async def _call(self, transport: str, endpoint: str, auth_token: Optional[str], method: str,
+                    params: Optional[Dict[str, Any]]) -> Any:
+        key = (transport, endpoint, auth_token)
+        connection = self.transports.get(key)
+        if connection is None:
+            if transport not in TRANSPORTS:
+                raise ValueError(f"Unsupported MCP transport: {transport}")
+            kwargs = {'pool_size': self.http_pool_size} if transport == 'http' else {}
+            connection = self.transports[key] = TRANSPORTS[transport](endpoint, auth_token, self.timeout, **kwargs)
+        return await connection.request(method, params)
+
+    async def _close_all(self):
+        transports, self.transports = list(self.transports.values()), {}
+        for transport in transports:
+            try:
+                await transport.close()
+            except Exception as e:
+                logger.warning(f"Error closing MCP transport {transport.endpoint}: {str(e)}")
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self.loop is None:
+                self._started.clear()
+                self.thread = threading.Thread(target=self._run_loop, name='mcp-transports', daemon=True)
+                self.thread.start()
+                self._started.wait()
+            return self.loop
+
+    def _run_loop(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self.loop = loop
+        self._started.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
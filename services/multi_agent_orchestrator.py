@@ -1,6 +1,8 @@
 import logging
 import asyncio
+import itertools
 import json
+import os
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
@@ -8,10 +10,9 @@ from enum import Enum
 from models import AIAgent, ReplitApp
 from app import db
 from sqlalchemy import func, desc
-import threading
-import queue
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 import hashlib
+from services.task_scheduler import AsyncTaskScheduler
 
 class TaskStatus(Enum):
     PENDING = "pending"
@@ -20,6 +21,7 @@ class TaskStatus(Enum):
     FAILED = "failed"
     ESCALATED = "escalated"
     SPECIALIST_REQUIRED = "specialist_required"
+    CANCELLED = "cancelled"
 
 class AgentRole(Enum):
     GENERALIST = "generalist"
@@ -80,9 +82,16 @@ class MultiAgentOrchestrator:
         self.logger = logging.getLogger(__name__)
         self.active_tasks: Dict[str, TaskRequest] = {}
         self.agent_pool: Dict[int, AgentCapability] = {}
-        self.task_queue = queue.PriorityQueue()
-        self.executor = ThreadPoolExecutor(max_workers=10)
+        self.scheduler = AsyncTaskScheduler(
+            max_concurrency=int(os.getenv('ORCHESTRATOR_MAX_CONCURRENT_TASKS', '100')),
+            name='multi-agent-orchestrator',
+            on_expired=self._handle_deadline_missed
+        )
+        self.executor = ThreadPoolExecutor(max_workers=int(os.getenv('ORCHESTRATOR_AGENT_WORKERS', '32')))
         self.running = False
+        self._task_sequence = itertools.count()
+        # Set on the scheduler loop whenever agent capacity is released
+        self._capacity_released = None
         self.generation_threshold = 3  # Auto-generate specialist after 3 failures
         self.quality_gates = [
             self._gate_completeness_check,
@@ -115,20 +124,42 @@ class MultiAgentOrchestrator:
         )
         
         self.active_tasks[task_id] = task
-        
-        # Add to priority queue (negative priority for max-heap behavior)
-        self.task_queue.put((-priority, task_id))
+        self._enqueue(task)
         
         self.logger.info(f"Task {task_id} submitted with priority {priority}, complexity {complexity:.2f}")
         return task_id
     
+    def cancel_task(self, task_id: str) -> bool:
+        """Cancel a queued or running task"""
+        
+        task = self.active_tasks.get(task_id)
+        if not task or task.status in (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED):
+            return False
+        
+        self.scheduler.cancel(task_id)
+        task.status = TaskStatus.CANCELLED
+        self.logger.info(f"Task {task_id} cancelled")
+        return True
+    
+    def _enqueue(self, task: TaskRequest, priority: Optional[int] = None):
+        """Queue a task on the scheduler; higher priority first, then earliest deadline"""
+        self.scheduler.submit(
+            task.id,
+            lambda: self.process_task_parallel(task.id),
+            priority=task.priority if priority is None else priority,
+            deadline=task.deadline
+        )
+    
     async def process_task_parallel(self, task_id: str) -> Dict[str, Any]:
         """Process task using parallel multi-agent collaboration"""
         
         task = self.active_tasks.get(task_id)
         if not task:
             return {'error': 'Task not found'}
+        if task.status == TaskStatus.CANCELLED:
+            return {'task_id': task_id, 'status': 'cancelled'}
         
+        selected_agents = []
         try:
             task.status = TaskStatus.IN_PROGRESS
             task.current_attempts += 1
@@ -166,13 +197,21 @@ class MultiAgentOrchestrator:
                 'cost_estimate': sum([agent.cost_per_task for agent in selected_agents])
             }
             
+        except asyncio.CancelledError:
+            task.status = TaskStatus.CANCELLED
+            raise
         except Exception as e:
             self.logger.error(f"Error processing task {task_id}: {str(e)}")
             return await self._handle_processing_error(task, str(e))
+        finally:
+            self._release_agents(selected_agents)
     
     async def _select_optimal_agents(self, task: TaskRequest) -> List[AgentCapability]:
         """Select optimal agents for task using multi-dimensional scoring"""
         
+        # Wait until at least one agent is below its max_concurrent_tasks limit
+        await self._wait_for_agent_capacity()
+        
         available_agents = [
             agent for agent in self.agent_pool.values() 
             if agent.current_load < agent.max_concurrent_tasks
@@ -201,38 +240,65 @@ class MultiAgentOrchestrator:
             if qa_agents:
                 selected.append(qa_agents[0])
         
-        # Update agent load
+        # Update agent load; released by process_task_parallel once the task finishes
         for agent in selected:
             agent.current_load += 1
         
         return selected
     
+    async def _wait_for_agent_capacity(self):
+        """Block until some agent in the pool can take another task"""
+        
+        if self._capacity_released is None:
+            self._capacity_released = asyncio.Event()
+        
+        while self.agent_pool and not any(
+            agent.current_load < agent.max_concurrent_tasks for agent in self.agent_pool.values()
+        ):
+            self._capacity_released.clear()
+            await self._capacity_released.wait()
+    
+    def _release_agents(self, agents: List[AgentCapability]):
+        """Return agent load taken by _select_optimal_agents"""
+        
+        for agent in agents:
+            agent.current_load = max(0, agent.current_load - 1)
+        
+        if agents and self._capacity_released is not None:
+            self._capacity_released.set()
+    
     async def _execute_parallel_processing(self, task: TaskRequest, agents: List[AgentCapability]) -> List[Dict[str, Any]]:
         """Execute task across multiple agents in parallel"""
         
         # Create subtasks for parallel execution
         subtasks = self._decompose_task(task, len(agents))
         
-        # Execute in parallel
-        futures = []
-        for i, agent in enumerate(agents):
-            future = self.executor.submit(
+        # Agent calls block, so they run on the executor while the event loop keeps scheduling
+        loop = asyncio.get_running_loop()
+        calls = [
+            loop.run_in_executor(
+                self.executor,
                 self._execute_agent_task,
                 agent,
                 subtasks[i] if i < len(subtasks) else task.description,
                 task.requirements
             )
-            futures.append(future)
+            for i, agent in enumerate(agents)
+        ]
         
         # Collect results
+        outcomes = await asyncio.wait_for(
+            asyncio.gather(*calls, return_exceptions=True),
+            timeout=300  # 5-minute timeout
+        )
+        
         results = []
-        for future in as_completed(futures, timeout=300):  # 5-minute timeout
-            try:
-                result = future.result()
-                results.append(result)
-            except Exception as e:
-                self.logger.error(f"Agent execution failed: {str(e)}")
-                results.append({'error': str(e), 'success': False})
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                self.logger.error(f"Agent execution failed: {str(outcome)}")
+                results.append({'error': str(outcome), 'success': False})
+            else:
+                results.append(outcome)
         
         return results
     
@@ -329,7 +395,7 @@ class MultiAgentOrchestrator:
         })
         
         task.status = TaskStatus.PENDING
-        self.task_queue.put((-task.priority, task.id))
+        self._enqueue(task)
         
         return {
             'task_id': task.id,
@@ -365,7 +431,7 @@ class MultiAgentOrchestrator:
                 'specialist_role': specialist_spec['role']
             })
             
-            self.task_queue.put((-10, task.id))  # High priority for specialist retry
+            self._enqueue(task, priority=10)  # High priority for specialist retry
             
             return {
                 'task_id': task.id,
@@ -579,30 +645,38 @@ class MultiAgentOrchestrator:
             self.agent_pool[agent.id] = capability
     
     def _start_orchestrator(self):
-        """Start the orchestrator background process"""
-        
-        def orchestrator_loop():
-            self.running = True
-            while self.running:
-                try:
-                    if not self.task_queue.empty():
-                        priority, task_id = self.task_queue.get(timeout=1)
-                        
-                        # Process task asynchronously
-                        asyncio.create_task(self.process_task_parallel(task_id))
-                        
-                except queue.Empty:
-                    continue
-                except Exception as e:
-                    self.logger.error(f"Orchestrator error: {str(e)}")
-        
-        # Start orchestrator in background thread
-        orchestrator_thread = threading.Thread(target=orchestrator_loop, daemon=True)
-        orchestrator_thread.start()
+        """Start the scheduler event loop that runs queued tasks"""
+        
+        self.scheduler.start()
+        self.running = True
+    
+    def shutdown(self):
+        """Stop the scheduler, cancelling running tasks"""
+        
+        self.running = False
+        self.scheduler.stop()
+        self.executor.shutdown(wait=False)
+    
+    def _handle_deadline_missed(self, task_id: str):
+        """Fail a task whose deadline passed before it could start"""
+        
+        task = self.active_tasks.get(task_id)
+        if not task:
+            return
+        
+        task.status = TaskStatus.FAILED
+        task.feedback_history.append({
+            'attempt': task.current_attempts,
+            'timestamp': datetime.utcnow().isoformat(),
+            'action': 'deadline_missed'
+        })
     
     def _generate_task_id(self, description: str) -> str:
         """Generate unique task ID"""
-        return hashlib.md5(f"{description}_{datetime.utcnow().isoformat()}".encode()).hexdigest()[:12]
+        # The sequence keeps IDs unique when the same description is submitted in a burst
+        return hashlib.md5(
+            f"{description}_{datetime.utcnow().isoformat()}_{next(self._task_sequence)}".encode()
+        ).hexdigest()[:12]
     
     def _analyze_task_complexity(self, description: str, requirements: List[str]) -> float:
         """Analyze task complexity (0.0 to 1.0)"""
@@ -710,9 +784,6 @@ class MultiAgentOrchestrator:
                 'error': str(e),
                 'confidence': 0.0
             }
-        finally:
-            # Reduce agent load
-            agent.current_load = max(0, agent.current_load - 1)
     
     def _meets_quality_threshold(self, result: Dict) -> bool:
         """Check if result meets quality threshold"""
@@ -956,11 +1027,12 @@ class MultiAgentOrchestrator:
         
         return {
             'active_tasks': len(self.active_tasks),
-            'queued_tasks': self.task_queue.qsize(),
+            'queued_tasks': self.scheduler.queue_depth,
             'agent_pool_size': len(self.agent_pool),
             'running': self.running,
             'total_tasks_processed': len([t for t in self.active_tasks.values() if t.status == TaskStatus.COMPLETED]),
-            'specialist_agents_created': len([a for a in self.agent_pool.values() if a.role == AgentRole.SPECIALIST])
+            'specialist_agents_created': len([a for a in self.agent_pool.values() if a.role == AgentRole.SPECIALIST]),
+            'scheduler': self.scheduler.get_metrics()
         }
 
 # Singleton instance
@@ -12,10 +12,14 @@ import requests
 import json
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Union, Any
 from openai import OpenAI
 from google import genai
 from google.genai import types
+from requests.adapters import HTTPAdapter
+
+from services.generation_graph import GenerationGraph, GenerationStep, ProviderLimits
 
 # the newest OpenAI model is "gpt-5" which was released August 7, 2025.
 # do not change this unless explicitly requested by the user
@@ -31,9 +35,23 @@ class MultimediaGenerationService:
         self.openai_api_key = os.environ.get("OPENAI_API_KEY")
         self.gemini_api_key = os.environ.get("GEMINI_API_KEY")
         
-        # Initialize OpenAI client
+        # Per-provider concurrency caps and timeouts, shared by all callers
+        self.limits = ProviderLimits()
+        
+        # Pooled HTTP session for Suno and Ideogram
+        pool_size = int(os.environ.get("MULTIMEDIA_HTTP_POOL_SIZE", "20"))
+        self.http = requests.Session()
+        self.http.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=pool_size))
+        
+        # Workers for the independent steps of story packages and multimedia bundles
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(os.environ.get("MULTIMEDIA_GENERATION_WORKERS", "8")),
+            thread_name_prefix="multimedia-generation"
+        )
+        
+        # Initialize OpenAI client (it pools its own connections)
         if self.openai_api_key:
-            self.openai_client = OpenAI(api_key=self.openai_api_key)
+            self.openai_client = OpenAI(api_key=self.openai_api_key, timeout=self.limits.timeout("openai"))
         else:
             self.openai_client = None
             
@@ -108,7 +126,9 @@ class MultimediaGenerationService:
             payload["tags"] = tags
             
         try:
-            response = requests.post(self.suno_endpoint, headers=headers, json=payload)
+            with self.limits.slot("suno"):
+                response = self.http.post(self.suno_endpoint, headers=headers, json=payload,
+                                          timeout=self.limits.timeout("suno"))
             response.raise_for_status()
             
             result = response.json()
@@ -140,7 +160,9 @@ class MultimediaGenerationService:
         }
         
         try:
-            response = requests.get(f"https://api.sunoapi.com/v1/suno/get/{task_id}", headers=headers)
+            with self.limits.slot("suno"):
+                response = self.http.get(f"https://api.sunoapi.com/v1/suno/get/{task_id}", headers=headers,
+                                         timeout=self.limits.timeout("suno"))
             response.raise_for_status()
             
             return {
@@ -206,7 +228,9 @@ class MultimediaGenerationService:
             }
             
         try:
-            response = requests.post(self.ideogram_endpoint, headers=headers, json=payload)
+            with self.limits.slot("ideogram"):
+                response = self.http.post(self.ideogram_endpoint, headers=headers, json=payload,
+                                          timeout=self.limits.timeout("ideogram"))
             response.raise_for_status()
             
             result = response.json()
@@ -278,14 +302,15 @@ class MultimediaGenerationService:
             quality_param = cast(Literal["standard", "hd"], validated_quality)
             style_param = cast(Literal["vivid", "natural"], validated_style)
                 
-            response = self.openai_client.images.generate(
-                model="dall-e-3",
-                prompt=prompt,
-                size=size_param,
-                quality=quality_param,
-                style=style_param,
-                n=1
-            )
+            with self.limits.slot("openai"):
+                response = self.openai_client.images.generate(
+                    model="dall-e-3",
+                    prompt=prompt,
+                    size=size_param,
+                    quality=quality_param,
+                    style=style_param,
+                    n=1
+                )
             
             logger.info("DALL-E 3 image generation successful")
             
@@ -355,15 +380,16 @@ class MultimediaGenerationService:
             
             prompt = prompts.get(script_type, prompts["social_media"])
             
-            response = self.openai_client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": "You are an expert scriptwriter and storyteller with extensive experience in creating compelling content for various media formats. Your scripts are known for their engaging narratives, clear structure, and audience appeal."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.8,
-                max_tokens=1500
-            )
+            with self.limits.slot("openai"):
+                response = self.openai_client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": "You are an expert scriptwriter and storyteller with extensive experience in creating compelling content for various media formats. Your scripts are known for their engaging narratives, clear structure, and audience appeal."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.8,
+                    max_tokens=1500
+                )
             
             script_content = response.choices[0].message.content
             
@@ -447,15 +473,16 @@ SCENE X: [Title]
 
 Make each scene visually distinct and create a cohesive visual narrative."""
             
-            response = self.openai_client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": "You are a professional storyboard artist and visual director with expertise in creating detailed scene descriptions for multimedia content. Your descriptions are vivid, technically precise, and optimized for visual content generation."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=2000
-            )
+            with self.limits.slot("openai"):
+                response = self.openai_client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": "You are a professional storyboard artist and visual director with expertise in creating detailed scene descriptions for multimedia content. Your descriptions are vivid, technically precise, and optimized for visual content generation."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.7,
+                    max_tokens=2000
+                )
             
             storyboard_content = response.choices[0].message.content
             
@@ -545,15 +572,16 @@ For each character, provide:
 
 Make each character unique, memorable, and relevant to the story concept."""
             
-            response = self.openai_client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": "You are a professional character designer and storyteller who creates compelling, well-rounded characters for various media. Your character profiles are detailed, consistent, and optimized for visual representation."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.8,
-                max_tokens=2500
-            )
+            with self.limits.slot("openai"):
+                response = self.openai_client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": "You are a professional character designer and storyteller who creates compelling, well-rounded characters for various media. Your character profiles are detailed, consistent, and optimized for visual representation."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.8,
+                    max_tokens=2500
+                )
             
             character_content = response.choices[0].message.content
             
@@ -628,15 +656,16 @@ For each prompt, provide:
 
 Make the enhanced prompts significantly more detailed and specific while maintaining the original intent."""
             
-            response = self.openai_client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": f"You are an expert prompt engineer specializing in AI {content_type} generation. You understand how to craft detailed, effective prompts that produce high-quality results from various AI generation services."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.6,
-                max_tokens=2000
-            )
+            with self.limits.slot("openai"):
+                response = self.openai_client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": f"You are an expert prompt engineer specializing in AI {content_type} generation. You understand how to craft detailed, effective prompts that produce high-quality results from various AI generation services."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.6,
+                    max_tokens=2000
+                )
             
             enhanced_content = response.choices[0].message.content
             
@@ -680,6 +709,9 @@ Make the enhanced prompts significantly more detailed and specific while maintai
         """
         Generate a complete storytelling package: script, storyboard, characters, and multimedia
         
+        Character profiles depend only on the concept, so they are generated
+        while the script, storyboard and prompt enhancement run in turn.
+        
         Args:
             story_concept: Core story idea
             duration: Target duration in seconds
@@ -689,7 +721,7 @@ Make the enhanced prompts significantly more detailed and specific while maintai
             target_audience: Target audience
             
         Returns:
-            Dictionary containing complete story package
+            Dictionary containing complete story package, with per-step latencies under "timings"
         """
         package = {
             "success": True,
@@ -699,69 +731,56 @@ Make the enhanced prompts significantly more detailed and specific while maintai
             "characters": None,
             "enhanced_prompts": None,
             "total_estimated_cost": 0,
-            "errors": []
+            "errors": [],
+            "timings": None
         }
         
-        try:
-            # 1. Generate script
-            script_result = self.generate_script(
+        graph = GenerationGraph([
+            GenerationStep("script", lambda inputs: self.generate_script(
                 concept=story_concept,
                 script_type="story",
                 duration=duration,
                 target_audience=target_audience
-            )
-            
-            if script_result.get("success"):
-                package["script"] = script_result
-                package["total_estimated_cost"] += script_result.get("estimated_cost", 0)
-            else:
-                package["errors"].append(f"Script generation failed: {script_result.get('error')}")
-                package["success"] = False
-                return package
-            
-            # 2. Generate character profiles
-            character_result = self.generate_character_profiles(
+            )),
+            GenerationStep("characters", lambda inputs: self.generate_character_profiles(
                 story_concept=story_concept,
                 num_characters=3
-            )
-            
-            if character_result.get("success"):
-                package["characters"] = character_result
-                package["total_estimated_cost"] += character_result.get("estimated_cost", 0)
-            else:
-                package["errors"].append(f"Character generation failed: {character_result.get('error')}")
-            
-            # 3. Generate storyboard descriptions
-            storyboard_result = self.generate_storyboard_descriptions(
-                script_content=script_result.get("script_content", ""),
+            )),
+            GenerationStep("storyboard", lambda inputs: self.generate_storyboard_descriptions(
+                script_content=inputs["script"].get("script_content", ""),
                 num_scenes=num_scenes,
                 visual_style=visual_style
-            )
-            
-            if storyboard_result.get("success"):
-                package["storyboard"] = storyboard_result
-                package["total_estimated_cost"] += storyboard_result.get("estimated_cost", 0)
-            else:
-                package["errors"].append(f"Storyboard generation failed: {storyboard_result.get('error')}")
-            
-            # 4. Create enhanced prompts for multimedia generation
-            if storyboard_result.get("success"):
-                # Extract basic prompts from storyboard
-                basic_prompts = [f"Scene from story: {story_concept}, visual style: {visual_style}"]
-                
-                enhancement_result = self.enhance_prompts_for_generation(
-                    basic_prompts=basic_prompts,
-                    content_type="image",
-                    style_preferences=visual_style
-                )
-                
-                if enhancement_result.get("success"):
-                    package["enhanced_prompts"] = enhancement_result
-                    package["total_estimated_cost"] += enhancement_result.get("estimated_cost", 0)
-                else:
-                    package["errors"].append(f"Prompt enhancement failed: {enhancement_result.get('error')}")
+            ), depends_on=("script",)),
+            # Enhanced prompts are only wanted once there is a storyboard to illustrate
+            GenerationStep("enhanced_prompts", lambda inputs: self.enhance_prompts_for_generation(
+                basic_prompts=[f"Scene from story: {story_concept}, visual style: {visual_style}"],
+                content_type="image",
+                style_preferences=visual_style
+            ), depends_on=("storyboard",))
+        ])
+        labels = {
+            "script": "Script generation",
+            "characters": "Character generation",
+            "storyboard": "Storyboard generation",
+            "enhanced_prompts": "Prompt enhancement"
+        }
+        
+        try:
+            results, package["timings"] = graph.run(self.executor)
+            
+            for name, label in labels.items():
+                result = results[name]
+                if result.get("success"):
+                    package[name] = result
+                    package["total_estimated_cost"] += result.get("estimated_cost", 0)
+                elif not result.get("skipped"):
+                    package["errors"].append(f"{label} failed: {result.get('error')}")
+            if not results["script"].get("success"):
+                package["success"] = False
             
-            logger.info(f"Complete story package generated. Total cost: ${package['total_estimated_cost']:.4f}")
+            logger.info(f"Complete story package generated in {package['timings']['wall_ms']:.0f}ms "
+                        f"({package['timings']['sequential_ms']:.0f}ms of steps). "
+                        f"Total cost: ${package['total_estimated_cost']:.4f}")
             return package
             
         except Exception as e:
@@ -792,59 +811,43 @@ Make the enhanced prompts significantly more detailed and specific while maintai
             image_style: Style for image generation
             
         Returns:
-            Dictionary containing results from both services
+            Dictionary containing results from both services, with per-step latencies under "timings"
         """
         results = {
             "success": True,
             "music": None,
             "image": None,
             "total_estimated_cost": 0,
-            "errors": []
+            "errors": [],
+            "timings": None
         }
         
-        # Generate music
-        try:
-            music_result = self.generate_music(
+        graph = GenerationGraph([
+            GenerationStep("music", lambda inputs: self.generate_music(
                 prompt=music_prompt,
                 title=title,
                 tags=music_tags
-            )
-            
-            if music_result.get("success"):
-                results["music"] = music_result
-                results["total_estimated_cost"] += music_result.get("estimated_cost", 0)
-            else:
-                results["errors"].append(f"Music generation failed: {music_result.get('error')}")
-                results["success"] = False
-                
-        except Exception as e:
-            results["errors"].append(f"Music generation error: {str(e)}")
-            results["success"] = False
+            )),
+            GenerationStep("image", lambda inputs: self.generate_image_ideogram(
+                prompt=image_prompt,
+                style_type=image_style
+            ) if use_ideogram else self.generate_image_dalle(
+                prompt=image_prompt
+            ))
+        ])
         
-        # Generate image
-        try:
-            if use_ideogram:
-                image_result = self.generate_image_ideogram(
-                    prompt=image_prompt,
-                    style_type=image_style
-                )
+        step_results, results["timings"] = graph.run(self.executor)
+        for name, label in (("music", "Music"), ("image", "Image")):
+            result = step_results[name]
+            if result.get("success"):
+                results[name] = result
+                results["total_estimated_cost"] += result.get("estimated_cost", 0)
             else:
-                image_result = self.generate_image_dalle(
-                    prompt=image_prompt
-                )
-                
-            if image_result.get("success"):
-                results["image"] = image_result
-                results["total_estimated_cost"] += image_result.get("estimated_cost", 0)
-            else:
-                results["errors"].append(f"Image generation failed: {image_result.get('error')}")
+                results["errors"].append(f"{label} generation failed: {result.get('error')}")
                 results["success"] = False
-                
-        except Exception as e:
-            results["errors"].append(f"Image generation error: {str(e)}")
-            results["success"] = False
         
-        logger.info(f"Multimedia generation completed. Cost: ${results['total_estimated_cost']:.4f}")
+        logger.info(f"Multimedia generation completed in {results['timings']['wall_ms']:.0f}ms. "
+                    f"Cost: ${results['total_estimated_cost']:.4f}")
         return results
 
     # Gemini VEO3 Video Generation
@@ -875,14 +878,15 @@ Make the enhanced prompts significantly more detailed and specific while maintai
             enhanced_prompt = f"{prompt}. Style: {style}. Duration: {duration} seconds. High quality, detailed, smooth motion."
             
             # Generate video using Gemini VEO3
-            response = self.gemini_client.models.generate_content(
-                model="gemini-2.0-flash-preview-video-generation",
-                contents=enhanced_prompt,
-                config=types.GenerateContentConfig(
-                    response_modalities=['VIDEO'],
-                    temperature=0.7
+            with self.limits.slot("gemini"):
+                response = self.gemini_client.models.generate_content(
+                    model="gemini-2.0-flash-preview-video-generation",
+                    contents=enhanced_prompt,
+                    config=types.GenerateContentConfig(
+                        response_modalities=['VIDEO'],
+                        temperature=0.7
+                    )
                 )
-            )
             
             if not response.candidates or not response.candidates[0].content:
                 return {"error": "No video content generated", "success": False}
@@ -0,0 +1,422 @@
+"""
+Parallel Parameter Search
+Grid, genetic, Bayesian and walk-forward search over real backtests in a process pool
+"""
+
+import itertools
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from services.ai_cache_backends import MISS, LRUMemoryCache
+from services.cache_keys import build_cache_key, content_digest
+from services.vectorized_backtest import (
+    compute_signals, effective_parameters, simulate_trades, trade_statistics, warmup_days
+)
+
+Window = Tuple[int, int]
+
+# Worker-side cache of attached shared price arrays
+_MAX_ATTACHED = 4
+_attached = OrderedDict()  # segment name -> (SharedMemory, ndarray)
+
+
+class SharedPriceArray:
+    """An (assets, days) float64 price array copied once into shared memory.
+
+    Jobs reference the segment by name, so workers map the same pages
+    instead of receiving a pickled copy of the prices with every job.
+    """
+
+    def __init__(self, prices: np.ndarray):
+        prices = np.ascontiguousarray(prices, dtype=np.float64)
+        self.shape = prices.shape
+        self.data_hash = content_digest(memoryview(prices))
+        self.segment = shared_memory.SharedMemory(create=True, size=max(1, prices.nbytes))
+        self.array = np.ndarray(self.shape, dtype=np.float64, buffer=self.segment.buf)
+        self.array[:] = prices
+
+    @property
+    def name(self) -> str:
+        return self.segment.name
+
+    def release(self):
+        self.array = None
+        self.segment.close()
+        self.segment.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+def _attach(name: str, shape: Tuple[int, int]) -> np.ndarray:
+    entry = _attached.get(name)
+    if entry is None:
+        # Workers share the parent's resource tracker, and the parent unlinks the segment
+        segment = shared_memory.SharedMemory(name=name)
+        entry = (segment, np.ndarray(shape, dtype=np.float64, buffer=segment.buf))
+        _attached[name] = entry
+
+        while len(_attached) > _MAX_ATTACHED:
+            _, (stale_segment, _) = _attached.popitem(last=False)
+            stale_segment.close()
+    else:
+        _attached.move_to_end(name)
+
+    return entry[1]
+
+
+def _backtest(prices: np.ndarray, strategy: str, params: Dict[str, Any], window: Window,
+              default_position_size: float) -> Dict[str, Any]:
+    start, end = window
+    # Rolling windows see the history before the window, but trades start inside it
+    lead = min(start, warmup_days(strategy, params))
+    prices = prices[:, start - lead:end]
+
+    signals = compute_signals(strategy, prices, params)
+    signals[:, :lead] = 0
+    trades = simulate_trades(
+        range(end - start + lead), range(prices.shape[0]), prices, signals,
+        max_position_size=params.get('position_size', default_position_size)
+    )
+    statistics = trade_statistics(trades)
+    statistics['trades'] = len(trades)
+    return statistics
+
+
+def _evaluate_job(job: Tuple) -> Dict[str, Any]:
+    """Run one backtest in a worker process against shared prices"""
+    name, shape, strategy, params, window, default_position_size = job
+    return _backtest(_attach(name, shape), strategy, params, window, default_position_size)
+
+
+class ParallelParameterSearch:
+    """Parameter optimizers that score every candidate with an actual backtest.
+
+    Backtests run in a process pool (spawned, so it is safe to use from a
+    threaded web process) against a shared-memory copy of the prices.
+    Results are cached by strategy, effective parameters, data hash and
+    window, so parameters a strategy does not read, repeated GA
+    individuals and repeated runs over the same data cost nothing.
+    """
+
+    def __init__(self, max_workers: int = None, cache_entries: int = 100000,
+                 cache_ttl: int = 24 * 3600, objective: str = 'sharpe_ratio'):
+        self.max_workers = max_workers or int(os.getenv('BACKTEST_WORKERS', '0')) or os.cpu_count() or 1
+        self.objective = objective
+        self.cache = LRUMemoryCache(max_bytes=64 * 1024 * 1024, max_entries=cache_entries)
+        self.cache_ttl = cache_ttl
+        self.default_position_size = 0.05
+
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self.stats = {'evaluations': 0, 'cache_hits': 0}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._pool
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def evaluate(self, strategy: str, prices: SharedPriceArray, param_sets: Sequence[Dict[str, Any]],
+                 windows: Sequence[Window] = None) -> List[List[Dict[str, Any]]]:
+        """Backtest every parameter set on every window; result[i][j] is set i on window j"""
+        windows = list(windows or [(0, prices.shape[1])])
+        flat = self.evaluate_pairs(strategy, prices, [(params, window) for params in param_sets for window in windows])
+        return [flat[i * len(windows):(i + 1) * len(windows)] for i in range(len(param_sets))]
+
+    def evaluate_pairs(self, strategy: str, prices: SharedPriceArray,
+                       pairs: Sequence[Tuple[Dict[str, Any], Window]]) -> List[Dict[str, Any]]:
+        """Backtest (parameters, window) pairs, running uncached ones as one parallel batch"""
+        results = [None] * len(pairs)
+        pending = {}  # cache key -> (job, [result index, ...])
+
+        for index, (params, window) in enumerate(pairs):
+            effective = effective_parameters(strategy, params)
+            key = build_cache_key('backtest', strategy, {
+                'params': effective,
+                'data': prices.data_hash,
+                'window': list(window),
+                'position_size': self.default_position_size
+            })
+            cached, _ = self.cache.get(key)
+            if cached is not MISS:
+                self.stats['cache_hits'] += 1
+                results[index] = cached
+            elif key in pending:
+                pending[key][1].append(index)
+            else:
+                job = (prices.name, prices.shape, strategy, effective, tuple(window), self.default_position_size)
+                pending[key] = (job, [index])
+
+        if not pending:
+            return results
+
+        keys = list(pending)
+        jobs = [pending[key][0] for key in keys]
+        if self.max_workers == 1:
+            outcomes = (_backtest(prices.array, *job[2:]) for job in jobs)
+        else:
+            chunksize = max(1, len(jobs) // (self.max_workers * 4))
+            outcomes = self._executor().map(_evaluate_job, jobs, chunksize=chunksize)
+
+        for key, outcome in zip(keys, outcomes):
+            self.cache.set(key, outcome, self.cache_ttl)
+            self.stats['evaluations'] += 1
+            for index in pending[key][1]:
+                results[index] = outcome
+
+        return results
+
+    def score(self, result: Dict[str, Any]) -> float:
+        return float(result.get(self.objective, 0.0))
+
+    def _score_many(self, strategy, prices, param_sets, window) -> List[float]:
+        return [self.score(row[0]) for row in self.evaluate(strategy, prices, param_sets, [window])]
+
+    # Optimizers
+
+    def grid_search(self, strategy: str, prices: SharedPriceArray, parameter_space: Dict[str, List],
+                    window: Window = None, max_evaluations: int = 5000) -> Dict[str, Any]:
+        """Exhaustive search over the parameters the strategy reads; others are fixed at their midpoint"""
+        window = window or (0, prices.shape[1])
+        active, fixed = self._split_space(strategy, parameter_space)
+
+        names = list(active)
+        combinations = list(itertools.product(*(active[name] for name in names)))
+        if len(combinations) > max_evaluations:
+            rng = np.random.default_rng(0)
+            picks = rng.choice(len(combinations), size=max_evaluations, replace=False)
+            combinations = [combinations[index] for index in sorted(picks)]
+
+        param_sets = [dict(fixed, **dict(zip(names, values))) for values in combinations]
+        scores = self._score_many(strategy, prices, param_sets, window)
+        best = int(np.argmax(scores)) if scores else None
+
+        return {
+            'best_parameters': param_sets[best] if best is not None else dict(fixed),
+            'best_score': scores[best] if best is not None else 0.0,
+            'evaluations': list(zip(param_sets, scores)),
+            'active_parameters': names
+        }
+
+    def genetic_search(self, strategy: str, prices: SharedPriceArray, parameter_space: Dict[str, List],
+                       window: Window = None, population_size: int = 24, generations: int = 10,
+                       mutation_rate: float = 0.2, elite: int = 2, seed: int = 0) -> Dict[str, Any]:
+        """Genetic algorithm over parameter grid indices; each generation is scored as one parallel batch"""
+        window = window or (0, prices.shape[1])
+        active, fixed = self._split_space(strategy, parameter_space)
+        names = list(active)
+        sizes = np.array([len(active[name]) for name in names], dtype=int)
+        rng = np.random.default_rng(seed)
+
+        def decode(genome):
+            return dict(fixed, **{name: active[name][index] for name, index in zip(names, genome)})
+
+        population = rng.integers(0, sizes, size=(population_size, len(names))) if names \
+            else np.zeros((1, 0), dtype=int)
+        best_genome, best_score, convergence_generation = None, -np.inf, 0
+
+        for generation in range(generations):
+            scores = np.array(self._score_many(strategy, prices, [decode(g) for g in population], window))
+            leader = int(np.argmax(scores))
+            if scores[leader] > best_score:
+                best_genome, best_score, convergence_generation = population[leader].copy(), scores[leader], generation
+
+            if not names or generation == generations - 1:
+                break
+
+            order = np.argsort(scores)[::-1]
+            offspring = [population[index].copy() for index in order[:elite]]
+            while len(offspring) < population_size:
+                parents = [
+                    population[max(rng.choice(len(population), size=3, replace=False), key=lambda k: scores[k])]
+                    for _ in range(2)
+                ]
+                child = np.where(rng.random(len(names)) < 0.5, parents[0], parents[1])
+                mutate = rng.random(len(names)) < mutation_rate
+                child[mutate] = rng.integers(0, sizes[mutate])
+                offspring.append(child)
+            population = np.array(offspring)
+
+        return {
+            'best_parameters': decode(best_genome) if best_genome is not None else dict(fixed),
+            'best_score': float(best_score) if np.isfinite(best_score) else 0.0,
+            'generations': generations,
+            'population_size': population_size,
+            'convergence_generation': convergence_generation
+        }
+
+    def bayesian_search(self, strategy: str, prices: SharedPriceArray, parameter_space: Dict[str, List],
+                        window: Window = None, iterations: int = 30, initial_points: int = 8,
+                        batch_size: int = None, candidates: int = 2000, seed: int = 0) -> Dict[str, Any]:
+        """Gaussian-process search with expected improvement, proposing a batch per round"""
+        window = window or (0, prices.shape[1])
+        active, fixed = self._split_space(strategy, parameter_space)
+        names = list(active)
+        sizes = np.array([len(active[name]) for name in names], dtype=int)
+        rng = np.random.default_rng(seed)
+        batch_size = batch_size or self.max_workers
+
+        def decode(point):
+            return dict(fixed, **{name: active[name][index] for name, index in zip(names, point)})
+
+        grid_size = int(np.prod(sizes)) if names else 1
+        if grid_size <= candidates:
+            pool = np.array(list(itertools.product(*(range(size) for size in sizes))), dtype=int).reshape(grid_size, len(names))
+        else:
+            pool = np.unique(rng.integers(0, sizes, size=(candidates, len(names))), axis=0)
+        scale = np.maximum(sizes - 1, 1)
+
+        observed = {}
+        first = pool[rng.choice(len(pool), size=min(initial_points, len(pool)), replace=False)]
+        for point, score in zip(first, self._score_many(strategy, prices, [decode(p) for p in first], window)):
+            observed[tuple(point)] = score
+
+        while len(observed) < min(iterations, len(pool)):
+            remaining = np.array([p for p in pool if tuple(p) not in observed])
+            X = np.array(list(observed)) / scale
+            y = np.array(list(observed.values()))
+            improvement = _expected_improvement(X, y, remaining / scale)
+            take = min(batch_size, iterations - len(observed), len(remaining))
+            batch = remaining[np.argsort(improvement)[::-1][:take]]
+            for point, score in zip(batch, self._score_many(strategy, prices, [decode(p) for p in batch], window)):
+                observed[tuple(point)] = score
+
+        best_point = max(observed, key=observed.get)
+        return {
+            'best_parameters': decode(best_point),
+            'best_score': float(observed[best_point]),
+            'iterations': len(observed),
+            'acquisition_function': 'expected_improvement'
+        }
+
+    def walk_forward(self, strategy: str, prices: SharedPriceArray, parameter_space: Dict[str, List],
+                     windows: int = 8, train_fraction: float = 0.7, max_evaluations: int = 500) -> Dict[str, Any]:
+        """Anchored walk-forward: grid-search each training span, then test the winner on the next span.
+
+        All in-sample backtests of all windows go to the pool as one batch,
+        followed by one batch for the out-of-sample tests.
+        """
+        days = prices.shape[1]
+        splits = _walk_forward_splits(days, windows, train_fraction)
+        if not splits:
+            return {'optimization_windows': 0, 'windows': []}
+
+        active, fixed = self._split_space(strategy, parameter_space)
+        names = list(active)
+        combinations = list(itertools.product(*(active[name] for name in names)))[:max_evaluations]
+        param_sets = [dict(fixed, **dict(zip(names, values))) for values in combinations]
+
+        in_sample = self.evaluate(strategy, prices, param_sets, [train for train, _ in splits])
+        winners = []
+        for j in range(len(splits)):
+            scores = [self.score(row[j]) for row in in_sample]
+            best = int(np.argmax(scores))
+            winners.append((param_sets[best], scores[best]))
+
+        out_of_sample = self.evaluate_pairs(strategy, prices, [
+            (params, test) for (params, _), (_, test) in zip(winners, splits)
+        ])
+
+        window_results = []
+        for j, ((train, test), (params, in_score)) in enumerate(zip(splits, winners)):
+            window_results.append({
+                'train': list(train),
+                'test': list(test),
+                'parameters': params,
+                'in_sample_score': in_score,
+                'out_of_sample_score': self.score(out_of_sample[j])
+            })
+
+        in_scores = np.array([w['in_sample_score'] for w in window_results])
+        out_scores = np.array([w['out_of_sample_score'] for w in window_results])
+        distinct = len({tuple(sorted(effective_parameters(strategy, w['parameters']).items()))
+                        for w in window_results})
+
+        return {
+            'optimization_windows': len(window_results),
+            'out_of_sample_periods': len(window_results),
+            'average_in_sample_sharpe': float(in_scores.mean()),
+            'average_out_of_sample_sharpe': float(out_scores.mean()),
+            'parameter_stability_score': 1 - (distinct - 1) / max(len(window_results) - 1, 1),
+            'performance_degradation': float(1 - out_scores.mean() / in_scores.mean()) if in_scores.mean() else 0.0,
+            'windows': window_results
+        }
+
+    def _split_space(self, strategy: str, parameter_space: Dict[str, List]) -> Tuple[Dict[str, List], Dict[str, Any]]:
+        """Separate parameters the backtest reads from ones fixed at their midpoint"""
+        active_names = set(effective_parameters(strategy, parameter_space))
+        active = {name: list(values) for name, values in parameter_space.items() if name in active_names}
+        fixed = {name: values[len(values) // 2] for name, values in parameter_space.items()
+                 if name not in active_names}
+        return active, fixed
+
+
+def _walk_forward_splits(days: int, windows: int, train_fraction: float) -> List[Tuple[Window, Window]]:
+    """Anchored (expanding) training spans, each followed by an equal-size test span"""
+    initial_train = int(days * train_fraction)
+    test_length = (days - initial_train) // max(windows, 1)
+    if test_length < 1:
+        return []
+
+    return [
+        ((0, initial_train + k * test_length), (initial_train + k * test_length, initial_train + (k + 1) * test_length))
+        for k in range(windows)
+    ]
+
+
+def _expected_improvement(X: np.ndarray, y: np.ndarray, candidates: np.ndarray,
+                          length_scale: float = 0.3, noise: float = 1e-6, xi: float = 0.01) -> np.ndarray:
+    """Expected improvement of a zero-mean RBF Gaussian process fitted to standardized scores"""
+    std = y.std() or 1.0
+    target = (y - y.mean()) / std
+
+    def kernel(a, b):
+        distance = ((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=-1)
+        return np.exp(-0.5 * distance / length_scale ** 2)
+
+    K = kernel(X, X) + noise * np.eye(len(X))
+    try:
+        L = np.linalg.cholesky(K)
+    except np.linalg.LinAlgError:
+        L = np.linalg.cholesky(K + 1e-3 * np.eye(len(X)))
+
+    alpha = np.linalg.solve(L.T, np.linalg.solve(L, target))
+    K_star = kernel(candidates, X)
+    mean = K_star @ alpha
+    v = np.linalg.solve(L, K_star.T)
+    sigma = np.sqrt(np.maximum(1.0 - (v ** 2).sum(axis=0), 1e-12))
+
+    gain = mean - target.max() - xi
+    z = gain / sigma
+    cdf = 0.5 * (1 + _erf(z / np.sqrt(2)))
+    pdf = np.exp(-0.5 * z ** 2) / np.sqrt(2 * np.pi)
+    return gain * cdf + sigma * pdf
+
+
+def _erf(x: np.ndarray) -> np.ndarray:
+    # Abramowitz-Stegun 7.1.26, accurate to 1.5e-7, avoids a scipy dependency
+    sign = np.sign(x)
+    x = np.abs(x)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    return sign * (1 - poly * np.exp(-x * x))
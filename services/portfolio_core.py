@@ -0,0 +1,217 @@
+"""
+Portfolio Core
+Cholesky-factored covariance with batched solves for mean-variance and the frontier, and Newton risk parity
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from scipy.linalg import cho_factor, cho_solve
+except ImportError:  # blocked triangular solves in numpy instead
+    cho_factor = cho_solve = None
+
+logger = logging.getLogger(__name__)
+
+# Diagonal block size for the numpy triangular solves
+SOLVE_BLOCK = 128
+
+
+class CovarianceFactor:
+    """Cholesky factorization of a covariance matrix, computed once and reused for every solve.
+
+    A matrix that is not numerically positive definite (e.g. a sample
+    covariance with fewer periods than assets) gets the smallest diagonal
+    ridge, in powers of ten of its mean variance, that makes it factorable.
+    """
+
+    def __init__(self, cov_matrix: np.ndarray):
+        self.cov = np.ascontiguousarray(cov_matrix, dtype=float)
+        self.n = self.cov.shape[0]
+        self.ridge = 0.0
+
+        scale = np.trace(self.cov) / max(self.n, 1)
+        for exponent in [None] + list(range(-12, 0)):
+            matrix = self.cov if exponent is None else self.cov + np.eye(self.n) * scale * 10.0 ** exponent
+            try:
+                if cho_factor is not None:
+                    self._factor = cho_factor(matrix, lower=True, check_finite=False)
+                    self.lower = np.tril(self._factor[0])
+                else:
+                    self.lower = np.linalg.cholesky(matrix)
+                self.ridge = 0.0 if exponent is None else scale * 10.0 ** exponent
+                break
+            except np.linalg.LinAlgError:
+                continue
+        else:
+            raise np.linalg.LinAlgError("Covariance matrix could not be factorized")
+
+        if self.ridge:
+            logger.warning(f"Covariance matrix not positive definite; factorized with ridge {self.ridge:.3g}")
+
+    def solve(self, rhs: np.ndarray) -> np.ndarray:
+        """Solve ``cov @ x = rhs`` for a vector or a matrix of right-hand sides"""
+        rhs = np.asarray(rhs, dtype=float)
+        if cho_solve is not None:
+            return cho_solve(self._factor, rhs, check_finite=False)
+
+        columns = rhs.reshape(self.n, -1)
+        solution = self._solve_upper(self._solve_lower(columns))
+        return solution.reshape(rhs.shape)
+
+    def _solve_lower(self, rhs: np.ndarray) -> np.ndarray:
+        """Forward substitution ``L y = rhs`` a block of rows at a time"""
+        L = self.lower
+        result = np.empty_like(rhs)
+        for start in range(0, self.n, SOLVE_BLOCK):
+            end = min(start + SOLVE_BLOCK, self.n)
+            block_rhs = rhs[start:end] - L[start:end, :start] @ result[:start]
+            result[start:end] = np.linalg.solve(L[start:end, start:end], block_rhs)
+        return result
+
+    def _solve_upper(self, rhs: np.ndarray) -> np.ndarray:
+        """Back substitution ``L.T x = rhs`` a block of rows at a time"""
+        L = self.lower
+        result = np.empty_like(rhs)
+        for end in range(self.n, 0, -SOLVE_BLOCK):
+            start = max(0, end - SOLVE_BLOCK)
+            block_rhs = rhs[start:end] - L[end:, start:end].T @ result[end:]
+            result[start:end] = np.linalg.solve(L[start:end, start:end].T, block_rhs)
+        return result
+
+
+class PortfolioCore:
+    """Portfolio computations over one covariance matrix.
+
+    ``cov^-1 mu`` and ``cov^-1 1`` come from a single batched solve against
+    the cached factorization; mean-variance weights, the frontier scalars
+    and every frontier point are then closed-form in those two vectors.
+    """
+
+    def __init__(self, cov_matrix: np.ndarray):
+        self.factor = CovarianceFactor(cov_matrix)
+        self.cov = self.factor.cov
+        self.n = self.factor.n
+        self._solved: Dict[bytes, np.ndarray] = {}
+
+    def solve(self, vector: np.ndarray) -> np.ndarray:
+        return self.factor.solve(vector)
+
+    def solve_returns(self, expected_returns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(cov^-1 mu, cov^-1 1), solved together and cached per expected-returns vector"""
+        expected_returns = np.asarray(expected_returns, dtype=float)
+        key = expected_returns.tobytes()
+        solved = self._solved.get(key)
+        if solved is None:
+            solved = self._solved[key] = self.factor.solve(np.column_stack([expected_returns, np.ones(self.n)]))
+        return solved[:, 0], solved[:, 1]
+
+    def mean_variance_weights(self, expected_returns: np.ndarray, risk_aversion: float) -> np.ndarray:
+        """Unconstrained weights ``cov^-1 mu`` scaled by risk aversion and their sum"""
+        inv_mu, _ = self.solve_returns(expected_returns)
+        return inv_mu / (risk_aversion * np.sum(inv_mu))
+
+    def efficient_frontier(self, expected_returns: np.ndarray, points: int = 20) -> List[Tuple[float, float]]:
+        """(volatility, return) of the minimum-variance portfolio at evenly spaced target returns"""
+        expected_returns = np.asarray(expected_returns, dtype=float)
+        inv_mu, inv_ones = self.solve_returns(expected_returns)
+        A = expected_returns @ inv_mu
+        B = expected_returns @ inv_ones
+        C = np.sum(inv_ones)
+        D = A * C - B ** 2
+
+        targets = np.linspace(np.min(expected_returns), np.max(expected_returns), points)
+        lambdas = (C * targets - B) / D
+        gammas = (A - B * targets) / D
+        # w = lambda cov^-1 mu + gamma cov^-1 1, so w' cov w needs no further products with cov
+        variances = lambdas ** 2 * A + 2 * lambdas * gammas * B + gammas ** 2 * C
+        vols = np.sqrt(np.maximum(variances, 0.0))
+        return [(float(vol), float(target)) for vol, target in zip(vols, targets)]
+
+    def risk_contributions(self, weights: np.ndarray) -> np.ndarray:
+        """Each asset's share of portfolio variance"""
+        marginal = self.cov @ weights
+        return weights * marginal / (weights @ marginal)
+
+    def risk_parity_weights(self, budgets: Optional[np.ndarray] = None, tolerance: float = 1e-10,
+                            max_iterations: int = 100) -> Tuple[np.ndarray, Dict[str, float]]:
+        """Risk budgeting weights by Newton's method.
+
+        Minimizes the convex ``0.5 y' cov y - sum(b log y)``, whose solution
+        has risk contributions ``y_i (cov y)_i = b_i``. Each Newton system
+        ``(cov + diag(b / y^2)) d = -grad`` is solved by Jacobi-preconditioned
+        conjugate gradients, so an iteration costs matrix-vector products
+        rather than a factorization. Steps are kept inside ``y > 0`` and
+        backtracked until the objective decreases. Stops once every relative
+        risk contribution error is below ``tolerance``.
+        """
+        b = np.full(self.n, 1.0 / self.n) if budgets is None else np.asarray(budgets, dtype=float) / np.sum(budgets)
+        cov = self.cov
+        diagonal = np.diag(cov).copy()
+
+        y = np.sqrt(b / diagonal)
+        y /= np.sqrt(y @ cov @ y)
+        cov_y = cov @ y
+        objective = 0.5 * y @ cov_y - b @ np.log(y)
+
+        iterations = cg_iterations = 0
+        error = np.max(np.abs(y * cov_y - b) / b)
+        while error >= tolerance and iterations < max_iterations:
+            iterations += 1
+            gradient = cov_y - b / y
+            curvature = b / y ** 2
+            direction, steps = self._newton_direction(gradient, curvature, diagonal)
+            cg_iterations += steps
+
+            step = 1.0
+            shrinking = direction < 0
+            if shrinking.any():
+                step = min(1.0, 0.99 * np.min(-y[shrinking] / direction[shrinking]))
+            slope = gradient @ direction
+            # Slack for rounding in the objective, which otherwise stalls the last quadratic steps
+            slack = 1e-12 * max(1.0, abs(objective))
+            while True:
+                candidate = y + step * direction
+                candidate_cov_y = cov @ candidate
+                candidate_objective = 0.5 * candidate @ candidate_cov_y - b @ np.log(candidate)
+                if candidate_objective <= objective + 1e-4 * step * slope + slack or step < 1e-12:
+                    break
+                step *= 0.5
+
+            y, cov_y, objective = candidate, candidate_cov_y, candidate_objective
+            error = np.max(np.abs(y * cov_y - b) / b)
+
+        weights = y / np.sum(y)
+        return weights, {
+            'iterations': iterations,
+            'cg_iterations': cg_iterations,
+            'max_relative_error': float(error),
+            'converged': bool(error < tolerance)
+        }
+
+    def _newton_direction(self, gradient: np.ndarray, curvature: np.ndarray,
+                          diagonal: np.ndarray) -> Tuple[np.ndarray, int]:
+        """Preconditioned CG for ``(cov + diag(curvature)) d = -gradient``, to a tolerance that tightens near the optimum"""
+        preconditioner = 1.0 / (diagonal + curvature)
+        gradient_norm = np.linalg.norm(gradient)
+        target = min(0.5, np.sqrt(gradient_norm)) * gradient_norm * 1e-3
+
+        direction = np.zeros(self.n)
+        residual = -gradient
+        z = preconditioner * residual
+        search = z.copy()
+        rz = residual @ z
+        for step in range(1, 2 * self.n + 1):
+            product = self.cov @ search + curvature * search
+            alpha = rz / (search @ product)
+            direction += alpha * search
+            residual -= alpha * product
+            if np.linalg.norm(residual) <= target:
+                break
+            z = preconditioner * residual
+            rz_next = residual @ z
+            search = z + (rz_next / rz) * search
+            rz = rz_next
+        return direction, step
@@ -13,6 +13,12 @@ from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from enum import Enum
 import json
+import weakref
+
+from services.agent_telemetry import instrument_agent
+from services.portfolio_core import PortfolioCore
+from services.risk_simulation import RiskSimulationEngine
+from services.technical_indicators import IndicatorStreams, PriceStream, RSI, RollingMean, RollingStd, RollingZScore, rsi
 
 @dataclass
 class QuantitativeModel:
@@ -105,6 +111,15 @@ class QuantitativeAnalysisExpert:
             "economic_data": "fred_api"
         }
         
+        # Factorized covariance matrices, reused while the matrix object is alive
+        self._portfolio_cores: List[Tuple[weakref.ref, PortfolioCore]] = []
+        
+        # Per-asset indicators, advanced only by prices added since the last signal run
+        self.indicator_streams = IndicatorStreams(self._signal_indicators)
+        
+        # VaR/ES and stress scenarios; Monte Carlo runs use a process pool started on first use
+        self.risk_engine = RiskSimulationEngine()
+        
         # Performance tracking
         self.metrics = {
             'models_deployed': 0,
@@ -115,6 +130,7 @@ class QuantitativeAnalysisExpert:
         
         self.logger.info("Quantitative Analysis Expert initialized - Elite mathematical modeling ready")
     
+    @instrument_agent('quantitative_analysis_expert', 'Quantitative Analysis Expert')
     async def build_quantitative_model(self, strategy_data: Dict[str, Any]) -> QuantitativeModel:
         """
         Build comprehensive quantitative investment model
@@ -173,6 +189,7 @@ class QuantitativeAnalysisExpert:
             self.logger.error(f"Error building quantitative model: {str(e)}")
             raise
     
+    @instrument_agent('quantitative_analysis_expert', 'Quantitative Analysis Expert')
     async def optimize_portfolio(self, portfolio_data: Dict[str, Any]) -> PortfolioOptimization:
         """
         Advanced portfolio optimization using multiple methodologies
@@ -233,6 +250,7 @@ class QuantitativeAnalysisExpert:
             self.logger.error(f"Error in portfolio optimization: {str(e)}")
             raise
     
+    @instrument_agent('quantitative_analysis_expert', 'Quantitative Analysis Expert')
     async def analyze_risk(self, portfolio_data: Dict[str, Any]) -> RiskAnalysis:
         """
         Comprehensive risk analysis and measurement
@@ -248,10 +266,11 @@ class QuantitativeAnalysisExpert:
             self.logger.info("Starting comprehensive risk analysis")
             
             # Phase 1: Historical return preparation
-            returns = await self._prepare_portfolio_returns(portfolio_data)
+            asset_returns, weights = await self._prepare_asset_returns(portfolio_data)
+            returns = asset_returns @ weights
             
             # Phase 2: Value-at-Risk calculations
-            var_metrics = await self._calculate_var_metrics(returns)
+            var_metrics = await self._calculate_var_metrics(returns, asset_returns, weights, portfolio_data)
             
             # Phase 3: Performance and risk-adjusted metrics
             performance_metrics = await self._calculate_performance_metrics(returns)
@@ -263,8 +282,8 @@ class QuantitativeAnalysisExpert:
             correlation_analysis = await self._analyze_correlations(portfolio_data)
             
             # Phase 6: Scenario analysis and stress testing
-            scenario_results = await self._conduct_scenario_analysis(portfolio_data)
-            stress_results = await self._conduct_stress_tests(portfolio_data)
+            scenario_results = await self._conduct_scenario_analysis(portfolio_data, asset_returns, weights)
+            stress_results = await self._conduct_stress_tests(portfolio_data, asset_returns, weights)
             
             # Phase 7: Risk decomposition
             risk_decomp = await self._decompose_portfolio_risk(portfolio_data, returns)
@@ -289,6 +308,7 @@ class QuantitativeAnalysisExpert:
             self.logger.error(f"Error in risk analysis: {str(e)}")
             raise
     
+    @instrument_agent('quantitative_analysis_expert', 'Quantitative Analysis Expert')
     async def generate_trading_signals(self, signal_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Generate quantitative trading signals using multiple models
@@ -597,24 +617,25 @@ class QuantitativeAnalysisExpert:
         
         return expected_returns
     
+    def _portfolio_core(self, cov_matrix: np.ndarray) -> PortfolioCore:
+        """Portfolio core for a covariance matrix, factorized once per matrix"""
+        self._portfolio_cores = [(ref, core) for ref, core in self._portfolio_cores if ref() is not None]
+        for ref, core in self._portfolio_cores:
+            if ref() is cov_matrix:
+                return core
+        
+        core = PortfolioCore(cov_matrix)
+        self._portfolio_cores.append((weakref.ref(cov_matrix), core))
+        return core
+    
     async def _mean_variance_optimization(self, expected_returns: np.ndarray, cov_matrix: np.ndarray, portfolio_data: Dict) -> np.ndarray:
         """Perform mean-variance optimization"""
         
-        n_assets = len(expected_returns)
-        
         # Risk aversion parameter
         risk_aversion = portfolio_data.get('risk_aversion', 3.0)
         
-        # Simplified analytical solution for mean-variance optimization
-        inv_cov = np.linalg.inv(cov_matrix)
-        ones = np.ones((n_assets, 1))
-        
-        # Calculate optimal weights
-        numerator = inv_cov @ expected_returns.reshape(-1, 1)
-        denominator = ones.T @ inv_cov @ expected_returns.reshape(-1, 1)
-        
-        # Basic mean-variance weights (simplified)
-        weights = numerator.flatten() / (risk_aversion * np.sum(numerator))
+        # Analytical solution: cov^-1 mu scaled by risk aversion and its sum
+        weights = self._portfolio_core(cov_matrix).mean_variance_weights(expected_returns, risk_aversion)
         
         # Apply constraints
         constraints = portfolio_data.get('constraints', {})
@@ -629,24 +650,15 @@ class QuantitativeAnalysisExpert:
     async def _risk_parity_optimization(self, cov_matrix: np.ndarray, portfolio_data: Dict) -> np.ndarray:
         """Perform risk parity optimization"""
         
-        n_assets = cov_matrix.shape[0]
-        
-        # Initialize equal weights
-        weights = np.ones(n_assets) / n_assets
+        # Equal risk contributions unless risk budgets are given
+        budgets = portfolio_data.get('risk_budgets')
+        weights, solver = self._portfolio_core(cov_matrix).risk_parity_weights(
+            np.asarray(budgets, dtype=float) if budgets is not None else None
+        )
         
-        # Iterative risk parity algorithm (simplified)
-        for iteration in range(50):
-            # Calculate risk contributions
-            portfolio_vol = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
-            marginal_contrib = np.dot(cov_matrix, weights) / portfolio_vol
-            contrib = weights * marginal_contrib
-            
-            # Target equal risk contributions
-            target_contrib = np.ones(n_assets) / n_assets
-            
-            # Update weights
-            weights = weights * (target_contrib / contrib) ** 0.5
-            weights = weights / np.sum(weights)
+        if not solver['converged']:
+            self.logger.warning(f"Risk parity did not converge after {solver['iterations']} iterations "
+                                f"(max relative error {solver['max_relative_error']:.2e})")
         
         return weights
     
@@ -673,51 +685,21 @@ class QuantitativeAnalysisExpert:
             # No views, return equilibrium weights
             return market_weights
         
-        # With views, adjust returns (simplified)
-        tau = 0.05  # Scaling factor
-        
-        # Black-Litterman formula (simplified)
-        bl_cov = np.linalg.inv(np.linalg.inv(tau * cov_matrix))
-        bl_returns = np.dot(bl_cov, np.dot(np.linalg.inv(tau * cov_matrix), pi))
+        # With views, adjust returns (simplified): without a view matrix the
+        # posterior (tau cov)(tau cov)^-1 pi reduces to the equilibrium returns
+        bl_returns = pi
         
         # Optimal weights
-        inv_cov = np.linalg.inv(cov_matrix)
-        bl_weights = np.dot(inv_cov, bl_returns) / (risk_aversion * np.dot(np.ones(n_assets), np.dot(inv_cov, bl_returns)))
+        inv_bl_returns = self._portfolio_core(cov_matrix).solve(bl_returns)
+        bl_weights = inv_bl_returns / (risk_aversion * np.sum(inv_bl_returns))
         
         return bl_weights / np.sum(bl_weights)
     
     async def _generate_efficient_frontier(self, expected_returns: np.ndarray, cov_matrix: np.ndarray) -> List[Tuple[float, float]]:
         """Generate efficient frontier points"""
         
-        frontier_points = []
-        
-        # Generate range of target returns
-        min_return = np.min(expected_returns)
-        max_return = np.max(expected_returns)
-        
-        target_returns = np.linspace(min_return, max_return, 20)
-        
-        for target_return in target_returns:
-            # Solve for minimum variance portfolio with target return
-            inv_cov = np.linalg.inv(cov_matrix)
-            ones = np.ones(len(expected_returns))
-            
-            # Calculate weights for target return
-            A = np.dot(expected_returns.T, np.dot(inv_cov, expected_returns))
-            B = np.dot(expected_returns.T, np.dot(inv_cov, ones))
-            C = np.dot(ones.T, np.dot(inv_cov, ones))
-            
-            lambda_val = (C * target_return - B) / (A * C - B**2)
-            gamma_val = (A - B * target_return) / (A * C - B**2)
-            
-            weights = lambda_val * np.dot(inv_cov, expected_returns) + gamma_val * np.dot(inv_cov, ones)
-            
-            # Calculate portfolio volatility
-            portfolio_vol = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
-            
-            frontier_points.append((portfolio_vol, target_return))
-        
-        return frontier_points
+        # Minimum variance portfolios for 20 target returns from one batched solve
+        return self._portfolio_core(cov_matrix).efficient_frontier(expected_returns, points=20)
     
     async def _analyze_risk_budget(self, weights: np.ndarray, cov_matrix: np.ndarray) -> Dict[str, float]:
         """Analyze risk budget allocation"""
@@ -730,11 +712,14 @@ class QuantitativeAnalysisExpert:
         return dict(enumerate(risk_contrib))
     
     # Risk analysis methods
-    async def _prepare_portfolio_returns(self, portfolio_data: Dict) -> np.ndarray:
-        """Prepare portfolio returns for risk analysis"""
+    async def _prepare_asset_returns(self, portfolio_data: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        """Daily asset returns (periods x assets) and portfolio weights for risk analysis"""
+        
+        weights = np.array(list(portfolio_data.get('weights', {1: 0.25, 2: 0.25, 3: 0.25, 4: 0.25}).values()), dtype=float)
         
-        # Generate synthetic portfolio returns
-        weights = np.array(list(portfolio_data.get('weights', {1: 0.25, 2: 0.25, 3: 0.25, 4: 0.25}).values()))
+        # Realized returns when the caller has them, one column per weight
+        if portfolio_data.get('asset_returns') is not None:
+            return np.asarray(portfolio_data['asset_returns'], dtype=float), weights
         
         # Generate underlying asset returns
         n_periods = 252 * 3  # 3 years of daily data
@@ -747,28 +732,46 @@ class QuantitativeAnalysisExpert:
             n_periods
         )
         
-        # Calculate portfolio returns
-        portfolio_returns = np.dot(asset_returns, weights)
-        
-        return portfolio_returns
+        return asset_returns, weights
     
-    async def _calculate_var_metrics(self, returns: np.ndarray) -> Dict:
-        """Calculate Value-at-Risk metrics"""
+    async def _calculate_var_metrics(self, returns: np.ndarray, asset_returns: np.ndarray,
+                                     weights: np.ndarray, portfolio_data: Dict) -> Dict:
+        """Calculate Value-at-Risk metrics
         
-        # Sort returns for VaR calculation
-        sorted_returns = np.sort(returns)
+        ``var_method`` selects historical (default), parametric or monte_carlo
+        estimates over ``var_horizon_days``. VaR and ES are reported as
+        returns, so losses are negative.
+        """
         
-        # Calculate VaR at different confidence levels
-        var_95 = np.percentile(sorted_returns, 5)
-        var_99 = np.percentile(sorted_returns, 1)
+        method = portfolio_data.get('var_method', 'historical')
+        horizon_days = int(portfolio_data.get('var_horizon_days', 1))
         
-        # Expected Shortfall (CVaR)
-        es_95 = np.mean(sorted_returns[sorted_returns <= var_95])
+        if method == 'historical':
+            estimate = self.risk_engine.historical(weights, asset_returns, horizon_days=horizon_days)
+        else:
+            mean = asset_returns.mean(axis=0)
+            cov_matrix = np.atleast_2d(np.cov(asset_returns.T))
+            if method == 'parametric':
+                estimate = self.risk_engine.parametric(weights, cov_matrix, mean, horizon_days=horizon_days)
+            elif method == 'monte_carlo':
+                estimate = await asyncio.to_thread(
+                    self.risk_engine.monte_carlo, weights, cov_matrix, mean,
+                    horizon_days=horizon_days,
+                    paths=portfolio_data.get('simulation_paths'),
+                    distribution=portfolio_data.get('simulation_distribution', 'normal'),
+                    degrees_of_freedom=portfolio_data.get('degrees_of_freedom', 5.0)
+                )
+            else:
+                raise ValueError(f"Unknown VaR method: {method}")
         
         return {
-            'var_95': var_95,
-            'var_99': var_99,
-            'expected_shortfall': es_95
+            'var_95': -estimate.var[0.95],
+            'var_99': -estimate.var[0.99],
+            'expected_shortfall': -estimate.expected_shortfall[0.95],
+            'expected_shortfall_99': -estimate.expected_shortfall[0.99],
+            'method': estimate.method,
+            'horizon_days': horizon_days,
+            'paths': estimate.paths
         }
     
     async def _calculate_performance_metrics(self, returns: np.ndarray) -> Dict:
@@ -860,9 +863,11 @@ class QuantitativeAnalysisExpert:
             'min_correlation': np.min(correlation_matrix[np.triu_indices(n_assets, k=1)])
         }
     
-    async def _conduct_scenario_analysis(self, portfolio_data: Dict) -> Dict:
-        """Conduct scenario analysis"""
+    async def _conduct_scenario_analysis(self, portfolio_data: Dict, asset_returns: np.ndarray,
+                                         weights: np.ndarray) -> Dict:
+        """Portfolio return in each market scenario, through its beta to the market portfolio"""
         
+        # Market returns in each scenario
         scenarios = {
             'bull_market': 0.15,    # 15% return
             'bear_market': -0.25,   # -25% return
@@ -870,12 +875,16 @@ class QuantitativeAnalysisExpert:
             'stagflation': -0.08,   # -8% return
             'normal_market': 0.08   # 8% return
         }
+        scenarios.update(portfolio_data.get('scenarios', {}))
         
-        return scenarios
+        return self.risk_engine.stress_test(weights, np.atleast_2d(np.cov(asset_returns.T)), scenarios,
+                                            portfolio_data.get('market_weights'))
     
-    async def _conduct_stress_tests(self, portfolio_data: Dict) -> Dict:
-        """Conduct stress tests"""
+    async def _conduct_stress_tests(self, portfolio_data: Dict, asset_returns: np.ndarray,
+                                    weights: np.ndarray) -> Dict:
+        """Portfolio return in historical market stress episodes, through its beta to the market portfolio"""
         
+        # Market drawdowns in each episode
         stress_tests = {
             '2008_financial_crisis': -0.37,
             '2020_covid_crash': -0.34,
@@ -884,8 +893,10 @@ class QuantitativeAnalysisExpert:
             'currency_crisis': -0.15,
             'geopolitical_crisis': -0.10
         }
+        stress_tests.update(portfolio_data.get('stress_scenarios', {}))
         
-        return stress_tests
+        return self.risk_engine.stress_test(weights, np.atleast_2d(np.cov(asset_returns.T)), stress_tests,
+                                            portfolio_data.get('market_weights'))
     
     async def _decompose_portfolio_risk(self, portfolio_data: Dict, returns: np.ndarray) -> Dict:
         """Decompose portfolio risk by component"""
@@ -915,6 +926,23 @@ class QuantitativeAnalysisExpert:
         return risk_decomp
     
     # Signal generation methods
+    @staticmethod
+    def _signal_indicators() -> PriceStream:
+        """Indicators the signal generators read for each asset"""
+        return PriceStream(
+            price_indicators={
+                'sma_20': RollingMean(20),
+                'sma_50': RollingMean(50),
+                'zscore_20': RollingZScore(20),
+                'rsi_14': RSI(14)
+            },
+            return_indicators={
+                'volatility_10': RollingStd(10),
+                'volatility_20': RollingStd(20)
+            },
+            history=11
+        )
+    
     async def _calculate_technical_indicators(self, signal_data: Dict) -> Dict:
         """Calculate technical indicators for signal generation"""
         
@@ -924,8 +952,9 @@ class QuantitativeAnalysisExpert:
         for asset, price_data in prices.items():
             if len(price_data) >= 50:  # Need sufficient data
                 # Simple moving averages
-                sma_20 = np.mean(price_data[-20:])
-                sma_50 = np.mean(price_data[-50:])
+                stream = self.indicator_streams.sync(asset, price_data)
+                sma_20 = stream['sma_20']
+                sma_50 = stream['sma_50']
                 current_price = price_data[-1]
                 
                 # Generate signal based on moving average crossover
@@ -986,12 +1015,10 @@ class QuantitativeAnalysisExpert:
         
         for asset, price_data in prices.items():
             if len(price_data) >= 20:
-                # Calculate recent returns
-                returns = [(price_data[i] - price_data[i-1])/price_data[i-1] for i in range(1, len(price_data))]
-                recent_returns = returns[-10:]  # Last 10 periods
+                stream = self.indicator_streams.sync(asset, price_data)
                 
-                # Mean reversion signal based on recent performance
-                cumulative_return = np.prod([1 + r for r in recent_returns]) - 1
+                # Mean reversion signal based on performance over the last 10 periods
+                cumulative_return = stream.price / stream.lag(10) - 1
                 
                 # Strong negative return suggests mean reversion opportunity
                 if cumulative_return < -0.05:  # 5% decline
@@ -1004,7 +1031,7 @@ class QuantitativeAnalysisExpert:
                 signals[asset] = {
                     'signal': signal_strength,
                     'cumulative_return': cumulative_return,
-                    'volatility': np.std(recent_returns) if recent_returns else 0
+                    'volatility': stream['volatility_10']
                 }
         
         return signals
@@ -1082,7 +1109,7 @@ class QuantitativeAnalysisExpert:
             
             if len(price_data) >= 50:
                 # Simulate ML model prediction
-                features = self._extract_features(price_data)
+                features = self._extract_features(asset, price_data)
                 prediction = self._simulate_ml_prediction(features)
                 
                 # Convert prediction to signal
@@ -1098,20 +1125,20 @@ class QuantitativeAnalysisExpert:
         
         return signals
     
-    def _extract_features(self, price_data: List[float]) -> Dict:
+    def _extract_features(self, asset: str, price_data: List[float]) -> Dict:
         """Extract features for ML model"""
         
         if len(price_data) < 20:
             return {}
         
         # Simple feature extraction
-        returns = [(price_data[i] - price_data[i-1])/price_data[i-1] for i in range(1, len(price_data))]
+        stream = self.indicator_streams.sync(asset, price_data)
         
         return {
-            'volatility': np.std(returns[-20:]),
-            'momentum': (price_data[-1] - price_data[-11]) / price_data[-11],
-            'rsi': self._calculate_rsi(price_data),
-            'mean_reversion': (price_data[-1] - np.mean(price_data[-20:])) / np.std(price_data[-20:])
+            'volatility': stream['volatility_20'],
+            'momentum': (stream.price - stream.lag(10)) / stream.lag(10),
+            'rsi': stream['rsi_14'],
+            'mean_reversion': stream['zscore_20']
         }
     
     def _calculate_rsi(self, prices: List[float], window: int = 14) -> float:
@@ -1120,20 +1147,7 @@ class QuantitativeAnalysisExpert:
         if len(prices) < window + 1:
             return 50.0  # Neutral RSI
         
-        deltas = [prices[i] - prices[i-1] for i in range(1, len(prices))]
-        gains = [d if d > 0 else 0 for d in deltas[-window:]]
-        losses = [-d if d < 0 else 0 for d in deltas[-window:]]
-        
-        avg_gain = np.mean(gains) if gains else 0
-        avg_loss = np.mean(losses) if losses else 0
-        
-        if avg_loss == 0:
-            return 100.0
-        
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return rsi
+        return float(rsi(prices[-(window + 1):], window)[-1])
     
     def _simulate_ml_prediction(self, features: Dict) -> float:
         """Simulate ML model prediction"""
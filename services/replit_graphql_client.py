@@ -0,0 +1,192 @@
+"""
+Replit GraphQL Client
+Pooled, rate-limited and batched access to the Replit GraphQL API
+"""
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+REPL_FILES_FIELDS = """
+    files(count: 100) {
+        items {
+            path
+            content
+            size
+        }
+    }
+"""
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class GraphQLError(Exception):
+    """Raised when a GraphQL request fails after all retries"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting requests per second to one host"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available"""
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+
+class ReplitGraphQLClient:
+    """GraphQL client sharing one keep-alive session across a bounded worker pool.
+
+    Requests are throttled per host with a token bucket, retried with
+    exponential backoff on network errors and retryable status codes, and
+    repl file lookups are batched into aliased multi-repl queries.
+    """
+
+    def __init__(self, base_url: str, headers: Dict[str, str], max_workers: int = 8,
+                 requests_per_second: float = 5.0, batch_size: int = 10,
+                 max_retries: int = 3, backoff_base: float = 0.5, timeout: int = 30):
+        self.base_url = base_url
+        self.max_workers = max(1, max_workers)
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.requests_per_second = requests_per_second
+        self._rate_limiters = {}
+        self._rate_limiters_lock = threading.Lock()
+
+        self.stats = {
+            'requests': 0,
+            'retries': 0,
+            'failures': 0
+        }
+        self._stats_lock = threading.Lock()
+
+    def _rate_limiter(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        with self._rate_limiters_lock:
+            if host not in self._rate_limiters:
+                self._rate_limiters[host] = TokenBucket(self.requests_per_second, burst=self.max_workers)
+            return self._rate_limiters[host]
+
+    def _count(self, stat: str):
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return float(retry_after)
+        return self.backoff_base * (2 ** attempt) * (0.5 + random.random())
+
+    def execute(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Execute a GraphQL query and return the decoded response body"""
+        payload = {'query': query}
+        if variables:
+            payload['variables'] = variables
+
+        limiter = self._rate_limiter(self.base_url)
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            limiter.acquire()
+            self._count('requests')
+            response = None
+
+            try:
+                response = self.session.post(self.base_url, json=payload, timeout=self.timeout)
+                if response.status_code == 200:
+                    return response.json()
+                last_error = f"HTTP {response.status_code} - {response.text[:200]}"
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    break
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                last_error = str(e)
+
+            if attempt < self.max_retries:
+                self._count('retries')
+                time.sleep(self._backoff(attempt, response))
+
+        self._count('failures')
+        raise GraphQLError(last_error)
+
+    def fetch_repl_files(self, repl_ids: List[str]) -> Dict[str, List[Dict]]:
+        """Fetch file contents for many repls concurrently, batching repls per query.
+
+        Repls whose batch failed map to an empty list.
+        """
+        batches = [repl_ids[i:i + self.batch_size] for i in range(0, len(repl_ids), self.batch_size)]
+        results = {}
+
+        if not batches:
+            return results
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+            for batch_result in executor.map(self._fetch_files_batch, batches):
+                results.update(batch_result)
+
+        return results
+
+    def _fetch_files_batch(self, repl_ids: List[str]) -> Dict[str, List[Dict]]:
+        variables = {f'id{i}': repl_id for i, repl_id in enumerate(repl_ids)}
+        declarations = ', '.join(f'$id{i}: String!' for i in range(len(repl_ids)))
+        selections = '\n'.join(
+            f'r{i}: repl(id: $id{i}) {{ {REPL_FILES_FIELDS} }}' for i in range(len(repl_ids))
+        )
+        query = f'query GetReplFilesBatch({declarations}) {{\n{selections}\n}}'
+
+        try:
+            data = self.execute(query, variables)
+        except GraphQLError as e:
+            logging.error(f"Error fetching files for {len(repl_ids)} repls: {str(e)}")
+            return {repl_id: [] for repl_id in repl_ids}
+        except ValueError as e:
+            logging.error(f"Invalid response fetching files for {len(repl_ids)} repls: {str(e)}")
+            return {repl_id: [] for repl_id in repl_ids}
+
+        if 'errors' in data:
+            # Errors may affect only some aliases; the rest still carry data
+            logging.error(f"GraphQL errors fetching files: {data['errors']}")
+
+        repls = data.get('data') or {}
+        return {
+            repl_id: ((repls.get(f'r{i}') or {}).get('files') or {}).get('items', [])
+            for i, repl_id in enumerate(repl_ids)
+        }
+
+    def close(self):
+        self.session.close()
@@ -1,21 +1,32 @@
 import os
-import requests
+import time
 import logging
 from datetime import datetime
 from app import db
 from models import ReplitApp
+from services.replit_graphql_client import ReplitGraphQLClient, GraphQLError
 
 class ReplitService:
     def __init__(self):
         self.api_token = os.getenv('REPLIT_TOKEN', '')
-        self.base_url = 'https://replit.com/graphql'
+        self.base_url = os.getenv('REPLIT_GRAPHQL_URL', 'https://replit.com/graphql')
         self.headers = {
             'Authorization': f'Bearer {self.api_token}',
             'Content-Type': 'application/json'
         }
+        self.client = ReplitGraphQLClient(
+            self.base_url,
+            self.headers,
+            max_workers=int(os.getenv('REPLIT_MAX_CONCURRENCY', '8')),
+            requests_per_second=float(os.getenv('REPLIT_REQUESTS_PER_SECOND', '5')),
+            batch_size=int(os.getenv('REPLIT_BATCH_SIZE', '10'))
+        )
+        self.last_run_stats = {}
         
     def discover_apps(self):
         """Discover all Replit apps for the authenticated user"""
+        started = time.perf_counter()
+        stats_before = dict(self.client.stats)
         try:
             if not self.api_token:
                 logging.error("REPLIT_TOKEN not found in environment variables")
@@ -49,18 +60,7 @@ class ReplitService:
             }
             """
             
-            response = requests.post(
-                self.base_url,
-                json={'query': query},
-                headers=self.headers,
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                logging.error(f"Replit API error: {response.status_code} - {response.text}")
-                return 0
-                
-            data = response.json()
+            data = self.client.execute(query)
             
             if 'errors' in data:
                 logging.error(f"GraphQL errors: {data['errors']}")
@@ -69,10 +69,17 @@ class ReplitService:
             repls = data.get('data', {}).get('currentUser', {}).get('repls', {}).get('items', [])
             discovered_count = 0
             
+            # Load all known apps in one query instead of one lookup per repl
+            repl_ids = [repl['id'] for repl in repls if repl.get('id')]
+            existing_apps = {
+                app.repl_id: app
+                for app in ReplitApp.query.filter(ReplitApp.repl_id.in_(repl_ids)).all()
+            } if repl_ids else {}
+            
             for repl in repls:
                 try:
                     # Check if app already exists
-                    existing_app = ReplitApp.query.filter_by(repl_id=repl['id']).first()
+                    existing_app = existing_apps.get(repl['id'])
                     
                     if existing_app:
                         # Update existing app
@@ -108,12 +115,23 @@ class ReplitService:
             logging.info(f"Successfully discovered {discovered_count} Replit apps")
             return discovered_count
             
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Network error while discovering apps: {str(e)}")
+        except GraphQLError as e:
+            logging.error(f"Replit API error while discovering apps: {str(e)}")
             return 0
         except Exception as e:
             logging.error(f"Unexpected error in discover_apps: {str(e)}")
             return 0
+        finally:
+            self._record_run_stats('discover_apps', started, stats_before)
+    
+    def _record_run_stats(self, operation, started, stats_before):
+        """Record and log wall-clock time and request counts for a fetch run"""
+        self.last_run_stats = {
+            'operation': operation,
+            'wall_clock_seconds': round(time.perf_counter() - started, 3),
+            **{key: value - stats_before.get(key, 0) for key, value in self.client.stats.items()}
+        }
+        logging.info(f"Replit {operation} run stats: {self.last_run_stats}")
     
     def get_app_files(self, repl_id):
         """Get file contents for a specific repl"""
@@ -135,21 +153,7 @@ class ReplitService:
             }
             """
             
-            response = requests.post(
-                self.base_url,
-                json={
-                    'query': query,
-                    'variables': {'replId': repl_id}
-                },
-                headers=self.headers,
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                logging.error(f"Error fetching files for repl {repl_id}: {response.status_code}")
-                return []
-                
-            data = response.json()
+            data = self.client.execute(query, {'replId': repl_id})
             
             if 'errors' in data:
                 logging.error(f"GraphQL errors fetching files: {data['errors']}")
@@ -162,6 +166,18 @@ class ReplitService:
             logging.error(f"Error getting app files for {repl_id}: {str(e)}")
             return []
     
+    def get_files_for_repls(self, repl_ids):
+        """Get file contents for many repls concurrently in batched queries"""
+        if not self.api_token or not repl_ids:
+            return {}
+        
+        started = time.perf_counter()
+        stats_before = dict(self.client.stats)
+        try:
+            return self.client.fetch_repl_files(list(repl_ids))
+        finally:
+            self._record_run_stats('get_files_for_repls', started, stats_before)
+    
     def mark_inactive_apps(self, active_repl_ids):
         """Mark apps as inactive if they're no longer in the user's account"""
         try:
@@ -0,0 +1,214 @@
+"""
+Risk Simulation
+Parametric, historical and Monte Carlo VaR/ES over portfolio weights, with chunked multi-process path generation
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from statistics import NormalDist
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.parameter_search import SharedPriceArray, _attach
+from services.portfolio_core import CovarianceFactor
+
+DEFAULT_CONFIDENCE = (0.95, 0.99)
+
+# Chunks are sized so one chunk's draws stay near this many floats
+CHUNK_ELEMENTS = 2_000_000
+
+
+@dataclass
+class RiskEstimate:
+    """VaR and expected shortfall by confidence level, as losses in fractions of portfolio value"""
+    method: str
+    horizon_days: int
+    var: Dict[float, float]
+    expected_shortfall: Dict[float, float]
+    paths: int = 0
+    details: Dict[str, Any] = field(default_factory=dict)
+
+
+def tail_risk(pnl: np.ndarray, confidence: Sequence[float]) -> Tuple[Dict[float, float], Dict[float, float]]:
+    """VaR as the loss at each confidence's percentile and ES as the mean loss at or beyond it"""
+    var, shortfall = {}, {}
+    for level in confidence:
+        cutoff = np.percentile(pnl, (1 - level) * 100)
+        var[level] = float(-cutoff)
+        shortfall[level] = float(-pnl[pnl <= cutoff].mean())
+    return var, shortfall
+
+
+def simulate_paths(params: np.ndarray, out: np.ndarray, start: int, count: int, seed: int, chunk_paths: int,
+                   horizon_days: int, distribution: str, degrees_of_freedom: float):
+    """Portfolio returns for paths ``start .. start + count`` written into ``out``.
+
+    ``params`` stacks the daily mean log returns, the weights and the
+    Cholesky factor of the daily covariance. Paths are drawn a chunk at a
+    time, and chunk ``k`` always uses the RNG stream spawned from ``seed``
+    with key ``k``, so results do not depend on how paths are split over
+    workers. ``start`` must be a multiple of ``chunk_paths``.
+    """
+    mean, weights, lower = params[0], params[1], params[2:]
+    for chunk_start in range(start, start + count, chunk_paths):
+        size = min(chunk_paths, start + count - chunk_start)
+        rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk_start // chunk_paths,)))
+
+        if distribution == 'normal':
+            # Daily normal log returns sum to one normal draw over the horizon
+            log_returns = rng.standard_normal((size, len(mean))) @ lower.T
+            log_returns *= np.sqrt(horizon_days)
+            log_returns += mean * horizon_days
+        else:
+            # Multivariate Student-t days, scaled to the daily covariance, summed over the horizon
+            log_returns = np.zeros((size, len(mean)))
+            for _ in range(horizon_days):
+                scale = np.sqrt((degrees_of_freedom - 2) / rng.chisquare(degrees_of_freedom, size))
+                shocks = rng.standard_normal((size, len(mean))) @ lower.T
+                shocks *= scale[:, None]
+                log_returns += shocks
+            log_returns += mean * horizon_days
+
+        np.expm1(log_returns, out=log_returns)
+        out[chunk_start:chunk_start + size] = log_returns @ weights
+
+
+def _simulate_job(job) -> int:
+    params_name, params_shape, out_name, out_shape, start, count, *settings = job
+    simulate_paths(_attach(params_name, params_shape), _attach(out_name, out_shape), start, count, *settings)
+    return count
+
+
+class RiskSimulationEngine:
+    """VaR and expected shortfall for a weighted portfolio.
+
+    ``parametric`` is the normal closed form, ``historical`` uses the
+    portfolio's realized (overlapping, compounded) horizon returns and
+    ``monte_carlo`` simulates correlated normal or Student-t log returns.
+    Simulated paths are generated in chunks of about CHUNK_ELEMENTS draws
+    and reduced to one portfolio return per path, so memory grows with the
+    number of paths and never with paths x assets. Large runs are split
+    over a process pool (spawned, like the backtest pool) that writes into
+    a shared-memory result array.
+    """
+
+    def __init__(self, max_workers: int = None, chunk_paths: int = None, default_paths: int = None,
+                 seed: int = 0):
+        self.max_workers = max_workers or int(os.getenv('MONTE_CARLO_WORKERS', '0')) or os.cpu_count() or 1
+        self.chunk_paths = chunk_paths or int(os.getenv('MONTE_CARLO_CHUNK_PATHS', '0')) or None
+        self.default_paths = default_paths or int(os.getenv('MONTE_CARLO_PATHS', '100000'))
+        self.seed = seed
+
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._pool
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def parametric(self, weights: np.ndarray, cov_matrix: np.ndarray, mean: Optional[np.ndarray] = None,
+                   confidence: Sequence[float] = DEFAULT_CONFIDENCE, horizon_days: int = 1) -> RiskEstimate:
+        weights = np.asarray(weights, dtype=float)
+        cov_matrix = np.atleast_2d(np.asarray(cov_matrix, dtype=float))
+        drift = float(weights @ mean) * horizon_days if mean is not None else 0.0
+        volatility = float(np.sqrt(weights @ cov_matrix @ weights * horizon_days))
+
+        var, shortfall = {}, {}
+        normal = NormalDist()
+        for level in confidence:
+            z = normal.inv_cdf(level)
+            var[level] = z * volatility - drift
+            shortfall[level] = volatility * normal.pdf(z) / (1 - level) - drift
+        return RiskEstimate('parametric', horizon_days, var, shortfall,
+                            details={'volatility': volatility, 'expected_return': drift})
+
+    def historical(self, weights: np.ndarray, asset_returns: np.ndarray,
+                   confidence: Sequence[float] = DEFAULT_CONFIDENCE, horizon_days: int = 1) -> RiskEstimate:
+        """From realized returns, one row per period; multi-day horizons use overlapping windows"""
+        portfolio = np.asarray(asset_returns, dtype=float) @ np.asarray(weights, dtype=float)
+        if horizon_days > 1:
+            growth = np.concatenate([[0.0], np.cumsum(np.log1p(portfolio))])
+            portfolio = np.expm1(growth[horizon_days:] - growth[:-horizon_days])
+        var, shortfall = tail_risk(portfolio, confidence)
+        return RiskEstimate('historical', horizon_days, var, shortfall, paths=len(portfolio))
+
+    def monte_carlo(self, weights: np.ndarray, cov_matrix: np.ndarray, mean: Optional[np.ndarray] = None,
+                    confidence: Sequence[float] = DEFAULT_CONFIDENCE, horizon_days: int = 1,
+                    paths: int = None, distribution: str = 'normal', degrees_of_freedom: float = 5.0,
+                    seed: int = None) -> RiskEstimate:
+        """Simulated horizon returns of the portfolio; ``distribution`` is 'normal' or 'student_t'"""
+        pnl = self.simulate(weights, cov_matrix, mean, horizon_days, paths, distribution, degrees_of_freedom, seed)
+        var, shortfall = tail_risk(pnl, confidence)
+        return RiskEstimate('monte_carlo', horizon_days, var, shortfall, paths=len(pnl),
+                            details={'distribution': distribution})
+
+    def simulate(self, weights: np.ndarray, cov_matrix: np.ndarray, mean: Optional[np.ndarray] = None,
+                 horizon_days: int = 1, paths: int = None, distribution: str = 'normal',
+                 degrees_of_freedom: float = 5.0, seed: int = None) -> np.ndarray:
+        """Portfolio return of every simulated path; ``mean`` and ``cov_matrix`` describe daily simple returns"""
+        if distribution not in ('normal', 'student_t'):
+            raise ValueError(f"Unknown simulation distribution: {distribution}")
+        if distribution == 'student_t' and degrees_of_freedom <= 2:
+            raise ValueError("Student-t simulation needs more than 2 degrees of freedom")
+
+        weights = np.asarray(weights, dtype=float)
+        n_assets = len(weights)
+        paths = int(paths or self.default_paths)
+        seed = self.seed if seed is None else seed
+        chunk_paths = self.chunk_paths or max(1000, CHUNK_ELEMENTS // max(n_assets, 1))
+
+        cov_matrix = np.atleast_2d(np.asarray(cov_matrix, dtype=float))
+        params = np.empty((n_assets + 2, n_assets))
+        # Log-return drift that keeps each asset's expected simple return at ``mean``
+        params[0] = (0.0 if mean is None else np.asarray(mean, dtype=float)) - 0.5 * np.diag(cov_matrix)
+        params[1] = weights
+        params[2:] = CovarianceFactor(cov_matrix).lower
+        settings = (seed, chunk_paths, int(horizon_days), distribution, float(degrees_of_freedom))
+
+        chunks = -(-paths // chunk_paths)
+        if self.max_workers == 1 or chunks < 2:
+            pnl = np.empty(paths)
+            simulate_paths(params, pnl, 0, paths, *settings)
+            return pnl
+
+        # Whole chunks per job, a few jobs per worker so uneven finishes balance out
+        job_paths = -(-chunks // (self.max_workers * 4)) * chunk_paths
+        with SharedPriceArray(params) as shared_params, SharedPriceArray(np.empty(paths)) as shared_out:
+            jobs = [
+                (shared_params.name, shared_params.shape, shared_out.name, shared_out.shape,
+                 start, min(job_paths, paths - start)) + settings
+                for start in range(0, paths, job_paths)
+            ]
+            list(self._executor().map(_simulate_job, jobs))
+            return shared_out.array.copy()
+
+    def stress_test(self, weights: np.ndarray, cov_matrix: np.ndarray, market_moves: Dict[str, float],
+                    market_weights: Optional[np.ndarray] = None) -> Dict[str, float]:
+        """Portfolio return in each scenario, given the market portfolio's move in it.
+
+        Each asset moves by its beta to the market portfolio (equal weights
+        unless given) times the scenario's market move, the expected asset
+        return conditional on that move under the covariance.
+        """
+        weights = np.asarray(weights, dtype=float)
+        cov_matrix = np.atleast_2d(np.asarray(cov_matrix, dtype=float))
+        market = np.full(len(weights), 1.0 / len(weights)) if market_weights is None \
+            else np.asarray(market_weights, dtype=float)
+        market_variance = float(market @ cov_matrix @ market)
+        beta = float(weights @ cov_matrix @ market) / market_variance if market_variance > 0 else 1.0
+        return {name: beta * move for name, move in market_moves.items()}
@@ -1,4 +1,5 @@
 import logging
+import time as timer
 from datetime import datetime, time
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
@@ -55,6 +56,15 @@ def init_scheduler():
             replace_existing=True
         )
         
+        # History partitions and retention roll-off daily at 3:30 AM
+        scheduler.add_job(
+            func=maintain_history_tables,
+            trigger=CronTrigger(hour=3, minute=30),
+            id='history_maintenance',
+            name='History Partitions and Retention',
+            replace_existing=True
+        )
+        
         scheduler.start()
         logging.info("Scheduler initialized with daily tasks")
         
@@ -68,14 +78,17 @@ def daily_discovery_and_matrix_update():
     """Daily task to discover apps and update matrix"""
     try:
         logging.info("Starting daily discovery and matrix update")
+        run_started = timer.perf_counter()
         
         # Discover new/updated apps
         replit_service = ReplitService()
         discovered_count = replit_service.discover_apps()
+        discovery_seconds = timer.perf_counter() - run_started
         
         # Analyze all apps for AI agents
         ai_service = AIAgentService()
         analyzed_count = ai_service.analyze_all_apps()
+        analysis_seconds = timer.perf_counter() - run_started - discovery_seconds
         
         # Generate new matrix
         analytics_service = AnalyticsService()
@@ -115,7 +128,9 @@ def daily_discovery_and_matrix_update():
         
         telegram_service.send_daily_summary(summary_data)
         
-        logging.info(f"Daily update completed: {discovered_count} apps discovered, {analyzed_count} apps analyzed")
+        logging.info(f"Daily update completed: {discovered_count} apps discovered, {analyzed_count} apps analyzed "
+                     f"(discovery {discovery_seconds:.1f}s, analysis {analysis_seconds:.1f}s, "
+                     f"total {timer.perf_counter() - run_started:.1f}s)")
         
     except Exception as e:
         logging.error(f"Error in daily discovery and matrix update: {str(e)}")
@@ -247,6 +262,19 @@ def send_weekly_summary():
     except Exception as e:
         logging.error(f"Error sending weekly summary: {str(e)}")
 
+def maintain_history_tables():
+    """Create upcoming history partitions and drop or delete history past its retention"""
+    try:
+        from app import app
+        from services.history_partitions import history_partitions
+        
+        with app.app_context():
+            results = history_partitions.maintain()
+        logging.info(f"History maintenance completed: {results}")
+        
+    except Exception as e:
+        logging.error(f"Error in history maintenance: {str(e)}")
+
 def get_scheduler_status():
     """Get current scheduler status and job information"""
     global scheduler
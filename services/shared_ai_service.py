@@ -6,15 +6,15 @@ Provides common AI functionality for cross-application integration
 import os
 import json
 import logging
-import hashlib
+import threading
 import time
-from typing import Dict, List, Any, Optional, Union
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Any, Optional, Union
 from dataclasses import dataclass
-from datetime import datetime, timedelta
-try:
-    import redis
-except ImportError:
-    redis = None
+from datetime import datetime
+
+from services.ai_cache_backends import LRUMemoryCache, MISS, create_l2_backend
+from services.cache_keys import build_cache_key, content_digest
 
 try:
     import openai
@@ -38,67 +38,153 @@ class CacheEntry:
 
 
 class SharedAICache:
-    """Redis-based caching for AI service responses"""
+    """Tiered caching for AI service responses.
     
-    def __init__(self, redis_host='localhost', redis_port=6379, redis_db=0):
-        self.redis_client = None
-        self.memory_cache = {}
+    L1 is a bounded in-process LRU cache with TTL expiry. L2 is an optional
+    shared store (Redis or a local SQLite file) that fills L1 on a hit.
+    Concurrent misses for the same key are coalesced by get_or_compute so the
+    underlying AI call runs once.
+    """
+    
+    def __init__(self, redis_host='localhost', redis_port=6379, redis_db=0, l2_backend: str = None,
+                 l1_max_bytes: int = None, l1_max_entries: int = None):
+        self.logger = logging.getLogger(__name__)
         
-        if redis:
-            try:
-                self.redis_client = redis.Redis(host=redis_host, port=redis_port, db=redis_db, decode_responses=True)
-                self.redis_client.ping()
-            except:
-                self.redis_client = None
-                logging.warning("Redis not available, using in-memory cache")
-        else:
-            logging.warning("Redis module not installed, using in-memory cache")
+        self.l1 = LRUMemoryCache(
+            max_bytes=l1_max_bytes or int(os.getenv('AI_CACHE_L1_MAX_BYTES', str(64 * 1024 * 1024))),
+            max_entries=l1_max_entries or int(os.getenv('AI_CACHE_L1_MAX_ENTRIES', '10000'))
+        )
+        self.l2 = create_l2_backend(l2_backend, redis_host, redis_port, redis_db)
         
-        self.logger = logging.getLogger(__name__)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'l1_hits': 0,
+            'l2_hits': 0,
+            'misses': 0,
+            'sets': 0,
+            'coalesced': 0,
+            'errors': 0,
+            'cost_saved': 0.0
+        }
     
     def _generate_cache_key(self, service: str, method: str, params: Dict) -> str:
         """Generate unique cache key for service call"""
-        key_data = f"{service}:{method}:{json.dumps(params, sort_keys=True)}"
-        return hashlib.md5(key_data.encode()).hexdigest()
+        return build_cache_key(service, method, params)
+    
+    def _record(self, stat: str, amount=1):
+        with self._stats_lock:
+            self.stats[stat] += amount
+    
+    def _lookup(self, cache_key: str) -> Any:
+        """Look the key up in L1, then L2; returns MISS when absent"""
+        value, cost_saved = self.l1.get(cache_key)
+        if value is not MISS:
+            self._record('l1_hits')
+        elif self.l2:
+            try:
+                value, cost_saved, remaining_ttl = self.l2.get(cache_key)
+            except Exception as e:
+                self.logger.error(f"Cache get error: {e}")
+                self._record('errors')
+                value = MISS
+            if value is not MISS:
+                self._record('l2_hits')
+                self.l1.set(cache_key, value, remaining_ttl, cost_saved)
+        
+        if value is MISS:
+            self._record('misses')
+        else:
+            self._record('hits')
+            self._record('cost_saved', cost_saved)
+        return value
+    
+    def _store(self, cache_key: str, result: Any, ttl: int, cost_saved: float):
+        payload = json.dumps({'value': result, 'cost_saved': cost_saved})
+        self.l1.set(cache_key, result, ttl, cost_saved, size=len(payload))
+        self._record('sets')
+        
+        if self.l2:
+            try:
+                self.l2.set(cache_key, payload, ttl)
+            except Exception as e:
+                self.logger.error(f"Cache set error: {e}")
+                self._record('errors')
     
     def get(self, service: str, method: str, params: Dict) -> Optional[Any]:
         """Get cached result if available"""
-        cache_key = self._generate_cache_key(service, method, params)
-        
+        value = self._lookup(self._generate_cache_key(service, method, params))
+        return None if value is MISS else value
+    
+    def set(self, service: str, method: str, params: Dict, result: Any, ttl: int = 3600, cost_saved: float = 0):
+        """Cache service result; cost_saved is credited on every later hit"""
         try:
-            if self.redis_client:
-                cached_data = self.redis_client.get(cache_key)
-                if cached_data:
-                    return json.loads(cached_data)
-            else:
-                # Memory cache fallback
-                if cache_key in self.memory_cache:
-                    entry = self.memory_cache[cache_key]
-                    if datetime.now() - entry['timestamp'] < timedelta(seconds=entry['ttl']):
-                        return entry['value']
-                    else:
-                        del self.memory_cache[cache_key]
+            self._store(self._generate_cache_key(service, method, params), result, ttl, cost_saved)
         except Exception as e:
-            self.logger.error(f"Cache get error: {e}")
-        
-        return None
+            self.logger.error(f"Cache set error: {e}")
+            self._record('errors')
     
-    def set(self, service: str, method: str, params: Dict, result: Any, ttl: int = 3600, cost_saved: float = 0):
-        """Cache service result"""
+    def get_or_compute(self, service: str, method: str, params: Dict, compute: Callable[[], Any],
+                       ttl: int = 3600, cost_saved: float = 0) -> Any:
+        """Return the cached result, computing it once across concurrent callers on a miss"""
         cache_key = self._generate_cache_key(service, method, params)
+        value = self._lookup(cache_key)
+        if value is not MISS:
+            return value
+        
+        with self._inflight_lock:
+            pending = self._inflight.get(cache_key)
+            is_leader = pending is None
+            if is_leader:
+                pending = self._inflight[cache_key] = Future()
+        
+        if not is_leader:
+            self._record('coalesced')
+            return pending.result()
         
         try:
-            if self.redis_client:
-                self.redis_client.setex(cache_key, ttl, json.dumps(result))
-            else:
-                # Memory cache fallback
-                self.memory_cache[cache_key] = {
-                    'value': result,
-                    'timestamp': datetime.now(),
-                    'ttl': ttl
-                }
+            result = compute()
+            try:
+                self._store(cache_key, result, ttl, cost_saved)
+            except Exception as e:
+                self.logger.error(f"Cache set error: {e}")
+                self._record('errors')
+            pending.set_result(result)
+            return result
         except Exception as e:
-            self.logger.error(f"Cache set error: {e}")
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(cache_key, None)
+    
+    def delete(self, service: str, method: str, params: Dict):
+        """Invalidate a cached result in every tier"""
+        cache_key = self._generate_cache_key(service, method, params)
+        self.l1.delete(cache_key)
+        if self.l2:
+            try:
+                self.l2.delete(cache_key)
+            except Exception as e:
+                self.logger.error(f"Cache delete error: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit, miss, eviction and cost-saved counters for this worker"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'hit_rate': stats['hits'] / lookups if lookups else 0,
+            'evictions': self.l1.evictions,
+            'expirations': self.l1.expirations,
+            'l1_entries': len(self.l1),
+            'l1_bytes': self.l1.current_bytes,
+            'l2_backend': self.l2.name if self.l2 else None
+        })
+        return stats
 
 
 class SharedTextProcessor:
@@ -111,29 +197,20 @@ class SharedTextProcessor:
     def extract_text(self, content: Union[str, bytes], content_type: str = 'text') -> str:
         """Extract text from various content types"""
         cache_key_params = {
-            'content_hash': hashlib.md5(str(content).encode()).hexdigest()[:16],
+            'content_hash': content_digest(content),
             'content_type': content_type
         }
         
-        # Check cache first
-        cached_result = self.cache.get('text_processor', 'extract_text', cache_key_params)
-        if cached_result:
-            self.logger.info("Text extraction result retrieved from cache")
-            return cached_result
-        
-        # Process text extraction
-        try:
+        def extract() -> str:
             if content_type == 'pdf':
                 # PDF processing logic would go here
-                extracted_text = f"Extracted text from PDF: {str(content)[:100]}..."
-            else:
-                extracted_text = str(content)
-            
-            # Cache result
-            self.cache.set('text_processor', 'extract_text', cache_key_params, extracted_text, ttl=7200, cost_saved=0.001)
-            
-            return extracted_text
-            
+                return f"Extracted text from PDF: {str(content)[:100]}..."
+            return str(content)
+        
+        # Served from cache, or extracted once for every concurrent caller
+        try:
+            return self.cache.get_or_compute('text_processor', 'extract_text', cache_key_params, extract,
+                                             ttl=7200, cost_saved=0.001)
         except Exception as e:
             self.logger.error(f"Text extraction error: {e}")
             return ""
@@ -144,27 +221,22 @@ class SharedTextProcessor:
             operations = ['clean', 'normalize']
         
         cache_key_params = {
-            'text_hash': hashlib.md5(text.encode()).hexdigest()[:16],
+            'text_hash': content_digest(text),
             'operations': operations
         }
         
-        # Check cache
-        cached_result = self.cache.get('text_processor', 'preprocess_text', cache_key_params)
-        if cached_result:
-            return cached_result
-        
-        # Apply preprocessing operations
-        processed_text = text
-        for operation in operations:
-            if operation == 'clean':
-                processed_text = processed_text.strip().replace('\n\n', '\n')
-            elif operation == 'normalize':
-                processed_text = processed_text.lower()
+        def preprocess() -> str:
+            # Apply preprocessing operations
+            processed_text = text
+            for operation in operations:
+                if operation == 'clean':
+                    processed_text = processed_text.strip().replace('\n\n', '\n')
+                elif operation == 'normalize':
+                    processed_text = processed_text.lower()
+            return processed_text
         
-        # Cache result
-        self.cache.set('text_processor', 'preprocess_text', cache_key_params, processed_text, ttl=3600, cost_saved=0.001)
-        
-        return processed_text
+        return self.cache.get_or_compute('text_processor', 'preprocess_text', cache_key_params, preprocess,
+                                         ttl=3600, cost_saved=0.001)
 
 
 class SharedAnalysisService:
@@ -194,19 +266,14 @@ class SharedAnalysisService:
     def analyze_sentiment(self, text: str, context: str = 'general') -> Dict[str, Any]:
         """Shared sentiment analysis for both trading and document analysis"""
         cache_key_params = {
-            'text_hash': hashlib.md5(text.encode()).hexdigest()[:16],
+            'text_hash': content_digest(text),
             'context': context
         }
         
-        # Check cache
-        cached_result = self.cache.get('analysis_service', 'analyze_sentiment', cache_key_params)
-        if cached_result:
-            self.logger.info("Sentiment analysis retrieved from cache")
-            return cached_result
+        use_openai = context == 'financial' and self.openai_client
         
-        # Perform sentiment analysis
-        try:
-            if context == 'financial' and self.openai_client:
+        def analyze() -> Dict[str, Any]:
+            if use_openai:
                 # Use OpenAI for financial sentiment
                 response = self.openai_client.chat.completions.create(
                     model="gpt-3.5-turbo",
@@ -217,29 +284,28 @@ class SharedAnalysisService:
                     max_tokens=100
                 )
                 
-                result = {
+                return {
                     'sentiment': 'neutral',
                     'confidence': 0.5,
                     'context': context,
                     'source': 'openai'
                 }
-                
-                # Cache result with cost savings
-                self.cache.set('analysis_service', 'analyze_sentiment', cache_key_params, result, ttl=1800, cost_saved=0.002)
-                
-            else:
-                # Use local sentiment analysis
-                result = {
-                    'sentiment': 'neutral',
-                    'confidence': 0.7,
-                    'context': context,
-                    'source': 'local'
-                }
-                
-                self.cache.set('analysis_service', 'analyze_sentiment', cache_key_params, result, ttl=3600, cost_saved=0.05)
-            
-            return result
             
+            # Use local sentiment analysis
+            return {
+                'sentiment': 'neutral',
+                'confidence': 0.7,
+                'context': context,
+                'source': 'local'
+            }
+        
+        # Concurrent misses on the same text share one analysis; failures are not cached
+        try:
+            if use_openai:
+                return self.cache.get_or_compute('analysis_service', 'analyze_sentiment', cache_key_params, analyze,
+                                                 ttl=1800, cost_saved=0.002)
+            return self.cache.get_or_compute('analysis_service', 'analyze_sentiment', cache_key_params, analyze,
+                                             ttl=3600, cost_saved=0.05)
         except Exception as e:
             self.logger.error(f"Sentiment analysis error: {e}")
             return {'sentiment': 'neutral', 'confidence': 0.0, 'error': str(e)}
@@ -247,36 +313,32 @@ class SharedAnalysisService:
     def extract_key_insights(self, text: str, domain: str = 'general') -> List[str]:
         """Extract key insights from text content"""
         cache_key_params = {
-            'text_hash': hashlib.md5(text.encode()).hexdigest()[:16],
+            'text_hash': content_digest(text),
             'domain': domain
         }
         
-        # Check cache
-        cached_result = self.cache.get('analysis_service', 'extract_insights', cache_key_params)
-        if cached_result:
-            return cached_result
-        
-        # Extract insights based on domain
-        insights = []
-        
-        if domain == 'financial':
-            # Financial insights
-            if 'profit' in text.lower() or 'loss' in text.lower():
-                insights.append("Contains profit/loss information")
-            if 'risk' in text.lower():
-                insights.append("Risk factors mentioned")
-        
-        elif domain == 'document':
-            # Document insights
-            if len(text.split()) > 1000:
-                insights.append("Long-form document detected")
-            if 'summary' in text.lower() or 'conclusion' in text.lower():
-                insights.append("Contains summary or conclusion")
-        
-        # Cache result
-        self.cache.set('analysis_service', 'extract_insights', cache_key_params, insights, ttl=3600, cost_saved=0.01)
+        def extract() -> List[str]:
+            # Extract insights based on domain
+            insights = []
+            
+            if domain == 'financial':
+                # Financial insights
+                if 'profit' in text.lower() or 'loss' in text.lower():
+                    insights.append("Contains profit/loss information")
+                if 'risk' in text.lower():
+                    insights.append("Risk factors mentioned")
+            
+            elif domain == 'document':
+                # Document insights
+                if len(text.split()) > 1000:
+                    insights.append("Long-form document detected")
+                if 'summary' in text.lower() or 'conclusion' in text.lower():
+                    insights.append("Contains summary or conclusion")
+            
+            return insights
         
-        return insights
+        return self.cache.get_or_compute('analysis_service', 'extract_insights', cache_key_params, extract,
+                                         ttl=3600, cost_saved=0.01)
 
 
 class SharedDataProcessor:
@@ -289,32 +351,26 @@ class SharedDataProcessor:
     def normalize_data(self, data: Dict[str, Any], schema: Dict[str, str]) -> Dict[str, Any]:
         """Normalize data according to shared schema"""
         cache_key_params = {
-            'data_hash': hashlib.md5(json.dumps(data, sort_keys=True).encode()).hexdigest()[:16],
+            'data': data,
             'schema': list(schema.keys())
         }
         
-        # Check cache
-        cached_result = self.cache.get('data_processor', 'normalize_data', cache_key_params)
-        if cached_result:
-            return cached_result
-        
-        # Normalize data
-        normalized_data = {}
-        for key, expected_type in schema.items():
-            if key in data:
-                if expected_type == 'float':
-                    normalized_data[key] = float(data[key])
-                elif expected_type == 'int':
-                    normalized_data[key] = int(data[key])
-                elif expected_type == 'str':
-                    normalized_data[key] = str(data[key])
-                else:
-                    normalized_data[key] = data[key]
-        
-        # Cache result
-        self.cache.set('data_processor', 'normalize_data', cache_key_params, normalized_data, ttl=1800, cost_saved=0.001)
+        def normalize() -> Dict[str, Any]:
+            normalized_data = {}
+            for key, expected_type in schema.items():
+                if key in data:
+                    if expected_type == 'float':
+                        normalized_data[key] = float(data[key])
+                    elif expected_type == 'int':
+                        normalized_data[key] = int(data[key])
+                    elif expected_type == 'str':
+                        normalized_data[key] = str(data[key])
+                    else:
+                        normalized_data[key] = data[key]
+            return normalized_data
         
-        return normalized_data
+        return self.cache.get_or_compute('data_processor', 'normalize_data', cache_key_params, normalize,
+                                         ttl=1800, cost_saved=0.001)
 
 
 class SharedAIServiceManager:
@@ -337,16 +393,18 @@ class SharedAIServiceManager:
     
     def get_service_stats(self) -> Dict[str, Any]:
         """Get service performance statistics"""
-        cache_hit_rate = (
-            self.metrics['cache_hits'] / 
-            (self.metrics['cache_hits'] + self.metrics['cache_misses'])
-            if (self.metrics['cache_hits'] + self.metrics['cache_misses']) > 0 else 0
-        )
+        cache_stats = self.cache.get_stats()
+        self.metrics.update({
+            'cache_hits': cache_stats['hits'],
+            'cache_misses': cache_stats['misses'],
+            'cost_saved': cache_stats['cost_saved']
+        })
         
         return {
-            'cache_hit_rate': cache_hit_rate,
+            'cache_hit_rate': cache_stats['hit_rate'],
             'total_requests': self.metrics['requests_served'],
             'cost_saved': self.metrics['cost_saved'],
+            'cache': cache_stats,
             'uptime': 'Active'
         }
     
@@ -0,0 +1,257 @@
+"""
+Async Task Scheduler
+Priority and deadline ordered scheduling of coroutines on a dedicated event loop
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class ScheduledTask:
+    """Queue entry for one submission of a task"""
+
+    __slots__ = ('key', 'factory', 'priority', 'deadline', 'enqueued_at', 'cancelled')
+
+    def __init__(self, key: str, factory: Callable[[], Awaitable[Any]], priority: int,
+                 deadline: Optional[datetime]):
+        self.key = key
+        self.factory = factory
+        self.priority = priority
+        self.deadline = deadline
+        self.enqueued_at = time.monotonic()
+        self.cancelled = False
+
+    def expired(self) -> bool:
+        if self.deadline is None:
+            return False
+        if self.deadline.tzinfo is None:
+            # Naive deadlines follow the datetime.utcnow() convention of TaskRequest
+            return self.deadline <= datetime.utcnow()
+        return self.deadline <= datetime.now(timezone.utc)
+
+
+class AsyncTaskScheduler:
+    """Runs submitted coroutines on its own event loop thread.
+
+    Tasks are ordered by priority (highest first), then earliest deadline,
+    then submission order. At most ``max_concurrency`` tasks run at once; the
+    rest wait in a heap. Tasks whose deadline passes while queued are dropped
+    and reported to ``on_expired`` instead of being run. ``submit`` and
+    ``cancel`` are safe to call from any thread, including from tasks running
+    on the scheduler loop.
+    """
+
+    def __init__(self, max_concurrency: int = 100, name: str = 'task-scheduler',
+                 on_expired: Optional[Callable[[str], None]] = None, wait_sample_size: int = 1000):
+        self.max_concurrency = max(1, max_concurrency)
+        self.name = name
+        self.on_expired = on_expired
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+
+        self._heap = []
+        self._queued: Dict[str, ScheduledTask] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._started = threading.Event()
+
+        self._wait_samples = deque(maxlen=wait_sample_size)
+        self.stats = {
+            'submitted': 0,
+            'started': 0,
+            'completed': 0,
+            'failed': 0,
+            'cancelled': 0,
+            'deadline_missed': 0,
+            'max_queue_depth': 0
+        }
+
+    def start(self):
+        """Start the event loop thread if it is not running yet"""
+        with self._lock:
+            if self.running:
+                return
+            self.running = True
+            self._started.clear()
+            self.thread = threading.Thread(target=self._run_loop, name=self.name, daemon=True)
+            self.thread.start()
+        self._started.wait()
+
+    def stop(self, timeout: float = 5.0):
+        """Cancel running tasks and stop the event loop thread"""
+        with self._lock:
+            if not self.running:
+                return
+            self.running = False
+            loop = self.loop
+
+        loop.call_soon_threadsafe(self._wakeup.set)
+        self.thread.join(timeout)
+
+    def submit(self, key: str, factory: Callable[[], Awaitable[Any]], priority: int = 5,
+               deadline: Optional[datetime] = None):
+        """Queue ``factory()`` to run under ``key``, replacing a queued entry with the same key"""
+        entry = ScheduledTask(key, factory, priority, deadline)
+        deadline_order = deadline.timestamp() if deadline is not None else float('inf')
+
+        with self._lock:
+            previous = self._queued.get(key)
+            if previous is not None:
+                previous.cancelled = True
+            self._queued[key] = entry
+            heapq.heappush(self._heap, (-priority, deadline_order, next(self._sequence), entry))
+            self.stats['submitted'] += 1
+            self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], len(self._queued))
+
+        self._notify()
+
+    def cancel(self, key: str) -> bool:
+        """Cancel a queued or running task; returns False if the key is unknown"""
+        with self._lock:
+            entry = self._queued.pop(key, None)
+            if entry is not None:
+                entry.cancelled = True
+                self.stats['cancelled'] += 1
+                return True
+
+            task = self._running.get(key)
+
+        if task is None:
+            return False
+
+        self.loop.call_soon_threadsafe(task.cancel)
+        return True
+
+    def is_pending(self, key: str) -> bool:
+        with self._lock:
+            return key in self._queued or key in self._running
+
+    def is_busy(self) -> bool:
+        """True while any task is queued or running"""
+        with self._lock:
+            return bool(self._queued or self._running)
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queued)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth, concurrency and wait-time metrics"""
+        with self._lock:
+            waits = sorted(self._wait_samples)
+            metrics = dict(self.stats)
+            metrics.update({
+                'queue_depth': len(self._queued),
+                'running': len(self._running),
+                'max_concurrency': self.max_concurrency
+            })
+
+        if waits:
+            metrics['wait_time'] = {
+                'samples': len(waits),
+                'avg_seconds': sum(waits) / len(waits),
+                'p50_seconds': waits[len(waits) // 2],
+                'p95_seconds': waits[min(len(waits) - 1, int(len(waits) * 0.95))],
+                'max_seconds': waits[-1]
+            }
+        else:
+            metrics['wait_time'] = {'samples': 0}
+
+        return metrics
+
+    def _notify(self):
+        loop = self.loop
+        if loop is not None and self.running:
+            loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._wakeup = asyncio.Event()
+        # Pick up anything submitted before the loop started
+        self._wakeup.set()
+        self._started.set()
+
+        try:
+            self.loop.run_until_complete(self._dispatch())
+        except Exception as e:
+            logging.error(f"Scheduler {self.name} stopped with error: {str(e)}")
+        finally:
+            self.loop.close()
+
+    async def _dispatch(self):
+        while self.running:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            while self.running and self._start_next():
+                pass
+
+        for task in list(self._running.values()):
+            task.cancel()
+        if self._running:
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+    def _start_next(self) -> bool:
+        """Start the next runnable entry; returns False when nothing can start"""
+        expired = []
+        started = False
+
+        with self._lock:
+            while self._heap and len(self._running) < self.max_concurrency:
+                entry = heapq.heappop(self._heap)[-1]
+                if entry.cancelled:
+                    continue
+
+                del self._queued[entry.key]
+                if entry.expired():
+                    self.stats['deadline_missed'] += 1
+                    expired.append(entry.key)
+                    continue
+
+                # Registered under the lock so the entry is never neither queued nor running
+                self._running[entry.key] = self.loop.create_task(self._run(entry))
+                self._wait_samples.append(time.monotonic() - entry.enqueued_at)
+                self.stats['started'] += 1
+                started = True
+                break
+
+        for key in expired:
+            self._report_expired(key)
+
+        return started
+
+    def _report_expired(self, key: str):
+        logging.warning(f"Task {key} missed its deadline before it could start")
+        if self.on_expired is not None:
+            try:
+                self.on_expired(key)
+            except Exception as e:
+                logging.error(f"Error handling expired task {key}: {str(e)}")
+
+    async def _run(self, entry: ScheduledTask):
+        outcome = 'completed'
+        try:
+            await entry.factory()
+        except asyncio.CancelledError:
+            outcome = 'cancelled'
+        except Exception as e:
+            outcome = 'failed'
+            logging.error(f"Scheduled task {entry.key} failed: {str(e)}")
+        finally:
+            with self._lock:
+                if self._running.get(entry.key) is asyncio.current_task():
+                    del self._running[entry.key]
+                self.stats[outcome] += 1
+            self._wakeup.set()
@@ -0,0 +1,419 @@
+"""
+Technical Indicators
+Streaming O(1)-update indicators on NumPy ring buffers, and batch versions over (series, periods) arrays
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Rows processed per block when materializing rolling windows, bounding
+# temporary memory to roughly ASSET_CHUNK * periods * window floats
+ASSET_CHUNK = 32
+
+# Running sums are recomputed from the window this often to shed rounding drift
+RESYNC_INTERVAL = 4096
+
+# Streams kept by an IndicatorStreams before the least recently used is dropped
+MAX_STREAMS = 1024
+
+
+class RingBuffer:
+    """Fixed-capacity window of the most recent values"""
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("Ring buffer capacity must be at least 1")
+        self.capacity = capacity
+        self._data = np.zeros(capacity)
+        self._next = 0
+        self.size = 0
+
+    def push(self, value: float) -> Optional[float]:
+        """Append a value; returns the value it evicted once the buffer is full"""
+        evicted = float(self._data[self._next]) if self.size == self.capacity else None
+        self._data[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return evicted
+
+    def lag(self, periods: int) -> float:
+        """Value ``periods`` pushes ago; 0 is the latest"""
+        if not 0 <= periods < self.size:
+            raise IndexError(f"Lag {periods} outside the {self.size} buffered values")
+        return float(self._data[(self._next - 1 - periods) % self.capacity])
+
+    def values(self) -> np.ndarray:
+        """Buffered values, oldest first"""
+        if self.size < self.capacity:
+            return self._data[:self.size].copy()
+        return np.roll(self._data, -self._next)
+
+    def reset(self):
+        self._next = 0
+        self.size = 0
+
+
+class StreamingIndicator:
+    """Indicator updated one observation at a time; ``value`` is NaN until it has input"""
+
+    value: float = float('nan')
+
+    def update(self, value: float) -> float:
+        raise NotImplementedError
+
+    def reset(self):
+        raise NotImplementedError
+
+
+class RollingMean(StreamingIndicator):
+    """Mean of the last ``window`` values (of all values while fewer have arrived)"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.buffer = RingBuffer(window)
+        self.reset()
+
+    def update(self, value: float) -> float:
+        evicted = self.buffer.push(value)
+        self._sum += value - (evicted or 0.0)
+        self._updates += 1
+        if self._updates % RESYNC_INTERVAL == 0:
+            self._sum = float(self.buffer.values().sum())
+        self.value = self._sum / self.buffer.size
+        return self.value
+
+    @property
+    def ready(self) -> bool:
+        return self.buffer.size == self.window
+
+    def reset(self):
+        self.buffer.reset()
+        self._sum = 0.0
+        self._updates = 0
+        self.value = float('nan')
+
+
+class RollingStd(StreamingIndicator):
+    """Population standard deviation of the last ``window`` values.
+
+    Mean and sum of squared deviations are updated with the windowed form of
+    Welford's algorithm, which stays accurate for series with a large level
+    and small variation (prices) where a running sum of squares would not.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.buffer = RingBuffer(window)
+        self.reset()
+
+    def update(self, value: float) -> float:
+        evicted = self.buffer.push(value)
+        if evicted is None:
+            delta = value - self.mean
+            self.mean += delta / self.buffer.size
+            self._m2 += delta * (value - self.mean)
+        else:
+            previous_mean = self.mean
+            self.mean += (value - evicted) / self.window
+            self._m2 += (value - evicted) * (value - self.mean + evicted - previous_mean)
+
+        self._updates += 1
+        if self._updates % RESYNC_INTERVAL == 0:
+            window = self.buffer.values()
+            self.mean = float(window.mean())
+            self._m2 = float(((window - self.mean) ** 2).sum())
+
+        self.value = float(np.sqrt(max(self._m2, 0.0) / self.buffer.size))
+        return self.value
+
+    @property
+    def ready(self) -> bool:
+        return self.buffer.size == self.window
+
+    def reset(self):
+        self.buffer.reset()
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._updates = 0
+        self.value = float('nan')
+
+
+class RollingZScore(StreamingIndicator):
+    """Distance of the latest value from the window mean in window standard deviations; 0 for a flat window"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.std = RollingStd(window)
+
+    def update(self, value: float) -> float:
+        std = self.std.update(value)
+        self.value = (value - self.std.mean) / std if std > 0 else 0.0
+        return self.value
+
+    @property
+    def mean(self) -> float:
+        return self.std.mean
+
+    @property
+    def ready(self) -> bool:
+        return self.std.ready
+
+    def reset(self):
+        self.std.reset()
+        self.value = float('nan')
+
+
+class EMA(StreamingIndicator):
+    """Exponential moving average with ``alpha = 2 / (span + 1)``, seeded with the first value"""
+
+    def __init__(self, span: float):
+        self.span = span
+        self.alpha = 2.0 / (span + 1.0)
+        self.reset()
+
+    def update(self, value: float) -> float:
+        if self.count == 0:
+            self.value = float(value)
+        else:
+            self.value += self.alpha * (value - self.value)
+        self.count += 1
+        return self.value
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.span
+
+    def reset(self):
+        self.count = 0
+        self.value = float('nan')
+
+
+class RSI(StreamingIndicator):
+    """Relative Strength Index of prices over ``window`` changes.
+
+    Averages gains and losses over the window (Cutler's RSI); 50 until
+    ``window`` changes have been seen, 100 when the window has no losses.
+    """
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.gains = RollingMean(window)
+        self.losses = RollingMean(window)
+        self.reset()
+
+    def update(self, price: float) -> float:
+        if self._last is not None:
+            change = price - self._last
+            self.gains.update(max(change, 0.0))
+            self.losses.update(max(-change, 0.0))
+        self._last = price
+
+        if not self.gains.ready:
+            self.value = 50.0
+        elif self.losses.value <= 0:  # running sums can leave a rounding residual instead of 0
+            self.value = 100.0
+        else:
+            self.value = 100.0 - 100.0 / (1.0 + self.gains.value / self.losses.value)
+        return self.value
+
+    @property
+    def ready(self) -> bool:
+        return self.gains.ready
+
+    def reset(self):
+        self.gains.reset()
+        self.losses.reset()
+        self._last = None
+        self.value = 50.0
+
+
+class PriceStream:
+    """Indicators over one price series, updated per tick.
+
+    ``price_indicators`` see each price and ``return_indicators`` each
+    simple return (from the second price on). The last ``history`` prices
+    are kept for ``lag`` lookbacks.
+    """
+
+    def __init__(self, price_indicators: Optional[Dict[str, StreamingIndicator]] = None,
+                 return_indicators: Optional[Dict[str, StreamingIndicator]] = None, history: int = 1):
+        self.price_indicators = price_indicators or {}
+        self.return_indicators = return_indicators or {}
+        self.prices = RingBuffer(max(1, history))
+        self.count = 0
+        self.first: Optional[float] = None
+
+    def update(self, price: float) -> 'PriceStream':
+        price = float(price)
+        if self.count:
+            previous = self.prices.lag(0)
+            change = (price - previous) / previous
+            for indicator in self.return_indicators.values():
+                indicator.update(change)
+        else:
+            self.first = price
+        for indicator in self.price_indicators.values():
+            indicator.update(price)
+        self.prices.push(price)
+        self.count += 1
+        return self
+
+    def __getitem__(self, name: str) -> float:
+        indicator = self.price_indicators.get(name) or self.return_indicators[name]
+        return indicator.value
+
+    @property
+    def price(self) -> float:
+        return self.prices.lag(0)
+
+    def lag(self, periods: int) -> float:
+        return self.prices.lag(periods)
+
+    def snapshot(self) -> Dict[str, float]:
+        values = {name: indicator.value for name, indicator in self.price_indicators.items()}
+        values.update({name: indicator.value for name, indicator in self.return_indicators.items()})
+        return values
+
+    def reset(self):
+        for indicator in list(self.price_indicators.values()) + list(self.return_indicators.values()):
+            indicator.reset()
+        self.prices.reset()
+        self.count = 0
+        self.first = None
+
+
+class IndicatorStreams:
+    """Price streams by key (an asset, or an algorithm and asset), built by ``factory``.
+
+    ``update`` feeds a single tick. ``sync`` accepts the full price history
+    callers already hold and feeds only the prices added since the last
+    call, so re-passing a growing history costs O(1) per new price. A history
+    that is not a continuation of what the stream has seen (shorter, or a
+    different first or last-seen price) replays from scratch.
+
+    At most ``max_streams`` streams are kept; the least recently used is
+    dropped first, and replays from scratch if its key comes back.
+    """
+
+    def __init__(self, factory: Callable[[], PriceStream], max_streams: int = MAX_STREAMS):
+        self.factory = factory
+        self.max_streams = max(1, max_streams)
+        self.streams: 'OrderedDict[str, PriceStream]' = OrderedDict()
+
+    def _stream(self, key: str) -> PriceStream:
+        stream = self.streams.get(key)
+        if stream is None:
+            stream = self.streams[key] = self.factory()
+            while len(self.streams) > self.max_streams:
+                self.streams.popitem(last=False)
+        else:
+            self.streams.move_to_end(key)
+        return stream
+
+    def update(self, key: str, price: float) -> PriceStream:
+        return self._stream(key).update(price)
+
+    def sync(self, key: str, prices: Sequence[float]) -> PriceStream:
+        stream = self._stream(key)
+
+        seen = stream.count
+        if seen and (len(prices) < seen or prices[0] != stream.first or prices[seen - 1] != stream.price):
+            stream.reset()
+            seen = 0
+        for index in range(seen, len(prices)):
+            stream.update(prices[index])
+        return stream
+
+    def discard(self, key: str):
+        self.streams.pop(key, None)
+
+    def clear(self):
+        self.streams.clear()
+
+
+# Batch mode: every function takes a (series, periods) array, or one series as a 1-D array
+
+
+def _rolling(values: np.ndarray, window: int, reducer) -> np.ndarray:
+    """Apply ``reducer`` over trailing windows along axis 1; NaN until a window fills"""
+    result = np.full(values.shape, np.nan)
+    if values.shape[1] < window:
+        return result
+
+    for start in range(0, values.shape[0], ASSET_CHUNK):
+        block = np.ascontiguousarray(values[start:start + ASSET_CHUNK])
+        windows = sliding_window_view(block, window, axis=1)
+        result[start:start + ASSET_CHUNK, window - 1:] = reducer(windows, axis=-1)
+    return result
+
+
+def _batch(function):
+    """Lift a function of a 2-D array to accept a single 1-D series as well"""
+    def wrapper(values, *args, **kwargs):
+        values = np.asarray(values, dtype=float)
+        result = function(np.atleast_2d(values), *args, **kwargs)
+        return result[0] if values.ndim == 1 else result
+    wrapper.__name__ = function.__name__
+    wrapper.__doc__ = function.__doc__
+    return wrapper
+
+
+@_batch
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over the last ``window`` periods for each series (row)"""
+    return _rolling(values, window, np.mean)
+
+
+@_batch
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing population standard deviation over the last ``window`` periods for each series (row)"""
+    return _rolling(values, window, np.std)
+
+
+@_batch
+def rolling_zscore(values: np.ndarray, window: int) -> np.ndarray:
+    """Z-score of each value against its trailing window; 0 for a flat window"""
+    mean = rolling_mean(values, window)
+    std = rolling_std(values, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(std > 0, (values - mean) / std, np.where(np.isnan(std), np.nan, 0.0))
+
+
+@_batch
+def ema(values: np.ndarray, span: float) -> np.ndarray:
+    """Exponential moving average along each row, seeded with its first value"""
+    alpha = 2.0 / (span + 1.0)
+    result = np.empty(values.shape)
+    if values.shape[1] == 0:
+        return result
+    result[:, 0] = values[:, 0]
+    for period in range(1, values.shape[1]):
+        result[:, period] = result[:, period - 1] + alpha * (values[:, period] - result[:, period - 1])
+    return result
+
+
+@_batch
+def simple_returns(prices: np.ndarray) -> np.ndarray:
+    """Period-over-period returns; the first period is NaN"""
+    result = np.full(prices.shape, np.nan)
+    result[:, 1:] = np.diff(prices, axis=1) / prices[:, :-1]
+    return result
+
+
+@_batch
+def rsi(prices: np.ndarray, window: int = 14) -> np.ndarray:
+    """Cutler's RSI for every period, as ``RSI``: 50 before ``window`` changes, 100 without losses"""
+    result = np.full(prices.shape, 50.0)
+    changes = np.diff(prices, axis=1)
+    if changes.shape[1] < window:
+        return result
+
+    gains = rolling_mean(np.maximum(changes, 0.0), window)[:, window - 1:]
+    losses = rolling_mean(np.maximum(-changes, 0.0), window)[:, window - 1:]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result[:, window:] = np.where(losses == 0, 100.0, 100.0 - 100.0 / (1.0 + gains / losses))
+    return result
+
@@ -0,0 +1,213 @@
+"""
+Vectorized Backtest
+Array-based signal generation and trade simulation for AlgorithmicTradingDeveloper
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from services.technical_indicators import rolling_mean, rolling_std
+
+# Strategy signal parameters, matching the event-driven engine
+MOMENTUM_FAST_WINDOW = 20
+MOMENTUM_SLOW_WINDOW = 50
+MOMENTUM_SCALE = 10
+MEAN_REVERSION_WINDOW = 30
+MEAN_REVERSION_Z_ENTRY = 2
+MEAN_REVERSION_SIGNAL = 0.8
+
+INITIAL_CASH = 1000000
+
+
+def apply_return_dynamics(returns: np.ndarray, momentum: float = 0.1, mean_reversion: float = 0.05,
+                          lookback: int = 5) -> np.ndarray:
+    """Add momentum and short-term mean reversion to daily returns, in place.
+
+    ``returns`` has one row per day and one column per asset. Each day adds
+    ``momentum`` times the previous (already adjusted) return and subtracts
+    ``mean_reversion`` times the mean of up to ``lookback`` previous returns.
+    The recurrence runs over days once, for all assets at a time.
+    """
+    for i in range(1, len(returns)):
+        returns[i] += returns[i - 1] * momentum - returns[max(0, i - lookback):i].mean(axis=0) * mean_reversion
+    return returns
+
+
+def momentum_signals(prices: np.ndarray, ma_fast: int = MOMENTUM_FAST_WINDOW,
+                     ma_slow: int = MOMENTUM_SLOW_WINDOW, momentum_threshold: float = 0.0) -> np.ndarray:
+    """Moving average crossover signals in [-1, 1] for an (assets, days) price array.
+
+    Days where the price is less than ``momentum_threshold`` (a fraction)
+    away from the fast average do not signal.
+    """
+    fast = rolling_mean(prices, int(ma_fast))
+    slow = rolling_mean(prices, int(ma_slow))
+    distance = (prices - fast) / fast
+    strength = distance * MOMENTUM_SCALE
+
+    signals = np.zeros(prices.shape)
+    with np.errstate(invalid='ignore'):
+        uptrend = (prices > fast) & (fast > slow)
+        downtrend = ~uptrend & (prices < fast) & (fast < slow)
+        if momentum_threshold > 0:
+            strong = np.abs(distance) >= momentum_threshold
+            uptrend &= strong
+            downtrend &= strong
+    signals[uptrend] = np.minimum(1.0, strength[uptrend])
+    signals[downtrend] = np.maximum(-1.0, strength[downtrend])
+    return signals
+
+
+def mean_reversion_signals(prices: np.ndarray, lookback_window: int = MEAN_REVERSION_WINDOW,
+                           z_score_entry: float = MEAN_REVERSION_Z_ENTRY,
+                           z_score_exit: Optional[float] = None) -> np.ndarray:
+    """Z-score reversion signals for an (assets, days) price array.
+
+    With ``z_score_exit`` set, longs are also closed once the z-score has
+    reverted above ``-z_score_exit``.
+    """
+    mean = rolling_mean(prices, int(lookback_window))
+    std = rolling_std(prices, int(lookback_window))
+
+    signals = np.zeros(prices.shape)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z_score = np.where(std > 0, (prices - mean) / std, 0.0)
+        if z_score_exit is not None:
+            signals[z_score > -z_score_exit] = -MEAN_REVERSION_SIGNAL
+        signals[z_score > z_score_entry] = -MEAN_REVERSION_SIGNAL
+        signals[z_score < -z_score_entry] = MEAN_REVERSION_SIGNAL
+    return signals
+
+
+SIGNAL_FUNCTIONS = {
+    'momentum': momentum_signals,
+    'mean_reversion': mean_reversion_signals
+}
+
+# Tunable parameters each signal rule reads; any strategy also reads position_size
+STRATEGY_PARAMETERS = {
+    'momentum': ('ma_fast', 'ma_slow', 'momentum_threshold'),
+    'mean_reversion': ('lookback_window', 'z_score_entry', 'z_score_exit')
+}
+SIZING_PARAMETER = 'position_size'
+
+
+def effective_parameters(strategy: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """The subset of ``params`` that changes the backtest of ``strategy``"""
+    names = STRATEGY_PARAMETERS.get(strategy, ()) + (SIZING_PARAMETER,)
+    return {name: params[name] for name in sorted(names) if name in params}
+
+
+def warmup_days(strategy: str, params: Optional[Dict[str, Any]] = None) -> int:
+    """History a strategy's rolling windows need before its first signal"""
+    params = params or {}
+    if strategy == 'momentum':
+        return int(max(params.get('ma_fast', MOMENTUM_FAST_WINDOW), params.get('ma_slow', MOMENTUM_SLOW_WINDOW)))
+    if strategy == 'mean_reversion':
+        return int(params.get('lookback_window', MEAN_REVERSION_WINDOW))
+    return 0
+
+
+def compute_signals(strategy: str, prices: np.ndarray, params: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """Signals for every asset and day; strategies without a rule never trade"""
+    signal_function = SIGNAL_FUNCTIONS.get(strategy)
+    if signal_function is None:
+        return np.zeros(prices.shape)
+
+    rule_params = {name: value for name, value in (params or {}).items()
+                   if name in STRATEGY_PARAMETERS[strategy]}
+    return signal_function(prices, **rule_params)
+
+
+def price_matrix(data: pd.DataFrame, asset_universe: Sequence[str]) -> np.ndarray:
+    """(assets, days) price array from a backtesting frame with ``<asset>_price`` columns"""
+    columns = [f'{asset}_price' for asset in asset_universe]
+    return np.ascontiguousarray(data[columns].to_numpy(dtype=float).T)
+
+
+def simulate_trades(dates: pd.DatetimeIndex, asset_universe: Sequence[str], prices: np.ndarray,
+                    signals: np.ndarray, max_position_size: float = 0.05,
+                    initial_cash: float = INITIAL_CASH) -> List[Dict]:
+    """Turn a signal array into the trade list of the event-driven engine.
+
+    Days and assets without a signal cannot trade, so only non-zero signals
+    are visited, in date order and then universe order. Entry size depends
+    on the cash left after earlier trades, which keeps this final ledger
+    pass sequential.
+    """
+    days, assets = np.nonzero(signals.T)
+    signal_values = signals[assets, days]
+    price_values = prices[assets, days]
+
+    trades = []
+    positions = [0] * len(asset_universe)
+    cash = initial_cash
+
+    for day, asset, signal, price in zip(days.tolist(), assets.tolist(),
+                                         signal_values.tolist(), price_values.tolist()):
+        current_position = positions[asset]
+
+        if signal > 0 and current_position == 0:
+            target_value = cash * max_position_size * abs(signal)
+            position_size = max(0, int(target_value / price / 100) * 100)
+            if position_size > 0:
+                trades.append({
+                    'date': dates[day],
+                    'asset': asset_universe[asset],
+                    'action': 'buy',
+                    'quantity': position_size,
+                    'price': price,
+                    'value': position_size * price,
+                    'signal_strength': signal
+                })
+                positions[asset] = position_size
+                cash -= position_size * price
+
+        elif signal < 0 and current_position > 0:
+            trades.append({
+                'date': dates[day],
+                'asset': asset_universe[asset],
+                'action': 'sell',
+                'quantity': current_position,
+                'price': price,
+                'value': current_position * price,
+                'signal_strength': signal
+            })
+            cash += current_position * price
+            positions[asset] = 0
+
+    return trades
+
+
+def trade_statistics(trades: List[Dict], initial_cash: float = INITIAL_CASH) -> Dict[str, float]:
+    """Round-trip P&L statistics, pairing each sell with the open buy of its asset"""
+    open_buys = {}
+    pnl = []
+    for trade in trades:
+        if trade['action'] == 'buy':
+            open_buys[trade['asset']] = trade
+        elif trade['asset'] in open_buys:
+            buy = open_buys.pop(trade['asset'])
+            pnl.append((trade['price'] - buy['price']) * trade['quantity'])
+
+    if not pnl:
+        return {'total_return': 0.0, 'sharpe_ratio': 0.0, 'win_rate': 0.0, 'round_trips': 0}
+
+    pnl = np.array(pnl)
+    volatility = pnl.std() if len(pnl) > 1 else 0.0
+    return {
+        'total_return': float(pnl.sum() / initial_cash),
+        'sharpe_ratio': float(pnl.mean() / volatility) if volatility > 0 else 0.0,
+        'win_rate': float((pnl > 0).mean()),
+        'round_trips': int(len(pnl))
+    }
+
+
+def run_vectorized_backtest(strategy: str, asset_universe: Sequence[str], data: pd.DataFrame,
+                            max_position_size: float = 0.05) -> List[Dict]:
+    """Signals and trades for a strategy over a prepared backtesting frame"""
+    prices = price_matrix(data, asset_universe)
+    signals = compute_signals(strategy, prices)
+    return simulate_trades(data.index, list(asset_universe), prices, signals, max_position_size)
@@ -5,7 +5,10 @@ Drag-and-drop agent workflow builder for non-technical users
 """
 
 import json
+import os
 import uuid
+import heapq
+from collections import OrderedDict, deque
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
@@ -72,6 +75,72 @@ class VisualWorkflow:
     version: str = "1.0.0"
     status: str = "draft"
 
+@dataclass
+class CompiledWorkflow:
+    """Execution plan for a workflow: node and connection indexes over the part reachable from triggers"""
+    workflow_id: str
+    version: Tuple
+    nodes: Dict[str, WorkflowNode]
+    outgoing: Dict[str, List[WorkflowConnection]]
+    incoming_counts: Dict[str, int]
+    order: List[str]  # topological order of reachable nodes
+    position: Dict[str, int]
+    triggers: List[str]
+    joins: List[str]  # nodes waiting on more than one upstream connection
+
+def compile_workflow(workflow: VisualWorkflow) -> CompiledWorkflow:
+    """Index a workflow for execution; raises ValueError if its reachable part has a cycle"""
+    nodes = {node.id: node for node in workflow.nodes}
+    outgoing: Dict[str, List[WorkflowConnection]] = {node_id: [] for node_id in nodes}
+    for connection in workflow.connections:
+        if connection.source_node in nodes and connection.target_node in nodes:
+            outgoing[connection.source_node].append(connection)
+
+    triggers = [node.id for node in workflow.nodes if node.type == NodeType.TRIGGER]
+    reachable = set(triggers)
+    stack = list(triggers)
+    while stack:
+        for connection in outgoing[stack.pop()]:
+            if connection.target_node not in reachable:
+                reachable.add(connection.target_node)
+                stack.append(connection.target_node)
+
+    incoming_counts = {node_id: 0 for node_id in reachable}
+    for node_id in reachable:
+        for connection in outgoing[node_id]:
+            incoming_counts[connection.target_node] += 1
+
+    # Kahn's algorithm, keeping the workflow's node order among independent nodes
+    remaining = dict(incoming_counts)
+    ready = deque(node.id for node in workflow.nodes if node.id in reachable and remaining[node.id] == 0)
+    order = []
+    while ready:
+        node_id = ready.popleft()
+        order.append(node_id)
+        for connection in outgoing[node_id]:
+            remaining[connection.target_node] -= 1
+            if remaining[connection.target_node] == 0:
+                ready.append(connection.target_node)
+    if len(order) < len(reachable):
+        cycle = sorted(node_id for node_id in reachable if remaining[node_id] > 0)
+        raise ValueError(f"Workflow contains a cycle through nodes: {cycle}")
+
+    return CompiledWorkflow(
+        workflow_id=workflow.id,
+        version=_workflow_version(workflow),
+        nodes=nodes,
+        outgoing=outgoing,
+        incoming_counts=incoming_counts,
+        order=order,
+        position={node_id: index for index, node_id in enumerate(order)},
+        triggers=triggers,
+        joins=[node_id for node_id in order if incoming_counts[node_id] > 1]
+    )
+
+def _workflow_version(workflow: VisualWorkflow) -> Tuple:
+    return (workflow.updated_at, id(workflow.nodes), len(workflow.nodes),
+            id(workflow.connections), len(workflow.connections))
+
 class VisualWorkflowService:
     """
     Visual workflow orchestration service enabling drag-and-drop agent coordination
@@ -81,7 +150,17 @@ class VisualWorkflowService:
     def __init__(self):
         self.workflows: Dict[str, VisualWorkflow] = {}
         self.templates: Dict[str, VisualWorkflow] = {}
-        self.execution_history: Dict[str, List[Dict]] = {}
+        
+        # Bounded per-workflow history of execution summaries (no node outputs)
+        self.history_size = int(os.getenv('VISUAL_WORKFLOW_HISTORY_SIZE', '50'))
+        self.execution_history: Dict[str, deque] = {}
+        
+        # Node outputs of unfinished executions, so they can be resumed
+        self.checkpoint_limit = int(os.getenv('VISUAL_WORKFLOW_CHECKPOINTS', '100'))
+        self.checkpoints: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        
+        self.default_max_concurrency = int(os.getenv('VISUAL_WORKFLOW_MAX_CONCURRENCY', '4'))
+        self._compiled: Dict[str, CompiledWorkflow] = {}
         
         # Initialize pre-built workflow templates
         self._initialize_workflow_templates()
@@ -390,78 +469,200 @@ class VisualWorkflowService:
             for name, template in self.templates.items()
         ]
     
-    async def execute_workflow(self, workflow_id: str, input_data: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Execute a visual workflow"""
+    def compile(self, workflow_id: str) -> CompiledWorkflow:
+        """Compiled execution plan for a workflow, cached until the workflow changes"""
         if workflow_id not in self.workflows:
             raise ValueError(f"Workflow {workflow_id} not found")
         
         workflow = self.workflows[workflow_id]
+        compiled = self._compiled.get(workflow_id)
+        if compiled is None or compiled.version != _workflow_version(workflow):
+            compiled = self._compiled[workflow_id] = compile_workflow(workflow)
+        return compiled
+    
+    def get_checkpoint(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """Checkpoint of an execution that failed or was cancelled"""
+        return self.checkpoints.get(execution_id)
+    
+    async def execute_workflow(self, workflow_id: str, input_data: Dict[str, Any] = None,
+                               resume_from: Optional[Any] = None) -> Dict[str, Any]:
+        """Execute a visual workflow, running independent branches concurrently.
+        
+        ``resume_from`` takes an execution id or a checkpoint dict; nodes that
+        finished in that execution reuse their recorded output.
+        """
+        if workflow_id not in self.workflows:
+            raise ValueError(f"Workflow {workflow_id} not found")
+        
+        workflow = self.workflows[workflow_id]
+        checkpoint = self._resolve_checkpoint(workflow_id, resume_from)
         execution_id = f"exec_{uuid.uuid4().hex[:8]}"
         
         # Initialize execution context
         execution_context = {
             "workflow_id": workflow_id,
             "execution_id": execution_id,
-            "input_data": input_data or {},
-            "variables": workflow.variables.copy(),
+            "input_data": input_data if input_data is not None else (checkpoint or {}).get("input_data", {}),
+            "variables": dict((checkpoint or {}).get("variables") or workflow.variables),
             "node_outputs": {},
+            "skipped_nodes": [],
             "execution_log": [],
             "start_time": datetime.now(),
             "status": "running"
         }
+        if checkpoint:
+            execution_context["resumed_from"] = checkpoint["execution_id"]
         
         try:
-            # Find trigger nodes to start execution
-            trigger_nodes = [node for node in workflow.nodes if node.type == NodeType.TRIGGER]
-            
-            if not trigger_nodes:
+            compiled = self.compile(workflow_id)
+            if not compiled.triggers:
                 raise ValueError("Workflow has no trigger nodes")
             
-            # Execute workflow starting from triggers
-            for trigger_node in trigger_nodes:
-                await self._execute_node_chain(workflow, trigger_node, execution_context)
+            max_concurrency = int(workflow.settings.get("max_concurrency", self.default_max_concurrency))
+            restored = dict(checkpoint["node_outputs"]) if checkpoint else {}
+            await self._execute_graph(compiled, execution_context, max(1, max_concurrency), restored)
             
             execution_context["status"] = "completed"
             execution_context["end_time"] = datetime.now()
+            if checkpoint:
+                self.checkpoints.pop(checkpoint["execution_id"], None)
             
+        except asyncio.CancelledError:
+            execution_context["status"] = "cancelled"
+            execution_context["end_time"] = datetime.now()
+            self._save_checkpoint(execution_context)
+            self._record_execution(execution_context)
+            raise
         except Exception as e:
             execution_context["status"] = "failed"
             execution_context["error"] = str(e)
             execution_context["end_time"] = datetime.now()
+            self._save_checkpoint(execution_context)
             logger.error(f"Workflow execution failed: {str(e)}")
         
-        # Store execution history
-        if workflow_id not in self.execution_history:
-            self.execution_history[workflow_id] = []
-        self.execution_history[workflow_id].append(execution_context)
-        
+        self._record_execution(execution_context)
         return execution_context
     
-    async def _execute_node_chain(self, workflow: VisualWorkflow, start_node: WorkflowNode, 
-                                execution_context: Dict[str, Any]):
-        """Execute a chain of connected nodes"""
-        current_node = start_node
-        visited_nodes = set()
+    async def _execute_graph(self, compiled: CompiledWorkflow, execution_context: Dict[str, Any],
+                             max_concurrency: int, restored: Dict[str, Dict[str, Any]]):
+        """Run nodes as their upstream connections resolve, at most ``max_concurrency`` at a time.
         
-        while current_node and current_node.id not in visited_nodes:
-            visited_nodes.add(current_node.id)
-            
-            # Execute current node
-            node_result = await self._execute_single_node(current_node, execution_context)
-            execution_context["node_outputs"][current_node.id] = node_result
-            
-            # Log execution
-            execution_context["execution_log"].append({
-                "node_id": current_node.id,
-                "node_name": current_node.name,
-                "node_type": current_node.type.value,
-                "result": node_result,
-                "timestamp": datetime.now().isoformat()
-            })
-            
-            # Find next node based on connections and results
-            next_node = self._find_next_node(workflow, current_node, node_result, execution_context)
-            current_node = next_node
+        A node runs once every incoming connection is resolved and at least one
+        was taken; if none was taken it is skipped and so are its outgoing
+        connections. Join nodes therefore wait for all their branches.
+        """
+        pending = dict(compiled.incoming_counts)
+        taken = dict.fromkeys(pending, 0)
+        ready: List[Tuple[int, str]] = []
+        running: Dict[asyncio.Task, Tuple[str, float]] = {}
+        loop = asyncio.get_running_loop()
+        
+        def resolve(node_id: str, result: Optional[Dict[str, Any]]):
+            # Walk iteratively so long skipped chains do not recurse
+            stack = [(node_id, result)]
+            while stack:
+                source_id, source_result = stack.pop()
+                for connection in compiled.outgoing[source_id]:
+                    target = connection.target_node
+                    if source_result is not None and self._connection_taken(connection, source_result, execution_context):
+                        taken[target] += 1
+                    pending[target] -= 1
+                    if pending[target] == 0:
+                        if taken[target]:
+                            heapq.heappush(ready, (compiled.position[target], target))
+                        else:
+                            execution_context["skipped_nodes"].append(target)
+                            stack.append((target, None))
+        
+        for node_id in compiled.triggers:
+            heapq.heappush(ready, (compiled.position[node_id], node_id))
+        
+        try:
+            while ready or running:
+                while ready and len(running) < max_concurrency:
+                    _, node_id = heapq.heappop(ready)
+                    if node_id in restored:
+                        result = restored[node_id]
+                        self._complete_node(compiled.nodes[node_id], result, execution_context, 0.0, restored=True)
+                        resolve(node_id, result)
+                        continue
+                    task = asyncio.ensure_future(self._execute_single_node(compiled.nodes[node_id], execution_context))
+                    running[task] = (node_id, loop.time())
+                
+                if not running:
+                    continue
+                
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=lambda task: compiled.position[running[task][0]]):
+                    node_id, started = running.pop(task)
+                    result = task.result()
+                    self._complete_node(compiled.nodes[node_id], result, execution_context, loop.time() - started)
+                    resolve(node_id, result)
+        finally:
+            for task in running:
+                task.cancel()
+    
+    def _complete_node(self, node: WorkflowNode, result: Dict[str, Any], execution_context: Dict[str, Any],
+                       duration: float, restored: bool = False):
+        execution_context["node_outputs"][node.id] = result
+        entry = {
+            "node_id": node.id,
+            "node_name": node.name,
+            "node_type": node.type.value,
+            "result": result,
+            "duration_ms": round(duration * 1000, 2),
+            "timestamp": datetime.now().isoformat()
+        }
+        if restored:
+            entry["restored"] = True
+        execution_context["execution_log"].append(entry)
+    
+    def _resolve_checkpoint(self, workflow_id: str, resume_from: Optional[Any]) -> Optional[Dict[str, Any]]:
+        if resume_from is None:
+            return None
+        checkpoint = self.checkpoints.get(resume_from) if isinstance(resume_from, str) else resume_from
+        if not checkpoint:
+            raise ValueError(f"No checkpoint for execution {resume_from}")
+        if checkpoint.get("workflow_id") != workflow_id:
+            raise ValueError(f"Checkpoint {checkpoint.get('execution_id')} belongs to another workflow")
+        return checkpoint
+    
+    def _save_checkpoint(self, execution_context: Dict[str, Any]):
+        if not execution_context["node_outputs"]:
+            return
+        self.checkpoints[execution_context["execution_id"]] = {
+            "workflow_id": execution_context["workflow_id"],
+            "execution_id": execution_context["execution_id"],
+            "input_data": execution_context["input_data"],
+            "variables": execution_context["variables"],
+            "node_outputs": dict(execution_context["node_outputs"]),
+            "saved_at": datetime.now().isoformat()
+        }
+        while len(self.checkpoints) > self.checkpoint_limit:
+            self.checkpoints.popitem(last=False)
+    
+    def _record_execution(self, execution_context: Dict[str, Any]):
+        """Store a summary of the execution; node outputs stay with the caller"""
+        history = self.execution_history.get(execution_context["workflow_id"])
+        if history is None:
+            history = self.execution_history[execution_context["workflow_id"]] = deque(maxlen=self.history_size)
+        
+        end_time = execution_context.get("end_time") or datetime.now()
+        history.append({
+            "execution_id": execution_context["execution_id"],
+            "status": execution_context["status"],
+            "error": execution_context.get("error"),
+            "resumed_from": execution_context.get("resumed_from"),
+            "start_time": execution_context["start_time"].isoformat(),
+            "end_time": end_time.isoformat(),
+            "duration_ms": round((end_time - execution_context["start_time"]).total_seconds() * 1000, 2),
+            "nodes_executed": len(execution_context["node_outputs"]),
+            "skipped_nodes": list(execution_context["skipped_nodes"]),
+            "execution_log": [
+                {key: value for key, value in entry.items() if key != "result"} | {"status": entry["result"].get("status")}
+                for entry in execution_context["execution_log"]
+            ]
+        })
     
     async def _execute_single_node(self, node: WorkflowNode, execution_context: Dict[str, Any]) -> Dict[str, Any]:
         """Execute a single workflow node"""
@@ -506,40 +707,30 @@ class VisualWorkflowService:
         except Exception as e:
             return {"status": "error", "error": str(e)}
     
-    def _find_next_node(self, workflow: VisualWorkflow, current_node: WorkflowNode,
-                       node_result: Dict[str, Any], execution_context: Dict[str, Any]) -> Optional[WorkflowNode]:
-        """Find the next node to execute based on connections and conditions"""
-        
-        # Find connections from current node
-        outgoing_connections = [
-            conn for conn in workflow.connections 
-            if conn.source_node == current_node.id
-        ]
-        
-        for connection in outgoing_connections:
-            # Check connection conditions
-            if connection.connection_type == ConnectionType.SUCCESS and node_result.get("status") == "success":
-                return self._get_node_by_id(workflow, connection.target_node)
-            elif connection.connection_type == ConnectionType.ERROR and node_result.get("status") == "error":
-                return self._get_node_by_id(workflow, connection.target_node)
-            elif connection.connection_type == ConnectionType.CONDITIONAL:
-                if self._evaluate_connection_condition(connection, node_result, execution_context):
-                    return self._get_node_by_id(workflow, connection.target_node)
-            elif connection.connection_type == ConnectionType.DATA:
-                return self._get_node_by_id(workflow, connection.target_node)
-        
-        return None
+    def _connection_taken(self, connection: WorkflowConnection, node_result: Dict[str, Any],
+                          execution_context: Dict[str, Any]) -> bool:
+        """Whether a connection carries execution on, given its source node's result"""
+        status = node_result.get("status")
+        if connection.connection_type == ConnectionType.SUCCESS:
+            return status == "success"
+        elif connection.connection_type == ConnectionType.ERROR:
+            return status == "error"
+        elif connection.connection_type == ConnectionType.CONDITIONAL:
+            return self._evaluate_connection_condition(connection, node_result, execution_context)
+        return True
     
     def _get_node_by_id(self, workflow: VisualWorkflow, node_id: str) -> Optional[WorkflowNode]:
         """Get node by ID from workflow"""
-        for node in workflow.nodes:
-            if node.id == node_id:
-                return node
-        return None
+        if workflow.id in self.workflows:
+            return self.compile(workflow.id).nodes.get(node_id)
+        return next((node for node in workflow.nodes if node.id == node_id), None)
     
     def _evaluate_connection_condition(self, connection: WorkflowConnection,
                                      node_result: Dict[str, Any], execution_context: Dict[str, Any]) -> bool:
         """Evaluate connection condition"""
+        # Ports named true/false follow the condition node's boolean result
+        if connection.source_port in ("true", "false") and isinstance(node_result.get("result"), bool):
+            return node_result["result"] == (connection.source_port == "true")
         # Simple condition evaluation - in production use safe evaluation
         return True  # Simplified for demo
     
@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+from services.agent_telemetry import AgentTelemetry
+
+
+@pytest.fixture(scope='module')
+def app_db():
+    from app import app, db
+    from models import AgentExecution
+
+    with app.app_context():
+        db.create_all()
+        yield db
+        AgentExecution.query.filter(AgentExecution.agent_key.like('telemetry_%')).delete(synchronize_session=False)
+        db.session.commit()
+
+
+def test_calls_recorded_during_flushes_are_written_once(app_db):
+    from models import AgentExecution
+
+    telemetry = AgentTelemetry(capacity=1000000, flush_seconds=0, batch_size=250, enabled=True)
+    entry = telemetry.instrument('telemetry_test_agent', 'Telemetry Test')(lambda request: {'tokens_used': 3})
+
+    def record():
+        for _ in range(2000):
+            entry({'campaign_id': 'c1'})
+            time.sleep(0.0001)
+
+    recorder = threading.Thread(target=record)
+    recorder.start()
+    written = 0
+    while recorder.is_alive():
+        written += telemetry.flush()
+    recorder.join()
+    written += telemetry.flush()
+
+    assert written == 2000
+    assert telemetry.stats() == {'buffered': 0, 'flushed': written, 'failed': 0, 'dropped': 0}
+    rows = AgentExecution.query.filter_by(agent_key='telemetry_test_agent')
+    assert rows.count() == written
+    sample = rows.first()
+    assert (sample.campaign_id, sample.tokens_used, sample.execution_status) == ('c1', 3, 'success')
+
+
+def test_full_buffer_counts_dropped_records(app_db):
+    telemetry = AgentTelemetry(capacity=10, flush_seconds=0, enabled=True)
+    entry = telemetry.instrument('telemetry_drop_agent')(lambda request: None)
+    for _ in range(25):
+        entry({})
+
+    assert telemetry.flush() == 10
+    assert telemetry.stats()['dropped'] == 15
+
+
+def test_records_appended_to_a_detached_buffer_are_written(app_db):
+    telemetry = AgentTelemetry(capacity=100, flush_seconds=0, enabled=True)
+    entry = telemetry.instrument('telemetry_late_agent')(lambda request: None)
+    entry({})
+    detached = telemetry.buffer
+    take = telemetry._take
+
+    def take_after_late_append(records, count):
+        # A recorder that read the buffer reference before the swap appends once the flush has started
+        if records is detached and len(detached) == 1:
+            detached.append((next(telemetry._sequence),) + detached[0][1:])
+        return take(records, count)
+
+    telemetry._take = take_after_late_append
+    assert telemetry.flush() == 2
+    assert telemetry.stats() == {'buffered': 0, 'flushed': 2, 'failed': 0, 'dropped': 0}
@@ -0,0 +1,34 @@
+import hashlib
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from services.ai_agent_service import AIAgentService
+
+
+def make_service(patterns_key):
+    service = AIAgentService.__new__(AIAgentService)
+    service._patterns_digest = hashlib.blake2b(patterns_key, digest_size=16).digest()
+    return service
+
+
+def analyzed_app(service):
+    analyzed_at = datetime.utcnow()
+    fingerprint = SimpleNamespace(analyzed_at=analyzed_at, patterns_digest=service._patterns_digest.hex())
+    return SimpleNamespace(file_fingerprints=[fingerprint], last_modified=analyzed_at - timedelta(hours=1))
+
+
+def test_unmodified_app_is_not_reanalyzed():
+    service = make_service(b'patterns')
+    assert not service._needs_analysis(analyzed_app(service))
+
+
+def test_changed_patterns_reanalyze_an_unmodified_app():
+    app = analyzed_app(make_service(b'patterns'))
+    assert make_service(b'edited patterns')._needs_analysis(app)
+
+
+def test_fingerprints_without_a_digest_are_reanalyzed():
+    service = make_service(b'patterns')
+    app = analyzed_app(service)
+    app.file_fingerprints[0].patterns_digest = None
+    assert service._needs_analysis(app)
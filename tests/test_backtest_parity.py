@@ -0,0 +1,51 @@
+import asyncio
+import math
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from check_backtest_parity import make_algorithm  # noqa: E402
+from services.algorithmic_trading_developer import AlgorithmicTradingDeveloper, TradingStrategy  # noqa: E402
+
+ASSETS = ['ASSET000', 'ASSET001', 'ASSET002', 'ASSET003']
+
+
+def seeded_data(days=500, seed=7):
+    """Prices in the layout _prepare_backtesting_data produces, independent of the process's hash seed"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for asset in ASSETS:
+        returns = rng.normal(0.0008, 0.02, days)
+        data[f'{asset}_price'] = 100 * np.exp(np.cumsum(returns))
+        data[f'{asset}_volume'] = rng.lognormal(15, 0.5, days)
+        data[f'{asset}_returns'] = np.concatenate([[0], returns[1:]])
+    return pd.DataFrame(data, index=pd.date_range('2015-01-01', periods=days, freq='D'))
+
+
+def same(a, b):
+    if isinstance(a, float) and isinstance(b, float):
+        # The event-driven engine keeps running window sums, which round differently from np.mean
+        return math.isclose(a, b, rel_tol=1e-9)
+    return a == b
+
+
+@pytest.mark.parametrize('strategy', [TradingStrategy.MOMENTUM, TradingStrategy.MEAN_REVERSION])
+def test_vectorized_engine_matches_event_driven_trades(strategy):
+    developer = AlgorithmicTradingDeveloper()
+    algorithm = make_algorithm(strategy, ASSETS)
+    data = seeded_data()
+
+    event_trades = asyncio.run(developer._simulate_strategy_execution_event_driven(algorithm, data))
+    vector_trades = asyncio.run(developer._simulate_strategy_execution(algorithm, data, engine='vectorized'))
+
+    assert event_trades
+    assert len(vector_trades) == len(event_trades)
+    for event_trade, vector_trade in zip(event_trades, vector_trades):
+        assert event_trade.keys() == vector_trade.keys()
+        assert all(same(event_trade[key], vector_trade[key]) for key in event_trade), (event_trade, vector_trade)
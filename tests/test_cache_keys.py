@@ -0,0 +1,24 @@
+from services.cache_keys import MEMO_MIN_SIZE, _DigestMemo, content_digest
+
+
+def test_non_contiguous_memoryview_matches_its_bytes():
+    data = bytes(range(256)) * 8
+    view = memoryview(data)[::2]
+
+    assert not view.contiguous
+    assert content_digest(view) == content_digest(view.tobytes())
+
+
+def test_memo_keeps_payloads_within_its_byte_budget():
+    memo = _DigestMemo(max_entries=32, max_bytes=4 * MEMO_MIN_SIZE)
+    payloads = [bytes([n]) * MEMO_MIN_SIZE for n in range(8)]
+    for n, payload in enumerate(payloads):
+        memo.put(payload, str(n))
+
+    assert memo.current_bytes <= memo.max_bytes
+    assert len(memo.entries) == 3
+    assert memo.get(payloads[-1]) == '7'
+    assert memo.get(payloads[0]) is None
+
+    memo.put(b'x' * (memo.max_bytes + 1), 'too large')
+    assert len(memo.entries) == 3
@@ -0,0 +1,52 @@
+import pytest
+
+
+@pytest.fixture(scope='module')
+def app_db():
+    from app import app, db
+    from models import ExecutedOpportunity
+
+    with app.app_context():
+        db.create_all()
+        yield db
+        ExecutedOpportunity.query.filter(ExecutedOpportunity.opportunity_id.like('savings_%')).delete(
+            synchronize_session=False
+        )
+        db.session.commit()
+
+
+def save(db, **fields):
+    from models import ExecutedOpportunity
+
+    opportunity = ExecutedOpportunity(opportunity_type='optimization', title='Savings', **fields)
+    db.session.add(opportunity)
+    db.session.commit()
+    return opportunity
+
+
+def test_savings_are_extracted_from_the_prompt(app_db):
+    opportunity = save(app_db, opportunity_id='savings_derived', replit_prompt='achieving $125.50/month savings')
+    assert opportunity.savings_achieved == 125.5
+
+    opportunity.replit_prompt = 'achieving $40/month savings'
+    app_db.session.commit()
+    assert opportunity.savings_achieved == 40.0
+
+
+@pytest.mark.parametrize('fields', [
+    {'replit_prompt': 'achieving $125.50/month savings', 'savings_achieved': 80.0},
+    {'savings_achieved': 80.0, 'replit_prompt': 'achieving $125.50/month savings'},
+])
+def test_explicit_savings_are_kept(app_db, fields):
+    opportunity = save(app_db, opportunity_id='savings_explicit', **fields)
+    assert opportunity.savings_achieved == 80.0
+
+    opportunity.replit_prompt = 'achieving $40/month savings'
+    opportunity.savings_achieved = 55.0
+    app_db.session.commit()
+    assert opportunity.savings_achieved == 55.0
+
+
+def test_prompt_without_savings_records_zero(app_db):
+    assert save(app_db, opportunity_id='savings_none', replit_prompt='no figure here').savings_achieved == 0.0
+    assert save(app_db, opportunity_id='savings_empty').savings_achieved == 0.0
@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import pytest
+
+from services.execution_rollup import ExecutionRollup
+
+
+@pytest.fixture(scope='module')
+def app_db():
+    from app import app, db
+
+    with app.app_context():
+        db.create_all()
+        yield db
+
+
+def add_execution(db, execution_id):
+    from models import AgentExecution
+
+    now = datetime.utcnow()
+    db.session.add(AgentExecution(
+        id=execution_id, agent_key='rollup_test_agent', agent_name='Rollup Test', execution_id=f'rollup-{execution_id}',
+        execution_status='success', execution_time_ms=100, cost_usd=0.01, started_at=now, completed_at=now
+    ))
+    db.session.commit()
+
+
+def total_executions():
+    from models import AgentPerformanceMetrics
+
+    return AgentPerformanceMetrics.query.filter_by(agent_key='rollup_test_agent').one().total_executions
+
+
+def test_rows_committed_out_of_id_order_are_folded_once(app_db):
+    rollup = ExecutionRollup(interval_seconds=0)
+    add_execution(app_db, 1001)
+    add_execution(app_db, 1003)
+    rollup.fold()
+    assert total_executions() == 2
+
+    # 1002 was drawn before 1003 but committed after it was folded
+    add_execution(app_db, 1002)
+    assert rollup.fold() == 1
+    assert total_executions() == 3
+
+    add_execution(app_db, 1004)
+    assert rollup.fold() == 1
+    assert rollup.fold() == 0
+    assert total_executions() == 4
+
+
+def test_unseen_ranges_expire_after_the_gap_window(app_db):
+    from models import SystemSettings
+    from services.execution_rollup import WATERMARK_KEY, _parse_watermark
+
+    rollup = ExecutionRollup(interval_seconds=0, gap_seconds=0)
+    add_execution(app_db, 1010)
+    rollup.fold()
+
+    watermark, gaps = _parse_watermark(SystemSettings.query.filter_by(setting_key=WATERMARK_KEY).one().setting_value)
+    assert watermark == 1010
+    assert gaps == []
@@ -0,0 +1,61 @@
+from datetime import date
+
+from agent_marketplace.rankings import MarketplaceRankings
+
+
+class Agent:
+    pass
+
+
+class Purchase:
+    pass
+
+
+class AgentAnalytics:
+    pass
+
+
+class FakeSession:
+    def __init__(self):
+        self.info = {}
+
+
+def make_rankings():
+    rankings = MarketplaceRankings(None, Agent, Purchase, AgentAnalytics, refresh_seconds=0)
+    rankings.catalog = {1: ('seo', 4.5, True), 2: ('video', 4.0, True), 3: ('finance', 3.5, True)}
+    rankings.built = True
+    return rankings
+
+
+def commit(rankings, changes):
+    session = FakeSession()
+    session.info[rankings._changes_key] = changes
+    rankings._apply_changes(session)
+
+
+def test_purchase_into_new_category_updates_co_purchases():
+    rankings = make_rankings()
+    commit(rankings, [('purchase', 7, 1)])
+    commit(rankings, [('purchase', 7, 2)])
+
+    assert rankings.built
+    assert rankings.co_purchases == {'seo': {'seo': 1, 'video': 1}, 'video': {'video': 1, 'seo': 1}}
+    assert rankings.stats['incremental_updates'] == 2
+
+
+def test_purchase_matches_rebuild_counts_for_several_buyers():
+    rankings = make_rankings()
+    commit(rankings, [('purchase', 7, 1), ('purchase', 7, 2), ('purchase', 7, 3), ('purchase', 8, 3),
+                      ('purchase', 8, 1)])
+
+    assert rankings.co_purchases['seo'] == {'seo': 2, 'video': 1, 'finance': 2}
+    assert rankings.co_purchases['finance'] == {'finance': 2, 'seo': 2, 'video': 1}
+    assert rankings.co_purchases['video'] == {'video': 1, 'seo': 1, 'finance': 1}
+
+
+def test_failed_change_marks_rankings_for_rebuild_instead_of_raising():
+    rankings = make_rankings()
+    rankings.window_start = date(2026, 1, 1)
+    commit(rankings, [('downloads', 1, 'not a date', 3)])
+
+    assert not rankings.built
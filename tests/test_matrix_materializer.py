@@ -0,0 +1,58 @@
+from datetime import datetime
+
+import pytest
+
+from services import matrix_materializer
+from services.matrix_materializer import MaterializedMatrix
+
+
+@pytest.fixture
+def matrix(monkeypatch):
+    from app import app, db
+
+    with app.app_context():
+        db.create_all()
+        matrix = MaterializedMatrix(fingerprint_check_seconds=3600, opportunity_refresh_seconds=3600)
+        monkeypatch.setattr(matrix_materializer, 'materialized_matrix', matrix)
+        yield matrix
+
+
+def add_app(repl_id):
+    from app import db
+    from models import ReplitApp
+
+    db.session.add(ReplitApp(repl_id=repl_id, name=repl_id, url=f'https://{repl_id}.example'))
+    db.session.commit()
+
+
+def app_names(matrix):
+    return {app['name'] for app in matrix.current()[1]['apps']}
+
+
+def test_local_commit_patches_without_rebuild(matrix):
+    add_app('matrix-local-1')
+    app_names(matrix)
+    builds = matrix.stats['full_builds']
+
+    add_app('matrix-local-2')
+    assert 'matrix-local-2' in app_names(matrix)
+    assert matrix.stats['full_builds'] == builds
+
+
+def test_write_alongside_a_local_commit_forces_rebuild(matrix):
+    from app import db
+    from models import ReplitApp
+
+    app_names(matrix)
+    builds = matrix.stats['full_builds']
+
+    # Another process commits between our last read and our own commit
+    with db.engine.begin() as connection:
+        connection.execute(ReplitApp.__table__.insert().values(
+            repl_id='matrix-remote', name='matrix-remote', is_active=True, updated_at=datetime.utcnow()
+        ))
+    add_app('matrix-local-3')
+
+    names = app_names(matrix)
+    assert {'matrix-remote', 'matrix-local-3'} <= names
+    assert matrix.stats['full_builds'] == builds + 1
@@ -0,0 +1,74 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+# Statements each payload issues however many apps and agents exist
+EXPECTED_QUERIES = {'matrix_payload': 3, 'apps_payload': 1, 'agents_payload': 1}
+AGENTS_PER_APP = 4
+
+
+@pytest.fixture(scope='module')
+def app_db():
+    from app import app, db
+    from models import ReplitApp
+
+    with app.app_context():
+        db.create_all()
+        yield db
+        for replit_app in ReplitApp.query.filter(ReplitApp.repl_id.like('querycount-%')):
+            db.session.delete(replit_app)
+        db.session.commit()
+
+
+@contextmanager
+def count_queries(db):
+    counter = {'queries': 0}
+
+    def before_cursor_execute(*args):
+        counter['queries'] += 1
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def seed(db, app_count):
+    from models import AIAgent, AppCredential, ReplitApp
+
+    seeded = ReplitApp.query.filter(ReplitApp.repl_id.like('querycount-%'))
+    for replit_app in seeded.all():
+        db.session.delete(replit_app)
+    db.session.flush()
+    for app_index in range(app_count):
+        replit_app = ReplitApp(repl_id=f'querycount-{app_index}', name=f'App {app_index}', language='python')
+        for agent_index in range(AGENTS_PER_APP):
+            replit_app.ai_agents.append(AIAgent(
+                agent_type=['openai', 'anthropic', 'local'][agent_index % 3],
+                agent_name=f'Agent {agent_index} in app{app_index}.py',
+                cost_estimate=float(agent_index * 5),
+                effectiveness_score=0.4 + agent_index * 0.1,
+                features_used=['imports_openai'],
+                api_endpoints=[]
+            ))
+        replit_app.credentials.append(AppCredential(credential_type='api_key', service_name='openai'))
+        db.session.add(replit_app)
+    db.session.commit()
+    db.session.expunge_all()
+
+
+@pytest.mark.parametrize('payload', sorted(EXPECTED_QUERIES))
+def test_query_count_does_not_grow_with_data(app_db, payload):
+    from services.matrix_read_model import MatrixReadModel
+
+    counts = []
+    for app_count in (5, 60):
+        seed(app_db, app_count)
+        with count_queries(app_db) as counter:
+            getattr(MatrixReadModel(), payload)()
+        app_db.session.expunge_all()
+        counts.append(counter['queries'])
+
+    assert counts == [EXPECTED_QUERIES[payload]] * 2
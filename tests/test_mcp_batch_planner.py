@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from services.mcp_batch_planner import MCPBatchPlanner
+
+
+class RecordService:
+    """Tool backend over one in-memory record; ``get`` reads it, ``update`` writes it"""
+
+    def __init__(self):
+        self.registered_tools = {}
+        self.record = {'x': 'old'}
+        self.calls = []
+
+    async def call_tool(self, tool_name, parameters, session_id=None):
+        self.calls.append(tool_name)
+        await asyncio.sleep(0)
+        if tool_name == 'update':
+            self.record[parameters['key']] = parameters['value']
+            return {'success': True}
+        return {'success': True, 'value': self.record[parameters['key']]}
+
+
+READ_WRITE_READ = [
+    {'id': 'read', 'tool_name': 'get', 'parameters': {'key': 'x'}},
+    {'id': 'write', 'tool_name': 'update', 'parameters': {'key': 'x', 'value': 'new'}, 'depends_on': ['read']},
+    {'id': 'reread', 'tool_name': 'get', 'parameters': {'key': 'x'}, 'depends_on': ['write']},
+]
+
+
+def test_reads_around_a_write_are_not_merged():
+    service = RecordService()
+    planner = MCPBatchPlanner(service)
+
+    plan = planner.plan(READ_WRITE_READ)
+    assert len(plan.calls) == 3
+
+    results = asyncio.run(planner.execute(READ_WRITE_READ))
+    assert service.calls == ['get', 'update', 'get']
+    assert results[0]['value'] == 'old'
+    assert results[2]['value'] == 'new'
+
+
+def test_identical_calls_with_the_same_dependencies_are_merged():
+    service = RecordService()
+    planner = MCPBatchPlanner(service)
+    batch = [
+        {'id': 'a', 'tool_name': 'get', 'parameters': {'key': 'x'}},
+        {'id': 'b', 'tool_name': 'get', 'parameters': {'key': 'x'}},
+        {'id': 'c', 'tool_name': 'update', 'parameters': {'key': 'x', 'value': 'new'}, 'depends_on': ['a']},
+        {'id': 'd', 'tool_name': 'update', 'parameters': {'key': 'x', 'value': 'new'}, 'depends_on': ['b']},
+    ]
+
+    plan = planner.plan(batch)
+    assert [call.indexes for call in plan.calls] == [[0, 1], [2, 3]]
+
+    results = asyncio.run(planner.execute(batch))
+    assert service.calls == ['get', 'update']
+    assert results[0] == results[1]
+
+
+def test_cycles_are_rejected():
+    planner = MCPBatchPlanner(RecordService())
+    with pytest.raises(ValueError, match='cycle'):
+        planner.plan([
+            {'id': 'a', 'tool_name': 'get', 'parameters': {}, 'depends_on': ['b']},
+            {'id': 'b', 'tool_name': 'get', 'parameters': {'key': 'y'}, 'depends_on': ['a']},
+        ])
@@ -0,0 +1,183 @@
+import asyncio
+import contextlib
+import os
+import signal
+import sys
+import time
+
+import pytest
+
+pytest.importorskip('aiohttp')
+pytest.importorskip('websockets')
+
+from aiohttp import ClientResponseError, web  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from mcp_echo_server import EchoServer, build_app  # noqa: E402
+from services.mcp_integration_service import MCPIntegrationService, MCPTool, MCPTransport  # noqa: E402
+from services.mcp_transports import HTTPTransport, MCPTransportBase  # noqa: E402
+
+ECHO_SCRIPT = os.path.join(os.path.dirname(__file__), '..', 'scripts', 'mcp_echo_server.py')
+CALLS = 20
+
+
+class RecordingTransport(MCPTransportBase):
+    """Keeps every message sent and answers requests from the event loop"""
+
+    def __init__(self):
+        super().__init__('recording://', timeout=5)
+        self.sent = []
+
+    async def _connect(self):
+        pass
+
+    async def _send(self, message):
+        self.sent.append(message)
+        if 'method' in message and 'id' in message:
+            reply = {'jsonrpc': '2.0', 'id': message['id'], 'result': {'params': message['params']}}
+            asyncio.get_running_loop().call_soon(self._dispatch, reply)
+
+
+@contextlib.asynccontextmanager
+async def echo_app():
+    server = EchoServer(0.0)
+    runner = web.AppRunner(build_app(server))
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    try:
+        yield server, site._server.sockets[0].getsockname()[1]
+    finally:
+        await runner.cleanup()
+
+
+def reversed_delays():
+    # Later calls finish first, so responses arrive in the opposite order to the requests
+    return [{'i': i, 'delay': (CALLS - i) * 0.005} for i in range(CALLS)]
+
+
+def structured(results):
+    return [result['result']['structuredContent'] for result in results]
+
+
+def echo_service(transport, endpoint):
+    service = MCPIntegrationService()
+    service.register_tool(MCPTool(name='echo', description='Local echo server', input_schema={'type': 'object'},
+                                  transport=transport, endpoint=endpoint))
+    return service
+
+
+def test_base_transport_is_abstract():
+    with pytest.raises(TypeError):
+        MCPTransportBase('recording://')
+
+
+def test_concurrent_first_requests_share_one_handshake():
+    async def run():
+        transport = RecordingTransport()
+        results = await asyncio.gather(*(transport.request('tools/call', {'i': i}) for i in range(5)))
+        return transport, results
+
+    transport, results = asyncio.run(run())
+
+    assert [message['method'] for message in transport.sent] == \
+        ['initialize', 'notifications/initialized'] + ['tools/call'] * 5
+    assert transport.sent[0]['params']['protocolVersion']
+    assert [result['params']['i'] for result in results] == list(range(5))
+    assert transport.stats['connects'] == 1
+
+
+def test_server_pings_are_answered():
+    async def run():
+        transport = RecordingTransport()
+        transport._dispatch({'jsonrpc': '2.0', 'id': 'server-1', 'method': 'ping'})
+        transport._dispatch({'jsonrpc': '2.0', 'id': 'server-2', 'method': 'sampling/createMessage'})
+        transport._dispatch({'jsonrpc': '2.0', 'method': 'notifications/progress'})
+        await asyncio.sleep(0.01)
+        return transport.sent
+
+    ping, unsupported = asyncio.run(run())
+
+    assert ping == {'jsonrpc': '2.0', 'id': 'server-1', 'result': {}}
+    assert (unsupported['id'], unsupported['error']['code']) == ('server-2', -32601)
+
+
+def test_http_responses_match_requests_and_expired_sessions_reinitialize():
+    async def run():
+        async with echo_app() as (server, port):
+            transport = HTTPTransport(f'http://127.0.0.1:{port}/mcp', timeout=5)
+            try:
+                arguments = reversed_delays()
+                results = await asyncio.gather(*(
+                    transport.request('tools/call', {'name': 'echo', 'arguments': args}) for args in arguments
+                ))
+                assert [result['structuredContent']['arguments'] for result in results] == arguments
+                assert transport.stats['connects'] == 1
+                assert server.requests == CALLS + 1
+                first_session = transport.session_id
+
+                server.forget_sessions()
+                with pytest.raises(ClientResponseError) as error:
+                    await transport.request('tools/call', {'name': 'echo', 'arguments': {}})
+                assert error.value.status == 404
+                assert not transport._connected
+
+                result = await transport.request('tools/call', {'name': 'echo', 'arguments': {'again': True}})
+                assert result['structuredContent']['arguments'] == {'again': True}
+                assert transport.stats['connects'] == 2
+                assert transport.session_id not in (None, first_session)
+            finally:
+                await transport.close()
+
+    asyncio.run(run())
+
+
+def test_websocket_calls_share_one_connection():
+    async def run():
+        async with echo_app() as (server, port):
+            service = echo_service(MCPTransport.WEBSOCKET, f'ws://127.0.0.1:{port}/mcp')
+            try:
+                arguments = reversed_delays()
+                results = await asyncio.gather(*(service.call_tool('echo', args) for args in arguments))
+                stats = service.get_connection_stats()
+            finally:
+                # The server shares this loop, so close from a worker thread to let it answer
+                await asyncio.get_running_loop().run_in_executor(None, service.close)
+        return arguments, results, stats
+
+    arguments, results, stats = asyncio.run(run())
+
+    assert all(result['success'] for result in results)
+    assert [content['arguments'] for content in structured(results)] == arguments
+    assert len({content['connection'] for content in structured(results)}) == 1
+    assert [value['connects'] for value in stats.values()] == [1]
+
+
+def test_stdio_calls_share_one_process_which_is_restarted_after_it_dies():
+    endpoint = f'{sys.executable} {ECHO_SCRIPT}'
+    service = echo_service(MCPTransport.STDIO, endpoint)
+
+    async def batch(arguments):
+        return await asyncio.gather(*(service.call_tool('echo', args) for args in arguments))
+
+    try:
+        arguments = reversed_delays()
+        results = asyncio.run(batch(arguments))
+        assert all(result['success'] for result in results)
+        assert [content['arguments'] for content in structured(results)] == arguments
+        pids = {content['pid'] for content in structured(results)}
+        assert len(pids) == 1
+
+        os.kill(pids.pop(), signal.SIGKILL)
+        deadline = time.monotonic() + 5
+        while service.get_connection_stats()[f'stdio:{endpoint}']['connected']:
+            assert time.monotonic() < deadline, 'transport did not notice the process exit'
+            time.sleep(0.01)
+
+        restarted = asyncio.run(batch([{'after': 'restart'}]))
+        assert restarted[0]['success']
+        assert structured(restarted)[0]['pid'] not in {content['pid'] for content in structured(results)}
+        assert service.get_connection_stats()[f'stdio:{endpoint}']['connects'] == 2
+    finally:
+        service.close()
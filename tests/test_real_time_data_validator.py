@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('aiohttp')
+pytest.importorskip('yfinance')
+pytest.importorskip('selenium')
+
+from services.ai_cache_backends import MISS  # noqa: E402
+from services.real_time_data_validator import RealTimeDataValidator  # noqa: E402
+
+
+class FailingBulkPool:
+    """Source pool whose multi-id CoinGecko calls fail and single-id calls succeed"""
+
+    def __init__(self):
+        self.coingecko_calls = []
+
+    async def get_json(self, source, url, params=None):
+        if source != 'coingecko':
+            return 404, {}
+        ids = params['ids'].split(',')
+        self.coingecko_calls.append(ids)
+        if len(ids) > 1:
+            return 503, {}
+        return 200, {ids[0]: {'usd': 10.0}}
+
+    async def run_browser(self, source, scrape):
+        return None
+
+
+def test_symbols_of_a_failed_chunk_are_fetched_one_by_one():
+    pool = FailingBulkPool()
+    validator = RealTimeDataValidator(source_pool=pool)
+
+    async def run():
+        failed = await validator._prefetch_coingecko(['BTC', 'ETH'])
+        quotes = await validator._crypto_quotes('BTC', {'coingecko': failed, 'binance': [], 'kraken': []})
+        return failed, quotes
+
+    failed, quotes = asyncio.run(run())
+    assert failed == ['BTC', 'ETH']
+    assert quotes[0] == {'price': 10.0, 'market_cap': 0, 'volume_24h': 0, 'change_24h': 0}
+    assert pool.coingecko_calls == [['btc', 'eth'], ['btc']]
+
+
+def test_empty_quotes_expire_after_the_negative_ttl():
+    validator = RealTimeDataValidator(source_pool=FailingBulkPool())
+    validator.negative_quote_ttl = 0
+
+    validator._store_quote('coingecko', 'NOPE', {})
+    validator._store_quote('coingecko', 'BTC', {'price': 10.0})
+    assert validator._lookup_quote('coingecko', 'NOPE') is MISS
+    assert validator._lookup_quote('coingecko', 'BTC') == {'price': 10.0}
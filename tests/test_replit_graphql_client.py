@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from replit_graphql_stub import StubGraphQL, serve  # noqa: E402
+from services.replit_graphql_client import GraphQLError, ReplitGraphQLClient  # noqa: E402
+
+
+@pytest.fixture
+def stub():
+    stub = StubGraphQL(repls=40, delay=0.05)
+    server, stub.url = serve(stub)
+    yield stub
+    server.shutdown()
+
+
+def make_client(stub, **options):
+    options = dict({'requests_per_second': 0, 'backoff_base': 0.01}, **options)
+    return ReplitGraphQLClient(stub.url, {'Authorization': 'Bearer test'}, **options)
+
+
+def test_repl_files_are_batched_and_fetched_concurrently(stub):
+    client = make_client(stub, max_workers=4, batch_size=5)
+
+    started = time.perf_counter()
+    files = client.fetch_repl_files(stub.repl_ids)
+    elapsed = time.perf_counter() - started
+
+    assert files == {repl_id: stub.files(repl_id) for repl_id in stub.repl_ids}
+    assert stub.requests == 8
+    assert stub.repls_per_request == [5] * 8
+    assert stub.peak_in_flight == 4
+    # Two rounds of four concurrent requests, not eight in a row
+    assert elapsed < 6 * stub.delay
+
+
+def test_retryable_statuses_are_retried_with_backoff(stub):
+    client = make_client(stub)
+    stub.fail_next(2, status=503)
+
+    data = client.execute('query GetReplFiles($replId: String!) { repl(id: $replId) { files } }',
+                          {'replId': 'repl-1'})
+
+    assert data['data']['repl']['files']['items'] == stub.files('repl-1')
+    assert stub.requests == 3
+    assert client.stats == {'requests': 3, 'retries': 2, 'failures': 0}
+
+
+def test_retry_after_is_honoured(stub):
+    client = make_client(stub)
+    stub.fail_next(1, status=429, retry_after=1)
+
+    client.execute('query GetUserRepls { currentUser { repls } }')
+
+    assert stub.request_times[1] - stub.request_times[0] >= 1
+
+
+def test_failed_batches_map_to_empty_lists(stub):
+    client = make_client(stub, batch_size=20, max_retries=1)
+    stub.fail_next(2, status=503)
+    stub.delay = 0
+
+    files = client.fetch_repl_files(stub.repl_ids[:20])
+
+    assert files == {repl_id: [] for repl_id in stub.repl_ids[:20]}
+    assert client.stats['failures'] == 1
+
+
+def test_non_retryable_status_fails_without_retrying(stub):
+    client = make_client(stub)
+    stub.fail_next(1, status=400)
+
+    with pytest.raises(GraphQLError):
+        client.execute('query GetUserRepls { currentUser { repls } }')
+    assert stub.requests == 1
+
+
+def test_requests_are_rate_limited_per_host(stub):
+    client = make_client(stub, requests_per_second=20, max_workers=1)
+    stub.delay = 0
+
+    for _ in range(6):
+        client.execute('query GetUserRepls { currentUser { repls } }')
+
+    # One request from the burst, then one every 50ms
+    assert stub.request_times[-1] - stub.request_times[0] >= 0.2
+
+
+def test_discovery_run_reports_wall_clock(stub, monkeypatch):
+    from app import app, db
+    from services.replit_service import ReplitService
+
+    monkeypatch.setenv('REPLIT_TOKEN', 'test')
+    monkeypatch.setenv('REPLIT_GRAPHQL_URL', stub.url)
+    with app.app_context():
+        db.create_all()
+        service = ReplitService()
+
+        assert service.discover_apps() == len(stub.repl_ids)
+        stats = service.last_run_stats
+        assert stats['operation'] == 'discover_apps'
+        assert stats['requests'] == 1
+        assert stats['wall_clock_seconds'] >= stub.delay
@@ -0,0 +1,67 @@
+import base64
+import json
+
+import pytest
+
+from agent_marketplace.search_index import decode_cursor, encode_cursor
+
+
+def raw_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+def test_issued_cursors_round_trip():
+    assert decode_cursor(encode_cursor((4.5, 120, 7)), 3) == [4.5, 120, 7]
+    assert decode_cursor(encode_cursor((1.25, 9)), 2) == [1.25, 9]
+    assert decode_cursor(None, 3) is None
+
+
+@pytest.mark.parametrize('cursor', [
+    encode_cursor((1.25, 9)),             # a ranked query cursor sent to a listing
+    encode_cursor((4.5, 120, 7, 1)),
+    raw_cursor({'rating': 4.5}),
+    raw_cursor(17),
+    raw_cursor(['high', 120, 7]),
+    raw_cursor([4.5, 120, None]),
+    raw_cursor([4.5, 120, 'NaN']),
+    'not-base64!',
+])
+def test_wrong_shape_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 3)
+
+
+def test_missing_search_vector_falls_back_to_the_in_process_index():
+    from flask import Flask
+    from flask_sqlalchemy import SQLAlchemy
+
+    from agent_marketplace.search_index import AgentSearchIndex
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db = SQLAlchemy(app)
+
+    class Agent(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        name = db.Column(db.String(200))
+        description = db.Column(db.Text)
+        is_active = db.Column(db.Boolean, default=True)
+        is_verified = db.Column(db.Boolean, default=True)
+        category = db.Column(db.String(50))
+        industry = db.Column(db.String(50))
+        price = db.Column(db.Float)
+        rating = db.Column(db.Float)
+        download_count = db.Column(db.Integer)
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(Agent(name='Quasar SEO', description='Search engine helper'))
+        db.session.commit()
+
+        index = AgentSearchIndex(db, Agent, backend='tsvector')
+        index.setup()
+
+        # The column comes from a migration; setup only looks for it and adds nothing
+        assert 'search_vector' not in {column['name'] for column in db.inspect(db.engine).get_columns('agent')}
+        assert index.backend == 'python'
+        assert [agent.name for agent in index.search('quasar').agents] == ['Quasar SEO']
@@ -0,0 +1,43 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.shared_ai_service import SharedAICache, SharedAnalysisService, SharedTextProcessor
+
+
+def test_concurrent_misses_compute_once():
+    cache = SharedAICache(l2_backend='none')
+    processor = SharedTextProcessor(cache)
+    release = threading.Event()
+    calls = []
+    extract = cache.get_or_compute
+
+    def slow_get_or_compute(service, method, params, compute, **kwargs):
+        def gated():
+            calls.append(method)
+            release.wait(5)
+            return compute()
+        return extract(service, method, params, gated, **kwargs)
+
+    cache.get_or_compute = slow_get_or_compute
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(processor.extract_text, 'same document') for _ in range(8)]
+        deadline = time.monotonic() + 2
+        while cache.get_stats()['coalesced'] < 7 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == ['same document'] * 8
+    assert calls == ['extract_text']
+    assert processor.extract_text('same document') == 'same document'
+    assert calls == ['extract_text']
+
+
+def test_empty_results_are_served_from_cache():
+    cache = SharedAICache(l2_backend='none')
+    analysis = SharedAnalysisService(cache)
+
+    assert analysis.extract_key_insights('nothing notable', 'financial') == []
+    assert analysis.extract_key_insights('nothing notable', 'financial') == []
+    assert cache.get_stats()['hits'] == 1
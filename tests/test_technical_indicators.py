@@ -0,0 +1,56 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+
+from services.technical_indicators import IndicatorStreams, PriceStream, RollingMean  # noqa: E402
+
+
+def make_stream():
+    return PriceStream(price_indicators={'ma_2': RollingMean(2)})
+
+
+def test_least_recently_used_stream_is_dropped():
+    streams = IndicatorStreams(make_stream, max_streams=2)
+    streams.update('a', 1.0)
+    streams.update('b', 1.0)
+    streams.update('a', 3.0)
+    streams.update('c', 1.0)
+
+    assert list(streams.streams) == ['a', 'c']
+    assert streams.update('a', 5.0)['ma_2'] == 4.0
+
+
+def test_dropped_stream_replays_on_sync():
+    streams = IndicatorStreams(make_stream, max_streams=1)
+    streams.sync('a', [1.0, 2.0, 3.0])
+    streams.sync('b', [1.0])
+
+    assert streams.sync('a', [1.0, 2.0, 3.0, 5.0])['ma_2'] == 4.0
+
+
+def test_event_backtest_leaves_no_streams_behind():
+    from services.algorithmic_trading_developer import (
+        AlgorithmicTradingDeveloper, TradingAlgorithm, TradingStrategy
+    )
+
+    developer = AlgorithmicTradingDeveloper()
+    assets = ['ASSET000', 'ASSET001']
+    algorithm = TradingAlgorithm(
+        algorithm_id='streams_test', strategy_type=TradingStrategy.MOMENTUM, asset_universe=assets,
+        parameters={}, entry_conditions=[], exit_conditions=[], risk_limits={'max_position_size': 0.05},
+        position_sizing='fixed_fractional', execution_logic='market', backtesting_results={},
+        live_performance={}, optimization_history=[], last_updated=datetime.now()
+    )
+
+    async def run():
+        data = await developer._prepare_backtesting_data(
+            {'start_date': datetime(2015, 1, 1), 'end_date': datetime(2015, 4, 1)}, assets
+        )
+        return await developer._simulate_strategy_execution(algorithm, data, engine='event')
+
+    asyncio.run(run())
+    assert not developer.indicator_streams.streams